@@ -1,188 +1,887 @@
-from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
+from datetime import date
+from itertools import chain, islice
+import json
+import time
+from typing import Iterator
+
+if __name__ == '__main__':
+    # Load the .env file before the modules below read their settings. Importing
+    # this module (tests, the pre-fork server) leaves the environment alone.
+    from dotenv import load_dotenv
+    load_dotenv()
+
+from flask import Flask, g, jsonify, make_response, Response, request
+from flask.logging import default_handler
 # from flask_cors import CORS
 
-from event_tracker.models import calendar_model
+from event_tracker.models import archive_model, calendar_model, holiday_model, stats_model
+from event_tracker.utils.import_utils import iter_csv, iter_json_array, iter_ndjson, spool
+from event_tracker.utils.logger import configure_logger
+from event_tracker.utils.metrics import METRICS_ENABLED, REGISTRY, render_metrics
+from event_tracker.utils.recurrence import RecurrenceRule
 from event_tracker.utils.sql_utils import check_database_connection, check_table_exists
 
 
-# Load environment variables from .env file
-load_dotenv()
+def _stream_ndjson(events: Iterator[dict]) -> Iterator[str]:
+    for event in events:
+        yield json.dumps(event) + '\n'
 
-app = Flask(__name__)
-# This bypasses standard security stuff we'll talk about later
-# If you get errors that use words like cross origin or flight,
-# uncomment this
-# CORS(app)
+def _stream_json(events: Iterator[dict]) -> Iterator[str]:
+    yield '{"status": "success", "events": ['
+    separator = ''
+    for event in events:
+        yield separator + json.dumps(event)
+        separator = ', '
+    yield ']}'
 
+STREAM_FORMATS = {'ndjson': _stream_ndjson, 'json': _stream_json}
 
-####################################################
-#
-# Healthchecks
-#
-####################################################
+_request_seconds = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Time taken to handle HTTP requests.', ('method', 'route', 'status'))
 
 
-@app.route('/api/health', methods=['GET'])
-def healthcheck() -> Response:
+def create_app() -> Flask:
     """
-    Health check route to verify the service is running.
+    Creates the Flask application and registers its routes.
 
     Returns:
-        JSON response indicating the health status of the service.
+        Flask: The application, ready to be served by any WSGI server.
     """
-    app.logger.info('Health check')
-    return make_response(jsonify({'status': 'healthy'}), 200)
+    app = Flask(__name__)
+    # Log through the shared queue like the rest of the package, not Flask's own stderr handler
+    app.logger.removeHandler(default_handler)
+    configure_logger(app.logger)
+    # This bypasses standard security stuff we'll talk about later
+    # If you get errors that use words like cross origin or flight,
+    # uncomment this
+    # CORS(app)
 
-@app.route('/api/db-check', methods=['GET'])
-def db_check() -> Response:
-    """
-    Route to check if the database connection and events table are functional.
+    if METRICS_ENABLED:
+        @app.before_request
+        def start_timer():
+            g.request_started = time.perf_counter()
 
-    Returns:
-        JSON response indicating the database health status.
-    Raises:
-        404 error if there is an issue with the database.
-    """
-    try:
-        app.logger.info("Checking database connection...")
-        check_database_connection()
-        app.logger.info("Database connection is OK.")
-        app.logger.info("Checking if events table exists...")
-        check_table_exists("events")
-        app.logger.info("events table exists.")
-        return make_response(jsonify({'database_status': 'healthy'}), 200)
-    except Exception as e:
-        return make_response(jsonify({'error': str(e)}), 404)
-
-##########################################################
-#
-# Events
-#
-##########################################################
-
-@app.route('/api/create-event', methods=['POST'])
-def add_event() -> Response:
-    """
-    Route to add a new event to the database.
+        @app.after_request
+        def record_request_duration(response: Response) -> Response:
+            # Label by the route pattern, e.g. /api/get-event-by-id/<int:id>, not the raw path
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            started = g.get('request_started')
+            if started is not None:
+                _request_seconds.observe(time.perf_counter() - started, request.method, route, response.status_code)
+            return response
 
-    Expected JSON Input:
-        - event_day (int): The day of the event.
-        - event_month (int): The month of the event.
-        - event_year (int): The year of the event.
-        - event_name (str): The name of the event.
-        - is_religious (bool): Whether the event is religious.
 
-    Returns:
-        JSON response indicating the success of the event addition.
-    Raises:
-        400 error if input validation fails.
-        500 error if there is an issue adding the event to the database.
-    """
+    ####################################################
+    #
+    # Healthchecks
+    #
+    ####################################################
+
+
+    @app.route('/api/health', methods=['GET'])
+    def healthcheck() -> Response:
+        """
+        Health check route to verify the service is running.
+
+        Returns:
+            JSON response indicating the health status of the service.
+        """
+        app.logger.info('Health check')
+        return make_response(jsonify({'status': 'healthy'}), 200)
+
+    @app.route('/api/db-check', methods=['GET'])
+    def db_check() -> Response:
+        """
+        Route to check if the database connection and events table are functional.
+
+        Returns:
+            JSON response indicating the database health status.
+        Raises:
+            404 error if there is an issue with the database.
+        """
+        try:
+            app.logger.info("Checking database connection...")
+            check_database_connection()
+            app.logger.info("Database connection is OK.")
+            app.logger.info("Checking if events table exists...")
+            check_table_exists("events")
+            app.logger.info("events table exists.")
+            return make_response(jsonify({'database_status': 'healthy'}), 200)
+        except Exception as e:
+            return make_response(jsonify({'error': str(e)}), 404)
+
+    @app.route('/api/metrics', methods=['GET'])
+    def get_metrics() -> Response:
+        """
+        Route to get the service metrics in the Prometheus text format.
+
+        Includes request latency per route, model function and SQL statement timings,
+        and cache, connection pool and write queue counters. With METRICS_DIR set, the
+        counters and histograms are summed over every worker process.
+
+        Returns:
+            Plain text response in the Prometheus exposition format.
+        """
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    ##########################################################
+    #
+    # Events
+    #
+    ##########################################################
+
+    @app.route('/api/create-event', methods=['POST'])
+    def add_event() -> Response:
+        """
+        Route to add a new event to the database.
+
+        Expected JSON Input:
+            - event_day (int): The day of the event.
+            - event_month (int): The month of the event.
+            - event_year (int): The year of the event.
+            - event_name (str): The name of the event.
+            - is_religious (bool): Whether the event is religious.
+            - recurrence (dict, optional): How the event repeats from its date, e.g.
+              {"frequency": "nth_weekday", "weekday": 3, "nth": 4}. See RecurrenceRule.
+
+        Returns:
+            JSON response indicating the success of the event addition.
+        Raises:
+            400 error if input validation fails.
+            500 error if there is an issue adding the event to the database.
+        """
+
+        app.logger.info('Creating new event')
+        try:
+            # Get the JSON data from the request
+            data = request.get_json()
+
+            # Extract and validate required fields
+            event_name = data.get('event_name')
+            event_day = data.get('event_day')
+            event_month = data.get('event_month')
+            event_year = data.get('event_year')
+            is_religious = data.get('is_religious')
+
+            if event_day is None or event_month is None or event_year is None or not event_name or is_religious is None:
+                return make_response(jsonify({'error': 'Invalid input, all fields are required with valid values'}), 400)
+
+            # Check that the dates are valid
+            try:
+                day = int(event_day)
+                if not isinstance(day, int) or day <= 0:
+                    raise ValueError("Event_day must have a positive value.")
+            except ValueError as e:
+                return make_response(jsonify({'error': 'Day must be a valid int less than 31.'}), 400)
+
+            try:
+                month = int(event_month)
+                if not isinstance(month, int) or month <= 0:
+                    raise ValueError("Event_month must have a positive value.")
+            except ValueError as e:
+                return make_response(jsonify({'error': 'Month must be a valid int less than 13.'}), 400)
+
+            recurrence = data.get('recurrence')
+            if recurrence is not None:
+                try:
+                    recurrence = RecurrenceRule.from_dict(recurrence)
+                except ValueError as e:
+                    return make_response(jsonify({'error': str(e)}), 400)
+
+            # Call the celndar_model function to add the combatant to the database
+            app.logger.info('Adding event: %s, %d, %d, %d, %s', event_name, event_day, event_month, event_year, str(is_religious))
+            calendar_model.add_event(event_day=day, event_month=month, event_year=event_year,
+                                     event_name=event_name, is_religious=is_religious, recurrence=recurrence)
+
+            app.logger.info("Event added: %s", event_name)
+            return make_response(jsonify({'status': 'success', 'event': event_name}), 201)
+        except Exception as e:
+            app.logger.error("Failed to add event: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/events/bulk', methods=['POST'])
+    def add_events_bulk() -> Response:
+        """
+        Route to add many events in one request and one transaction.
+
+        The body is read to the end before the transaction starts, buffered on disk
+        past BULK_SPOOL_SIZE bytes, and then parsed incrementally while it is inserted.
+        Accepted formats:
+            - application/json: a JSON array of event objects.
+            - application/x-ndjson: one JSON event object per line.
+            - text/csv: a header row naming the fields, then one event per row.
+            - multipart/form-data: a CSV upload in the 'file' field.
+        Each event has the same fields as /api/create-event.
+
+        Query Parameters:
+            - batch_size (int, optional): Rows inserted per batch.
+
+        Returns:
+            JSON response with the number of events added and the rows that were skipped.
+        Raises:
+            400 error if the body cannot be parsed (nothing is added).
+            415 error if the content type is not supported.
+            500 error if there is an issue adding the events to the database.
+        """
+        content_type = request.mimetype
+        parsers = {
+            'application/json': iter_json_array,
+            'application/x-ndjson': iter_ndjson,
+            'application/jsonl': iter_ndjson,
+            'text/csv': iter_csv,
+        }
+        if content_type in parsers:
+            stream, parse = request.stream, parsers[content_type]
+        elif content_type == 'multipart/form-data' and 'file' in request.files:
+            stream, parse = request.files['file'].stream, iter_csv
+        else:
+            return make_response(jsonify({'error': f"Unsupported content type: {content_type or 'none'}"}), 415)
+
+        try:
+            batch_size = int(request.args.get('batch_size', calendar_model.BULK_INSERT_BATCH_SIZE))
+        except ValueError:
+            return make_response(jsonify({'error': 'batch_size must be an integer'}), 400)
+
+        # The upload is buffered before the import starts, so a slow client never
+        # holds a write transaction open
+        with spool(stream) as body:
+            try:
+                app.logger.info("Importing events from %s body", content_type)
+                result = calendar_model.add_events_bulk(parse(body), batch_size=batch_size)
+            except ValueError as e:
+                app.logger.error("Rejected bulk import: %s", str(e))
+                return make_response(jsonify({'error': str(e)}), 400)
+            except Exception as e:
+                app.logger.error("Failed to import events: %s", str(e))
+                return make_response(jsonify({'error': str(e)}), 500)
+
+        app.logger.info("Imported %d events, skipped %d", result['inserted'], len(result['errors']))
+        return make_response(jsonify({'status': 'success', **result}), 200)
+
+    @app.route('/api/delete-event/<int:id>', methods=['DELETE'])
+    def delete_event(id: int) -> Response:
+        """
+        Route to delete an event by its ID. This performs a soft delete by marking it as deleted.
+
+        Path Parameter:
+            - id (int): The ID of the event to delete.
+
+        Returns:
+            JSON response indicating success of the operation or error message.
+        """
+        try:
+            app.logger.info("Deleting event by ID: %s", id)
+
+            calendar_model.delete_event(id)
+            return make_response(jsonify({'status': 'event deleted'}), 200)
+        except Exception as e:
+            app.logger.error("Error deleting event: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+
+    @app.route('/api/get-event-by-id/<int:id>', methods=['GET'])
+    def get_event_by_id(id: int) -> Response:
+        """
+        Route to get an event by its ID.
+
+        Path Parameter:
+            - id (int): The ID of the event.
+
+        Returns:
+            JSON response with the event details or error message.
+        """
+        try:
+            app.logger.info("Retrieving event by ID: %s", id)
+
+            event = calendar_model.get_event_by_id(id)
+            return make_response(jsonify({'status': 'success', 'event': event}), 200)
+        except Exception as e:
+            app.logger.error("Error retrieving event by ID: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/events/batch', methods=['GET', 'POST'])
+    def get_events_by_ids() -> Response:
+        """
+        Route to get many events by ID in one request.
+
+        Query Parameters (GET):
+            - ids (str): Comma-separated event IDs, e.g. 1,2,3.
+        Request Body (POST):
+            - ids (list[int]): The event IDs, for lists too long for a URL.
+
+        Returns:
+            JSON response with one entry per ID, in order, saying whether it was found.
+        Raises:
+            400 error if the IDs are missing, not integers or more than MAX_BATCH_SIZE.
+            500 error if there is an issue retrieving the events.
+        """
+        if request.method == 'POST':
+            data = request.get_json(silent=True)
+            ids = data.get('ids') if isinstance(data, dict) else None
+            if not isinstance(ids, list):
+                return make_response(jsonify({'error': "Expected a JSON object with an 'ids' list."}), 400)
+        else:
+            try:
+                ids = [int(part) for part in request.args.get('ids', '').split(',') if part.strip()]
+            except ValueError:
+                return make_response(jsonify({'error': "ids must be comma-separated integers"}), 400)
+
+        try:
+            app.logger.info("Retrieving %d events by ID", len(ids))
+            entries = calendar_model.get_events_by_ids(ids)
+            return make_response(jsonify({'status': 'success', 'events': entries}), 200)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error("Error retrieving events by ID: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    ##########################################################
+    #
+    # Events Data
+    #
+    ##########################################################
+
+    @app.route('/api/get-events', methods=['GET'])
+    def get_events() -> Response:
+        """
+        Route to get the a list of all events.
+
+        Query Parameters (all optional):
+            - limit (int): Return a single page of at most this many events, ordered by ID.
+            - after (int): With limit, only return events with an ID greater than this.
+              Pass the 'next_after' value of the previous page to get the next one.
+            - stream (str): 'ndjson' streams one event per line, 'json' streams the usual
+              response body in chunks. Either way the events are never held in memory at once.
+            - format (str): 'columnar' returns the full list as an object mapping each field
+              to a list of values, e.g. {"id": [1, 2], "event_name": ["Easter", "Diwali"], ...}.
+
+        Without query parameters the response carries an ETag, and a request whose
+        If-None-Match matches it gets an empty 304 response.
+
+        Returns:
+            JSON response with a sorted leaderboard of events.
+        Raises:
+            400 error if the query parameters are invalid.
+            500 error if there is an issue generating the leaderboard.
+        """
+        stream = request.args.get('stream')
+        limit = request.args.get('limit')
+        orient = 'columns' if request.args.get('format') == 'columnar' else 'records'
+        if stream is not None and stream not in STREAM_FORMATS:
+            return make_response(jsonify({'error': f"stream must be one of {', '.join(STREAM_FORMATS)}"}), 400)
+        if stream is not None and limit is not None:
+            return make_response(jsonify({'error': 'stream and limit cannot be combined'}), 400)
+
+        try:
+            if stream is not None:
+                app.logger.info("Streaming list of events as %s", stream)
+                events = calendar_model.iter_events()
+                # Read the first page up front so database errors still produce a 500
+                first = list(islice(events, 1))
+                return Response(STREAM_FORMATS[stream](chain(first, events)),
+                                mimetype='application/x-ndjson' if stream == 'ndjson' else 'application/json')
+
+            if limit is not None:
+                try:
+                    limit = int(limit)
+                    after = int(request.args.get('after', 0))
+                except ValueError:
+                    return make_response(jsonify({'error': 'limit and after must be integers'}), 400)
+
+                app.logger.info("Generating page of events after ID %d", after)
+                try:
+                    events_data, next_after = calendar_model.get_events_page(limit, after)
+                except ValueError as e:
+                    return make_response(jsonify({'error': str(e)}), 400)
+
+                return make_response(jsonify({'status': 'success', 'events': events_data, 'next_after': next_after}), 200)
+
+            app.logger.info("Generating list of events")
+
+            events_data, etag = calendar_model.get_events_with_etag()
+            if etag is not None and orient != 'records':
+                etag = f"{etag}-{orient}"
+
+            # The client already has this exact list
+            if etag is not None and request.if_none_match.contains(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                return response
+
+            # The cached columns serialize themselves once, so unchanged lists skip jsonify
+            body = '{"status": "success", "events": %s}' % events_data.to_json(orient)
+            response = Response(body, status=200, mimetype='application/json')
+            if etag is not None:
+                response.set_etag(etag)
+            return response
+        except Exception as e:
+            app.logger.error("Error generating events data: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/events', methods=['GET'])
+    def get_events_between() -> Response:
+        """
+        Route to get the events that fall within a date range, ordered by date.
+
+        Query Parameters:
+            - from (str): The first date of the range, as YYYY-MM-DD.
+            - to (str): The last date of the range, as YYYY-MM-DD.
+
+        Returns:
+            JSON response with the events in the range.
+        Raises:
+            400 error if either date is missing or invalid.
+            500 error if there is an issue retrieving the events.
+        """
+        try:
+            start = date.fromisoformat(request.args.get('from', ''))
+            end = date.fromisoformat(request.args.get('to', ''))
+        except ValueError:
+            return make_response(jsonify({'error': "Query parameters 'from' and 'to' must be dates formatted as YYYY-MM-DD."}), 400)
+
+        if start > end:
+            return make_response(jsonify({'error': "'from' must not be after 'to'."}), 400)
+
+        try:
+            app.logger.info("Retrieving events between %s and %s", start, end)
+
+            events_data = calendar_model.get_events_between(start, end)
+
+            return make_response(jsonify({'status': 'success', 'events': events_data}), 200)
+        except Exception as e:
+            app.logger.error("Error retrieving events between %s and %s: %s", start, end, str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+
+    @app.route('/api/events/distances', methods=['GET'])
+    def get_event_distances() -> Response:
+        """
+        Route to get the number of days from a date to the live events.
 
-    app.logger.info('Creating new event')
-    try:
-        # Get the JSON data from the request
-        data = request.get_json()
+        Query Parameters:
+            - from (str, optional): The reference date, as YYYY-MM-DD. Defaults to today.
+            - k (int, optional): Only return the k nearest events on or after the reference date.
 
-        # Extract and validate required fields
-        event_name = data.get('event_name')
-        event_day = data.get('event_day')
-        event_month = data.get('event_month')
-        event_year = data.get('event_year')
-        is_religious = data.get('is_religious')
+        Returns:
+            JSON response with, if k is given, the nearest upcoming events and their 'days_until';
+            otherwise parallel 'ids' and 'days' lists covering every live event.
+        Raises:
+            400 error if the parameters are invalid.
+            500 error if there is an issue computing the distances.
+        """
+        try:
+            reference = date.fromisoformat(request.args['from']) if 'from' in request.args else date.today()
+            k = int(request.args['k']) if 'k' in request.args else None
+        except ValueError:
+            return make_response(jsonify({'error': "from must be a YYYY-MM-DD date and k an integer"}), 400)
+        if k is not None and k <= 0:
+            return make_response(jsonify({'error': "k must be a positive integer"}), 400)
+
+        try:
+            app.logger.info("Computing event distances from %s", reference)
+            if k is not None:
+                events_data = calendar_model.get_nearest_upcoming_events(reference, k)
+                return make_response(jsonify({'status': 'success', 'from': reference.isoformat(), 'events': events_data}), 200)
+
+            ids, days = calendar_model.get_event_distances(reference)
+            return make_response(jsonify({'status': 'success', 'from': reference.isoformat(),
+                                          'ids': ids.tolist(), 'days': days.tolist()}), 200)
+        except Exception as e:
+            app.logger.error("Error computing event distances: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/events/distance-matrix', methods=['GET'])
+    def get_distance_matrix() -> Response:
+        """
+        Route to get the number of days between every pair of events.
 
-        if event_day is None or event_month is None or event_year is None or not event_name or is_religious is None:
-            return make_response(jsonify({'error': 'Invalid input, all fields are required with valid values'}), 400)
+        Query Parameters:
+            - ids (str, optional): Comma separated event IDs to compare. Defaults to every live event.
 
-        # Check that the dates are valid
+        Returns:
+            JSON response with the event 'ids' and a 'days' matrix where days[i][j] is the
+            number of days from event ids[i] to event ids[j].
+        Raises:
+            400 error if the IDs are invalid or there are too many events to compare.
+            500 error if there is an issue computing the distances.
+        """
         try:
-            day = int(event_day)
-            if not isinstance(day, int) or day <= 0:
-                raise ValueError("Event_day must have a positive value.")
+            ids = [int(value) for value in request.args['ids'].split(',')] if 'ids' in request.args else None
+        except ValueError:
+            return make_response(jsonify({'error': "ids must be a comma separated list of integers"}), 400)
+
+        try:
+            app.logger.info("Computing event distance matrix")
+            matrix_ids, matrix = calendar_model.get_distance_matrix(ids)
+            return make_response(jsonify({'status': 'success', 'ids': matrix_ids.tolist(), 'days': matrix.tolist()}), 200)
         except ValueError as e:
-            return make_response(jsonify({'error': 'Day must be a valid int less than 31.'}), 400)
-        
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error("Error computing event distance matrix: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/events/upcoming', methods=['GET'])
+    def get_upcoming_events() -> Response:
+        """
+        Route to get the next events on or after a date.
+
+        Query Parameters:
+            - from (str, optional): The first date to include, as YYYY-MM-DD. Defaults to today.
+            - n (int, optional): The number of events to return. Defaults to 10.
+            - recurring (str, optional): 'true' (default) treats events as recurring every year
+              on their day and month; 'false' only returns events dated on or after 'from'.
+
+        Returns:
+            JSON response with the events in date order, each with the 'date' it falls on.
+        Raises:
+            400 error if the parameters are invalid.
+            500 error if there is an issue retrieving the events.
+        """
+        try:
+            start = date.fromisoformat(request.args['from']) if 'from' in request.args else date.today()
+            n = int(request.args.get('n', 10))
+        except ValueError:
+            return make_response(jsonify({'error': "from must be a YYYY-MM-DD date and n an integer"}), 400)
+        if n <= 0:
+            return make_response(jsonify({'error': "n must be a positive integer"}), 400)
+        recurring = request.args.get('recurring', 'true').lower() != 'false'
+
+        try:
+            app.logger.info("Retrieving next %d events from %s", n, start)
+            events_data = calendar_model.get_upcoming_events(start, n, recurring)
+            return make_response(jsonify({'status': 'success', 'events': events_data}), 200)
+        except Exception as e:
+            app.logger.error("Error retrieving upcoming events: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/events/month', methods=['GET'])
+    def get_events_in_month() -> Response:
+        """
+        Route to get the events falling in a month.
+
+        Query Parameters:
+            - year (int): The year.
+            - month (int): The month, 1 to 12.
+            - recurring (str, optional): 'true' (default) matches events on their day and month
+              only; 'false' also requires the stored year to match.
+
+        Returns:
+            JSON response with the events in date order, each with the 'date' it falls on.
+        Raises:
+            400 error if the parameters are invalid.
+            500 error if there is an issue retrieving the events.
+        """
+        try:
+            year = int(request.args['year'])
+            month = int(request.args['month'])
+            date(year, month, 1)
+        except (KeyError, ValueError):
+            return make_response(jsonify({'error': "year and month are required and must form a valid month"}), 400)
+        recurring = request.args.get('recurring', 'true').lower() != 'false'
+
+        try:
+            app.logger.info("Retrieving events in %d-%02d", year, month)
+            events_data = calendar_model.get_events_in_month(year, month, recurring)
+            return make_response(jsonify({'status': 'success', 'events': events_data}), 200)
+        except Exception as e:
+            app.logger.error("Error retrieving events in month: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/events/occurrences', methods=['GET'])
+    def get_occurrences() -> Response:
+        """
+        Route to get every occurrence of an event, recurring or not, within a date range.
+
+        Query Parameters:
+            - from (str): The first date of the range, as YYYY-MM-DD.
+            - to (str): The last date of the range, as YYYY-MM-DD.
+            - limit (int, optional): The maximum number of occurrences. Defaults to 1000.
+
+        Returns:
+            JSON response with the occurrences in date order, each event with the 'date' it
+            falls on and its 'recurrence' rule (None for one-off events).
+        Raises:
+            400 error if the parameters are invalid.
+            500 error if there is an issue retrieving the events.
+        """
         try:
-            month = int(event_month)
-            if not isinstance(month, int) or month <= 0:
-                raise ValueError("Event_month must have a positive value.")
+            start = date.fromisoformat(request.args.get('from', ''))
+            end = date.fromisoformat(request.args.get('to', ''))
+            limit = int(request.args.get('limit', calendar_model.MAX_PAGE_SIZE))
+        except ValueError:
+            return make_response(jsonify({'error': "'from' and 'to' must be dates formatted as YYYY-MM-DD and 'limit' an integer."}), 400)
+
+        try:
+            app.logger.info("Expanding occurrences between %s and %s", start, end)
+            events_data = calendar_model.get_occurrences(start, end, limit)
+            return make_response(jsonify({'status': 'success', 'events': events_data}), 200)
         except ValueError as e:
-            return make_response(jsonify({'error': 'Month must be a valid int less than 13.'}), 400)
-
-        # Call the celndar_model function to add the combatant to the database
-        app.logger.info('Adding event: %s, %d, %d, %d, %s', event_name, event_day, event_month, event_year, str(is_religious))
-        calendar_model.add_event(event_name, event_day, event_month, event_year, is_religious)
-
-        app.logger.info("Event added: %s", event_name)
-        return make_response(jsonify({'status': 'success', 'event': event_name}), 201)
-    except Exception as e:
-        app.logger.error("Failed to add event: %s", str(e))
-        return make_response(jsonify({'error': str(e)}), 500)
-    
-@app.route('/api/delete-event', methods=['DELETE'])
-def delete_event(id: int) -> Response:
-    """
-    Route to delete an event by its ID. This performs a soft delete by marking it as deleted.
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error("Error expanding occurrences: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
 
-    Path Parameter:
-        - id (int): The ID of the event to delete.
+    @app.route('/api/events/<int:id>/recurrence', methods=['PUT'])
+    def set_event_recurrence(id: int) -> Response:
+        """
+        Route to change how an event recurs.
 
-    Returns:
-        JSON response indicating success of the operation or error message.
-    """
-    try:
-        app.logger.info(f"Deleting event by ID: {id}")
-
-        calendar_model.delete_event(id)
-        return make_response(jsonify({'status': 'event deleted'}), 200)
-    except Exception as e:
-        app.logger.error(f"Error deleting event: {e}")
-        return make_response(jsonify({'error': str(e)}), 500)
-    
-
-@app.route('/api/get-event-by-id/<int:event_id>', methods=['GET'])
-def get_event_by_id(id: int) -> Response:
-    """
-    Route to get an event by its ID.
+        Path Parameter:
+            - id (int): The ID of the event.
 
-    Path Parameter:
-        - id (int): The ID of the event.
+        Expected JSON Input:
+            - recurrence (dict or null): The new rule, or null to make the event a one-off.
 
-    Returns:
-        JSON response with the event details or error message.
-    """
-    try:
-        app.logger.info(f"Retrieving event by ID: {id}")
-
-        event = calendar_model.get_event_by_id(id)
-        return make_response(jsonify({'status': 'success', 'event': event}), 200)
-    except Exception as e:
-        app.logger.error(f"Error retrieving event by ID: {e}")
-        return make_response(jsonify({'error': str(e)}), 500)
-    
-##########################################################
-#
-# Events Data
-#
-##########################################################
-    
-@app.route('/api/get-events', methods=['GET'])
-def get_events() -> Response:
-    """
-    Route to get the a list of all events.
+        Returns:
+            JSON response indicating success.
+        Raises:
+            400 error if the rule is invalid or the event cannot be changed.
+            500 error if there is an issue updating the event.
+        """
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or 'recurrence' not in data:
+            return make_response(jsonify({'error': "Expected a JSON object with a 'recurrence' field."}), 400)
+        try:
+            recurrence = RecurrenceRule.from_dict(data['recurrence']) if data['recurrence'] is not None else None
+            app.logger.info("Setting recurrence of event %d", id)
+            calendar_model.set_event_recurrence(id, recurrence)
+            return make_response(jsonify({'status': 'success', 'id': id}), 200)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error("Error setting recurrence of event %d: %s", id, str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
 
-    Returns:
-        JSON response with a sorted leaderboard of events.
-    Raises:
-        500 error if there is an issue generating the leaderboard.
-    """
-    try:
-        app.logger.info("Generating list of events")
+    @app.route('/api/events/search', methods=['GET'])
+    def search_events() -> Response:
+        """
+        Route to search events by name, best matches first.
+
+        Query Parameters:
+            - q (str): The words to find. Each also matches longer words it starts.
+            - religious (str, optional): 'true' or 'false' to only return religious or
+              non-religious events.
+            - limit (int, optional): The maximum number of results, at most 100. Defaults to 20.
+
+        Returns:
+            JSON response with the matching events, each with a relevance 'score'.
+        Raises:
+            400 error if the parameters are invalid.
+            500 error if there is an issue searching.
+        """
+        religious = request.args.get('religious')
+        if religious not in (None, 'true', 'false'):
+            return make_response(jsonify({'error': "religious must be 'true' or 'false'"}), 400)
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return make_response(jsonify({'error': 'limit must be an integer'}), 400)
+
+        try:
+            app.logger.info("Searching events")
+            events_data = calendar_model.search_events(
+                request.args.get('q', ''), None if religious is None else religious == 'true', limit)
+            return make_response(jsonify({'status': 'success', 'events': events_data}), 200)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error("Error searching events: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/events/autocomplete', methods=['GET'])
+    def autocomplete_events() -> Response:
+        """
+        Route to suggest events for a partially typed name.
+
+        Query Parameters:
+            - q (str): The text typed so far.
+            - limit (int, optional): The maximum number of suggestions, at most 100. Defaults to 10.
+
+        Returns:
+            JSON response with the suggested events.
+        Raises:
+            400 error if the parameters are invalid.
+            500 error if there is an issue loading the events.
+        """
+        try:
+            limit = int(request.args.get('limit', 10))
+        except ValueError:
+            return make_response(jsonify({'error': 'limit must be an integer'}), 400)
+
+        try:
+            events_data = calendar_model.autocomplete_events(request.args.get('q', ''), limit)
+            return make_response(jsonify({'status': 'success', 'events': events_data}), 200)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error("Error autocompleting events: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/events/changes', methods=['GET'])
+    def get_event_changes() -> Response:
+        """
+        Route to get the inserts, updates and deletions of events after a version.
+
+        Query Parameters:
+            - since (int, optional): The last version the client has seen. Defaults to 0, the whole history.
+            - limit (int, optional): The maximum number of changes. Defaults to 100.
+            - wait (float, optional): Seconds to wait for a change if there is none yet (long poll).
+              Defaults to 0.
+
+        Returns:
+            JSON response with the changes, the version to ask from next and whether more are waiting.
+        Raises:
+            400 error if a parameter is invalid.
+            500 error if there is an issue retrieving the changes.
+        """
+        try:
+            since = int(request.args.get('since', 0))
+            limit = int(request.args.get('limit', 100))
+            wait = float(request.args.get('wait', 0))
+        except ValueError:
+            return make_response(jsonify({'error': 'since and limit must be integers and wait a number'}), 400)
+
+        try:
+            result = calendar_model.get_changes(since, limit, wait)
+            return make_response(jsonify({'status': 'success', **result}), 200)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error("Error retrieving changes after version %s: %s", since, str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    ##########################################################
+    #
+    # Statistics
+    #
+    ##########################################################
+
+    @app.route('/api/stats/by-<any(day, month, year):period>', methods=['GET'])
+    def get_event_counts(period: str) -> Response:
+        """
+        Route to count the live events per day, month or year, e.g. for a calendar heatmap.
+
+        Path Parameter:
+            - period (str): by-day, by-month or by-year.
+        Query Parameters:
+            - from (str, optional): Only count events on or after this date, as YYYY-MM-DD.
+            - to (str, optional): Only count events on or before this date, as YYYY-MM-DD.
+
+        Returns:
+            JSON response with the total, religious and secular counts of each period.
+        Raises:
+            400 error if a date is invalid or 'from' is after 'to'.
+            500 error if there is an issue reading the counts.
+        """
+        try:
+            start = date.fromisoformat(request.args['from']) if 'from' in request.args else None
+            end = date.fromisoformat(request.args['to']) if 'to' in request.args else None
+        except ValueError:
+            return make_response(jsonify({'error': "from and to must be formatted as YYYY-MM-DD"}), 400)
+
+        try:
+            counts = stats_model.get_event_counts(period, start, end)
+            return make_response(jsonify({'status': 'success', 'counts': counts}), 200)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error("Error counting events by %s: %s", period, str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    ##########################################################
+    #
+    # Administration
+    #
+    ##########################################################
+
+    @app.route('/api/admin/compact', methods=['POST'])
+    def start_compaction() -> Response:
+        """
+        Route to archive old soft deleted events and reclaim their space, in the background.
+
+        Request Body (optional):
+            - retention_days (float): Archive events deleted at least this many days ago.
+              Defaults to ARCHIVE_RETENTION_DAYS.
+            - batch_size (int): The most events moved per transaction. Defaults to ARCHIVE_BATCH_SIZE.
+
+        Returns:
+            JSON response saying the compaction has started, with status 202.
+        Raises:
+            400 error if an option is invalid.
+            409 error if this worker is already compacting.
+        """
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return make_response(jsonify({'error': "Expected a JSON object."}), 400)
+        try:
+            started = archive_model.start_compaction(data.get('retention_days'), data.get('batch_size'))
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        if not started:
+            return make_response(jsonify({'error': "A compaction is already running."}), 409)
+        app.logger.info("Started compaction")
+        return make_response(jsonify({'status': 'started'}), 202)
+
+    @app.route('/api/admin/compact', methods=['GET'])
+    def get_compaction_status() -> Response:
+        """
+        Route to check on this worker's compactions.
+
+        Returns:
+            JSON response with whether one is running and the report of the last one:
+            events archived, bytes reclaimed, seconds taken and the longest write lock held.
+        """
+        return make_response(jsonify({'status': 'success', **archive_model.get_compaction_status()}), 200)
+
+    ##########################################################
+    #
+    # Holidays
+    #
+    ##########################################################
+
+    @app.route('/api/is-holiday', methods=['GET'])
+    def is_holiday() -> Response:
+        """
+        Route to check whether a date is a public holiday.
+
+        Query Parameters:
+            - date (str, optional): The date to check, as YYYY-MM-DD. Defaults to today.
+            - country (str, optional): An ISO 3166-1 alpha-2 country code. Defaults to HOLIDAY_COUNTRY.
+
+        Returns:
+            JSON response with whether the date is a holiday and the holidays on it.
+        Raises:
+            400 error if the date or country is invalid, or the year is out of range.
+            500 error if there is an issue looking up the holidays.
+        """
+        try:
+            day = date.fromisoformat(request.args['date']) if 'date' in request.args else date.today()
+        except ValueError:
+            return make_response(jsonify({'error': "date must be formatted as YYYY-MM-DD"}), 400)
+        country = request.args.get('country')
+
+        try:
+            app.logger.info("Checking whether %s is a holiday", day)
+            holiday_year = holiday_model.get_holiday_year(day.year, country)
+            names = holiday_year.holidays.get(day, [])
+            return make_response(jsonify({
+                'status': 'success',
+                'date': day.isoformat(),
+                'country': holiday_year.country,
+                'is_holiday': bool(names),
+                'holidays': names,
+                'source': holiday_year.source,
+            }), 200)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error("Error checking holiday for %s: %s", day, str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    return app
 
-        events_data = calendar_model.get_events()
 
-        return make_response(jsonify({'status': 'success', 'events': events_data}), 200)
-    except Exception as e:
-        app.logger.error(f"Error generating events data: {e}")
-        return make_response(jsonify({'error': str(e)}), 500)
+if __name__ == '__main__':
+    # Development server. Use `python -m event_tracker.utils.server` in production.
+    create_app().run(host='0.0.0.0', port=5000)
@@ -0,0 +1,722 @@
+"""
+asyncio version of the event API, served by aiohttp.
+
+    python async_app.py
+
+It exposes the same routes, parameters and responses as app.py. Database work
+runs on the DB executor thread (DB_EXECUTOR_THREADS) and holiday lookups share
+one pooled HTTP session, so a slow holiday API or a locked database only holds
+up the requests waiting on it and the event loop keeps accepting others.
+"""
+import asyncio
+from datetime import date
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, Optional
+
+if __name__ == '__main__':
+    # Load the .env file before the modules below read their settings. Importing
+    # this module, as the tests do, leaves the environment alone.
+    from dotenv import load_dotenv
+    load_dotenv()
+
+import aiohttp
+from aiohttp import web
+
+from event_tracker.models import archive_model, calendar_model, holiday_model, stats_model
+from event_tracker.models.calendar_model import Event
+from event_tracker.utils.async_utils import run_in_db_thread, shutdown_db_executor
+from event_tracker.utils.import_utils import iter_csv, iter_json_array, iter_ndjson, spool
+from event_tracker.utils.logger import configure_logger
+from event_tracker.utils.metrics import METRICS_ENABLED, REGISTRY, render_metrics
+from event_tracker.utils.recurrence import RecurrenceRule
+from event_tracker.utils.sql_utils import check_database_connection, check_table_exists
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# connections kept open to the holiday API
+HOLIDAY_API_CONNECTIONS = int(os.getenv("HOLIDAY_API_CONNECTIONS", "10"))
+# events read per database call when streaming /api/get-events
+STREAM_PAGE_SIZE = 500
+
+HOLIDAY_SESSION = web.AppKey('holiday_session', aiohttp.ClientSession)
+
+
+class _ChangeSignal:
+    """Wakes the coroutines waiting on the app's event loop whenever calendar_model writes."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._changed = asyncio.Event()
+
+    def current(self) -> asyncio.Event:
+        # Set by the next write. Take it before reading, so a write made during the read is not missed.
+        return self._changed
+
+    def notify(self) -> None:
+        # Called on the writing thread
+        self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+CHANGE_SIGNAL = web.AppKey('change_signal', _ChangeSignal)
+
+routes = web.RouteTableDef()
+
+_request_seconds = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Time taken to handle HTTP requests.', ('method', 'route', 'status'))
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Event):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, default=_default)
+
+def _json(data: Any, status: int = 200) -> web.Response:
+    return web.json_response(data, status=status, dumps=_dumps)
+
+def _error(message: str, status: int) -> web.Response:
+    return _json({'error': message}, status)
+
+
+####################################################
+#
+# Healthchecks
+#
+####################################################
+
+@routes.get('/api/health')
+async def healthcheck(request: web.Request) -> web.Response:
+    """Health check route to verify the service is running."""
+    logger.info('Health check')
+    return _json({'status': 'healthy'})
+
+@routes.get('/api/db-check')
+async def db_check(request: web.Request) -> web.Response:
+    """Route to check if the database connection and events table are functional."""
+    try:
+        logger.info("Checking database connection and events table...")
+        await run_in_db_thread(check_database_connection)
+        await run_in_db_thread(check_table_exists, "events")
+        return _json({'database_status': 'healthy'})
+    except Exception as e:
+        return _error(str(e), 404)
+
+@routes.get('/api/metrics')
+async def get_metrics(request: web.Request) -> web.Response:
+    """Route to get the service metrics in the Prometheus text format."""
+    return web.Response(body=render_metrics().encode(), headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+##########################################################
+#
+# Events
+#
+##########################################################
+
+@routes.post('/api/create-event')
+async def add_event(request: web.Request) -> web.Response:
+    """Route to add a new event to the database. See app.py for the expected JSON input."""
+    logger.info('Creating new event')
+    try:
+        data = await request.json()
+
+        event_name = data.get('event_name')
+        event_day = data.get('event_day')
+        event_month = data.get('event_month')
+        event_year = data.get('event_year')
+        is_religious = data.get('is_religious')
+
+        if event_day is None or event_month is None or event_year is None or not event_name or is_religious is None:
+            return _error('Invalid input, all fields are required with valid values', 400)
+
+        try:
+            day = int(event_day)
+            if day <= 0:
+                raise ValueError("Event_day must have a positive value.")
+        except ValueError:
+            return _error('Day must be a valid int less than 31.', 400)
+
+        try:
+            month = int(event_month)
+            if month <= 0:
+                raise ValueError("Event_month must have a positive value.")
+        except ValueError:
+            return _error('Month must be a valid int less than 13.', 400)
+
+        recurrence = data.get('recurrence')
+        if recurrence is not None:
+            try:
+                recurrence = RecurrenceRule.from_dict(recurrence)
+            except ValueError as e:
+                return _error(str(e), 400)
+
+        await run_in_db_thread(calendar_model.add_event, event_day=day, event_month=month, event_year=event_year,
+                               event_name=event_name, is_religious=is_religious, recurrence=recurrence)
+
+        logger.info("Event added: %s", event_name)
+        return _json({'status': 'success', 'event': event_name}, 201)
+    except Exception as e:
+        logger.error("Failed to add event: %s", str(e))
+        return _error(str(e), 500)
+
+class _BlockingReader:
+    """Gives import_utils.spool, running on a worker thread, a blocking view of an aiohttp body."""
+
+    def __init__(self, read: Callable[[int], Awaitable[bytes]], loop: asyncio.AbstractEventLoop):
+        self._read = read
+        self._loop = loop
+
+    def read(self, size: int) -> bytes:
+        return asyncio.run_coroutine_threadsafe(self._read(size), self._loop).result()
+
+async def _spool(read: Callable[[int], Awaitable[bytes]]) -> BinaryIO:
+    # The upload is buffered before the import starts, so a slow client never
+    # holds the DB thread or a write transaction open. The default executor
+    # waits on the client instead of the DB thread.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, spool, _BlockingReader(read, loop))
+
+@routes.post('/api/events/bulk')
+async def add_events_bulk(request: web.Request) -> web.Response:
+    """Route to add many events in one request and one transaction. See app.py for the formats."""
+    content_type = request.content_type
+    parsers = {
+        'application/json': iter_json_array,
+        'application/x-ndjson': iter_ndjson,
+        'application/jsonl': iter_ndjson,
+        'text/csv': iter_csv,
+        'multipart/form-data': iter_csv,
+    }
+    if content_type not in parsers:
+        return _error(f"Unsupported content type: {content_type or 'none'}", 415)
+
+    try:
+        batch_size = int(request.query.get('batch_size', calendar_model.BULK_INSERT_BATCH_SIZE))
+    except ValueError:
+        return _error('batch_size must be an integer', 400)
+
+    if content_type == 'multipart/form-data':
+        reader = await request.multipart()
+        part = await reader.next()
+        while part is not None and part.name != 'file':
+            part = await reader.next()
+        if part is None:
+            return _error(f"Unsupported content type: {content_type}", 415)
+        body = await _spool(part.read_chunk)
+    else:
+        body = await _spool(request.content.read)
+
+    with body:
+        try:
+            logger.info("Importing events from %s body", content_type)
+            result = await run_in_db_thread(
+                lambda: calendar_model.add_events_bulk(parsers[content_type](body), batch_size=batch_size))
+        except ValueError as e:
+            logger.error("Rejected bulk import: %s", str(e))
+            return _error(str(e), 400)
+        except Exception as e:
+            logger.error("Failed to import events: %s", str(e))
+            return _error(str(e), 500)
+
+    logger.info("Imported %d events, skipped %d", result['inserted'], len(result['errors']))
+    return _json({'status': 'success', **result})
+
+@routes.delete(r'/api/delete-event/{id:\d+}')
+async def delete_event(request: web.Request) -> web.Response:
+    """Route to soft delete an event by its ID."""
+    id = int(request.match_info['id'])
+    try:
+        logger.info("Deleting event by ID: %d", id)
+        await run_in_db_thread(calendar_model.delete_event, id)
+        return _json({'status': 'event deleted'})
+    except Exception as e:
+        logger.error("Error deleting event: %s", str(e))
+        return _error(str(e), 500)
+
+@routes.get(r'/api/get-event-by-id/{id:\d+}')
+async def get_event_by_id(request: web.Request) -> web.Response:
+    """Route to get an event by its ID."""
+    id = int(request.match_info['id'])
+    try:
+        logger.info("Retrieving event by ID: %d", id)
+        event = await run_in_db_thread(calendar_model.get_event_by_id, id)
+        return _json({'status': 'success', 'event': event})
+    except Exception as e:
+        logger.error("Error retrieving event by ID: %s", str(e))
+        return _error(str(e), 500)
+
+@routes.get('/api/events/batch')
+@routes.post('/api/events/batch')
+async def get_events_by_ids(request: web.Request) -> web.Response:
+    """Route to get many events by ID in one request, from ?ids=1,2,3 or a POSTed {"ids": [...]}."""
+    if request.method == 'POST':
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        ids = data.get('ids') if isinstance(data, dict) else None
+        if not isinstance(ids, list):
+            return _error("Expected a JSON object with an 'ids' list.", 400)
+    else:
+        try:
+            ids = [int(part) for part in request.query.get('ids', '').split(',') if part.strip()]
+        except ValueError:
+            return _error("ids must be comma-separated integers", 400)
+
+    try:
+        logger.info("Retrieving %d events by ID", len(ids))
+        entries = await run_in_db_thread(calendar_model.get_events_by_ids, ids)
+        return _json({'status': 'success', 'events': entries})
+    except ValueError as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error("Error retrieving events by ID: %s", str(e))
+        return _error(str(e), 500)
+
+##########################################################
+#
+# Events Data
+#
+##########################################################
+
+async def _stream_events(request: web.Request, stream: str, events: list[dict[str, Any]],
+                         after: Optional[int]) -> web.StreamResponse:
+    response = web.StreamResponse()
+    response.content_type = 'application/x-ndjson' if stream == 'ndjson' else 'application/json'
+    await response.prepare(request)
+
+    if stream == 'json':
+        await response.write(b'{"status": "success", "events": [')
+    separator = ''
+    while True:
+        if stream == 'ndjson':
+            await response.write(''.join(json.dumps(event) + '\n' for event in events).encode())
+        elif events:
+            await response.write((separator + ', '.join(json.dumps(event) for event in events)).encode())
+            separator = ', '
+        if after is None:
+            break
+        # One short database call per page, so no connection is held while the client reads
+        events, after = await run_in_db_thread(calendar_model.get_events_page, STREAM_PAGE_SIZE, after)
+    if stream == 'json':
+        await response.write(b']}')
+    await response.write_eof()
+    return response
+
+@routes.get('/api/get-events')
+async def get_events(request: web.Request) -> web.StreamResponse:
+    """Route to get the list of all events. Takes the same query parameters as app.py."""
+    stream = request.query.get('stream')
+    limit = request.query.get('limit')
+    orient = 'columns' if request.query.get('format') == 'columnar' else 'records'
+    if stream is not None and stream not in ('ndjson', 'json'):
+        return _error("stream must be one of ndjson, json", 400)
+    if stream is not None and limit is not None:
+        return _error('stream and limit cannot be combined', 400)
+
+    try:
+        if stream is not None:
+            logger.info("Streaming list of events as %s", stream)
+            # Read the first page up front so database errors still produce a 500
+            events, after = await run_in_db_thread(calendar_model.get_events_page, STREAM_PAGE_SIZE, 0)
+            return await _stream_events(request, stream, events, after)
+
+        if limit is not None:
+            try:
+                limit = int(limit)
+                after = int(request.query.get('after', 0))
+            except ValueError:
+                return _error('limit and after must be integers', 400)
+
+            logger.info("Generating page of events after ID %d", after)
+            try:
+                events_data, next_after = await run_in_db_thread(calendar_model.get_events_page, limit, after)
+            except ValueError as e:
+                return _error(str(e), 400)
+
+            return _json({'status': 'success', 'events': events_data, 'next_after': next_after})
+
+        logger.info("Generating list of events")
+        events_data, etag = await run_in_db_thread(calendar_model.get_events_with_etag)
+        if etag is not None and orient != 'records':
+            etag = f"{etag}-{orient}"
+
+        # The client already has this exact list
+        if etag is not None and any(tag.value == etag for tag in request.if_none_match or ()):
+            response = web.Response(status=304)
+            response.etag = etag
+            return response
+
+        body = '{"status": "success", "events": %s}' % events_data.to_json(orient)
+        response = web.Response(text=body, content_type='application/json')
+        if etag is not None:
+            response.etag = etag
+        return response
+    except Exception as e:
+        logger.error("Error generating events data: %s", str(e))
+        return _error(str(e), 500)
+
+@routes.get('/api/events')
+async def get_events_between(request: web.Request) -> web.Response:
+    """Route to get the events that fall within a date range, ordered by date."""
+    try:
+        start = date.fromisoformat(request.query.get('from', ''))
+        end = date.fromisoformat(request.query.get('to', ''))
+    except ValueError:
+        return _error("Query parameters 'from' and 'to' must be dates formatted as YYYY-MM-DD.", 400)
+
+    if start > end:
+        return _error("'from' must not be after 'to'.", 400)
+
+    try:
+        logger.info("Retrieving events between %s and %s", start, end)
+        events_data = await run_in_db_thread(calendar_model.get_events_between, start, end)
+        return _json({'status': 'success', 'events': events_data})
+    except Exception as e:
+        logger.error("Error retrieving events between %s and %s: %s", start, end, str(e))
+        return _error(str(e), 500)
+
+@routes.get('/api/events/distances')
+async def get_event_distances(request: web.Request) -> web.Response:
+    """Route to get the number of days from a date to the live events."""
+    try:
+        reference = date.fromisoformat(request.query['from']) if 'from' in request.query else date.today()
+        k = int(request.query['k']) if 'k' in request.query else None
+    except ValueError:
+        return _error("from must be a YYYY-MM-DD date and k an integer", 400)
+    if k is not None and k <= 0:
+        return _error("k must be a positive integer", 400)
+
+    try:
+        logger.info("Computing event distances from %s", reference)
+        if k is not None:
+            events_data = await run_in_db_thread(calendar_model.get_nearest_upcoming_events, reference, k)
+            return _json({'status': 'success', 'from': reference.isoformat(), 'events': events_data})
+
+        ids, days = await run_in_db_thread(calendar_model.get_event_distances, reference)
+        return _json({'status': 'success', 'from': reference.isoformat(), 'ids': ids.tolist(), 'days': days.tolist()})
+    except Exception as e:
+        logger.error("Error computing event distances: %s", str(e))
+        return _error(str(e), 500)
+
+@routes.get('/api/events/distance-matrix')
+async def get_distance_matrix(request: web.Request) -> web.Response:
+    """Route to get the number of days between every pair of events."""
+    try:
+        ids = [int(value) for value in request.query['ids'].split(',')] if 'ids' in request.query else None
+    except ValueError:
+        return _error("ids must be a comma separated list of integers", 400)
+
+    try:
+        logger.info("Computing event distance matrix")
+        matrix_ids, matrix = await run_in_db_thread(calendar_model.get_distance_matrix, ids)
+        return _json({'status': 'success', 'ids': matrix_ids.tolist(), 'days': matrix.tolist()})
+    except ValueError as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error("Error computing event distance matrix: %s", str(e))
+        return _error(str(e), 500)
+
+@routes.get('/api/events/upcoming')
+async def get_upcoming_events(request: web.Request) -> web.Response:
+    """Route to get the next events on or after a date."""
+    try:
+        start = date.fromisoformat(request.query['from']) if 'from' in request.query else date.today()
+        n = int(request.query.get('n', 10))
+    except ValueError:
+        return _error("from must be a YYYY-MM-DD date and n an integer", 400)
+    if n <= 0:
+        return _error("n must be a positive integer", 400)
+    recurring = request.query.get('recurring', 'true').lower() != 'false'
+
+    try:
+        logger.info("Retrieving next %d events from %s", n, start)
+        events_data = await run_in_db_thread(calendar_model.get_upcoming_events, start, n, recurring)
+        return _json({'status': 'success', 'events': events_data})
+    except Exception as e:
+        logger.error("Error retrieving upcoming events: %s", str(e))
+        return _error(str(e), 500)
+
+@routes.get('/api/events/month')
+async def get_events_in_month(request: web.Request) -> web.Response:
+    """Route to get the events falling in a month."""
+    try:
+        year = int(request.query['year'])
+        month = int(request.query['month'])
+        date(year, month, 1)
+    except (KeyError, ValueError):
+        return _error("year and month are required and must form a valid month", 400)
+    recurring = request.query.get('recurring', 'true').lower() != 'false'
+
+    try:
+        logger.info("Retrieving events in %d-%02d", year, month)
+        events_data = await run_in_db_thread(calendar_model.get_events_in_month, year, month, recurring)
+        return _json({'status': 'success', 'events': events_data})
+    except Exception as e:
+        logger.error("Error retrieving events in month: %s", str(e))
+        return _error(str(e), 500)
+
+@routes.get('/api/events/occurrences')
+async def get_occurrences(request: web.Request) -> web.Response:
+    """Route to get every occurrence of an event, recurring or not, within a date range."""
+    try:
+        start = date.fromisoformat(request.query.get('from', ''))
+        end = date.fromisoformat(request.query.get('to', ''))
+        limit = int(request.query.get('limit', calendar_model.MAX_PAGE_SIZE))
+    except ValueError:
+        return _error("'from' and 'to' must be dates formatted as YYYY-MM-DD and 'limit' an integer.", 400)
+
+    try:
+        logger.info("Expanding occurrences between %s and %s", start, end)
+        events_data = await run_in_db_thread(calendar_model.get_occurrences, start, end, limit)
+        return _json({'status': 'success', 'events': events_data})
+    except ValueError as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error("Error expanding occurrences: %s", str(e))
+        return _error(str(e), 500)
+
+@routes.put(r'/api/events/{id:\d+}/recurrence')
+async def set_event_recurrence(request: web.Request) -> web.Response:
+    """Route to change how an event recurs, or make it a one-off with a null 'recurrence'."""
+    id = int(request.match_info['id'])
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or 'recurrence' not in data:
+        return _error("Expected a JSON object with a 'recurrence' field.", 400)
+    try:
+        recurrence = RecurrenceRule.from_dict(data['recurrence']) if data['recurrence'] is not None else None
+        logger.info("Setting recurrence of event %d", id)
+        await run_in_db_thread(calendar_model.set_event_recurrence, id, recurrence)
+        return _json({'status': 'success', 'id': id})
+    except ValueError as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error("Error setting recurrence of event %d: %s", id, str(e))
+        return _error(str(e), 500)
+
+@routes.get('/api/events/search')
+async def search_events(request: web.Request) -> web.Response:
+    """Route to search events by name, best matches first. See app.py for the parameters."""
+    religious = request.query.get('religious')
+    if religious not in (None, 'true', 'false'):
+        return _error("religious must be 'true' or 'false'", 400)
+    try:
+        limit = int(request.query.get('limit', 20))
+    except ValueError:
+        return _error('limit must be an integer', 400)
+
+    try:
+        logger.info("Searching events")
+        events_data = await run_in_db_thread(calendar_model.search_events, request.query.get('q', ''),
+                                             None if religious is None else religious == 'true', limit)
+        return _json({'status': 'success', 'events': events_data})
+    except ValueError as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error("Error searching events: %s", str(e))
+        return _error(str(e), 500)
+
+@routes.get('/api/events/autocomplete')
+async def autocomplete_events(request: web.Request) -> web.Response:
+    """Route to suggest events for a partially typed name."""
+    try:
+        limit = int(request.query.get('limit', 10))
+    except ValueError:
+        return _error('limit must be an integer', 400)
+
+    try:
+        events_data = await run_in_db_thread(calendar_model.autocomplete_events, request.query.get('q', ''), limit)
+        return _json({'status': 'success', 'events': events_data})
+    except ValueError as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error("Error autocompleting events: %s", str(e))
+        return _error(str(e), 500)
+
+@routes.get('/api/events/changes')
+async def get_event_changes(request: web.Request) -> web.Response:
+    """Route to get the inserts, updates and deletions of events after a version, waiting up to ?wait= seconds for one."""
+    try:
+        since = int(request.query.get('since', 0))
+        limit = int(request.query.get('limit', 100))
+        wait = float(request.query.get('wait', 0))
+    except ValueError:
+        return _error('since and limit must be integers and wait a number', 400)
+    if not 0 <= wait <= calendar_model.MAX_CHANGES_WAIT:
+        return _error(f"Invalid wait: {wait}. Wait must be between 0 and {calendar_model.MAX_CHANGES_WAIT} seconds.", 400)
+
+    # The wait happens here on the event loop, never on the DB executor thread
+    signal = request.app[CHANGE_SIGNAL]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    try:
+        while True:
+            changed = signal.current()
+            result = await run_in_db_thread(calendar_model.get_changes, since, limit)
+            remaining = deadline - loop.time()
+            if result['changes'] or remaining <= 0:
+                return _json({'status': 'success', **result})
+            try:
+                # Writes by other processes do not signal, so look again every CHANGES_POLL_INTERVAL
+                await asyncio.wait_for(changed.wait(), min(remaining, calendar_model.CHANGES_POLL_INTERVAL))
+            except asyncio.TimeoutError:
+                pass
+    except ValueError as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error("Error retrieving changes after version %s: %s", since, str(e))
+        return _error(str(e), 500)
+
+##########################################################
+#
+# Statistics
+#
+##########################################################
+
+@routes.get('/api/stats/by-{period:(day|month|year)}')
+async def get_event_counts(request: web.Request) -> web.Response:
+    """Route to count the live events per day, month or year, e.g. for a calendar heatmap."""
+    period = request.match_info['period']
+    try:
+        start = date.fromisoformat(request.query['from']) if 'from' in request.query else None
+        end = date.fromisoformat(request.query['to']) if 'to' in request.query else None
+    except ValueError:
+        return _error("from and to must be formatted as YYYY-MM-DD", 400)
+
+    try:
+        counts = await run_in_db_thread(stats_model.get_event_counts, period, start, end)
+        return _json({'status': 'success', 'counts': counts})
+    except ValueError as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error("Error counting events by %s: %s", period, str(e))
+        return _error(str(e), 500)
+
+##########################################################
+#
+# Administration
+#
+##########################################################
+
+@routes.post('/api/admin/compact')
+async def start_compaction(request: web.Request) -> web.Response:
+    """Route to archive old soft deleted events and reclaim their space, in the background. See app.py."""
+    try:
+        data = await request.json() if request.can_read_body else {}
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return _error("Expected a JSON object.", 400)
+    try:
+        started = archive_model.start_compaction(data.get('retention_days'), data.get('batch_size'))
+    except ValueError as e:
+        return _error(str(e), 400)
+    if not started:
+        return _error("A compaction is already running.", 409)
+    logger.info("Started compaction")
+    return _json({'status': 'started'}, 202)
+
+@routes.get('/api/admin/compact')
+async def get_compaction_status(request: web.Request) -> web.Response:
+    """Route to check on this process's compactions."""
+    return _json({'status': 'success', **archive_model.get_compaction_status()})
+
+##########################################################
+#
+# Holidays
+#
+##########################################################
+
+@routes.get('/api/is-holiday')
+async def is_holiday(request: web.Request) -> web.Response:
+    """Route to check whether a date is a public holiday."""
+    try:
+        day = date.fromisoformat(request.query['date']) if 'date' in request.query else date.today()
+    except ValueError:
+        return _error("date must be formatted as YYYY-MM-DD", 400)
+    country = request.query.get('country')
+
+    try:
+        logger.info("Checking whether %s is a holiday", day)
+        holiday_year = await holiday_model.get_holiday_year_async(request.app[HOLIDAY_SESSION], day.year, country)
+        names = holiday_year.holidays.get(day, [])
+        return _json({
+            'status': 'success',
+            'date': day.isoformat(),
+            'country': holiday_year.country,
+            'is_holiday': bool(names),
+            'holidays': names,
+            'source': holiday_year.source,
+        })
+    except ValueError as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error("Error checking holiday for %s: %s", day, str(e))
+        return _error(str(e), 500)
+
+
+async def _client_session(app: web.Application) -> AsyncIterator[None]:
+    # One session for the app's lifetime keeps connections to the holiday API alive
+    connector = aiohttp.TCPConnector(limit=HOLIDAY_API_CONNECTIONS)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        app[HOLIDAY_SESSION] = session
+        yield
+
+async def _change_signal(app: web.Application) -> AsyncIterator[None]:
+    signal = _ChangeSignal(asyncio.get_running_loop())
+    calendar_model.add_change_listener(signal.notify)
+    app[CHANGE_SIGNAL] = signal
+    yield
+    calendar_model.remove_change_listener(signal.notify)
+
+async def _db_executor(app: web.Application) -> AsyncIterator[None]:
+    yield
+    shutdown_db_executor()
+
+
+@web.middleware
+async def _record_request_duration(request: web.Request, handler) -> web.StreamResponse:
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        # Label by the route pattern, e.g. /api/get-event-by-id/{id}, not the raw path
+        resource = request.match_info.route.resource
+        route = resource.canonical if resource is not None else 'unmatched'
+        _request_seconds.observe(time.perf_counter() - started, request.method, route, status)
+
+
+def create_app() -> web.Application:
+    """
+    Creates the aiohttp application and registers its routes.
+
+    Returns:
+        web.Application: The application, ready for web.run_app().
+    """
+    app = web.Application(middlewares=[_record_request_duration] if METRICS_ENABLED else [])
+    app.add_routes(routes)
+    app.cleanup_ctx.append(_client_session)
+    app.cleanup_ctx.append(_change_signal)
+    app.cleanup_ctx.append(_db_executor)
+    return app
+
+
+if __name__ == '__main__':
+    web.run_app(create_app(), host=os.getenv("WEB_HOST", "0.0.0.0"), port=int(os.getenv("WEB_PORT", "5000")))
@@ -0,0 +1,112 @@
+"""
+Latency of writes from requests while old soft deleted events are archived.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_compaction --rows 100000 --seconds 3
+
+A seeded database has half of its events soft deleted long ago. Writer threads
+call calendar_model.add_event for `seconds` on their own, then again while
+archive_model.compact() moves the deleted events out, in batches of
+--batch-size, into a separate archive file so the freed pages can be reclaimed.
+Each write waits for at most one archive transaction, so p99 stays close to
+ARCHIVE_MAX_LOCK_MS however many events are archived. The compaction report
+(events archived, bytes reclaimed, seconds taken, longest lock held) is printed
+after the table.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from benchmarks.common import print_table, report_baseline, seeded_database, summarize
+from event_tracker.models import archive_model, calendar_model
+from event_tracker.utils import sql_utils
+
+
+def soft_delete_half(path: str) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("UPDATE events SET deleted = TRUE WHERE id % 2 = 0")
+    conn.execute("UPDATE events SET deleted_at = ? WHERE deleted = TRUE", (time.time() - 365 * 86400,))
+    conn.commit()
+    conn.close()
+
+
+def write_latencies(threads: int, seconds: float, prefix: str, during=None) -> tuple[list[float], int, float]:
+    """Runs add_event on writer threads for `seconds`, or until `during` returns if it is given."""
+    samples, lock = [], threading.Lock()
+    counts = {'errors': 0}
+    stop = threading.Event()
+
+    def writer(number):
+        done = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                calendar_model.add_event(1, 1, 2030, f"{prefix}-{number}-{done}", False)
+            except Exception:
+                with lock:
+                    counts['errors'] += 1
+                continue
+            with lock:
+                samples.append(time.perf_counter() - start)
+            done += 1
+
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    if during is None:
+        time.sleep(seconds)
+    else:
+        during()
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return samples, counts['errors'], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="events in the seeded database")
+    parser.add_argument("--threads", type=int, default=4, help="concurrent writer threads")
+    parser.add_argument("--seconds", type=float, default=3, help="duration of the run without compaction")
+    parser.add_argument("--batch-size", type=int, default=archive_model.ARCHIVE_BATCH_SIZE,
+                        help="events moved per transaction at most")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    # Keep per-write logging out of the measurement
+    calendar_model.logger.setLevel("WARNING")
+    archive_model.logger.setLevel("WARNING")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = seeded_database(args.rows, os.path.join(tmp, "events.db"))
+        soft_delete_half(path)
+        sql_utils.DB_PATH = path
+        sql_utils.DB_POOL_SIZE = args.threads + 2
+
+        results, report = {}, {}
+        samples, errors, elapsed = write_latencies(args.threads, args.seconds, "idle")
+        results['add_event'] = summarize(samples, elapsed, errors)
+
+        def run_compaction():
+            report.update(archive_model.compact(0, args.batch_size, os.path.join(tmp, "archive.db")))
+
+        samples, errors, elapsed = write_latencies(args.threads, 0, "compacting", during=run_compaction)
+        results['add_event during compaction'] = summarize(samples, elapsed, errors)
+        sql_utils.close_pool()
+
+    print_table(results)
+    print(json.dumps(report, indent=2))
+    raise SystemExit(report_baseline(results, args.save, args.compare, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
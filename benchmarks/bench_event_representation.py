@@ -0,0 +1,121 @@
+"""
+Memory per event and rows per second for the ways get_events() can materialize rows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_event_representation --rows 100000
+
+Compares the old per-row dicts and plain dataclass with the slotted Event
+(built directly by event_row_factory) and the columnar EventColumns, both for
+building the result from a query and for building plus serializing it to JSON.
+"""
+import argparse
+from dataclasses import asdict, dataclass
+import gc
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from event_tracker.models.calendar_model import EventColumns, event_row_factory
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "sql", "create_event_table.sql")
+
+QUERY = """
+    SELECT id, event_name, event_day, event_month, event_year, is_religious
+    FROM events WHERE deleted = FALSE
+"""
+
+
+@dataclass
+class DictEvent:
+    """The Event representation before it was slotted, for comparison."""
+    id: int
+    event_name: str
+    event_day: int
+    event_month: int
+    event_year: int
+    is_religious: bool
+
+
+def as_dicts(conn):
+    return [{'id': row[0], 'event_name': row[1], 'event_day': row[2], 'event_month': row[3],
+             'event_year': row[4], 'is_religious': row[5]} for row in conn.execute(QUERY)]
+
+def as_dataclasses(conn):
+    return [DictEvent(*row) for row in conn.execute(QUERY)]
+
+def as_slotted_events(conn):
+    cursor = conn.cursor()
+    cursor.row_factory = event_row_factory
+    return cursor.execute(QUERY).fetchall()
+
+def as_columns(conn):
+    return EventColumns.from_rows(conn.execute(QUERY))
+
+STRATEGIES = {
+    'dicts': (as_dicts, json.dumps),
+    'dataclass': (as_dataclasses, lambda events: json.dumps([asdict(event) for event in events])),
+    'slotted Event': (as_slotted_events, lambda events: json.dumps([event.to_dict() for event in events])),
+    'EventColumns': (as_columns, lambda columns: columns.to_json('columns')),
+}
+
+
+def create_database(path: str, rows: int) -> None:
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    conn.executemany(
+        "INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) VALUES (?, ?, ?, ?, ?)",
+        ((f"event-{i}", i % 28 + 1, i % 12 + 1, 1900 + i % 200, i % 2) for i in range(rows)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure_memory(build, conn) -> int:
+    """Bytes still allocated by the result once it has been built."""
+    gc.collect()
+    tracemalloc.start()
+    result = build(conn)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def measure_rate(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="number of events to seed")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per strategy, best is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.db")
+        create_database(path, args.rows)
+        conn = sqlite3.connect(path)
+
+        print(f"{'representation':<16} {'bytes/event':>12} {'build rows/s':>14} {'build+json rows/s':>18}")
+        for name, (build, serialize) in STRATEGIES.items():
+            memory = measure_memory(build, conn)
+            build_time = measure_rate(lambda: build(conn), args.repeat)
+            total_time = measure_rate(lambda: serialize(build(conn)), args.repeat)
+            print(f"{name:<16} {memory / args.rows:>12.1f} {args.rows / build_time:>14,.0f} "
+                  f"{args.rows / total_time:>18,.0f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Throughput of concurrent add_event calls with and without the group-commit writer.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_group_commit --threads 16 --seconds 5
+
+For each mode a fresh database is created from sql/create_event_table.sql and
+writer threads call calendar_model.add_event as fast as they can. Failed calls
+(such as "database is locked") are counted rather than retried.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from event_tracker.models import calendar_model
+from event_tracker.utils import sql_utils
+from event_tracker.utils.write_queue import WriteQueue
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "sql", "create_event_table.sql")
+
+
+def create_database(path: str) -> None:
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    conn.close()
+
+
+def run_mode(queued: bool, threads: int, seconds: float, batch_delay_ms: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.db")
+        create_database(path)
+        sql_utils.DB_PATH = path
+        sql_utils.DB_POOL_SIZE = threads + 1
+        calendar_model.WRITE_QUEUE_ENABLED = queued
+        calendar_model._write_queue = WriteQueue(lambda: sql_utils.get_db_connection(), max_delay=batch_delay_ms / 1000)
+
+        stop = threading.Event()
+        counts = {'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def writer(number):
+            done = errors = 0
+            while not stop.is_set():
+                try:
+                    calendar_model.add_event(event_day=1, event_month=1, event_year=2030, is_religious=False,
+                                             event_name=f"writer-{number}-{done + errors}")
+                    done += 1
+                except Exception:
+                    errors += 1
+            with lock:
+                counts['writes'] += done
+                counts['errors'] += errors
+
+        workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        time.sleep(seconds)
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+        stats = calendar_model.get_write_stats()
+        calendar_model._write_queue.close()
+        sql_utils.close_pool()
+    return {'writes/s': counts['writes'] / seconds, 'errors': counts['errors'], **stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16, help="concurrent writer threads")
+    parser.add_argument("--seconds", type=float, default=5, help="duration of each run")
+    parser.add_argument("--batch-delay-ms", type=float, default=0, help="WRITE_BATCH_DELAY_MS for the queued run")
+    args = parser.parse_args()
+
+    # Keep per-write logging out of the measurement
+    calendar_model.logger.setLevel("WARNING")
+
+    for queued in (False, True):
+        result = run_mode(queued, args.threads, args.seconds, args.batch_delay_ms)
+        line = f"{'group commit' if queued else 'direct':<13} writes/s={result['writes/s']:>8,.0f} errors={result['errors']}"
+        if queued:
+            line += (f" mean batch={result['mean_batch_size']:.1f} max batch={result['max_batch_size']}"
+                     f" mean queue={result['mean_queue_ms']:.2f}ms max queue={result['max_queue_ms']:.2f}ms")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Import time of the apps, models and command line tools, from python -X importtime.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_import_time --runs 5 --top 15
+
+Each entry module is imported in a fresh interpreter `runs` times (after one
+run that compiles the bytecode), and its cumulative import time, including
+everything it imports that the interpreter had not loaded at startup, is
+reported like any other benchmark. The process exits with status 1 if a module
+goes over its BUDGETS entry, or if a module of the model and utils layers pulls
+in a web framework or another package they only need on demand.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Optional
+
+from benchmarks.common import print_table, report_baseline, ROOT, summarize
+
+
+# milliseconds allowed for each entry module (median of the runs), about twice what
+# it takes on one core of a laptop
+BUDGETS = {
+    'event_tracker.utils.sql_utils': 60,
+    'event_tracker.utils.migrations': 60,
+    'event_tracker.models.calendar_model': 100,
+    'event_tracker.models.holiday_model': 100,
+    'app': 400,
+    'async_app': 600,
+}
+
+# imported on first use only; none of them may load with the model and utils layers
+LAZY_PACKAGES = ('flask', 'werkzeug', 'numpy', 'aiohttp', 'requests', 'dotenv')
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(text: str) -> list[dict]:
+    """
+    Parses the report python -X importtime writes to stderr.
+
+    Returns:
+        list[dict]: One entry (module, self_us, cumulative_us, depth) per imported
+            module, in the order the report lists them (children before parents).
+    """
+    entries = []
+    for match in _LINE.finditer(text):
+        entries.append({'module': match.group(4), 'self_us': int(match.group(1)),
+                        'cumulative_us': int(match.group(2)), 'depth': len(match.group(3)) // 2})
+    return entries
+
+
+def profile_import(module: str) -> list[dict]:
+    """Imports a module in a fresh interpreter and returns its parsed import time report."""
+    # Bytecode is written and reused as in a normal install, even where it is turned off for development
+    env = {name: value for name, value in os.environ.items() if name != "PYTHONDONTWRITEBYTECODE"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def import_subtree(entries: list[dict], module: str) -> list[dict]:
+    """Returns the entries of a module and everything it imported, which the report lists just before it."""
+    for end, entry in enumerate(entries):
+        if entry['module'] == module and entry['depth'] == 0:
+            start = end
+            while start > 0 and entries[start - 1]['depth'] > 0:
+                start -= 1
+            return entries[start:end + 1]
+    raise ValueError(f"{module} is not in the import time report")
+
+
+def heaviest(entries: list[dict], count: int) -> list[dict]:
+    return sorted(entries, key=lambda entry: entry['self_us'], reverse=True)[:count]
+
+
+def run(modules: list[str], runs: int, top: int) -> tuple[dict[str, dict], list[str]]:
+    """
+    Profiles each module and checks it against its budget and LAZY_PACKAGES.
+
+    Returns:
+        tuple[dict[str, dict], list[str]]: The results by module, and one message per problem found.
+    """
+    results, problems = {}, []
+    for module in modules:
+        profile_import(module)  # writes the .pyc files
+        subtrees = [import_subtree(profile_import(module), module) for _ in range(runs)]
+        results[module] = summarize([subtree[-1]['cumulative_us'] / 1e6 for subtree in subtrees])
+
+        budget = BUDGETS.get(module)
+        if budget is not None and results[module]['p50_ms'] > budget:
+            problems.append(f"{module} takes {results[module]['p50_ms']:.1f} ms to import, over its {budget} ms budget")
+        if module.startswith('event_tracker.'):
+            loaded = {entry['module'].partition('.')[0] for entry in subtrees[0]}
+            for package in sorted(loaded.intersection(LAZY_PACKAGES)):
+                problems.append(f"{module} imports {package}")
+        if top:
+            print(f"\n{module}: {top} slowest imports by self time")
+            for entry in heaviest(subtrees[0], top):
+                print(f"  {entry['self_us'] / 1000:>8.2f} ms  {entry['module']}")
+    return results, problems
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS), help="entry modules to profile")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=0, help="list this many of each module's slowest imports")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    results, problems = run(args.modules, args.runs, args.top)
+    print()
+    print_table(results)
+    for problem in problems:
+        print(f"FAILED {problem}")
+    status = report_baseline(results, args.save, args.compare, args.threshold)
+    sys.exit(1 if problems else status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Request latency with logging off, logged synchronously, and through the log queue.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_logging --requests 5000
+
+Requests for one event go through the Flask test client against a small
+database, with every logger at DEBUG and records written to a file:
+
+    off      logging disabled
+    sync     a StreamHandler on each logger, writing on the request thread
+    queued   the shared QueueHandler, written by the listener thread
+    sampled  queued, with repeats of each message sampled (LOG_SAMPLE_BURST=20)
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from event_tracker.utils import logger as log_config
+from event_tracker.utils import sql_utils
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "sql", "create_event_table.sql")
+
+
+def create_database(path: str) -> None:
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    conn.execute("INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) "
+                 "VALUES ('Christmas', 25, 12, 2024, 1)")
+    conn.commit()
+    conn.close()
+
+
+def configured_loggers() -> list[logging.Logger]:
+    loggers = [logging.getLogger(name) for name in logging.root.manager.loggerDict]
+    return [logger for logger in loggers if isinstance(logger, logging.Logger) and log_config._handler in logger.handlers]
+
+
+def set_mode(mode: str, loggers: list[logging.Logger], output: logging.Handler) -> None:
+    logging.disable(logging.CRITICAL if mode == 'off' else logging.NOTSET)
+    sync = mode == 'sync'
+    for logger in loggers:
+        logger.setLevel(logging.DEBUG)
+        for handler in (log_config._handler, output):
+            logger.removeHandler(handler)
+        logger.addHandler(output if sync else log_config._handler)
+    sampling = log_config._handler.filters[0]
+    sampling.burst = 20 if mode == 'sampled' else 0
+    sampling._counts.clear()
+
+
+def run(client, requests: int) -> list[float]:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get("/api/get-event-by-id/1")
+        latencies.append(time.perf_counter() - start)
+    log_config.flush_logs()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.db")
+        create_database(path)
+        sql_utils.DB_PATH = path
+
+        from app import create_app
+        from event_tracker.models import calendar_model
+        calendar_model.EVENT_CACHE_ENABLED = False
+        client = create_app().test_client()
+
+        output = logging.FileHandler(os.path.join(tmp, "bench.log"))
+        output.setFormatter(log_config.TextFormatter())
+        log_config._listener.handlers = (output,)
+        loggers = configured_loggers()
+
+        print(f"{'mode':<10}{'mean (us)':>12}{'p50 (us)':>12}{'p99 (us)':>12}")
+        for mode in ('off', 'sync', 'queued', 'sampled'):
+            set_mode(mode, loggers, output)
+            run(client, args.requests // 10)  # warm up
+            latencies = sorted(run(client, args.requests))
+            p99 = latencies[int(len(latencies) * 0.99)]
+            print(f"{mode:<10}{statistics.mean(latencies) * 1e6:>12.1f}"
+                  f"{statistics.median(latencies) * 1e6:>12.1f}{p99 * 1e6:>12.1f}")
+        logging.disable(logging.NOTSET)
+        sql_utils.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cost of the metrics instrumentation on model calls and SQL statements.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_metrics_overhead --calls 20000
+
+Times calendar_model.get_event_by_id against a small database, and a bare
+SELECT on a connection, with instrumentation switched on and off.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from event_tracker.models import calendar_model
+from event_tracker.utils import metrics, sql_utils
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "sql", "create_event_table.sql")
+
+
+def create_database(path: str) -> None:
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    conn.execute("INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) "
+                 "VALUES ('Christmas', 25, 12, 2024, 1)")
+    conn.commit()
+    conn.close()
+
+
+def time_model_calls(enabled: bool, calls: int) -> float:
+    metrics.METRICS_ENABLED = enabled
+    sql_utils.close_pool()
+    start = time.perf_counter()
+    for _ in range(calls):
+        calendar_model.clear_cache()
+        calendar_model.get_event_by_id(1)
+    return (time.perf_counter() - start) / calls
+
+
+def time_statements(enabled: bool, calls: int) -> float:
+    factory = metrics.InstrumentedConnection if enabled else sqlite3.Connection
+    conn = sqlite3.connect(":memory:", factory=factory)
+    start = time.perf_counter()
+    for _ in range(calls):
+        conn.execute("SELECT 1").fetchone()
+    conn.close()
+    return (time.perf_counter() - start) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Keep per-call logging out of the measurement
+    calendar_model.logger.setLevel("WARNING")
+    sql_utils.logger.setLevel("WARNING")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.db")
+        create_database(path)
+        sql_utils.DB_PATH = path
+
+        print(f"{'':<24}{'off (us)':>10}{'on (us)':>10}{'overhead':>10}")
+        for label, bench in (("get_event_by_id", time_model_calls), ("SELECT 1", time_statements)):
+            off = bench(False, args.calls) * 1e6
+            on = bench(True, args.calls) * 1e6
+            print(f"{label:<24}{off:>10.2f}{on:>10.2f}{on - off:>+10.2f}")
+        sql_utils.close_pool()
+
+
+if __name__ == "__main__":
+    main()
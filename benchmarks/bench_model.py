@@ -0,0 +1,126 @@
+"""
+Microbenchmarks of the calendar_model and stats_model functions against seeded SQLite databases.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_model --sizes 10000 100000 1000000
+    python -m benchmarks.bench_model --save baseline.json
+    python -m benchmarks.bench_model --compare baseline.json --threshold 0.25
+
+Each size gets a fresh copy of a database seeded with that many events (see
+benchmarks.common.seed_database; the seeded templates are kept between runs).
+Every function is called repeatedly for up to --seconds and the latency
+percentiles and calls per second are reported. Reads run before writes, and
+the read caches are off unless --cache is given, so reads measure SQLite.
+With --compare the exit status is 1 if any p50 or p95 grew past the threshold.
+"""
+import argparse
+from datetime import date, timedelta
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.common import measure, print_table, report_baseline, seeded_database, summarize
+from event_tracker.models import calendar_model, stats_model
+from event_tracker.utils import sql_utils
+from event_tracker.utils.recurrence import RecurrenceRule
+
+
+def benchmarks(rows: int, rng: random.Random) -> list[tuple[str, callable]]:
+    """Returns (name, call) pairs, reads first."""
+    def random_id() -> int:
+        return rng.randint(1, rows)
+
+    def random_day() -> date:
+        return date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 100))
+
+    def month_window() -> tuple[date, date]:
+        start = random_day()
+        return start, start + timedelta(days=30)
+
+    counter = iter(range(1, sys.maxsize))
+    delete_ids = iter(range(rows, 0, -1))
+    yearly = RecurrenceRule.from_dict({'frequency': 'yearly'})
+
+    def bulk() -> None:
+        batch = next(counter)
+        calendar_model.add_events_bulk(
+            {'event_name': f"bulk-{batch}-{i}", 'event_day': 1, 'event_month': 1, 'event_year': 2000,
+             'is_religious': False} for i in range(1000))
+
+    return [
+        ('get_event_by_id', lambda: calendar_model.get_event_by_id(random_id())),
+        ('get_event_by_id x500', lambda: [calendar_model.get_event_by_id(random_id()) for _ in range(500)]),
+        ('get_events_by_ids(500)', lambda: calendar_model.get_events_by_ids([random_id() for _ in range(500)])),
+        ('get_events_page(100)', lambda: calendar_model.get_events_page(100, random_id())),
+        ('get_events_between(30 days)', lambda: calendar_model.get_events_between(*month_window())),
+        ('get_events', calendar_model.get_events),
+        ('get_event_distances', lambda: calendar_model.get_event_distances(random_day())),
+        ('get_nearest_upcoming_events(10)', lambda: calendar_model.get_nearest_upcoming_events(random_day(), 10)),
+        ('get_distance_matrix(500)', lambda: calendar_model.get_distance_matrix([random_id() for _ in range(500)])),
+        ('get_upcoming_events(10)', lambda: calendar_model.get_upcoming_events(random_day(), 10)),
+        ('get_events_in_month', lambda: calendar_model.get_events_in_month(rng.randint(1950, 2049), rng.randint(1, 12))),
+        ('get_occurrences(1 year)', lambda: calendar_model.get_occurrences(date(2030, 1, 1), date(2030, 12, 31))),
+        ('search_events', lambda: calendar_model.search_events(str(random_id()))),
+        ('search_events(religious)', lambda: calendar_model.search_events(str(random_id()), is_religious=True)),
+        ('autocomplete_events', lambda: calendar_model.autocomplete_events(f"event {random_id() // 100}")),
+        ('get_changes(100)', lambda: calendar_model.get_changes(random_id(), 100)),
+        ('get_event_counts(day, 1 year)', lambda: stats_model.get_event_counts('day', date(2030, 1, 1), date(2030, 12, 31))),
+        ('get_event_counts(month)', lambda: stats_model.get_event_counts('month')),
+        ('get_event_counts(year)', lambda: stats_model.get_event_counts('year')),
+        ('add_event', lambda: calendar_model.add_event(1, 1, 2000, f"added-{next(counter)}", False)),
+        ('add_event(recurring)', lambda: calendar_model.add_event(1, 1, 2000, f"added-{next(counter)}", False, yearly)),
+        ('update_event_date', lambda: calendar_model.update_event_date(random_id(), 2, 2, 2002)),
+        ('delete_event', lambda: calendar_model.delete_event(next(delete_ids))),
+        ('add_events_bulk(1000)', bulk),
+    ]
+
+
+def run_size(rows: int, args: argparse.Namespace, tmp: str) -> dict[str, dict]:
+    sql_utils.close_pool()
+    sql_utils.DB_PATH = seeded_database(rows, os.path.join(tmp, f"events-{rows}.db"), args.seed)
+    calendar_model.clear_cache()
+    rng = random.Random(args.seed)
+
+    results = {}
+    for name, call in benchmarks(rows, rng):
+        if args.only and not any(pattern in name for pattern in args.only):
+            continue
+        key = f"{name}[{rows}]"
+        results[key] = summarize(measure(call, min_rounds=args.min_rounds, max_seconds=args.seconds))
+        if args.verbose:
+            print_table({key: results[key]})
+    sql_utils.close_pool()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="events seeded per run")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time budget per benchmark")
+    parser.add_argument("--min-rounds", type=int, default=3, help="calls timed even past the budget")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="run benchmarks whose name contains any of these")
+    parser.add_argument("--cache", action="store_true", help="leave the read caches on")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--verbose", action="store_true", help="print each result as it completes")
+    args = parser.parse_args()
+
+    # Keep per-call logging out of the measurement
+    calendar_model.logger.setLevel("WARNING")
+    sql_utils.logger.setLevel("WARNING")
+    calendar_model.EVENT_CACHE_ENABLED = args.cache
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            results.update(run_size(rows, args, tmp))
+    print_table(results)
+    sys.exit(report_baseline(results, args.save, args.compare, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
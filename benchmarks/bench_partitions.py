@@ -0,0 +1,82 @@
+"""
+Reads and writes with events in one table against events partitioned by year or decade.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_partitions --rows 100000 --schemes decade year
+
+A seeded database is timed as it is, then moved into partition files with
+event_tracker.utils.partitions.split_events and timed again under each scheme,
+with the caches off. Partitioning pays off for date ranges, which only read the
+partitions they cover, and costs a lookup in event_partitions for single events;
+get_events merges every partition, PARTITION_WORKERS of them at a time.
+"""
+import argparse
+from datetime import date
+import itertools
+import os
+import random
+import tempfile
+
+from benchmarks.common import measure, print_table, report_baseline, seeded_database, summarize
+from event_tracker.models import calendar_model
+from event_tracker.utils import partitions, sql_utils
+
+
+def run_scheme(label: str, rows: int, seconds: float) -> dict[str, dict]:
+    rng = random.Random(0)
+    names = itertools.count()
+    cases = {
+        'get_event_by_id': lambda: calendar_model.get_event_by_id(rng.randint(1, rows)),
+        'get_events_between (1 year)': lambda: calendar_model.get_events_between(date(1990, 1, 1), date(1990, 12, 31)),
+        'get_events_between (10 years)': lambda: calendar_model.get_events_between(date(1990, 1, 1), date(1999, 12, 31)),
+        'get_events': calendar_model.get_events,
+        'add_event': lambda: calendar_model.add_event(1, 1, rng.randint(1950, 2049), f"bench-{next(names)}", False),
+    }
+    return {f"{label}: {name}": summarize(measure(case, max_seconds=seconds)) for name, case in cases.items()}
+
+
+def split_events_into(store: partitions.PartitionedEventStore) -> None:
+    try:
+        partitions.split_events(store, batch_size=10000)
+    finally:
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="events in the seeded database")
+    parser.add_argument("--schemes", nargs="+", choices=sorted(partitions.SCHEMES), default=['decade', 'year'])
+    parser.add_argument("--seconds", type=float, default=2, help="time spent on each case")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    # Keep per-call logging and caching out of the measurement
+    calendar_model.logger.setLevel("WARNING")
+    calendar_model.EVENT_CACHE_ENABLED = False
+    calendar_model.WRITE_QUEUE_ENABLED = False
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        sql_utils.DB_PATH = seeded_database(args.rows, os.path.join(tmp, "events.db"))
+        results.update(run_scheme("one table", args.rows, args.seconds))
+
+        for scheme in args.schemes:
+            sql_utils.DB_PATH = seeded_database(args.rows, os.path.join(tmp, f"events-{scheme}.db"))
+            partitions.PARTITION_DIR = os.path.join(tmp, scheme)
+            store = partitions.PartitionedEventStore(partitions.PARTITION_DIR, scheme)
+            split_events_into(store)
+            partitions.EVENT_PARTITIONING = scheme
+            results.update(run_scheme(scheme, args.rows, args.seconds))
+            partitions.close_partitioned_store()
+            partitions.EVENT_PARTITIONING = 'none'
+        sql_utils.close_pool()
+
+    print_table(results)
+    raise SystemExit(report_baseline(results, args.save, args.compare, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
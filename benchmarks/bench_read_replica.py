@@ -0,0 +1,72 @@
+"""
+Reads served from the SQLite file against reads served from an in-memory replica.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_read_replica --rows 100000
+
+A seeded database is read with READ_REPLICA_ENABLED off and then on, with the
+caches off so every call reaches SQLite. The replica runs the same queries on a
+:memory: copy taken with the backup API. The last case adds an event before
+every read, so each read first replays that change from event_changes into the
+copy: the price of read-your-writes, which grows with the changes, not with
+the database.
+"""
+import argparse
+from datetime import date
+import itertools
+import os
+import random
+import tempfile
+
+from benchmarks.common import measure, print_table, report_baseline, seeded_database, summarize
+from event_tracker.models import calendar_model
+from event_tracker.utils import sql_utils
+
+
+def run_mode(label: str, rows: int, seconds: float) -> dict[str, dict]:
+    rng = random.Random(0)
+    names = itertools.count()
+
+    def write_then_read():
+        calendar_model.add_event(1, 1, 2030, f"bench-{label}-{next(names)}", False)
+        calendar_model.get_event_by_id(rng.randint(1, rows))
+
+    cases = {
+        'get_event_by_id': lambda: calendar_model.get_event_by_id(rng.randint(1, rows)),
+        'get_events_between (1 year)': lambda: calendar_model.get_events_between(date(1990, 1, 1), date(1990, 12, 31)),
+        'get_events': calendar_model.get_events,
+        'add_event + get_event_by_id': write_then_read,
+    }
+    return {f"{label}: {name}": summarize(measure(case, max_seconds=seconds)) for name, case in cases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="events in the seeded database")
+    parser.add_argument("--seconds", type=float, default=2, help="time spent on each case")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    # Keep per-call logging and caching out of the measurement
+    calendar_model.logger.setLevel("WARNING")
+    calendar_model.EVENT_CACHE_ENABLED = False
+    calendar_model.WRITE_QUEUE_ENABLED = False
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, enabled in (("file", False), ("replica", True)):
+            sql_utils.DB_PATH = seeded_database(args.rows, os.path.join(tmp, f"events-{label}.db"))
+            sql_utils.READ_REPLICA_ENABLED = enabled
+            results.update(run_mode(label, args.rows, args.seconds))
+            sql_utils.close_replica()
+            sql_utils.close_pool()
+
+    print_table(results)
+    raise SystemExit(report_baseline(results, args.save, args.compare, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
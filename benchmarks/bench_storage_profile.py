@@ -0,0 +1,125 @@
+"""
+Mixed read/write throughput of the events database under each storage profile.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_storage_profile --seconds 5 --readers 4
+
+For every profile a fresh database is created from sql/create_event_table.sql
+and seeded, then reader threads repeatedly list events while a writer thread
+inserts and soft deletes events, each in its own transaction.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from event_tracker.utils.sql_utils import STORAGE_PROFILES, ConnectionPool, get_storage_profile
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "sql", "create_event_table.sql")
+
+READ_QUERY = """
+    SELECT id, event_name, event_day, event_month, event_year, is_religious
+    FROM events ORDER BY id DESC LIMIT 200
+"""
+
+
+def create_database(path: str, profile: dict, seed: int) -> None:
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']};")
+    conn.executemany(
+        "INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) VALUES (?, ?, ?, ?, ?)",
+        ((f"seed-{i}", i % 28 + 1, i % 12 + 1, 2000 + i % 50, i % 2) for i in range(seed)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_profile(name: str, seconds: float, readers: int, seed: int) -> dict:
+    profile = get_storage_profile(name)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.db")
+        create_database(path, profile, seed)
+        pool = ConnectionPool(path, size=readers + 1, timeout=30, profile=profile)
+
+        stop = threading.Event()
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def reader():
+            done = 0
+            while not stop.is_set():
+                conn = pool.acquire()
+                try:
+                    conn.execute(READ_QUERY).fetchall()
+                    done += 1
+                except sqlite3.OperationalError:
+                    with lock:
+                        counts['errors'] += 1
+                finally:
+                    pool.release(conn)
+            with lock:
+                counts['reads'] += done
+
+        def writer():
+            done = 0
+            while not stop.is_set():
+                conn = pool.acquire()
+                try:
+                    cursor = conn.execute(
+                        "INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) "
+                        "VALUES (?, 1, 1, 2024, 0)", (f"bench-{done}",))
+                    conn.commit()
+                    conn.execute("UPDATE events SET deleted = TRUE WHERE id = ?", (cursor.lastrowid,))
+                    conn.commit()
+                    done += 1
+                except sqlite3.OperationalError:
+                    with lock:
+                        counts['errors'] += 1
+                finally:
+                    pool.release(conn)
+            with lock:
+                counts['writes'] += done
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads.append(threading.Thread(target=writer))
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        pool.close()
+
+    return {
+        'profile': name,
+        'reads_per_sec': counts['reads'] / elapsed,
+        'writes_per_sec': counts['writes'] / elapsed,
+        'errors': counts['errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each run")
+    parser.add_argument("--readers", type=int, default=4, help="number of reader threads")
+    parser.add_argument("--seed", type=int, default=10000, help="number of events to seed")
+    parser.add_argument("--profiles", nargs="+", default=sorted(STORAGE_PROFILES, reverse=True))
+    args = parser.parse_args()
+
+    print(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'errors':>8}")
+    for name in args.profiles:
+        result = run_profile(name, args.seconds, args.readers, args.seed)
+        print(f"{result['profile']:<10} {result['reads_per_sec']:>10.1f} "
+              f"{result['writes_per_sec']:>10.1f} {result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+HTTP throughput of the pre-fork server as the number of worker processes grows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_workers --workers 1 2 4 --clients 8 --seconds 5
+
+For every worker count the server is started on a fresh seeded database, then
+client processes request a page of events over keep-alive connections as fast
+as they can. The clients run in their own processes so the load generator is
+not limited by a single interpreter either.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.common import start_server
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SCHEMA_PATH = os.path.join(ROOT, "sql", "create_event_table.sql")
+
+
+def create_database(path: str, seed: int) -> None:
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    conn.executemany(
+        "INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) VALUES (?, ?, ?, ?, ?)",
+        ((f"seed-{i}", i % 28 + 1, i % 12 + 1, 2000 + i % 50, i % 2) for i in range(seed)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def client(port: int, path: str, seconds: float, results) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    done = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                done += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.close()
+    results.put((done, errors))
+
+
+def run(workers: int, clients: int, seconds: float, path: str, env: dict, tmp: str) -> dict:
+    process, port = start_server(workers, env, os.path.join(tmp, f"server-{workers}.log"))
+    try:
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=client, args=(port, path, seconds, results)) for _ in range(clients)]
+        for p in processes:
+            p.start()
+        totals = [results.get() for _ in processes]
+        for p in processes:
+            p.join()
+    finally:
+        process.terminate()
+        process.wait()
+    done = sum(count for count, _ in totals)
+    return {'requests/s': done / seconds, 'errors': sum(errors for _, errors in totals)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to compare")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client processes")
+    parser.add_argument("--seconds", type=float, default=5, help="duration of each run")
+    parser.add_argument("--seed", type=int, default=5000, help="number of events to seed")
+    parser.add_argument("--path", default="/api/get-events?limit=100", help="the URL requested")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} clients, GET {args.path}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.db")
+        create_database(path, args.seed)
+        env = dict(os.environ, DB_PATH=path, WEB_PRELOAD="true")
+        for workers in args.workers:
+            result = run(workers, args.clients, args.seconds, args.path, env, tmp)
+            print(f"workers={workers:<3} requests/s={result['requests/s']:>9,.0f} errors={result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
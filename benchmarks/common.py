@@ -0,0 +1,237 @@
+"""
+Shared helpers for the benchmark suite: seeded databases, latency statistics,
+result tables and baseline files.
+"""
+import json
+import os
+import random
+import re
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Optional
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SCHEMA_PATH = os.path.join(ROOT, "sql", "create_event_table.sql")
+
+# seeded databases are kept here between runs, since seeding a million events takes a while
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "event-tracker-bench")
+
+# share of seeded events that recur yearly
+RECURRING_SHARE = 0.01
+
+
+###################################################
+#
+# Databases
+#
+###################################################
+
+def _schema_version() -> int:
+    with open(SCHEMA_PATH) as f:
+        return int(re.search(r"PRAGMA user_version = (\d+)", f.read()).group(1))
+
+
+def seed_database(path: str, rows: int, seed: int = 0) -> None:
+    """
+    Creates a database from sql/create_event_table.sql holding `rows` events.
+
+    Events get unique names and dates spread over 1950-2049, and RECURRING_SHARE
+    of them a yearly recurrence rule. The same seed always produces the same data.
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    conn.executemany(
+        "INSERT INTO events (id, event_name, event_day, event_month, event_year, is_religious) VALUES (?, ?, ?, ?, ?, ?)",
+        ((i, f"event-{i}", rng.randint(1, 28), rng.randint(1, 12), rng.randint(1950, 2049), rng.random() < 0.2)
+         for i in range(1, rows + 1)),
+    )
+    recurring = rng.sample(range(1, rows + 1), int(rows * RECURRING_SHARE))
+    conn.executemany("INSERT INTO recurrence_rules (event_id, frequency) VALUES (?, 'yearly')",
+                     ((i,) for i in sorted(recurring)))
+    conn.commit()
+    conn.close()
+
+
+def seeded_database(rows: int, path: str, seed: int = 0, cache_dir: str = CACHE_DIR) -> str:
+    """
+    Writes a fresh copy of a seeded database to `path`, seeding it only the first
+    time a (rows, seed, schema version) combination is asked for.
+
+    Returns:
+        str: path.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    template = os.path.join(cache_dir, f"events-{rows}-seed{seed}-v{_schema_version()}.db")
+    if not os.path.exists(template):
+        partial = template + ".partial"
+        seed_database(partial, rows, seed)
+        os.replace(partial, template)
+    shutil.copyfile(template, path)
+    return path
+
+
+###################################################
+#
+# Measuring
+#
+###################################################
+
+def measure(func: Callable[[], object], min_rounds: int = 5, max_seconds: float = 2.0,
+            max_rounds: int = 10000, warmup: int = 1) -> list[float]:
+    """
+    Calls func repeatedly and returns the duration of each call in seconds.
+
+    Calls continue until max_seconds have passed (or max_rounds calls were
+    made), but at least min_rounds calls are always timed.
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    while len(samples) < min_rounds or (time.perf_counter() < deadline and len(samples) < max_rounds):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(sorted_samples: list[float], p: float) -> float:
+    """Returns the pth percentile (0-100) of sorted samples, by nearest rank."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, round(p / 100 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def summarize(samples: list[float], elapsed: Optional[float] = None, errors: int = 0) -> dict:
+    """
+    Summarizes latencies in seconds.
+
+    Args:
+        samples (list[float]): One latency per operation.
+        elapsed (float): Wall-clock time the operations took, for throughput when they
+            overlapped. Defaults to the sum of the latencies.
+        errors (int): Operations that failed.
+
+    Returns:
+        dict: count, errors, ops/s and the mean, p50, p95 and p99 latency in milliseconds.
+    """
+    ordered = sorted(samples)
+    elapsed = elapsed if elapsed is not None else sum(ordered)
+    return {
+        'count': len(ordered),
+        'errors': errors,
+        'ops/s': len(ordered) / elapsed if elapsed else 0.0,
+        'mean_ms': statistics.mean(ordered) * 1000 if ordered else 0.0,
+        'p50_ms': percentile(ordered, 50) * 1000,
+        'p95_ms': percentile(ordered, 95) * 1000,
+        'p99_ms': percentile(ordered, 99) * 1000,
+    }
+
+
+def print_table(results: dict[str, dict]) -> None:
+    print(f"{'benchmark':<44}{'count':>8}{'ops/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, result in results.items():
+        print(f"{name:<44}{result['count']:>8}{result['ops/s']:>11,.1f}{result['p50_ms']:>10.3f}"
+              f"{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}{result['errors']:>8}")
+
+
+###################################################
+#
+# Baselines. A baseline is a JSON file of results
+# from an earlier run; comparing flags benchmarks
+# whose latency grew by more than a threshold.
+#
+###################################################
+
+def save_baseline(results: dict[str, dict], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump({'python': sys.version.split()[0], 'cpus': os.cpu_count(), 'results': results}, f, indent=2, sort_keys=True)
+
+
+def compare_to_baseline(results: dict[str, dict], baseline: dict[str, dict], threshold: float = 0.25,
+                        metrics: tuple = ('p50_ms', 'p95_ms')) -> list[dict]:
+    """
+    Finds regressions against a baseline.
+
+    Args:
+        results (dict[str, dict]): This run's results by benchmark name.
+        baseline (dict[str, dict]): The baseline's results by benchmark name.
+        threshold (float): The allowed relative increase, e.g. 0.25 for 25%.
+        metrics (tuple): The latency fields compared.
+
+    Returns:
+        list[dict]: One entry (benchmark, metric, baseline, current, change) per regression.
+            Benchmarks missing from either side are skipped.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric in metrics:
+            if before.get(metric) and result[metric] > before[metric] * (1 + threshold):
+                regressions.append({'benchmark': name, 'metric': metric, 'baseline': before[metric],
+                                    'current': result[metric], 'change': result[metric] / before[metric] - 1})
+    return regressions
+
+
+def report_baseline(results: dict[str, dict], save: Optional[str], compare: Optional[str], threshold: float) -> int:
+    """
+    Saves and/or compares against a baseline file as the command line asked.
+
+    Returns:
+        int: The process exit status, 1 if any benchmark regressed.
+    """
+    status = 0
+    if compare:
+        with open(compare) as f:
+            regressions = compare_to_baseline(results, json.load(f)['results'], threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['benchmark']} {r['metric']}: {r['baseline']:.3f} -> {r['current']:.3f} ms "
+                  f"({r['change']:+.0%})")
+        print(f"{len(regressions)} regressions beyond {threshold:.0%} against {compare}")
+        status = 1 if regressions else 0
+    if save:
+        save_baseline(results, save)
+        print(f"Saved baseline to {save}")
+    return status
+
+
+###################################################
+#
+# Servers
+#
+###################################################
+
+def start_server(workers: int, env: dict, log_path: str) -> tuple[subprocess.Popen, int]:
+    """
+    Starts the pre-fork server on a free port and waits for every worker to serve.
+
+    Returns:
+        tuple[subprocess.Popen, int]: The master process and its port.
+    """
+    log = open(log_path, "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "event_tracker.utils.server", "--workers", str(workers),
+         "--host", "127.0.0.1", "--port", "0"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        with open(log_path) as f:
+            text = f.read()
+        match = re.search(r"Listening on 127\.0\.0\.1:(\d+)", text)
+        if match and len(re.findall(r"serving on", text)) >= workers:
+            return process, int(match.group(1))
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"Server did not start:\n{text}")
@@ -0,0 +1,149 @@
+"""
+Concurrent HTTP load test of the event API.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test --rows 100000 --workers 4 --clients 16 --seconds 10
+    python -m benchmarks.load_test --url http://localhost:5000 --clients 16
+    python -m benchmarks.load_test --save load-baseline.json
+    python -m benchmarks.load_test --compare load-baseline.json
+
+Without --url the pre-fork server is started on a fresh copy of a seeded
+database. Client processes then send a weighted mix of requests (see
+SCENARIO) over keep-alive connections as fast as the server answers them, and
+the latency percentiles and throughput of each route and of the whole run are
+reported. Clients run in their own processes so the load generator does not
+share an interpreter with, or get limited by, any single process.
+"""
+import argparse
+from datetime import date, timedelta
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.common import print_table, report_baseline, seeded_database, start_server, summarize
+
+
+# (name, weight, method, path template); templates are filled in by make_request
+SCENARIO = [
+    ('GET get-event-by-id', 40, 'GET', '/api/get-event-by-id/{id}'),
+    ('GET get-events page', 15, 'GET', '/api/get-events?limit=100&after={id}'),
+    ('GET events between', 15, 'GET', '/api/events?from={day}&to={day_plus_30}'),
+    ('GET events upcoming', 10, 'GET', '/api/events/upcoming?from={day}&n=10'),
+    ('GET events occurrences', 10, 'GET', '/api/events/occurrences?from={day}&to={day_plus_30}'),
+    ('POST create-event', 10, 'POST', '/api/create-event'),
+]
+
+
+def make_request(template: str, rng: random.Random, rows: int, client: int, counter: int) -> tuple[str, bytes]:
+    day = date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 100))
+    path = template.format(id=rng.randint(1, rows), day=day, day_plus_30=day + timedelta(days=30))
+    if template != '/api/create-event':
+        return path, b''
+    body = {'event_name': f"load-{os.getpid()}-{client}-{counter}", 'event_day': day.day,
+            'event_month': day.month, 'event_year': day.year, 'is_religious': False}
+    return path, json.dumps(body).encode()
+
+
+def client(index: int, host: str, port: int, rows: int, seconds: float, seed: int, results) -> None:
+    rng = random.Random(seed * 1000 + index)
+    names = [name for name, _, _, _ in SCENARIO]
+    weights = [weight for _, weight, _, _ in SCENARIO]
+    routes = {name: (method, template) for name, _, method, template in SCENARIO}
+    latencies = {name: [] for name in names}
+    errors = dict.fromkeys(names, 0)
+
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    counter = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        method, template = routes[name]
+        counter += 1
+        path, body = make_request(template, rng, rows, index, counter)
+        headers = {'Content-Type': 'application/json'} if body else {}
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body or None, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors[name] += 1
+            else:
+                latencies[name].append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            errors[name] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.close()
+    results.put((latencies, errors))
+
+
+def run(host: str, port: int, rows: int, clients: int, seconds: float, seed: int) -> dict[str, dict]:
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=client, args=(i, host, port, rows, seconds, seed, results))
+                 for i in range(clients)]
+    started = time.monotonic()
+    for p in processes:
+        p.start()
+    outcomes = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+    elapsed = time.monotonic() - started
+
+    summary = {}
+    everything, all_errors = [], 0
+    for name, _, _, _ in SCENARIO:
+        samples = [latency for latencies, _ in outcomes for latency in latencies[name]]
+        errors = sum(errors[name] for _, errors in outcomes)
+        summary[name] = summarize(samples, elapsed, errors)
+        everything += samples
+        all_errors += errors
+    summary['all requests'] = summarize(everything, elapsed, all_errors)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="load an already running server instead of starting one")
+    parser.add_argument("--rows", type=int, default=10000, help="events seeded, or present at --url")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="server worker processes")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client processes")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            path = seeded_database(args.rows, os.path.join(tmp, "events.db"), args.seed)
+            env = dict(os.environ, DB_PATH=path, WEB_PRELOAD="true", LOG_LEVEL="WARNING",
+                       LOG_LEVELS="event_tracker.utils.server=INFO")
+            server, port = start_server(args.workers, env, os.path.join(tmp, "server.log"))
+            host = "127.0.0.1"
+        try:
+            print(f"{os.cpu_count()} CPUs, {args.clients} clients for {args.seconds}s against {host}:{port}")
+            results = run(host, port, args.rows, args.clients, args.seconds, args.seed)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    print_table(results)
+    sys.exit(report_baseline(results, args.save, args.compare, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,5 +13,8 @@ else
     echo "Skipping database creation."
 fi
 
-# Start the Python application
-exec python app.py
+# Bring an existing database up to the current schema
+python -m event_tracker.utils.migrations
+
+# Start the Python application with a pool of worker processes (see WEB_* in .env)
+exec python -m event_tracker.utils.server
@@ -0,0 +1,329 @@
+import argparse
+from contextlib import contextmanager
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from event_tracker.utils.logger import configure_logger
+from event_tracker.utils.metrics import timed
+from event_tracker.utils.partitions import check_unpartitioned
+from event_tracker.utils.sql_utils import get_db_connection
+
+# Named after the module even when run with python -m, so LOG_LEVELS can refer to it
+logger = logging.getLogger("event_tracker.models.archive_model")
+configure_logger(logger)
+
+# soft deleted events are archived once they have been deleted for this many days
+ARCHIVE_RETENTION_DAYS = float(os.getenv("ARCHIVE_RETENTION_DAYS", "30"))
+
+# a separate database file for the archive, attached while archiving; empty keeps it in events_archive
+ARCHIVE_DB_PATH = os.getenv("ARCHIVE_DB_PATH", "")
+
+# events moved per transaction at most, and how long a transaction may hold the write
+# lock before the batches shrink
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_MAX_LOCK_MS = float(os.getenv("ARCHIVE_MAX_LOCK_MS", "50"))
+
+# pause between transactions, so queued writes from requests get the lock
+ARCHIVE_PAUSE_MS = float(os.getenv("ARCHIVE_PAUSE_MS", "20"))
+
+# free pages returned to the file system per incremental_vacuum step
+VACUUM_STEP_PAGES = int(os.getenv("VACUUM_STEP_PAGES", "1000"))
+
+
+###################################################
+#
+# Archiving. Soft deleted events still sit in the
+# events table and its unique name index. Old ones
+# are moved to events_archive in short transactions,
+# then the freed pages are returned a step at a time,
+# so requests never wait behind a long write.
+#
+###################################################
+
+SELECT_EXPIRED_QUERY = """
+    SELECT id FROM events WHERE deleted = TRUE AND deleted_at <= ? ORDER BY deleted_at LIMIT ?
+"""
+
+ARCHIVE_EVENTS_QUERY = """
+    INSERT OR REPLACE INTO {table} (id, event_name, event_day, event_month, event_year, is_religious, recurrence, deleted_at)
+    SELECT e.id, e.event_name, e.event_day, e.event_month, e.event_year, e.is_religious,
+           (SELECT json_object('frequency', r.frequency, 'interval', r.repeat_interval, 'weekday', r.weekday,
+                               'nth', r.nth, 'easter_offset', r.easter_offset, 'until', r.until)
+            FROM recurrence_rules r WHERE r.event_id = e.id),
+           e.deleted_at
+    FROM events e WHERE e.id IN (SELECT value FROM json_each(?))
+"""
+
+def _check_options(retention_days: Optional[float], batch_size: Optional[int]) -> None:
+    if retention_days is not None and (not isinstance(retention_days, (int, float)) or isinstance(retention_days, bool)
+                                       or retention_days < 0):
+        raise ValueError(f"Invalid retention: {retention_days!r} days. It must be a number of at least 0.")
+    if batch_size is not None and (not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size < 1):
+        raise ValueError(f"Invalid batch size: {batch_size!r}. It must be an integer of at least 1.")
+
+@contextmanager
+def _archive_connection(archive_path: str) -> Iterator[tuple[sqlite3.Connection, str]]:
+    """Yields a connection and the name of the archive table, attaching archive_path if one is given."""
+    with get_db_connection() as conn:
+        if not archive_path:
+            yield conn, "events_archive"
+            return
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        try:
+            # Same columns as the table in the main database
+            schema = conn.execute("SELECT sql FROM main.sqlite_master WHERE name = 'events_archive'").fetchone()[0]
+            conn.execute(schema.replace("CREATE TABLE events_archive", "CREATE TABLE IF NOT EXISTS archive.events_archive", 1))
+            yield conn, "archive.events_archive"
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute("DETACH DATABASE archive")
+
+def _archive_batch(conn: sqlite3.Connection, table: str, cutoff: float, size: int) -> int:
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute(SELECT_EXPIRED_QUERY, (cutoff, size))
+        ids = json.dumps([row[0] for row in cursor.fetchall()])
+        cursor.execute(ARCHIVE_EVENTS_QUERY.format(table=table), (ids,))
+        cursor.execute("DELETE FROM recurrence_rules WHERE event_id IN (SELECT value FROM json_each(?))", (ids,))
+        cursor.execute("DELETE FROM events WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+        moved = cursor.rowcount
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return moved
+
+def archive_deleted_events(retention_days: Optional[float] = None, batch_size: Optional[int] = None,
+                           archive_path: Optional[str] = None) -> dict[str, Any]:
+    """
+    Moves events soft deleted more than retention_days ago from events to the archive.
+
+    Each batch is one transaction. A batch that holds the write lock for longer than
+    ARCHIVE_MAX_LOCK_MS halves the size of the next one, and quick batches grow back
+    towards batch_size, so writes from requests wait for one short batch at most.
+
+    Args:
+        retention_days (float): How long deleted events stay. Defaults to ARCHIVE_RETENTION_DAYS.
+        batch_size (int): The most events moved per transaction. Defaults to ARCHIVE_BATCH_SIZE.
+        archive_path (str): A database file to archive into. Defaults to ARCHIVE_DB_PATH.
+
+    Returns:
+        dict[str, Any]: The number of events 'archived', the number of 'batches' and the
+            'longest_lock_seconds' any batch held the write lock.
+
+    Raises:
+        ValueError: If retention_days is negative or batch_size is not a positive integer.
+        RuntimeError: If events are partitioned.
+        sqlite3.Error: If there is an issue with the database.
+    """
+    check_unpartitioned("Archiving")
+    _check_options(retention_days, batch_size)
+    retention_days = ARCHIVE_RETENTION_DAYS if retention_days is None else retention_days
+    batch_size = batch_size or ARCHIVE_BATCH_SIZE
+    archive_path = ARCHIVE_DB_PATH if archive_path is None else archive_path
+
+    cutoff = time.time() - retention_days * 86400
+    max_lock = ARCHIVE_MAX_LOCK_MS / 1000
+    archived = batches = 0
+    longest = 0.0
+    size = batch_size
+    try:
+        with _archive_connection(archive_path) as (conn, table):
+            while True:
+                start = time.perf_counter()
+                moved = _archive_batch(conn, table, cutoff, size)
+                elapsed = time.perf_counter() - start
+                longest = max(longest, elapsed)
+                if moved == 0:
+                    break
+                archived += moved
+                batches += 1
+                if moved < size:
+                    break
+                if elapsed > max_lock:
+                    size = max(1, size // 2)
+                elif elapsed < max_lock / 4:
+                    size = min(batch_size, size * 2)
+                time.sleep(ARCHIVE_PAUSE_MS / 1000)
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    logger.info("Archived %d deleted events in %d batches", archived, batches)
+    return {'archived': archived, 'batches': batches, 'longest_lock_seconds': longest}
+
+def reclaim_space(step_pages: Optional[int] = None) -> dict[str, Any]:
+    """
+    Returns the database's free pages to the file system, VACUUM_STEP_PAGES at a time.
+
+    Only databases created in incremental auto_vacuum mode can do this; see
+    enable_incremental_vacuum(). In WAL mode the file itself shrinks at the next checkpoint.
+
+    Args:
+        step_pages (int): Pages freed per step. Defaults to VACUUM_STEP_PAGES.
+
+    Returns:
+        dict[str, Any]: The 'bytes_reclaimed', the 'free_pages' left, and whether the
+            database is 'incremental'.
+
+    Raises:
+        sqlite3.Error: If there is an issue with the database.
+    """
+    step_pages = step_pages or VACUUM_STEP_PAGES
+    try:
+        with get_db_connection() as conn:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            before = conn.execute("PRAGMA page_count").fetchone()[0]
+            incremental = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            while incremental and free:
+                # Each step is its own short write transaction. executescript() steps the
+                # statement to the end; execute() would stop after freeing a single page.
+                conn.executescript(f"PRAGMA incremental_vacuum({int(step_pages)});")
+                free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if free:
+                    time.sleep(ARCHIVE_PAUSE_MS / 1000)
+            after = conn.execute("PRAGMA page_count").fetchone()[0]
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    if not incremental:
+        logger.warning("%d free pages kept: the database is not in incremental auto_vacuum mode", free)
+    return {'bytes_reclaimed': (before - after) * page_size, 'free_pages': free, 'incremental': incremental}
+
+@timed
+def compact(retention_days: Optional[float] = None, batch_size: Optional[int] = None,
+            archive_path: Optional[str] = None) -> dict[str, Any]:
+    """
+    Archives old soft deleted events, then reclaims the space they used.
+
+    Args:
+        retention_days (float): How long deleted events stay. Defaults to ARCHIVE_RETENTION_DAYS.
+        batch_size (int): The most events moved per transaction. Defaults to ARCHIVE_BATCH_SIZE.
+        archive_path (str): A database file to archive into. Defaults to ARCHIVE_DB_PATH.
+
+    Returns:
+        dict[str, Any]: The results of archive_deleted_events() and reclaim_space(),
+            and the 'seconds' taken.
+
+    Raises:
+        ValueError: If retention_days or batch_size is invalid.
+        sqlite3.Error: If there is an issue with the database.
+    """
+    start = time.perf_counter()
+    report = archive_deleted_events(retention_days, batch_size, archive_path)
+    report.update(reclaim_space())
+    report['seconds'] = time.perf_counter() - start
+    logger.info("Compaction archived %d events and reclaimed %d bytes in %.2f s",
+                report['archived'], report['bytes_reclaimed'], report['seconds'])
+    return report
+
+def enable_incremental_vacuum() -> None:
+    """
+    Switches an existing database to incremental auto_vacuum mode by rebuilding it.
+
+    VACUUM rewrites the whole file and locks out every other connection while it
+    runs, so do this once with the app stopped.
+
+    Raises:
+        sqlite3.Error: If there is an issue with the database.
+    """
+    try:
+        with get_db_connection() as conn:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+    logger.info("Database switched to incremental auto_vacuum mode")
+
+
+###################################################
+#
+# Background compaction, for the admin route
+#
+###################################################
+
+_job_lock = threading.Lock()
+_job = None
+_last_report = None
+_last_error = None
+
+def _run_job(options: dict[str, Any]) -> None:
+    global _job, _last_report, _last_error
+    try:
+        report, error = compact(**options), None
+    except Exception as e:
+        report, error = None, str(e)
+        logger.error("Compaction failed: %s", error)
+    with _job_lock:
+        _last_report, _last_error, _job = report, error, None
+
+def start_compaction(retention_days: Optional[float] = None, batch_size: Optional[int] = None) -> bool:
+    """
+    Runs compact() on a background thread, unless this process is already compacting.
+
+    Args:
+        retention_days (float): How long deleted events stay. Defaults to ARCHIVE_RETENTION_DAYS.
+        batch_size (int): The most events moved per transaction. Defaults to ARCHIVE_BATCH_SIZE.
+
+    Returns:
+        bool: True if a compaction was started.
+
+    Raises:
+        ValueError: If retention_days or batch_size is invalid.
+    """
+    global _job
+    _check_options(retention_days, batch_size)
+    options = {'retention_days': retention_days, 'batch_size': batch_size}
+    with _job_lock:
+        if _job is not None:
+            return False
+        _job = threading.Thread(target=_run_job, args=(options,), name="compaction", daemon=True)
+        _job.start()
+    return True
+
+def get_compaction_status() -> dict[str, Any]:
+    """
+    Reports on this process's compactions.
+
+    Returns:
+        dict[str, Any]: Whether one is 'running', the 'last_report' of the last one to
+            finish, and its 'error' if it failed.
+    """
+    with _job_lock:
+        return {'running': _job is not None, 'last_report': _last_report, 'error': _last_error}
+
+def wait_for_compaction(timeout: Optional[float] = None) -> None:
+    """Waits for a running background compaction to finish."""
+    with _job_lock:
+        job = _job
+    if job is not None:
+        job.join(timeout)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Archive old soft deleted events and reclaim their space.")
+    parser.add_argument("--retention-days", type=float, help=f"archive events deleted this long ago (default {ARCHIVE_RETENTION_DAYS:g})")
+    parser.add_argument("--batch-size", type=int, help=f"events moved per transaction at most (default {ARCHIVE_BATCH_SIZE})")
+    parser.add_argument("--archive-db", help="archive into this database file instead of the events_archive table")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="first rebuild the database so freed pages can be reclaimed; stop the app before using this")
+    args = parser.parse_args(argv)
+
+    if args.enable_incremental_vacuum:
+        enable_incremental_vacuum()
+    report = compact(args.retention_days, args.batch_size, args.archive_db)
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,390 @@
 from dataclasses import dataclass
+from datetime import date
+import hashlib
+from itertools import islice
+import json
 import logging
+import os
 import sqlite3
-from typing import Any
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional, TYPE_CHECKING
 
-from event_tracker.utils.sql_utils import get_db_connection
+from event_tracker.utils.cache import LRUCache
+from event_tracker.utils.sql_utils import get_change_watch, get_db_connection, get_read_connection, mark_replica_stale
 from event_tracker.utils.logger import configure_logger
+from event_tracker.utils.metrics import REGISTRY, Sample, timed
+from event_tracker.utils.partitions import check_unpartitioned, get_partitioned_store, PartitionedEventStore
+from event_tracker.utils.prefix_index import PrefixIndex, tokenize
+from event_tracker.utils.recurrence import RecurrenceRule
+from event_tracker.utils.upcoming_index import UpcomingIndex
+from event_tracker.utils.write_queue import WriteQueue
+
+if TYPE_CHECKING:
+    import numpy as np
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
-@dataclass
+# upper bound for a single page of get_events_page()
+MAX_PAGE_SIZE = 1000
+
+# upper bound for the IDs passed to get_events_by_ids()
+MAX_BATCH_SIZE = 1000
+# IDs bound to each IN (...) query, within SQLite's smallest default limit on ? parameters
+ID_QUERY_CHUNK_SIZE = 999
+
+# number of rows handed to each executemany() call by add_events_bulk()
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "500"))
+
+INSERT_EVENT_QUERY = """
+    INSERT INTO events (event_name, event_day, event_month, event_year, is_religious)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+SET_RECURRENCE_QUERY = """
+    INSERT OR REPLACE INTO recurrence_rules (event_id, frequency, repeat_interval, weekday, nth, easter_offset, until)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# read-through caches for get_event_by_id() and get_events()
+EVENT_CACHE_ENABLED = os.getenv("EVENT_CACHE_ENABLED", "true").lower() == "true"
+EVENT_CACHE_SIZE = int(os.getenv("EVENT_CACHE_SIZE", "1024"))
+EVENT_CACHE_TTL = float(os.getenv("EVENT_CACHE_TTL", "300"))
+# look for writes made by other processes, such as other server workers, before serving from the caches
+EVENT_CACHE_CHECK_WRITES = os.getenv("EVENT_CACHE_CHECK_WRITES", "true").lower() == "true"
+
+# largest number of events get_distance_matrix() will compare at once
+MAX_DISTANCE_MATRIX_SIZE = int(os.getenv("MAX_DISTANCE_MATRIX_SIZE", "2000"))
+
+# upper bound for the results of search_events() and autocomplete_events()
+MAX_SEARCH_RESULTS = 100
+
+# years of expanded recurring event occurrences kept in memory
+RECURRENCE_CACHE_YEARS = int(os.getenv("RECURRENCE_CACHE_YEARS", "64"))
+
+# send add_event, delete_event and update_event_date through the group-commit writer
+WRITE_QUEUE_ENABLED = os.getenv("WRITE_QUEUE_ENABLED", "true").lower() == "true"
+
+# upper bound for a single page of get_changes()
+MAX_CHANGES_PAGE = 1000
+# longest get_changes() may wait for a change, in seconds
+MAX_CHANGES_WAIT = float(os.getenv("MAX_CHANGES_WAIT", "30"))
+# how often a waiting get_changes() looks for changes written by other processes, in seconds
+CHANGES_POLL_INTERVAL = float(os.getenv("CHANGES_POLL_INTERVAL", "1"))
+
+
+###################################################
+#
+# Caching. Writes made through this module bump
+# _events_version and invalidate the touched event.
+# Before a cache is used, the database is checked for
+# commits from other processes; if the change log
+# holds any this process did not make, every cache
+# is dropped.
+#
+###################################################
+
+_event_cache = LRUCache(EVENT_CACHE_SIZE, EVENT_CACHE_TTL)
+
+_events_lock = threading.Lock()
+_events_changed = threading.Condition(_events_lock)  # notified when _events_version changes
+_events_version = 0
+_events_snapshot = None  # (version, expires at, etag, events)
+_events_stats = {'hits': 0, 'misses': 0}
+_date_arrays = None  # (version, expires at, ids, dates)
+_indexes = {}  # name -> (expires at, index) for the in-memory indexes, updated in place by writes
+_recurring_events = None  # (version, expires at, [(event, rule, start)])
+_occurrence_years = LRUCache(RECURRENCE_CACHE_YEARS, EVENT_CACHE_TTL)  # (version, year) -> occurrences
+_change_listeners = []  # called after every write, see add_change_listener()
+_seen_changes = None  # newest event_changes version the caches account for, None until first checked
+_own_changes = {}  # event_changes version before -> after each write of this process, see _write()
+
+def _invalidate(event_id: Optional[int] = None) -> None:
+    """Drops cached data made stale by a write, optionally for a single event."""
+    global _events_version, _events_snapshot, _date_arrays
+    # Before the version moves on, so nothing read from the old copy is cached as current
+    mark_replica_stale()
+    with _events_lock:
+        _events_version += 1
+        _events_snapshot = None
+        _date_arrays = None
+        if event_id is not None:
+            _event_cache.invalidate(event_id)
+        _events_changed.notify_all()
+    for listener in list(_change_listeners):
+        listener()
+
+def _reindex(event_id: int, changes: Optional[dict[str, Any]]) -> None:
+    """
+    Applies a write to the in-memory indexes that have been built.
+
+    Args:
+        event_id (int): The event that was written.
+        changes (dict[str, Any]): The new fields of the event, or None if it was deleted.
+    """
+    with _events_lock:
+        for name, (_, index) in list(_indexes.items()):
+            if changes is None:
+                index.remove(event_id)
+                continue
+            event = index.get(event_id)
+            if event is None and 'event_name' not in changes:
+                # The index does not know this event, so it cannot be patched
+                del _indexes[name]
+                continue
+            index.add({**(event or {}), **changes, 'id': event_id})
+
+def _drop_index() -> None:
+    with _events_lock:
+        _indexes.clear()
+
+def _check_external_writes() -> None:
+    """Drops every cache if another process may have written to the events since the last check."""
+    global _seen_changes
+    if not (EVENT_CACHE_ENABLED and EVENT_CACHE_CHECK_WRITES):
+        return
+    store = get_partitioned_store()
+    watch = get_change_watch()
+    try:
+        if not watch.poll([store.path(partition) for partition in store.partitions()] if store is not None else ()):
+            return
+        # Partitions keep no change log, so any commit to them counts as foreign
+        mark = watch.high_water_mark() if store is None else None
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    with _events_lock:
+        if mark is not None:
+            while _seen_changes in _own_changes:
+                _seen_changes = _own_changes.pop(_seen_changes)
+            if mark == _seen_changes:
+                return
+            _seen_changes = mark
+            for before in [before for before in _own_changes if before < mark]:
+                del _own_changes[before]
+    logger.debug("Events changed in another process, dropping the caches")
+    _event_cache.clear(reset_stats=False)
+    _drop_index()
+    _invalidate()
+
+def _change_mark(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM event_changes").fetchone()[0]
+
+def clear_cache() -> None:
+    """Empties every cache and resets the counters."""
+    global _seen_changes
+    with _events_lock:
+        _seen_changes = None
+        _own_changes.clear()
+    _event_cache.clear()
+    _occurrence_years.clear()
+    _invalidate()
+    _drop_index()
+    with _events_lock:
+        _events_stats['hits'] = 0
+        _events_stats['misses'] = 0
+
+def get_cache_stats() -> dict[str, Any]:
+    """
+    Returns the cache counters.
+
+    Returns:
+        dict[str, Any]: 'enabled', plus hit/miss counters for the 'events' (by ID) cache
+            and the 'event_list' cache.
+    """
+    with _events_lock:
+        list_stats = dict(_events_stats)
+        list_stats['version'] = _events_version
+    return {'enabled': EVENT_CACHE_ENABLED, 'events': _event_cache.stats(), 'event_list': list_stats}
+
+def _collect_metrics() -> list[Sample]:
+    samples = []
+    cache_stats = get_cache_stats()
+    for cache in ('events', 'event_list'):
+        for name in ('hits', 'misses'):
+            samples.append((f'event_cache_{name}_total', 'counter', f'Event cache {name}.',
+                            {'cache': cache}, cache_stats[cache][name]))
+    samples.append(('event_cache_entries', 'gauge', 'Events held in the by-ID cache.', {}, cache_stats['events']['size']))
+
+    write_stats = _write_queue.stats()
+    samples += [
+        ('write_batches_total', 'counter', 'Group commits made by the writer thread.', {}, write_stats['batches']),
+        ('write_operations_total', 'counter', 'Writes committed through the writer thread.', {}, write_stats['operations']),
+        ('write_operations_failed_total', 'counter', 'Queued writes that failed.', {}, write_stats['failed']),
+        ('write_queue_wait_seconds_total', 'counter', 'Time writes spent waiting in the queue.', {},
+         write_stats['mean_queue_ms'] * write_stats['operations'] / 1000),
+        ('write_commit_seconds_total', 'counter', 'Time spent committing write batches.', {},
+         write_stats['mean_commit_ms'] * write_stats['batches'] / 1000),
+        ('write_batch_size_max', 'gauge', 'Largest group commit so far.', {}, write_stats['max_batch_size']),
+        ('write_queue_wait_seconds_max', 'gauge', 'Longest time a write waited in the queue.', {},
+         write_stats['max_queue_ms'] / 1000),
+        ('write_queue_depth', 'gauge', 'Writes waiting for the writer thread.', {}, write_stats['queued']),
+    ]
+    return samples
+
+REGISTRY.register_collector(_collect_metrics)
+
+EVENT_FIELDS = ('id', 'event_name', 'event_day', 'event_month', 'event_year', 'is_religious')
+
+@dataclass(frozen=True)
 class Event:
+    # Slots instead of a per-instance __dict__ (dataclass(slots=True) needs Python 3.10)
+    __slots__ = EVENT_FIELDS
+
     id: int
     event_name: str
     event_day: int
     event_month: int
     event_year: int
-    is_religious: bool 
+    is_religious: bool
 
     def __post_init__(self):
         if self.event_day < 0 or self.event_month < 0 or self.event_year < 0:
             raise ValueError("Date must be a positive value.")
 
-def add_event(event_day, event_month, event_year, event_name, is_religious) -> None :
+    @classmethod
+    def from_row(cls, row: tuple) -> 'Event':
+        """Builds an Event from a row starting with the EVENT_FIELDS columns."""
+        return cls(row[0], row[1], row[2], row[3], row[4], row[5])
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'id': self.id, 'event_name': self.event_name, 'event_day': self.event_day,
+                'event_month': self.event_month, 'event_year': self.event_year, 'is_religious': self.is_religious}
+
+def event_row_factory(cursor: sqlite3.Cursor, row: tuple) -> Event:
+    """A sqlite3 row factory that returns Event objects for EVENT_FIELDS queries."""
+    return Event.from_row(row)
+
+class EventColumns:
+    """
+    A list of events stored as one tuple per field (struct of arrays) instead of
+    one object per event.
+
+    Building it from query rows is a single transpose, and to_json() serializes the
+    columns without creating per-event objects. The JSON is memoized, which is safe
+    because the columns are immutable.
+    """
+    __slots__ = EVENT_FIELDS + ('_json',)
+
+    def __init__(self, id: tuple, event_name: tuple, event_day: tuple, event_month: tuple,
+                 event_year: tuple, is_religious: tuple):
+        self.id = id
+        self.event_name = event_name
+        self.event_day = event_day
+        self.event_month = event_month
+        self.event_year = event_year
+        self.is_religious = is_religious
+        self._json = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> 'EventColumns':
+        """Builds the columns from (id, event_name, event_day, event_month, event_year, is_religious) rows."""
+        columns = tuple(zip(*rows))
+        return cls(*columns) if columns else cls((), (), (), (), (), ())
+
+    def _columns(self) -> tuple:
+        return (self.id, self.event_name, self.event_day, self.event_month, self.event_year, self.is_religious)
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def __getitem__(self, index: int) -> Event:
+        return Event.from_row([column[index] for column in self._columns()])
+
+    def __iter__(self) -> Iterator[Event]:
+        return map(Event.from_row, zip(*self._columns()))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, EventColumns):
+            return NotImplemented
+        return self._columns() == other._columns()
+
+    def to_records(self) -> list[dict[str, Any]]:
+        """Returns the events as a list of dicts."""
+        return [dict(zip(EVENT_FIELDS, row)) for row in zip(*self._columns())]
+
+    def to_json(self, orient: str = 'records') -> str:
+        """
+        Serializes the events to JSON.
+
+        Args:
+            orient (str): 'records' for a list of event objects, or 'columns' for an object
+                mapping each field to the list of its values.
+
+        Returns:
+            str: The JSON text.
+        """
+        cached = self._json.get(orient)
+        if cached is not None:
+            return cached
+        if orient == 'columns':
+            text = json.dumps(dict(zip(EVENT_FIELDS, self._columns())))
+        elif orient == 'records':
+            text = json.dumps(self.to_records())
+        else:
+            raise ValueError(f"Invalid orient: {orient}. Expected 'records' or 'columns'.")
+        self._json[orient] = text
+        return text
+
+###################################################
+#
+# Writes. Single event mutations are queued to one
+# writer thread that commits them in groups (see
+# WriteQueue), so concurrent writers neither fight
+# over the database lock nor pay a commit each.
+#
+###################################################
+
+_write_queue = WriteQueue(lambda: get_db_connection())
+
+def _write(operation: Callable[[sqlite3.Connection], Any]) -> Any:
+    # Runs a write operation in a group commit, or in its own transaction when the queue is disabled
+    pending = []
+    if not (EVENT_CACHE_ENABLED and EVENT_CACHE_CHECK_WRITES):
+        logged = operation
+    else:
+        # Note the change log entries this write adds, so _check_external_writes() knows them as ours
+        def logged(conn: sqlite3.Connection) -> Any:
+            before = _change_mark(conn)
+            result = operation(conn)
+            pending.append((before, _change_mark(conn)))
+            return result
+
+    if WRITE_QUEUE_ENABLED:
+        result = _write_queue.execute(logged)
+    else:
+        with get_db_connection() as conn:
+            result = logged(conn)
+            conn.commit()
+    # Only once committed, so a rolled back write is never taken for ours
+    with _events_lock:
+        for before, after in pending:
+            if after != before and (_seen_changes is None or before >= _seen_changes):
+                _own_changes[before] = after
+    return result
+
+def get_write_stats() -> dict[str, Any]:
+    """
+    Returns the counters of the group-commit writer.
+
+    Returns:
+        dict[str, Any]: See WriteQueue.stats(), plus whether the queue is 'enabled'.
+    """
+    return {'enabled': WRITE_QUEUE_ENABLED, **_write_queue.stats()}
+
+def _validate_date(event_day, event_month, event_year) -> None:
+    if not isinstance(event_day, (int)) or event_day <= 0:
+        raise ValueError(f"Invalid day: {event_day}. Day must be a positive number.")
+    if not isinstance(event_month, (int)) or event_month <= 0:
+        raise ValueError(f"Invalid month: {event_month}. Month must be a positive number.")
+    if not isinstance(event_year, (int)) or event_year <= 0:
+        raise ValueError(f"Invalid year: {event_year}. Year must be a positive number.")
+
+@timed
+def add_event(event_day, event_month, event_year, event_name, is_religious,
+              recurrence: Optional[RecurrenceRule] = None) -> None :
     """
     Adds a new event to the database.
 
@@ -32,37 +394,176 @@ def add_event(event_day, event_month, event_year, event_name, is_religious) -> N
         event_year (int): The year of the event.
         event_name (str): The name of the event.
         is_religious (bool): Whether the event is religious.
+        recurrence (RecurrenceRule): How the event repeats, starting from its date.
+            Defaults to a one-off event.
 
     Raises:
         ValueError: If the event name already exists or if the date is invalid.
         sqlite3.Error: If there is an issue with the database.
     """
-    if not isinstance(event_day, (int)) or event_day <= 0:
-        raise ValueError(f"Invalid day: {event_day}. Day must be a positive number.")
-    if not isinstance(event_month, (int)) or event_month <= 0:
-        raise ValueError(f"Invalid month: {event_month}. Month must be a positive number.")
-    if not isinstance(event_year, (int)) or event_year <= 0:
-        raise ValueError(f"Invalid year: {event_year}. Year must be a positive number.")
-    
+    _validate_date(event_day, event_month, event_year)
+    if recurrence is not None:
+        check_unpartitioned("Recurrence")
+        _validate_start(event_day, event_month, event_year)
+
+    def insert(conn: sqlite3.Connection) -> int:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(INSERT_EVENT_QUERY, (event_name, event_day, event_month, event_year, is_religious))
+        except sqlite3.IntegrityError:
+            logger.error("Duplicate event name: %s", event_name)
+            raise ValueError(f"Event with name '{event_name}' already exists")
+        if recurrence is not None:
+            cursor.execute(SET_RECURRENCE_QUERY, (cursor.lastrowid,) + recurrence.to_row())
+        return cursor.lastrowid
+
+    store = get_partitioned_store()
+    try:
+        if store is None:
+            id = _write(insert)
+        else:
+            try:
+                id = store.add(event_name, event_day, event_month, event_year, is_religious)
+            except sqlite3.IntegrityError:
+                logger.error("Duplicate event name: %s", event_name)
+                raise ValueError(f"Event with name '{event_name}' already exists")
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    _invalidate()
+    _reindex(id, {'event_name': event_name, 'event_day': event_day, 'event_month': event_month,
+                  'event_year': event_year, 'is_religious': is_religious})
+    logger.info("Event successfully added to the database: %s", event_name)
+
+def _validate_start(event_day: int, event_month: int, event_year: int) -> date:
+    try:
+        return date(event_year, event_month, event_day)
+    except ValueError:
+        raise ValueError(f"Invalid date: {event_year}-{event_month:02d}-{event_day:02d}. "
+                         "A recurring event must start on a real date.")
+
+def _to_int(value: Any, field: str) -> int:
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid {field}: {value}.")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {field}: {value!r}. Must be an integer.")
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ('true', '1', 'yes'):
+        return True
+    if isinstance(value, str) and value.strip().lower() in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"Invalid is_religious: {value!r}. Must be a boolean.")
+
+def _bulk_row(record: Any) -> tuple:
+    """Validates one imported record and converts it to INSERT parameters."""
+    if not isinstance(record, dict):
+        raise ValueError("Each event must be an object.")
+    event_name = record.get('event_name')
+    if not isinstance(event_name, str) or not event_name.strip():
+        raise ValueError("event_name is required.")
+    event_day = _to_int(record.get('event_day'), 'day')
+    event_month = _to_int(record.get('event_month'), 'month')
+    event_year = _to_int(record.get('event_year'), 'year')
+    _validate_date(event_day, event_month, event_year)
+    is_religious = _to_bool(record.get('is_religious'))
+    return (event_name, event_day, event_month, event_year, is_religious)
+
+def _insert_batch(cursor: sqlite3.Cursor, rows: list[tuple[int, tuple]], errors: list[dict[str, Any]]) -> int:
+    """
+    Inserts a batch with executemany(), falling back to one row at a time
+    if any row in the batch violates the unique event_name constraint.
+    """
+    cursor.execute("SAVEPOINT bulk_batch")
+    try:
+        cursor.executemany(INSERT_EVENT_QUERY, [params for _, params in rows])
+        cursor.execute("RELEASE bulk_batch")
+        return len(rows)
+    except sqlite3.IntegrityError:
+        cursor.execute("ROLLBACK TO bulk_batch")
+
+    inserted = 0
+    for index, params in rows:
+        try:
+            cursor.execute(INSERT_EVENT_QUERY, params)
+            inserted += 1
+        except sqlite3.IntegrityError:
+            errors.append({'index': index, 'event_name': params[0],
+                           'error': f"Event with name '{params[0]}' already exists"})
+    cursor.execute("RELEASE bulk_batch")
+    return inserted
+
+@timed
+def add_events_bulk(events: Iterable[dict[str, Any]], batch_size: int = BULK_INSERT_BATCH_SIZE) -> dict[str, Any]:
+    """
+    Adds many events to the database in a single transaction.
+
+    The input is consumed lazily and inserted batch_size rows at a time with
+    executemany(). Rows that fail validation or whose event_name already exists
+    are skipped and reported; every other row is committed together. The write lock
+    is held while the input is consumed, so request bodies are read in full first
+    (see import_utils.spool).
+
+    Args:
+        events (Iterable[dict[str, Any]]): Records with event_name, event_day, event_month,
+            event_year and is_religious. Numeric and boolean fields may be given as strings.
+        batch_size (int): The number of rows per executemany() call.
+
+    Returns:
+        dict[str, Any]: 'inserted', the number of events added, and 'errors', a list of
+            {'index', 'event_name', 'error'} entries for the rows that were skipped.
+
+    Raises:
+        ValueError: If the batch size is invalid, or the input itself raises it (e.g. malformed
+            JSON), in which case nothing is committed.
+        RuntimeError: If events are partitioned.
+        sqlite3.Error: If there is an issue with the database.
+    """
+    check_unpartitioned("Bulk import")
+    if not isinstance(batch_size, int) or batch_size <= 0:
+        raise ValueError(f"Invalid batch size: {batch_size}. Batch size must be a positive number.")
+
+    inserted = 0
+    errors = []
+    records = enumerate(events)
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO events (event_name, event_day, event_month, event_year, is_religious)
-                VALUES (?, ?, ?, ?, ?)
-            """, (event_name, event_day, event_month, event_year, is_religious))
+            cursor.execute("BEGIN IMMEDIATE")
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+                rows = []
+                for index, record in batch:
+                    try:
+                        rows.append((index, _bulk_row(record)))
+                    except ValueError as e:
+                        name = record.get('event_name') if isinstance(record, dict) else None
+                        errors.append({'index': index, 'event_name': name, 'error': str(e)})
+                if rows:
+                    inserted += _insert_batch(cursor, rows, errors)
             conn.commit()
+            _invalidate()
+            _drop_index()
 
-            logger.info("Event successfully added to the database: %s", event)
-
-    except sqlite3.IntegrityError:
-        logger.error("Duplicate event name: %s", event)
-        raise ValueError(f"Event with name '{event}' already exists")
+        errors.sort(key=lambda error: error['index'])
+        logger.info("Bulk import added %d events, skipped %d", inserted, len(errors))
+        return {'inserted': inserted, 'errors': errors}
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
 
+@timed
 def delete_event(id: int) -> None:
     """
     Marks an event as deleted in the database.
@@ -73,65 +574,260 @@ def delete_event(id: int) -> None:
     Raises:
         ValueError: If the event is not found or has already been deleted.
     """
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT deleted FROM events WHERE id = ?", (id,))
-            try:
-                deleted = cursor.fetchone()[0]
-                if deleted:
-                    logger.info("Event with ID %s has already been deleted", id)
-                    raise ValueError(f"Event with ID {id} has been deleted")
-            except TypeError:
-                logger.info("Event with ID %s not found", id)
-                raise ValueError(f"Event with ID {id} not found")
-
-            cursor.execute("UPDATE events SET deleted = TRUE WHERE id = ?", (id,))
-            conn.commit()
+    def mark_deleted(conn: sqlite3.Connection) -> None:
+        cursor = conn.cursor()
+        cursor.execute("SELECT deleted FROM events WHERE id = ?", (id,))
+        try:
+            deleted = cursor.fetchone()[0]
+            if deleted:
+                logger.info("Event with ID %s has already been deleted", id)
+                raise ValueError(f"Event with ID {id} has been deleted")
+        except TypeError:
+            logger.info("Event with ID %s not found", id)
+            raise ValueError(f"Event with ID {id} not found")
 
-            logger.info("Event with ID %s marked as deleted.", id)
+        cursor.execute("UPDATE events SET deleted = TRUE WHERE id = ?", (id,))
 
+    store = get_partitioned_store()
+    try:
+        if store is None:
+            _write(mark_deleted)
+        else:
+            row = _get_partitioned_row(store, id)
+            if row[6]:
+                logger.info("Event with ID %s has already been deleted", id)
+                raise ValueError(f"Event with ID {id} has been deleted")
+            store.mark_deleted(id, store.partition_of(row[4]))
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
-    
-def get_events() -> dict[str, Any]:
+
+    _invalidate(id)
+    _reindex(id, None)
+    logger.info("Event with ID %s marked as deleted.", id)
+
+def _get_partitioned_row(store: PartitionedEventStore, id: int) -> tuple:
+    # The event's row, deleted or not, from its partition
+    row = store.get(id)
+    if row is None:
+        logger.info("Event with ID %s not found", id)
+        raise ValueError(f"Event with ID {id} not found")
+    return row
+
+def _row_to_dict(row: tuple) -> dict[str, Any]:
+    return {
+        'id': row[0],
+        'event_name': row[1],
+        'event_day': row[2],
+        'event_month': row[3],
+        'event_year': row[4],
+        'is_religious': row[5]
+    }
+
+def get_events() -> list[Event]:
     """
     Retrieves all events from the database.
 
     Returns:
-        dict[str, Any]: A dictionary containing the events.
+        list[Event]: The live events.
+    """
+    return list(get_events_with_etag()[0])
+
+@timed
+def get_events_with_etag() -> tuple[EventColumns, Optional[str]]:
+    """
+    Retrieves all events in columnar form, together with an ETag identifying that exact list.
+
+    The columns are served from cache until an event is written, by this process or
+    another, or EVENT_CACHE_TTL expires. The ETag is the event_changes high-water mark
+    read before the list, followed by a hash of the serialized list. Every process and
+    every rebuild serving the same events at the same version gives the same ETag,
+    and a client holding the current one has an up to date copy.
+
+    Returns:
+        tuple[EventColumns, Optional[str]]: The events, and their ETag, or None
+            if caching is disabled.
     """
+    global _events_snapshot
+    _check_external_writes()
+    if EVENT_CACHE_ENABLED:
+        with _events_lock:
+            snapshot = _events_snapshot
+            if snapshot is not None and snapshot[0] == _events_version and snapshot[1] > time.monotonic():
+                _events_stats['hits'] += 1
+                return snapshot[3], snapshot[2]
+            _events_stats['misses'] += 1
+            version = _events_version
+
     query = """
         SELECT id, event_name, event_day, event_month, event_year, is_religious
         FROM events WHERE deleted = false
     """
 
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            rows = cursor.fetchall()
+        store = get_partitioned_store()
+        if store is not None:
+            # Partitions keep no change log, so the hash alone identifies the list
+            change_version = None
+            rows = list(store.scan())
+        else:
+            with get_read_connection() as conn:
+                # Read first, so a write landing in between gives a newer version next time
+                change_version = _change_mark(conn)
+                cursor = conn.cursor()
+                cursor.execute(query)
+                rows = cursor.fetchall()
 
-        leaderboard = []
-        for row in rows:
-            event = {
-                'id': row[0],
-                'event_name': row[1],
-                'event_day': row[2],
-                'event_month': row[3],
-                'event_year': row[4],
-                'is_religious': row[5]
-            }
-            leaderboard.append(event)
+        leaderboard = EventColumns.from_rows(rows)
 
-        logger.info("Events retrieved successfully")
-        return leaderboard
+        logger.debug("Events retrieved successfully")
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
-    
+
+    if not EVENT_CACHE_ENABLED:
+        return leaderboard, None
+
+    # Serializing here also warms the columns JSON for the first response
+    etag = hashlib.blake2b(leaderboard.to_json('columns').encode(), digest_size=12).hexdigest()
+    if change_version is not None:
+        etag = f"{change_version}-{etag}"
+    with _events_lock:
+        # A write that landed while we were reading makes this list stale
+        if version == _events_version:
+            _events_snapshot = (version, time.monotonic() + EVENT_CACHE_TTL, etag, leaderboard)
+    return leaderboard, etag
+
+@timed
+def get_events_page(limit: int, after: int = 0) -> tuple[list[dict[str, Any]], Optional[int]]:
+    """
+    Retrieves one page of live events ordered by ID.
+
+    Pages are addressed by the last ID of the previous page (keyset pagination),
+    so each page is a primary key range scan no matter how deep it is.
+
+    Args:
+        limit (int): The maximum number of events to return, at most MAX_PAGE_SIZE.
+        after (int): Only return events with an ID greater than this.
+
+    Returns:
+        tuple[list[dict[str, Any]], Optional[int]]: The events, and the value to pass
+            as `after` for the next page, or None if this was the last page.
+
+    Raises:
+        ValueError: If the limit or cursor is invalid.
+        sqlite3.Error: If there is an issue with the database.
+    """
+    if not isinstance(limit, int) or limit <= 0 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"Invalid limit: {limit}. Limit must be between 1 and {MAX_PAGE_SIZE}.")
+    if not isinstance(after, int) or after < 0:
+        raise ValueError(f"Invalid cursor: {after}. Cursor must be a non-negative number.")
+
+    query = """
+        SELECT id, event_name, event_day, event_month, event_year, is_religious
+        FROM events WHERE deleted = FALSE AND id > ?
+        ORDER BY id LIMIT ?
+    """
+
+    try:
+        store = get_partitioned_store()
+        if store is not None:
+            rows = store.page(limit, after)
+        else:
+            with get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (after, limit))
+                rows = cursor.fetchall()
+
+        events = [_row_to_dict(row) for row in rows]
+        next_after = events[-1]['id'] if len(events) == limit else None
+
+        logger.debug("Retrieved page of %d events after ID %s", len(events), after)
+        return events, next_after
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def iter_events(batch_size: int = 500) -> Iterator[dict[str, Any]]:
+    """
+    Lazily yields every live event ordered by ID.
+
+    Events are read one keyset page at a time and a connection is only held
+    while a page is being fetched, so a slow consumer never pins a connection
+    and memory use is bounded by the batch size. Partitioned events are read
+    from every partition at once and merged (see PartitionedEventStore.scan).
+
+    Args:
+        batch_size (int): The number of events fetched per query.
+
+    Yields:
+        dict[str, Any]: The next event.
+    """
+    store = get_partitioned_store()
+    if store is not None:
+        for row in store.scan(batch_size):
+            yield _row_to_dict(row)
+        return
+    after = 0
+    while after is not None:
+        events, after = get_events_page(batch_size, after)
+        yield from events
+
+@timed
+def get_events_between(start: date, end: date) -> list[dict[str, Any]]:
+    """
+    Retrieves the events whose date falls within a range, ordered by date.
+
+    The query is answered by a range scan over the idx_events_live_date index.
+
+    Args:
+        start (date): The first date of the range (inclusive).
+        end (date): The last date of the range (inclusive).
+
+    Returns:
+        list[dict[str, Any]]: The matching events.
+
+    Raises:
+        ValueError: If the range is empty.
+        sqlite3.Error: If there is an issue with the database.
+    """
+    if start > end:
+        raise ValueError(f"Invalid range: {start} is after {end}.")
+
+    # Row values are compared lexicographically, which SQLite can satisfy
+    # from the (event_year, event_month, event_day) index.
+    query = """
+        SELECT id, event_name, event_day, event_month, event_year, is_religious
+        FROM events
+        WHERE deleted = FALSE
+          AND (event_year, event_month, event_day) >= (?, ?, ?)
+          AND (event_year, event_month, event_day) <= (?, ?, ?)
+        ORDER BY event_year, event_month, event_day
+    """
+
+    try:
+        store = get_partitioned_store()
+        if store is not None:
+            # Only the partitions covering the range are read
+            rows = list(store.between(start, end))
+        else:
+            with get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (start.year, start.month, start.day, end.year, end.month, end.day))
+                rows = cursor.fetchall()
+
+        events = [_row_to_dict(row) for row in rows]
+
+        logger.debug("Retrieved %d events between %s and %s", len(events), start, end)
+        return events
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+@timed
 def get_event_by_id(id: int) -> Event:
     """
     Retrieves an event from the database by its ID.
@@ -142,25 +838,754 @@ def get_event_by_id(id: int) -> Event:
     Returns:
         Event: The event object.
     """
+    _check_external_writes()
+    if EVENT_CACHE_ENABLED:
+        event = _event_cache.get(id)
+        if event is not None:
+            return event
+        version = _events_version
+
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, event_name, event_day, event_month, event_year, is_religious, deleted FROM events WHERE id = ?", (id,))
-            row = cursor.fetchone()
-
-            if row:
-                if row[6]:
-                    logger.info("Event with ID %s has been deleted", id)
-                    raise ValueError(f"Event with ID {id} has been deleted")
-                return Event(id=row[0], event_name=row[1], event_day=row[2], event_month=row[3], event_year=row[4], is_religious=row[5])
-            else:
-                logger.info("Event with ID %s not found", id)
-                raise ValueError(f"Event with ID {id} not found")
+        store = get_partitioned_store()
+        if store is not None:
+            row = store.get(id)
+        else:
+            with get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id, event_name, event_day, event_month, event_year, is_religious, deleted FROM events WHERE id = ?", (id,))
+                row = cursor.fetchone()
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
+
+    if row:
+        if row[6]:
+            logger.info("Event with ID %s has been deleted", id)
+            raise ValueError(f"Event with ID {id} has been deleted")
+        event = Event.from_row(row)
+        if EVENT_CACHE_ENABLED:
+            with _events_lock:
+                # Skip caching if the event may have been written while we read it
+                if version == _events_version:
+                    _event_cache.set(id, event)
+        return event
+    else:
+        logger.info("Event with ID %s not found", id)
+        raise ValueError(f"Event with ID {id} not found")
+
+@timed
+def get_events_by_ids(ids: list[int]) -> list[dict[str, Any]]:
+    """
+    Retrieves many events by ID at once.
+
+    Cached events are served from memory and the rest are read with one
+    WHERE id IN (...) query per ID_QUERY_CHUNK_SIZE IDs.
+
+    Args:
+        ids (list[int]): The IDs of the events, at most MAX_BATCH_SIZE. Repeats are allowed.
+
+    Returns:
+        list[dict[str, Any]]: One entry per requested ID, in the same order, with the 'id',
+            a 'status' of 'found', 'not_found' or 'deleted', and the 'event' (None unless found).
+
+    Raises:
+        ValueError: If there are too many IDs or one is not an integer.
+        sqlite3.Error: If there is an issue with the database.
+    """
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ValueError(f"Too many IDs: {len(ids)}. At most {MAX_BATCH_SIZE} can be retrieved at once.")
+    for id in ids:
+        if not isinstance(id, int) or isinstance(id, bool):
+            raise ValueError(f"Invalid ID: {id!r}. IDs must be integers.")
+
+    _check_external_writes()
+    unique = dict.fromkeys(ids)
+    found, missing = {}, []
+    for id in unique:
+        event = _event_cache.get(id) if EVENT_CACHE_ENABLED else None
+        if event is not None:
+            found[id] = event
+        else:
+            missing.append(id)
+    cached = len(found)
+    version = _events_version
+
+    deleted = set()
+    if missing:
+        try:
+            store = get_partitioned_store()
+            if store is not None:
+                rows = list(store.get_many(missing).values())
+            else:
+                rows = []
+                with get_read_connection() as conn:
+                    cursor = conn.cursor()
+                    for start in range(0, len(missing), ID_QUERY_CHUNK_SIZE):
+                        chunk = missing[start:start + ID_QUERY_CHUNK_SIZE]
+                        cursor.execute(f"""
+                            SELECT id, event_name, event_day, event_month, event_year, is_religious, deleted
+                            FROM events WHERE id IN ({', '.join('?' * len(chunk))})
+                        """, chunk)
+                        rows += cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Database error: %s", str(e))
+            raise e
+
+        for row in rows:
+            if row[6]:
+                deleted.add(row[0])
+            else:
+                found[row[0]] = Event.from_row(row)
+
+        if EVENT_CACHE_ENABLED:
+            with _events_lock:
+                # Skip caching if events may have been written while we read them
+                if version == _events_version:
+                    for id in missing:
+                        if id in found:
+                            _event_cache.set(id, found[id])
+
+    entries = []
+    for id in ids:
+        event = found.get(id)
+        status = 'found' if event is not None else 'deleted' if id in deleted else 'not_found'
+        entries.append({'id': id, 'status': status, 'event': event.to_dict() if event is not None else None})
+    logger.debug("Retrieved %d of %d events by ID, %d from the cache", len(found), len(unique), cached)
+    return entries
     
+###########################################################
+#
+# Date distances. The dates of all live events are kept
+# as NumPy arrays so distances are computed for every
+# event at once instead of one Event at a time. NumPy
+# is imported on first use, as most processes never
+# ask for a distance.
+#
+###########################################################
+
+def _load_date_arrays() -> tuple['np.ndarray', 'np.ndarray']:
+    """
+    Returns the IDs and dates of every live event as parallel arrays, sorted by ID.
+
+    The arrays are built once and reused until an event is written or
+    EVENT_CACHE_TTL expires. Events whose date does not exist (e.g. February 30)
+    are left out.
+    """
+    import numpy as np
+
+    global _date_arrays
+    _check_external_writes()
+    with _events_lock:
+        cached = _date_arrays
+        if cached is not None and cached[0] == _events_version and cached[1] > time.monotonic():
+            return cached[2], cached[3]
+        version = _events_version
+
+    query = """
+        SELECT id, event_year, event_month, event_day
+        FROM events WHERE deleted = FALSE ORDER BY id
+    """
+    dtype = [('id', 'i8'), ('year', 'i8'), ('month', 'i8'), ('day', 'i8')]
+    try:
+        store = get_partitioned_store()
+        if store is not None:
+            rows = np.fromiter(((row[0], row[4], row[3], row[2]) for row in store.scan()), dtype=dtype)
+        else:
+            with get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query)
+                rows = np.fromiter(cursor, dtype=dtype)
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    months = (rows['year'] - 1970) * 12 + rows['month'] - 1
+    month_start = months.astype('datetime64[M]')
+    dates = month_start.astype('datetime64[D]') + (rows['day'] - 1)
+    valid = (rows['month'] >= 1) & (rows['month'] <= 12) & (dates.astype('datetime64[M]') == month_start)
+    ids, dates = rows['id'][valid], dates[valid]
+
+    with _events_lock:
+        if version == _events_version:
+            _date_arrays = (version, time.monotonic() + EVENT_CACHE_TTL, ids, dates)
+    return ids, dates
+
+@timed
+def get_event_distances(reference: date) -> tuple['np.ndarray', 'np.ndarray']:
+    """
+    Computes the number of days from a reference date to every live event.
+
+    Args:
+        reference (date): The date to measure from.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The event IDs, sorted, and the signed number of days
+            from the reference date to each event (negative for past events).
+    """
+    import numpy as np
+
+    ids, dates = _load_date_arrays()
+    days = (dates - np.datetime64(reference, 'D')).astype(np.int64)
+    return ids, days
+
+@timed
+def get_nearest_upcoming_events(reference: date, k: int) -> list[dict[str, Any]]:
+    """
+    Retrieves the k live events closest to a reference date, on or after it.
+
+    Args:
+        reference (date): The date to measure from.
+        k (int): The number of events to return.
+
+    Returns:
+        list[dict[str, Any]]: The events ordered by date, each with a 'days_until' field.
+
+    Raises:
+        ValueError: If k is not positive.
+    """
+    if not isinstance(k, int) or k <= 0:
+        raise ValueError(f"Invalid k: {k}. k must be a positive number.")
+
+    import numpy as np
+
+    ids, days = get_event_distances(reference)
+    upcoming = np.flatnonzero(days >= 0)
+    if len(upcoming) > k:
+        # Only the k smallest distances are partially sorted out of the rest
+        upcoming = upcoming[np.argpartition(days[upcoming], k - 1)[:k]]
+    upcoming = upcoming[np.argsort(days[upcoming], kind='stable')]
+
+    nearest = [(int(ids[i]), int(days[i])) for i in upcoming]
+    if not nearest:
+        return []
+
+    placeholders = ', '.join('?' * len(nearest))
+    try:
+        store = get_partitioned_store()
+        if store is not None:
+            rows = store.get_many([event_id for event_id, _ in nearest])
+        else:
+            with get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT id, event_name, event_day, event_month, event_year, is_religious
+                    FROM events WHERE id IN ({placeholders})
+                """, [event_id for event_id, _ in nearest])
+                rows = {row[0]: row for row in cursor.fetchall()}
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    events = []
+    for event_id, days_until in nearest:
+        if event_id in rows:
+            event = _row_to_dict(rows[event_id])
+            event['days_until'] = days_until
+            events.append(event)
+    return events
+
+@timed
+def get_distance_matrix(ids: Optional[list[int]] = None) -> tuple['np.ndarray', 'np.ndarray']:
+    """
+    Computes the number of days between every pair of live events.
+
+    Args:
+        ids (list[int]): Only compare these events. Defaults to every live event.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The event IDs in matrix order, and a square matrix whose
+            entry [i, j] is the signed number of days from event i to event j.
+
+    Raises:
+        ValueError: If more than MAX_DISTANCE_MATRIX_SIZE events would be compared.
+    """
+    import numpy as np
+
+    all_ids, dates = _load_date_arrays()
+    if ids is not None:
+        selected = np.isin(all_ids, np.asarray(ids, dtype=np.int64))
+        all_ids, dates = all_ids[selected], dates[selected]
+    if len(all_ids) > MAX_DISTANCE_MATRIX_SIZE:
+        raise ValueError(f"Too many events for a distance matrix: {len(all_ids)}. "
+                         f"At most {MAX_DISTANCE_MATRIX_SIZE} can be compared.")
+
+    day_numbers = dates.astype(np.int64)
+    return all_ids, day_numbers[None, :] - day_numbers[:, None]
+
+###########################################################
+#
+# Upcoming events. An in-memory sorted index answers
+# "next N events" and "events in a month" with a binary
+# search; writes made through this module patch it in place.
+#
+###########################################################
+
+def _with_index(name: str, factory: Callable[[], Any], query: Callable[[Any], Any]) -> Any:
+    """
+    Runs query(index) against an in-memory index of every live event, building it if needed.
+
+    Args:
+        name (str): The index, e.g. 'upcoming'.
+        factory (Callable): Creates an empty index with add(), remove() and get() methods.
+        query (Callable): Reads from the index.
+    """
+    _check_external_writes()
+    with _events_lock:
+        entry = _indexes.get(name)
+        if entry is not None and entry[0] > time.monotonic():
+            return query(entry[1])
+        version = _events_version
+
+    index = factory()
+    for event in iter_events():
+        index.add(event)
+    logger.debug("Built %s index over %d events", name, len(index))
+
+    with _events_lock:
+        # Only keep the index if no write happened while it was being built
+        if version == _events_version:
+            _indexes[name] = (time.monotonic() + EVENT_CACHE_TTL, index)
+        return query(index)
+
+def _with_upcoming_index(query: Callable[[UpcomingIndex], Any]) -> Any:
+    return _with_index('upcoming', UpcomingIndex, query)
+
+def _with_dates(occurrences: list[tuple[date, dict[str, Any]]]) -> list[dict[str, Any]]:
+    return [{**event, 'date': occurrence.isoformat()} for occurrence, event in occurrences]
+
+@timed
+def get_upcoming_events(start: date, n: int, recurring: bool = True) -> list[dict[str, Any]]:
+    """
+    Retrieves the next n events on or after a date.
+
+    Args:
+        start (date): The first date to include.
+        n (int): The maximum number of events to return.
+        recurring (bool): Treat events as recurring every year on their day and month, so
+            the stored year is ignored. Otherwise only events dated on or after start count.
+
+    Returns:
+        list[dict[str, Any]]: The events in date order, each with the 'date' it falls on.
+
+    Raises:
+        ValueError: If n is not positive.
+    """
+    if not isinstance(n, int) or n <= 0:
+        raise ValueError(f"Invalid n: {n}. n must be a positive number.")
+    return _with_dates(_with_upcoming_index(lambda index: index.next_events(start, n, recurring)))
+
+@timed
+def get_events_in_month(year: int, month: int, recurring: bool = True) -> list[dict[str, Any]]:
+    """
+    Retrieves the events falling in a month, in date order.
+
+    Args:
+        year (int): The year.
+        month (int): The month.
+        recurring (bool): Match events on their day and month only, ignoring the stored year.
+
+    Returns:
+        list[dict[str, Any]]: The events, each with the 'date' it falls on.
+
+    Raises:
+        ValueError: If the month is invalid.
+    """
+    if not isinstance(month, int) or not 1 <= month <= 12:
+        raise ValueError(f"Invalid month: {month}. Month must be between 1 and 12.")
+    return _with_dates(_with_upcoming_index(lambda index: index.events_in_month(year, month, recurring)))
+
+###########################################################
+#
+# Recurring events. A rule is stored once per event and
+# expanded lazily, one year at a time. Each year's
+# occurrences are memoized until the next write, so
+# windows spanning decades only compute the years they
+# reach and repeated queries reuse them.
+#
+###########################################################
+
+@timed
+def set_event_recurrence(id: int, recurrence: Optional[RecurrenceRule]) -> None:
+    """
+    Makes an event recur, changes how it recurs, or makes it a one-off event again.
+
+    Args:
+        id (int): The ID of the event.
+        recurrence (RecurrenceRule): The new rule, or None for a one-off event.
+
+    Raises:
+        ValueError: If the event is not found, has been deleted, or does not start on a real date.
+        RuntimeError: If events are partitioned.
+        sqlite3.Error: If there is an issue with the database.
+    """
+    check_unpartitioned("Recurrence")
+
+    def update(conn: sqlite3.Connection) -> None:
+        cursor = conn.cursor()
+        cursor.execute("SELECT deleted, event_day, event_month, event_year FROM events WHERE id = ?", (id,))
+        row = cursor.fetchone()
+        if row is None:
+            logger.info("Event with ID %s not found", id)
+            raise ValueError(f"Event with ID {id} not found")
+        if row[0]:
+            logger.info("Event with ID %s has been deleted", id)
+            raise ValueError(f"Event with ID {id} has been deleted")
+        if recurrence is None:
+            cursor.execute("DELETE FROM recurrence_rules WHERE event_id = ?", (id,))
+        else:
+            _validate_start(row[1], row[2], row[3])
+            cursor.execute(SET_RECURRENCE_QUERY, (id,) + recurrence.to_row())
+
+    try:
+        _write(update)
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    _invalidate(id)
+    logger.info("Recurrence of event with ID %s set to %s", id, recurrence)
+
+def _load_recurring_events() -> tuple[int, list[tuple[dict[str, Any], RecurrenceRule, date]]]:
+    """
+    Returns the events version and every live recurring event with its rule and start date.
+
+    The list is reused until an event is written or EVENT_CACHE_TTL expires.
+    """
+    global _recurring_events
+    _check_external_writes()
+    with _events_lock:
+        cached = _recurring_events
+        if cached is not None and cached[0] == _events_version and cached[1] > time.monotonic():
+            return cached[0], cached[2]
+        version = _events_version
+
+    query = """
+        SELECT e.id, e.event_name, e.event_day, e.event_month, e.event_year, e.is_religious,
+               r.frequency, r.repeat_interval, r.weekday, r.nth, r.easter_offset, r.until
+        FROM recurrence_rules r JOIN events e ON e.id = r.event_id
+        WHERE e.deleted = FALSE
+        ORDER BY e.id
+    """
+    try:
+        # Partitioned events cannot recur
+        if get_partitioned_store() is not None:
+            rows = []
+        else:
+            with get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query)
+                rows = cursor.fetchall()
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    recurring = []
+    for row in rows:
+        rule = RecurrenceRule.from_row(row[6:])
+        event = {**_row_to_dict(row), 'recurrence': rule.to_dict()}
+        recurring.append((event, rule, date(row[4], row[3], row[2])))
+
+    with _events_lock:
+        if version == _events_version:
+            _recurring_events = (version, time.monotonic() + EVENT_CACHE_TTL, recurring)
+    return version, recurring
+
+def _occurrences_in_year(year: int) -> list[tuple[date, dict[str, Any]]]:
+    """
+    Returns every occurrence of a live event in one year, in date order.
+
+    One-off events dated that year come from a range scan over idx_events_live_date;
+    recurring events are expanded from their rules.
+    """
+    version, recurring = _load_recurring_events()
+    occurrences = _occurrence_years.get((version, year))
+    if occurrences is not None:
+        return occurrences
+
+    query = """
+        SELECT id, event_name, event_day, event_month, event_year, is_religious
+        FROM events
+        WHERE deleted = FALSE
+          AND (event_year, event_month, event_day) >= (?, 1, 1)
+          AND (event_year, event_month, event_day) <= (?, 12, 31)
+          AND id NOT IN (SELECT event_id FROM recurrence_rules)
+    """
+    try:
+        store = get_partitioned_store()
+        if store is not None:
+            rows = list(store.between(date(year, 1, 1), date(year, 12, 31)))
+        else:
+            with get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (year, year))
+                rows = cursor.fetchall()
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    occurrences = []
+    for row in rows:
+        try:
+            occurrences.append((date(row[4], row[3], row[2]), {**_row_to_dict(row), 'recurrence': None}))
+        except ValueError:
+            pass  # not a real date, e.g. 30 February
+    for event, rule, start in recurring:
+        occurrences.extend((day, event) for day in rule.occurrences_in_year(start, year))
+    occurrences.sort(key=lambda occurrence: (occurrence[0], occurrence[1]['id']))
+
+    with _events_lock:
+        if version == _events_version:
+            _occurrence_years.set((version, year), occurrences)
+    return occurrences
+
+def iter_occurrences(start: date, end: date) -> Iterator[tuple[date, dict[str, Any]]]:
+    """
+    Lazily yields every occurrence of a live event within a date range.
+
+    Years are expanded one at a time as the generator reaches them, so a
+    consumer that stops early never computes the rest of the range.
+
+    Args:
+        start (date): The first date of the range (inclusive).
+        end (date): The last date of the range (inclusive).
+
+    Yields:
+        tuple[date, dict[str, Any]]: The date of the occurrence and its event, in date order.
+            Each event has a 'recurrence' field holding its rule, or None for one-off events.
+    """
+    for year in range(start.year, end.year + 1):
+        for occurrence in _occurrences_in_year(year):
+            if start <= occurrence[0] <= end:
+                yield occurrence
+
+@timed
+def get_occurrences(start: date, end: date, limit: int = MAX_PAGE_SIZE) -> list[dict[str, Any]]:
+    """
+    Retrieves the occurrences of events, recurring or not, within a date range.
+
+    Args:
+        start (date): The first date of the range (inclusive).
+        end (date): The last date of the range (inclusive).
+        limit (int): The maximum number of occurrences to return, at most MAX_PAGE_SIZE.
+
+    Returns:
+        list[dict[str, Any]]: The first `limit` occurrences in date order, each event
+            with the 'date' it falls on.
+
+    Raises:
+        ValueError: If the range is empty or the limit is invalid.
+    """
+    if start > end:
+        raise ValueError(f"Invalid range: {start} is after {end}.")
+    if not isinstance(limit, int) or not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Invalid limit: {limit}. Limit must be between 1 and {MAX_PAGE_SIZE}.")
+    return _with_dates(islice(iter_occurrences(start, end), limit))
+
+###########################################################
+#
+# Search. Names of live events are indexed by the
+# events_fts FTS5 table, which triggers keep in step with
+# events. Autocomplete uses an in-memory prefix index,
+# which also answers searches when FTS5 is unavailable.
+#
+###########################################################
+
+def _validate_search(text: str, limit: int) -> list[str]:
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("Invalid search: the query must not be empty.")
+    if not isinstance(limit, int) or not 0 < limit <= MAX_SEARCH_RESULTS:
+        raise ValueError(f"Invalid limit: {limit}. Limit must be between 1 and {MAX_SEARCH_RESULTS}.")
+    return tokenize(text)
+
+def _with_prefix_index(query: Callable[[PrefixIndex], Any]) -> Any:
+    return _with_index('prefix', PrefixIndex, query)
+
+@timed
+def search_events(text: str, is_religious: Optional[bool] = None, limit: int = 20) -> list[dict[str, Any]]:
+    """
+    Finds live events whose name contains every word of a query, best matches first.
+
+    Each word also matches longer words it is a prefix of ("christ" finds "Christmas"),
+    and case and accents are ignored. Results are ranked by BM25, so names where the
+    words are a larger share of the name rank higher.
+
+    Args:
+        text (str): The search query.
+        is_religious (bool): Only return religious (True) or non-religious (False) events.
+        limit (int): The maximum number of results, at most MAX_SEARCH_RESULTS.
+
+    Returns:
+        list[dict[str, Any]]: The matching events, each with a relevance 'score' (higher is
+            better, None when answered from the prefix index).
+
+    Raises:
+        ValueError: If the query is empty or the limit is invalid.
+        sqlite3.Error: If there is an issue with the database.
+    """
+    words = _validate_search(text, limit)
+    if not words:
+        return []
+    # The events_fts index only covers the events table of the main database
+    if get_partitioned_store() is not None:
+        return _search_prefix_index(text, is_religious, limit)
+
+    # Quoting each word keeps FTS5 operators in the input from being interpreted
+    match = ' '.join(f'"{word}"*' for word in words)
+    query = """
+        SELECT e.id, e.event_name, e.event_day, e.event_month, e.event_year, e.is_religious, -bm25(events_fts)
+        FROM events_fts JOIN events e ON e.id = events_fts.rowid
+        WHERE events_fts MATCH ?
+    """
+    params = [match]
+    if is_religious is not None:
+        query += " AND e.is_religious = ?"
+        params.append(is_religious)
+    query += " ORDER BY bm25(events_fts) LIMIT ?"
+    params.append(limit)
+
+    try:
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+    except sqlite3.OperationalError as e:
+        if 'events_fts' not in str(e) and 'fts5' not in str(e):
+            logger.error("Database error: %s", str(e))
+            raise e
+        logger.warning("Full-text search unavailable, using the prefix index: %s", str(e))
+        return _search_prefix_index(text, is_religious, limit)
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    return [{**_row_to_dict(row), 'score': row[6]} for row in rows]
+
+def _search_prefix_index(text: str, is_religious: Optional[bool], limit: int) -> list[dict[str, Any]]:
+    def query(index: PrefixIndex) -> list[dict[str, Any]]:
+        matches = index.complete(text, len(index))
+        if is_religious is not None:
+            matches = [event for event in matches if bool(event['is_religious']) == is_religious]
+        return matches[:limit]
+    return [{**event, 'score': None} for event in _with_prefix_index(query)]
+
+@timed
+def autocomplete_events(text: str, limit: int = 10) -> list[dict[str, Any]]:
+    """
+    Suggests live events for what has been typed so far, without querying the database.
+
+    Args:
+        text (str): The typed text. Its last word may be incomplete.
+        limit (int): The maximum number of suggestions, at most MAX_SEARCH_RESULTS.
+
+    Returns:
+        list[dict[str, Any]]: Events whose name starts with the text first, then events
+            having all its words elsewhere in the name, each group in name order.
+
+    Raises:
+        ValueError: If the text is empty or the limit is invalid.
+    """
+    _validate_search(text, limit)
+    return [dict(event) for event in _with_prefix_index(lambda index: index.complete(text, limit))]
+
+###########################################################
+#
+# Change feed. Triggers on events append every insert,
+# update and deletion to event_changes, numbered by an
+# increasing version, so clients sync by asking for the
+# changes after the last version they saw.
+#
+###########################################################
+
+def _read_changes(since: int, limit: int) -> list[dict[str, Any]]:
+    query = """
+        SELECT c.version, c.event_id, c.operation, c.changed_at,
+               e.event_name, e.event_day, e.event_month, e.event_year, e.is_religious
+        FROM event_changes c LEFT JOIN events e ON e.id = c.event_id
+        WHERE c.version > ?
+        ORDER BY c.version
+        LIMIT ?
+    """
+    try:
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (since, limit))
+            rows = cursor.fetchall()
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    changes = []
+    for version, event_id, operation, changed_at, *fields in rows:
+        # Inserts and updates carry the event as it is now, which may be newer than the change
+        event = _row_to_dict((event_id, *fields)) if operation != 'delete' and fields[0] is not None else None
+        changes.append({'version': version, 'id': event_id, 'operation': operation,
+                        'changed_at': changed_at, 'event': event})
+    return changes
+
+# Not @timed: long polls would swamp the latency histogram
+def get_changes(since: int, limit: int = 100, wait: float = 0) -> dict[str, Any]:
+    """
+    Retrieves the inserts, updates and deletions of events after a version.
+
+    With a wait, the call blocks until there is a change or the wait is over.
+    Writes made through this process wake it at once; writes made by other
+    processes are noticed within CHANGES_POLL_INTERVAL.
+
+    Args:
+        since (int): The last version the caller has seen; 0 for the whole history.
+        limit (int): The maximum number of changes to return (at most MAX_CHANGES_PAGE).
+        wait (float): How long to wait for a change if there is none yet, in seconds
+            (at most MAX_CHANGES_WAIT).
+
+    Returns:
+        dict[str, Any]: 'changes', oldest first, each with its 'version', the event 'id', the
+            'operation' ('insert', 'update' or 'delete'), 'changed_at' (Unix time) and the
+            current 'event' (None for deletions); 'version', the version to pass as `since`
+            next time; and 'has_more', whether more changes are already waiting.
+
+    Raises:
+        ValueError: If since, limit or wait is invalid.
+        RuntimeError: If events are partitioned.
+        sqlite3.Error: If there is an issue with the database.
+    """
+    check_unpartitioned("The change feed")
+    if not isinstance(since, int) or since < 0:
+        raise ValueError(f"Invalid version: {since}. Version must be a non-negative integer.")
+    if not isinstance(limit, int) or limit <= 0 or limit > MAX_CHANGES_PAGE:
+        raise ValueError(f"Invalid limit: {limit}. Limit must be between 1 and {MAX_CHANGES_PAGE}.")
+    if not 0 <= wait <= MAX_CHANGES_WAIT:
+        raise ValueError(f"Invalid wait: {wait}. Wait must be between 0 and {MAX_CHANGES_WAIT} seconds.")
+
+    deadline = time.monotonic() + wait
+    while True:
+        with _events_lock:
+            seen = _events_version
+        changes = _read_changes(since, limit + 1)
+        remaining = deadline - time.monotonic()
+        if changes or remaining <= 0:
+            break
+        # A write made after the read above has already changed the version, so it is never missed
+        with _events_changed:
+            _events_changed.wait_for(lambda: _events_version != seen, min(remaining, CHANGES_POLL_INTERVAL))
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    logger.debug("Retrieved %d changes after version %d", len(changes), since)
+    return {'changes': changes, 'version': changes[-1]['version'] if changes else since, 'has_more': has_more}
+
+def add_change_listener(listener: Callable[[], None]) -> None:
+    """
+    Calls a function, on the writing thread, after every write made through this module.
+
+    The function must be quick and must not raise; the async app uses it to wake
+    long polls waiting on its event loop.
+    """
+    _change_listeners.append(listener)
+
+def remove_change_listener(listener: Callable[[], None]) -> None:
+    _change_listeners.remove(listener)
+
 ###########################################################
 #
 # NOTE: This following function is not used in the application.
@@ -172,6 +1597,7 @@ def get_event_by_id(id: int) -> Event:
 #
 ###########################################################
     
+@timed
 def update_event_date(id: int, day: int, month: int, year: int) -> None:
     """
     Updates the date of an event in the database.
@@ -183,26 +1609,38 @@ def update_event_date(id: int, day: int, month: int, year: int) -> None:
         year (int): The year of the event.
 
     Raises:
-        ValueError: If the event is not found or has been deleted.
+        ValueError: If the event is not found, has been deleted or if the date is invalid.
     """
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT deleted FROM events WHERE id = ?", (id,))
-            try:
-                deleted = cursor.fetchone()[0]
-                if deleted:
-                    logger.info("Event with ID %s has been deleted", id)
-                    raise ValueError(f"Event with ID {id} has been deleted")
-            except TypeError:
-                logger.info("Event with ID %s not found", id)
-                raise ValueError(f"Event with ID {id} not found")
+    _validate_date(day, month, year)
 
-            cursor.execute("UPDATE events SET event_day = ?, event_month = ?, event_year = ? WHERE id = ?", (day, month, year, id))
+    def update(conn: sqlite3.Connection) -> None:
+        cursor = conn.cursor()
+        cursor.execute("SELECT deleted FROM events WHERE id = ?", (id,))
+        try:
+            deleted = cursor.fetchone()[0]
+            if deleted:
+                logger.info("Event with ID %s has been deleted", id)
+                raise ValueError(f"Event with ID {id} has been deleted")
+        except TypeError:
+            logger.info("Event with ID %s not found", id)
+            raise ValueError(f"Event with ID {id} not found")
 
-            conn.commit()
+        cursor.execute("UPDATE events SET event_day = ?, event_month = ?, event_year = ? WHERE id = ?", (day, month, year, id))
 
+    store = get_partitioned_store()
+    try:
+        if store is None:
+            _write(update)
+        else:
+            row = _get_partitioned_row(store, id)
+            if row[6]:
+                logger.info("Event with ID %s has been deleted", id)
+                raise ValueError(f"Event with ID {id} has been deleted")
+            store.move(id, store.partition_of(row[4]), day, month, year)
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
-    
+
+    _invalidate(id)
+    _reindex(id, {'event_day': day, 'event_month': month, 'event_year': year})
+    logger.info("Event date successfully updated: %s", id)
@@ -0,0 +1,368 @@
+from dataclasses import dataclass
+from datetime import date
+from functools import partial
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Optional, TYPE_CHECKING
+
+from event_tracker.utils.async_utils import run_in_db_thread
+from event_tracker.utils.cache import LRUCache
+from event_tracker.utils.date_utils import nth_weekday
+from event_tracker.utils.logger import configure_logger
+from event_tracker.utils.rate_limit import TokenBucket
+from event_tracker.utils.sql_utils import get_db_connection
+
+# The HTTP clients and asyncio are imported where they are used. Most lookups are
+# answered from the cache, and the Flask workers never take the async path.
+if TYPE_CHECKING:
+    import asyncio
+
+    import aiohttp
+    import requests
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# Upstream API, queried as {HOLIDAY_API_URL}/{year}/{country} (https://date.nager.at)
+HOLIDAY_API_URL = os.getenv("HOLIDAY_API_URL", "https://date.nager.at/api/v3/PublicHolidays")
+HOLIDAY_API_TIMEOUT = float(os.getenv("HOLIDAY_API_TIMEOUT", "5"))
+# at most HOLIDAY_API_RATE requests per second, with bursts of HOLIDAY_API_BURST
+HOLIDAY_API_RATE = float(os.getenv("HOLIDAY_API_RATE", "1"))
+HOLIDAY_API_BURST = int(os.getenv("HOLIDAY_API_BURST", "5"))
+HOLIDAY_COUNTRY = os.getenv("HOLIDAY_COUNTRY", "US")
+# how long a fetched holiday list is trusted, in seconds
+HOLIDAY_CACHE_TTL = float(os.getenv("HOLIDAY_CACHE_TTL", str(7 * 24 * 3600)))
+# how long to wait before retrying the API after falling back, in seconds
+HOLIDAY_FALLBACK_TTL = float(os.getenv("HOLIDAY_FALLBACK_TTL", "300"))
+# most (country, year) holiday lists kept in memory
+HOLIDAY_MEMORY_SIZE = int(os.getenv("HOLIDAY_MEMORY_SIZE", "256"))
+
+# years holidays can be looked up for
+MIN_HOLIDAY_YEAR = 1900
+MAX_HOLIDAY_YEAR = 2100
+
+# two ASCII letters, so the code is safe to put in the API URL
+_COUNTRY_CODE = re.compile(r"[A-Za-z]{2}")
+
+
+@dataclass
+class HolidayYear:
+    country: str
+    year: int
+    holidays: dict[date, list[str]]
+    source: str  # 'api', 'cache', 'stale-cache' or 'rules'
+    expires_at: float
+
+
+###################################################
+#
+# Rule-based calendar used when the API cannot be reached
+#
+###################################################
+
+MONDAY, THURSDAY = 0, 3
+
+FALLBACK_RULES: dict[str, list[tuple[str, Callable[[int], date]]]] = {
+    'US': [
+        ("New Year's Day", lambda year: date(year, 1, 1)),
+        ("Martin Luther King, Jr. Day", lambda year: nth_weekday(year, 1, MONDAY, 3)),
+        ("Presidents Day", lambda year: nth_weekday(year, 2, MONDAY, 3)),
+        ("Memorial Day", lambda year: nth_weekday(year, 5, MONDAY, -1)),
+        ("Juneteenth National Independence Day", lambda year: date(year, 6, 19)),
+        ("Independence Day", lambda year: date(year, 7, 4)),
+        ("Labor Day", lambda year: nth_weekday(year, 9, MONDAY, 1)),
+        ("Columbus Day", lambda year: nth_weekday(year, 10, MONDAY, 2)),
+        ("Veterans Day", lambda year: date(year, 11, 11)),
+        ("Thanksgiving Day", lambda year: nth_weekday(year, 11, THURSDAY, 4)),
+        ("Christmas Day", lambda year: date(year, 12, 25)),
+    ],
+}
+
+DEFAULT_RULES = [
+    ("New Year's Day", lambda year: date(year, 1, 1)),
+    ("Christmas Day", lambda year: date(year, 12, 25)),
+]
+
+def rule_based_holidays(country: str, year: int) -> dict[date, list[str]]:
+    """
+    Computes a country's fixed and weekday-based holidays for a year without the API.
+
+    Countries without their own rules only get New Year's Day and Christmas Day.
+    """
+    holidays = {}
+    for name, rule in FALLBACK_RULES.get(country, DEFAULT_RULES):
+        holidays.setdefault(rule(year), []).append(name)
+    return holidays
+
+
+###################################################
+#
+# Lookup. Each (country, year) is fetched once and then
+# answered from memory; concurrent misses for the same
+# year wait for a single fetch.
+#
+###################################################
+
+_calendars = LRUCache(HOLIDAY_MEMORY_SIZE, HOLIDAY_CACHE_TTL)
+_inflight: dict[tuple[str, int], threading.Event] = {}
+_lock = threading.Lock()
+_rate_limiter = TokenBucket(HOLIDAY_API_RATE, HOLIDAY_API_BURST)
+_session = None
+
+def _holiday_key(year: int, country: Optional[str]) -> tuple[str, int]:
+    """
+    Validates a lookup and returns its (country, year) key.
+
+    Raises:
+        ValueError: If the country is not an ISO 3166-1 alpha-2 code or the year is
+            outside MIN_HOLIDAY_YEAR to MAX_HOLIDAY_YEAR.
+    """
+    country = HOLIDAY_COUNTRY if country is None else country
+    if not isinstance(country, str) or not _COUNTRY_CODE.fullmatch(country):
+        raise ValueError(f"Invalid country: {country!r}. Expected an ISO 3166-1 alpha-2 code such as US.")
+    if not isinstance(year, int) or isinstance(year, bool) or not MIN_HOLIDAY_YEAR <= year <= MAX_HOLIDAY_YEAR:
+        raise ValueError(f"Invalid year: {year!r}. Year must be between {MIN_HOLIDAY_YEAR} and {MAX_HOLIDAY_YEAR}.")
+    return country.upper(), year
+
+def _get_session() -> 'requests.Session':
+    # A shared session keeps the connection to the API alive between fetches
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+    return _session
+
+def _parse_holidays(payload: list[dict[str, Any]]) -> dict[date, list[str]]:
+    holidays = {}
+    for entry in payload:
+        holidays.setdefault(date.fromisoformat(entry['date']), []).append(entry.get('name') or entry.get('localName'))
+    return holidays
+
+def _serialize_holidays(holidays: dict[date, list[str]]) -> str:
+    return json.dumps([{'date': day.isoformat(), 'name': name} for day, names in sorted(holidays.items()) for name in names])
+
+def _fetch_from_api(country: str, year: int) -> dict[date, list[str]]:
+    import requests
+
+    if not _rate_limiter.try_acquire():
+        raise requests.RequestException("Holiday API rate limit reached")
+    url = f"{HOLIDAY_API_URL.rstrip('/')}/{year}/{country}"
+    logger.info("Fetching holidays from %s", url)
+    response = _get_session().get(url, timeout=HOLIDAY_API_TIMEOUT)
+    response.raise_for_status()
+    try:
+        return _parse_holidays(response.json())
+    except (ValueError, KeyError, TypeError) as e:
+        raise requests.RequestException(f"Malformed holiday API response: {e}") from e
+
+def _read_cached(country: str, year: int) -> Optional[tuple[dict[date, list[str]], float]]:
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT holidays, fetched_at FROM holiday_cache WHERE country = ? AND year = ?", (country, year))
+            row = cursor.fetchone()
+    except sqlite3.Error as e:
+        logger.warning("Could not read holiday cache: %s", str(e))
+        return None
+    if row is None:
+        return None
+    return _parse_holidays(json.loads(row[0])), row[1]
+
+def _write_cached(country: str, year: int, holidays: dict[date, list[str]], fetched_at: float) -> None:
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT OR REPLACE INTO holiday_cache (country, year, holidays, fetched_at)
+                VALUES (?, ?, ?, ?)
+            """, (country, year, _serialize_holidays(holidays), fetched_at))
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.warning("Could not write holiday cache: %s", str(e))
+
+def _fresh_cached(country: str, year: int, cached: Optional[tuple[dict[date, list[str]], float]],
+                  now: float) -> Optional[HolidayYear]:
+    if cached is not None and cached[1] + HOLIDAY_CACHE_TTL > now:
+        return HolidayYear(country, year, cached[0], 'cache', cached[1] + HOLIDAY_CACHE_TTL)
+    return None
+
+def _fallback(country: str, year: int, cached: Optional[tuple[dict[date, list[str]], float]],
+              now: float) -> HolidayYear:
+    # Out of date data is still better than the rules, but retry the API soon
+    if cached is not None:
+        return HolidayYear(country, year, cached[0], 'stale-cache', now + HOLIDAY_FALLBACK_TTL)
+    return HolidayYear(country, year, rule_based_holidays(country, year), 'rules', now + HOLIDAY_FALLBACK_TTL)
+
+def _load_year(country: str, year: int) -> HolidayYear:
+    import requests
+
+    now = time.time()
+    cached = _read_cached(country, year)
+    entry = _fresh_cached(country, year, cached, now)
+    if entry is not None:
+        return entry
+
+    try:
+        holidays = _fetch_from_api(country, year)
+    except requests.RequestException as e:
+        logger.warning("Holiday API unavailable for %s %s, falling back: %s", country, year, str(e))
+    else:
+        _write_cached(country, year, holidays, now)
+        return HolidayYear(country, year, holidays, 'api', now + HOLIDAY_CACHE_TTL)
+
+    return _fallback(country, year, cached, now)
+
+def get_holiday_year(year: int, country: Optional[str] = None) -> HolidayYear:
+    """
+    Returns the holidays of a country for a whole year, fetching them if needed.
+
+    The list comes from memory, then the holiday_cache table, then the holiday
+    API. If the API cannot be reached, an expired cached list or the rule-based
+    calendar is used instead and the API is retried after HOLIDAY_FALLBACK_TTL.
+
+    Args:
+        year (int): The year.
+        country (str): An ISO 3166-1 alpha-2 country code. Defaults to HOLIDAY_COUNTRY.
+
+    Returns:
+        HolidayYear: The holidays and where they came from.
+
+    Raises:
+        ValueError: If the country or year is invalid.
+    """
+    key = _holiday_key(year, country)
+    while True:
+        with _lock:
+            entry = _calendars.get(key)
+            if entry is not None and entry.expires_at > time.time():
+                return entry
+            pending = _inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = _inflight[key] = threading.Event()
+
+        if not leader:
+            # Another thread is already loading this year
+            pending.wait(HOLIDAY_API_TIMEOUT + 1)
+            continue
+
+        try:
+            entry = _load_year(*key)
+            _calendars.set(key, entry)
+            return entry
+        finally:
+            with _lock:
+                del _inflight[key]
+            pending.set()
+
+def is_holiday(day: date, country: Optional[str] = None) -> bool:
+    """
+    Checks whether a date is a public holiday.
+
+    Args:
+        day (date): The date to check.
+        country (str): An ISO 3166-1 alpha-2 country code. Defaults to HOLIDAY_COUNTRY.
+
+    Returns:
+        bool: True if the date is a holiday.
+    """
+    return day in get_holiday_year(day.year, country).holidays
+
+def get_holiday_names(day: date, country: Optional[str] = None) -> list[str]:
+    """
+    Returns the names of the holidays on a date, or an empty list.
+    """
+    return get_holiday_year(day.year, country).holidays.get(day, [])
+
+def clear_holiday_cache() -> None:
+    """Forgets the holiday lists held in memory. The holiday_cache table is kept."""
+    _calendars.clear()
+
+
+###################################################
+#
+# Asynchronous lookup for the async app. The same
+# memory and database caches are used, the API is
+# called through a shared aiohttp session, and the
+# database is only touched from the DB executor.
+#
+###################################################
+
+_async_loads: dict[tuple[str, int], 'asyncio.Task'] = {}
+
+async def _fetch_from_api_async(session: 'aiohttp.ClientSession', country: str, year: int) -> dict[date, list[str]]:
+    import aiohttp
+
+    if not _rate_limiter.try_acquire():
+        raise aiohttp.ClientError("Holiday API rate limit reached")
+    url = f"{HOLIDAY_API_URL.rstrip('/')}/{year}/{country}"
+    logger.info("Fetching holidays from %s", url)
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=HOLIDAY_API_TIMEOUT)) as response:
+        response.raise_for_status()
+        payload = await response.json(content_type=None)
+    try:
+        return _parse_holidays(payload)
+    except (ValueError, KeyError, TypeError) as e:
+        raise aiohttp.ClientError(f"Malformed holiday API response: {e}") from e
+
+async def _load_year_async(session: 'aiohttp.ClientSession', country: str, year: int) -> HolidayYear:
+    import asyncio
+
+    import aiohttp
+
+    now = time.time()
+    cached = await run_in_db_thread(_read_cached, country, year)
+    entry = _fresh_cached(country, year, cached, now)
+    if entry is not None:
+        return entry
+
+    try:
+        holidays = await _fetch_from_api_async(session, country, year)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.warning("Holiday API unavailable for %s %s, falling back: %s", country, year, str(e))
+    else:
+        await run_in_db_thread(_write_cached, country, year, holidays, now)
+        return HolidayYear(country, year, holidays, 'api', now + HOLIDAY_CACHE_TTL)
+
+    return _fallback(country, year, cached, now)
+
+def _finish_async_load(key: tuple[str, int], task: 'asyncio.Task') -> None:
+    _async_loads.pop(key, None)
+    if not task.cancelled() and task.exception() is None:
+        _calendars.set(key, task.result())
+
+async def get_holiday_year_async(session: 'aiohttp.ClientSession', year: int, country: Optional[str] = None) -> HolidayYear:
+    """
+    Returns the holidays of a country for a whole year without blocking the event loop.
+
+    Behaves like get_holiday_year(). Concurrent misses for the same year share a
+    single load, which keeps running even if the request that started it is cancelled.
+
+    Args:
+        session (aiohttp.ClientSession): The session used to call the holiday API.
+        year (int): The year.
+        country (str): An ISO 3166-1 alpha-2 country code. Defaults to HOLIDAY_COUNTRY.
+
+    Returns:
+        HolidayYear: The holidays and where they came from.
+
+    Raises:
+        ValueError: If the country or year is invalid.
+    """
+    import asyncio
+
+    key = _holiday_key(year, country)
+    entry = _calendars.get(key)
+    if entry is not None and entry.expires_at > time.time():
+        return entry
+
+    task = _async_loads.get(key)
+    if task is None:
+        task = _async_loads[key] = asyncio.ensure_future(_load_year_async(session, *key))
+        task.add_done_callback(partial(_finish_async_load, key))
+    return await asyncio.shield(task)
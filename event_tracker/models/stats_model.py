@@ -0,0 +1,179 @@
+import argparse
+from datetime import date
+import logging
+import sqlite3
+import sys
+from typing import Any, Optional
+
+from event_tracker.utils.logger import configure_logger
+from event_tracker.utils.metrics import timed
+from event_tracker.utils.partitions import check_unpartitioned
+from event_tracker.utils.sql_utils import get_db_connection, get_read_connection
+
+# Named after the module even when run with python -m, so LOG_LEVELS can refer to it
+logger = logging.getLogger("event_tracker.models.stats_model")
+configure_logger(logger)
+
+
+###################################################
+#
+# Event counts. The event_day_counts table holds the
+# number of live events on each day and is kept up to
+# date by triggers on events, so every write made
+# through calendar_model (or directly) is counted.
+#
+###################################################
+
+# the columns each period groups by, and the fields they become
+PERIODS = {
+    'day': ('event_year', 'event_month', 'event_day'),
+    'month': ('event_year', 'event_month'),
+    'year': ('event_year',),
+}
+_FIELDS = {'event_year': 'year', 'event_month': 'month', 'event_day': 'day'}
+
+COUNT_DAYS_QUERY = """
+    SELECT event_year, event_month, event_day, COUNT(*), SUM(is_religious IS TRUE)
+    FROM events WHERE deleted = FALSE
+    GROUP BY event_year, event_month, event_day
+"""
+
+@timed
+def get_event_counts(period: str, start: Optional[date] = None, end: Optional[date] = None) -> list[dict[str, Any]]:
+    """
+    Counts the live events per day, month or year, read from the event_day_counts table.
+
+    Args:
+        period (str): 'day', 'month' or 'year'.
+        start (date): Only count events on or after this date.
+        end (date): Only count events on or before this date.
+
+    Returns:
+        list[dict[str, Any]]: One entry per period with events, in date order, with the
+            period's 'year' (and 'month', 'day') and the 'total', 'religious' and
+            'secular' counts.
+
+    Raises:
+        ValueError: If the period is unknown or the range is empty.
+        RuntimeError: If events are partitioned.
+        sqlite3.Error: If there is an issue with the database.
+    """
+    check_unpartitioned("Event counts")
+    if period not in PERIODS:
+        raise ValueError(f"Invalid period: {period}. Period must be one of {', '.join(PERIODS)}.")
+    if start is not None and end is not None and start > end:
+        raise ValueError(f"Invalid range: {start} is after {end}.")
+
+    columns = ', '.join(PERIODS[period])
+    conditions, params = [], []
+    # Row values are compared lexicographically, a range scan of the primary key
+    if start is not None:
+        conditions.append("(event_year, event_month, event_day) >= (?, ?, ?)")
+        params += [start.year, start.month, start.day]
+    if end is not None:
+        conditions.append("(event_year, event_month, event_day) <= (?, ?, ?)")
+        params += [end.year, end.month, end.day]
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+        SELECT {columns}, SUM(total), SUM(religious)
+        FROM event_day_counts {where}
+        GROUP BY {columns} ORDER BY {columns}
+    """
+
+    try:
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    fields = [_FIELDS[column] for column in PERIODS[period]]
+    counts = []
+    for row in rows:
+        entry = dict(zip(fields, row))
+        total, religious = row[-2:]
+        entry.update(total=total, religious=religious, secular=total - religious)
+        counts.append(entry)
+    logger.debug("Counted events for %d %ss", len(counts), period)
+    return counts
+
+def find_count_mismatches() -> list[dict[str, Any]]:
+    """
+    Compares event_day_counts with a fresh count of the events table.
+
+    Returns:
+        list[dict[str, Any]]: One entry per day whose stored counts are wrong, with
+            'year', 'month', 'day', and the 'stored' and 'actual' [total, religious]
+            counts ([0, 0] for a day missing from one side). Empty when consistent.
+
+    Raises:
+        sqlite3.Error: If there is an issue with the database.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT event_year, event_month, event_day, total, religious FROM event_day_counts")
+            stored = {tuple(row[:3]): list(row[3:]) for row in cursor.fetchall()}
+            cursor.execute(COUNT_DAYS_QUERY)
+            actual = {tuple(row[:3]): list(row[3:]) for row in cursor.fetchall()}
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    mismatches = []
+    for day in sorted(stored.keys() | actual.keys()):
+        if stored.get(day) != actual.get(day):
+            mismatches.append({'year': day[0], 'month': day[1], 'day': day[2],
+                               'stored': stored.get(day, [0, 0]), 'actual': actual.get(day, [0, 0])})
+    return mismatches
+
+def rebuild_event_counts() -> int:
+    """
+    Recounts every day from the events table, replacing event_day_counts in one transaction.
+
+    Returns:
+        int: The number of days with events.
+
+    Raises:
+        RuntimeError: If events are partitioned.
+        sqlite3.Error: If there is an issue with the database.
+    """
+    check_unpartitioned("Event counts")
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("DELETE FROM event_day_counts")
+            cursor.execute(f"""
+                INSERT INTO event_day_counts (event_year, event_month, event_day, total, religious)
+                {COUNT_DAYS_QUERY}
+            """)
+            days = cursor.rowcount
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    logger.info("Rebuilt event counts for %d days", days)
+    return days
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Check or rebuild the event_day_counts table.")
+    parser.add_argument("--check", action="store_true",
+                        help="only report days whose counts are wrong, exiting with status 1 if any are")
+    args = parser.parse_args(argv)
+
+    mismatches = find_count_mismatches()
+    for m in mismatches:
+        logger.warning("%04d-%02d-%02d: stored %s, actual %s", m['year'], m['month'], m['day'], m['stored'], m['actual'])
+    logger.info("%d days with wrong counts", len(mismatches))
+    if not args.check:
+        rebuild_event_counts()
+    sys.exit(1 if args.check and mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
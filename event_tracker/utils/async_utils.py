@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import os
+import threading
+from typing import Any, Callable, TypeVar
+
+
+T = TypeVar('T')
+
+# threads running blocking database calls for the async app
+DB_EXECUTOR_THREADS = int(os.getenv("DB_EXECUTOR_THREADS", "1"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+###################################################
+#
+# Database executor. calendar_model and sql_utils are
+# blocking, so the async app runs them on dedicated
+# threads and the event loop never waits on SQLite.
+#
+###################################################
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide database executor, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_THREADS, thread_name_prefix='db')
+        return _executor
+
+
+async def run_in_db_thread(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs a blocking database function on the database executor and awaits its result.
+
+    Args:
+        func (Callable): The function, e.g. calendar_model.get_event_by_id.
+        *args, **kwargs: Its arguments.
+
+    Returns:
+        The function's return value. Exceptions it raises are re-raised here.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), partial(func, *args, **kwargs))
+
+
+def shutdown_db_executor() -> None:
+    """Waits for queued database calls to finish and stops the executor threads."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def _forget_executor_after_fork() -> None:
+    # The executor's threads do not exist in a forked child
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_executor_after_fork)
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Hashable
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache whose entries also expire after a TTL.
+
+    Once `max_size` entries are stored, adding another evicts the least recently
+    used one. Expired entries are dropped lazily when they are looked up.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        if max_size <= 0:
+            raise ValueError(f"Invalid cache size: {max_size}. Size must be a positive number.")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires at, value)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value for a key, or `default` if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self._stats['misses'] += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores a value, evicting the least recently used entry if the cache is full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Removes a key from the cache if it is present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, reset_stats: bool = True) -> None:
+        """Removes every entry and, unless reset_stats is False, resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            if reset_stats:
+                for name in self._stats:
+                    self._stats[name] = 0
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the cache counters.
+
+        Returns:
+            dict: hits, misses, evictions and expirations, plus the current size.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['max_size'] = self.max_size
+        return stats
@@ -0,0 +1,60 @@
+import calendar
+from datetime import date, timedelta
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """
+    Returns the nth occurrence of a weekday in a month.
+
+    Args:
+        year (int): The year.
+        month (int): The month.
+        weekday (int): Monday is 0 and Sunday is 6.
+        n (int): 1 for the first occurrence, 2 for the second, ..., or -1 for the last.
+
+    Returns:
+        date: The matching date.
+
+    Raises:
+        ValueError: If the month does not have an nth such weekday.
+    """
+    if n == -1:
+        last = date(year, month, calendar.monthrange(year, month)[1])
+        return last - timedelta(days=(last.weekday() - weekday) % 7)
+    if n <= 0:
+        raise ValueError(f"Invalid occurrence: {n}. Must be positive or -1.")
+    first = date(year, month, 1)
+    result = first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    if result.month != month:
+        raise ValueError(f"{calendar.month_name[month]} {year} has no occurrence {n} of weekday {weekday}.")
+    return result
+
+
+def easter_sunday(year: int) -> date:
+    """
+    Returns the date of Western (Gregorian) Easter Sunday.
+
+    Uses the anonymous Gregorian algorithm (Meeus/Jones/Butcher).
+
+    Args:
+        year (int): The year.
+
+    Returns:
+        date: Easter Sunday of that year.
+    """
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def clamp_date(year: int, month: int, day: int) -> date:
+    """Returns the date, moved back to the last day of the month if the month is shorter."""
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
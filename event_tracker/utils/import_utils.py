@@ -0,0 +1,172 @@
+import codecs
+import csv
+import io
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Iterator, Optional
+
+
+# bytes read from the request body per read() call
+READ_CHUNK_SIZE = 64 * 1024
+# bulk import bodies larger than this many bytes are buffered on disk
+BULK_SPOOL_SIZE = int(os.getenv("BULK_SPOOL_SIZE", str(8 * 1024 * 1024)))
+
+_json_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+###################################################
+#
+# Incremental parsers for bulk imports. Each one reads
+# a binary stream a chunk at a time and yields one
+# record at a time, so the body is never fully loaded.
+#
+###################################################
+
+class _ChunkReader:
+    """A text buffer over a binary stream that only holds the unparsed tail."""
+
+    def __init__(self, stream: BinaryIO, chunk_size: int):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+        try:
+            text = self._decoder.decode(chunk, final=self._eof)
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Invalid UTF-8 input: {e}") from e
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def peek(self) -> Optional[str]:
+        """Returns the next non-whitespace character without consuming it, or None at the end."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return None
+
+    def advance(self) -> None:
+        self._pos += 1
+
+    def decode_value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _json_decoder.raw_decode(self._buffer, self._pos)
+                # A value ending exactly at the end of the buffer (e.g. a number)
+                # might continue in the next chunk
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    raise ValueError(f"Invalid JSON: {e}") from e
+            self._fill()
+
+
+def iter_json_array(stream: BinaryIO, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yields the elements of a top-level JSON array as they are read.
+
+    Args:
+        stream (BinaryIO): A UTF-8 encoded JSON document containing an array.
+        chunk_size (int): The number of bytes to read at a time.
+
+    Yields:
+        Any: Each decoded array element.
+
+    Raises:
+        ValueError: If the document is not a well formed JSON array.
+    """
+    reader = _ChunkReader(stream, chunk_size)
+    if reader.peek() != '[':
+        raise ValueError("Expected a JSON array")
+    reader.advance()
+
+    if reader.peek() == ']':
+        reader.advance()
+    else:
+        while True:
+            yield reader.decode_value()
+            char = reader.peek()
+            reader.advance()
+            if char == ']':
+                break
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array but found {char!r}")
+
+    if reader.peek() is not None:
+        raise ValueError("Unexpected data after JSON array")
+
+
+def iter_ndjson(stream: BinaryIO) -> Iterator[Any]:
+    """
+    Yields one decoded value per line of newline-delimited JSON. Blank lines are skipped.
+
+    Raises:
+        ValueError: If a line is not valid JSON.
+    """
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON on line {number}: {e}") from e
+
+
+def iter_csv(stream: BinaryIO) -> Iterator[dict[str, str]]:
+    """
+    Yields one dict per CSV row, keyed by the header row.
+
+    Raises:
+        ValueError: If the input is not valid UTF-8 CSV.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    try:
+        yield from csv.DictReader(text)
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid CSV: {e}") from e
+    finally:
+        # Leave the underlying stream open for its owner
+        text.detach()
+
+
+###################################################
+#
+# Buffering request bodies before an import, so a
+# slow client never holds a write transaction open.
+#
+###################################################
+
+def spool(stream: BinaryIO, chunk_size: int = READ_CHUNK_SIZE) -> BinaryIO:
+    """
+    Reads a stream to the end into a rewound buffer, moving to a temporary file
+    once it grows past BULK_SPOOL_SIZE bytes. The caller closes the buffer.
+    """
+    buffer = io.BytesIO()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(buffer, io.BytesIO) and buffer.tell() + len(chunk) > BULK_SPOOL_SIZE:
+            on_disk = tempfile.TemporaryFile()
+            on_disk.write(buffer.getvalue())
+            buffer = on_disk
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
@@ -1,26 +1,239 @@
+import atexit
+from datetime import datetime, timezone
+import json
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import os
+import queue
 import sys
+import threading
+import time
 
-from flask import current_app, has_request_context
 
+# level for every logger without an entry in LOG_LEVELS
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# per-logger levels as "name=LEVEL,name=LEVEL"; a name also covers the modules below it,
+# so "event_tracker.utils=DEBUG" applies to event_tracker.utils.sql_utils
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# "text" for the classic one-line format, "json" for one JSON object per line
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# INFO and DEBUG messages repeated more than LOG_SAMPLE_BURST times within
+# LOG_SAMPLE_WINDOW seconds are dropped until the window ends; 0 disables sampling
+LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "20"))
+LOG_SAMPLE_WINDOW = float(os.getenv("LOG_SAMPLE_WINDOW", "1"))
 
-def configure_logger(logger):
-    logger.setLevel(logging.DEBUG)  # Set the desired logging level here
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
-    # Create a console handler that logs to stderr
+
+def _parse_levels(spec: str) -> dict:
+    levels = {}
+    for entry in spec.split(','):
+        name, _, level = entry.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+_levels = _parse_levels(LOG_LEVELS)
+
+
+def level_for(name: str) -> str:
+    """
+    Returns the configured level for a logger: the LOG_LEVELS entry for its
+    name or its nearest parent package, otherwise LOG_LEVEL.
+    """
+    while name:
+        if name in _levels:
+            return _levels[name]
+        name = name.rpartition('.')[0]
+    return LOG_LEVEL
+
+
+###################################################
+#
+# Formatting and sampling
+#
+###################################################
+
+class TextFormatter(logging.Formatter):
+    """The classic one-line format, noting how many repeats sampling dropped."""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{line} ({suppressed} similar messages suppressed)" if suppressed else line
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as a single-line JSON object."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Drops repeats of high-frequency INFO and DEBUG messages.
+
+    Messages are counted per logger and format string (before arguments are
+    merged in), so "Retrieved %d events" is one message whatever the count.
+    The first `burst` occurrences in each `window` seconds pass; the rest are
+    dropped, and the next one to pass carries the number dropped as
+    `record.suppressed`. Warnings and errors always pass.
+    """
+
+    def __init__(self, burst: int = LOG_SAMPLE_BURST, window: float = LOG_SAMPLE_WINDOW):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._counts = {}  # (logger, msg) -> [window start, passed, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0 or record.levelno > logging.INFO:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            count = self._counts.get(key)
+            if count is None or now - count[0] >= self.window:
+                suppressed = count[2] if count else 0
+                if len(self._counts) > 10000:
+                    self._counts.clear()
+                self._counts[key] = [now, 1, 0]
+            elif count[1] < self.burst:
+                count[1] += 1
+                suppressed = 0
+            else:
+                count[2] += 1
+                return False
+        record.suppressed = suppressed
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    # Only merge the arguments into the message on the calling thread. Timestamps,
+    # formatting and the write to stderr happen on the listener thread.
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if not _listening:
+            _start_listener()
+        super().enqueue(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+###################################################
+#
+# The pipeline. Every configured logger shares one
+# QueueHandler; a single listener thread formats the
+# queued records and writes them to stderr. The thread
+# starts with the first record, so importing a module
+# that configures a logger costs no thread.
+#
+###################################################
+
+_handler = None
+_listener = None
+_listening = False
+_stopped = False
+_pipeline_lock = threading.Lock()
+
+
+def _output_handler() -> logging.Handler:
     handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.DEBUG)
+    handler.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else TextFormatter())
+    return handler
+
+
+def _create_pipeline() -> None:
+    global _handler, _listener
+    records = queue.SimpleQueue()
+    if _handler is None:
+        _handler = _DeferredQueueHandler(records)
+        _handler.addFilter(SamplingFilter())
+    else:
+        _handler.queue = records
+    _listener = QueueListener(records, _output_handler())
+
+
+def _start_listener() -> None:
+    global _listening
+    with _pipeline_lock:
+        # Records logged after the exit handler stopped the pipeline are dropped
+        if not _listening and not _stopped:
+            _listener.start()
+            _listening = True
+
+
+def configure_logger(logger: logging.Logger) -> None:
+    """
+    Routes a logger through the shared logging queue at its configured level.
+
+    Safe to call any number of times for the same logger; the handler is only
+    attached once.
+
+    Args:
+        logger (logging.Logger): The logger, usually logging.getLogger(__name__).
+    """
+    with _pipeline_lock:
+        if _handler is None:
+            _create_pipeline()
+        logger.setLevel(level_for(logger.name))
+        if _handler not in logger.handlers:
+            logger.addHandler(_handler)
+
+
+def flush_logs() -> None:
+    """Blocks until every record queued so far has been written. Call before os._exit()."""
+    with _pipeline_lock:
+        if _listening:
+            # stop() drains the queue and joins the thread; start() picks up what comes next
+            _listener.stop()
+            _listener.start()
+
+
+def _stop_pipeline() -> None:
+    global _listening, _stopped
+    with _pipeline_lock:
+        listening, _listening, _stopped = _listening, False, True
+    if listening:
+        _listener.stop()
 
-    # Create a formatter with a timestamp
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-    # Add the formatter to the handler
-    handler.setFormatter(formatter)
+def _restart_after_fork() -> None:
+    # The listener thread does not exist in a forked child. Give the child its own
+    # queue (records the parent had queued are the parent's to write) and listener,
+    # started by the child's first record.
+    global _pipeline_lock, _listening
+    _pipeline_lock = threading.Lock()
+    _listening = False
+    if _handler is not None:
+        _create_pipeline()
 
-    # Add the handler to the logger
-    logger.addHandler(handler)
 
-    if has_request_context():
-        app_logger = current_app.logger
-        for handler in app_logger.handlers:
-            logger.addHandler(handler)
\ No newline at end of file
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(_stop_pipeline)
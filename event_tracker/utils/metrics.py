@@ -0,0 +1,450 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# directory where the processes serving one port pool their metrics; empty keeps them per process
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+# seconds between writes of a process's metrics to METRICS_DIR
+METRICS_SHARE_INTERVAL = float(os.getenv("METRICS_SHARE_INTERVAL", "5"))
+
+# upper bounds in seconds; an implicit +Inf bucket catches the rest
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# (name, type, help, labels, value) as returned by collectors
+Sample = tuple[str, str, str, dict, float]
+
+
+def _format_labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+###################################################
+#
+# Metric types. Values are kept per combination of
+# label values and rendered in the Prometheus text
+# exposition format.
+#
+###################################################
+
+class Counter:
+    """A monotonically increasing count, per combination of label values."""
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: Any, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: Any) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def snapshot(self) -> list:
+        """Returns [label values, value] pairs, as written to METRICS_DIR."""
+        with self._lock:
+            return [[list(labelvalues), value] for labelvalues, value in self._values.items()]
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Counts observations into fixed buckets, per combination of label values.
+
+    Observing is a binary search and an increment under a lock, cheap enough to
+    time every request and query.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [count per bucket, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: Any) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues: Any) -> Iterator[None]:
+        """Observes the time spent in the with block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def count(self, *labelvalues: Any) -> int:
+        with self._lock:
+            series = self._series.get(labelvalues)
+            return series[2] if series else 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> list:
+        """Returns [label values, bucket counts, sum, count] entries, as written to METRICS_DIR."""
+        with self._lock:
+            return [[list(labelvalues), list(counts), total, count]
+                    for labelvalues, (counts, total, count) in self._series.items()]
+
+    def merge(self, labelvalues: tuple, counts: list[int], total: float, count: int) -> None:
+        """Adds the observations of another process's series with the same buckets."""
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0] = [mine + theirs for mine, theirs in zip(series[0], counts)]
+            series[1] += total
+            series[2] += count
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = sorted((labelvalues, (list(counts), total, count))
+                            for labelvalues, (counts, total, count) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        labelnames = self.labelnames + ('le',)
+        for labelvalues, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(labelnames, labelvalues + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds the process's metrics and renders them for /api/metrics.
+
+    Counters and histograms are updated as things happen. Values that already
+    live elsewhere, such as cache and pool statistics, are read at scrape time
+    from collectors: functions returning (name, type, help, labels, value) samples.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type, name: str, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {type(metric).__name__}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        """Returns the counter with this name, creating it on first use."""
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        """Returns the histogram with this name, creating it on first use."""
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def snapshot(self, collect: bool = True) -> dict:
+        """
+        Returns every metric's current values, and unless collect is False the
+        collectors' samples, in a form json.dumps() accepts.
+        """
+        with self._lock:
+            metrics = list(self._metrics.items())
+            collectors = list(self._collectors) if collect else []
+        snapshot = {'counters': {}, 'histograms': {}, 'samples': []}
+        for name, metric in metrics:
+            if isinstance(metric, Histogram):
+                snapshot['histograms'][name] = {'help': metric.help, 'labelnames': list(metric.labelnames),
+                                                'buckets': list(metric.buckets), 'series': metric.snapshot()}
+            else:
+                snapshot['counters'][name] = {'help': metric.help, 'labelnames': list(metric.labelnames),
+                                              'values': metric.snapshot()}
+        for collector in collectors:
+            snapshot['samples'].extend(list(sample) for sample in collector())
+        return snapshot
+
+    def reset(self) -> None:
+        """Zeroes every counter and histogram. Collectors are kept."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def render(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format (version 0.0.4).
+
+        Returns:
+            str: The exposition, ending with a newline.
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+            collectors = list(self._collectors)
+
+        lines = []
+        for _, metric in metrics:
+            lines.extend(metric.render())
+
+        families = {}
+        for collector in collectors:
+            for name, kind, help, labels, value in collector():
+                families.setdefault(name, (kind, help, []))[2].append((labels, value))
+        for name, (kind, help, samples) in sorted(families.items()):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+###################################################
+#
+# Several processes. With METRICS_DIR set, every
+# process writes its snapshot there as <pid>.json,
+# and a scrape adds up the counters and histograms
+# of all of them, so totals never go backwards
+# whichever process answers. Collector samples are
+# live state, so they are only kept for running
+# processes, labelled with their pid.
+#
+###################################################
+
+_sharing = None  # the thread writing this process's snapshot, see start_sharing()
+
+
+def write_snapshot(directory: str, collect: bool = True) -> None:
+    """Writes this process's metrics to directory/<pid>.json, replacing its previous snapshot."""
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump(REGISTRY.snapshot(collect), f)
+    # Readers never see a half written file
+    os.replace(temporary, path)
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def render_shared(directory: str) -> str:
+    """
+    Renders the sum of the metrics of every process that has written to a directory.
+
+    Returns:
+        str: The exposition, in the format of MetricsRegistry.render().
+    """
+    write_snapshot(directory)
+    merged = MetricsRegistry()
+    samples = []
+    for filename in sorted(os.listdir(directory)):
+        pid, extension = os.path.splitext(filename)
+        if extension != '.json' or not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue  # removed, or replaced by a process that has just exited
+        for name, counter in snapshot['counters'].items():
+            metric = merged.counter(name, counter['help'], tuple(counter['labelnames']))
+            for labelvalues, value in counter['values']:
+                metric.inc(*labelvalues, amount=value)
+        for name, histogram in snapshot['histograms'].items():
+            metric = merged.histogram(name, histogram['help'], tuple(histogram['labelnames']),
+                                      tuple(histogram['buckets']))
+            for labelvalues, counts, total, count in histogram['series']:
+                metric.merge(tuple(labelvalues), counts, total, count)
+        if _is_running(int(pid)):
+            samples.extend((name, kind, help, {**labels, 'pid': pid}, value)
+                           for name, kind, help, labels, value in snapshot['samples'])
+    merged.register_collector(lambda: samples)
+    return merged.render()
+
+
+def render_metrics() -> str:
+    """Renders the metrics for /api/metrics: this process's, or every process's with METRICS_DIR."""
+    if METRICS_DIR:
+        return render_shared(METRICS_DIR)
+    return REGISTRY.render()
+
+
+def start_sharing() -> None:
+    """
+    Writes this process's metrics to METRICS_DIR every METRICS_SHARE_INTERVAL seconds,
+    so scrapes answered by other processes include them. Does nothing without METRICS_DIR.
+    """
+    global _sharing
+    if not (METRICS_ENABLED and METRICS_DIR) or _sharing is not None:
+        return
+
+    def share() -> None:
+        while True:
+            time.sleep(METRICS_SHARE_INTERVAL)
+            try:
+                write_snapshot(METRICS_DIR)
+            except OSError:
+                pass  # the directory is gone, e.g. the server is shutting down
+
+    _sharing = threading.Thread(target=share, name="metrics-share", daemon=True)
+    _sharing.start()
+
+
+def stop_sharing() -> None:
+    """Writes this process's final counters to METRICS_DIR, without its live samples."""
+    if METRICS_ENABLED and METRICS_DIR:
+        try:
+            write_snapshot(METRICS_DIR, collect=False)
+        except OSError:
+            pass
+
+
+def _forget_sharing_after_fork() -> None:
+    # The thread does not survive the fork; the child starts its own
+    global _sharing
+    _sharing = None
+
+
+os.register_at_fork(after_in_child=_forget_sharing_after_fork)
+
+
+###################################################
+#
+# Instrumentation
+#
+###################################################
+
+_function_seconds = REGISTRY.histogram(
+    'model_function_duration_seconds', 'Time spent in model functions.', ('function',))
+_function_errors = REGISTRY.counter(
+    'model_function_errors_total', 'Model function calls that raised.', ('function',))
+_query_seconds = REGISTRY.histogram(
+    'sql_query_duration_seconds', 'Time spent executing SQL statements, by statement type.',
+    ('statement',), SQL_BUCKETS)
+_query_errors = REGISTRY.counter(
+    'sql_query_errors_total', 'SQL statements that raised, by statement type.', ('statement',))
+
+
+def timed(func: Callable) -> Callable:
+    """Records the duration of every call to a function, and the calls that raise."""
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not METRICS_ENABLED:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            _function_errors.inc(name)
+            raise
+        finally:
+            _function_seconds.observe(time.perf_counter() - start, name)
+    return wrapper
+
+
+def _statement_type(sql: str) -> str:
+    # The leading keyword keeps the label set small, unlike the full SQL text
+    words = sql.split(None, 1)
+    return words[0].upper() if words else 'EMPTY'
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """A cursor that times every statement it executes."""
+
+    def execute(self, sql, parameters=()):
+        statement = _statement_type(sql)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        except sqlite3.Error:
+            _query_errors.inc(statement)
+            raise
+        finally:
+            _query_seconds.observe(time.perf_counter() - start, statement)
+
+    def executemany(self, sql, seq_of_parameters):
+        statement = _statement_type(sql)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        except sqlite3.Error:
+            _query_errors.inc(statement)
+            raise
+        finally:
+            _query_seconds.observe(time.perf_counter() - start, statement)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    A connection whose cursors are InstrumentedCursors, including the ones
+    behind conn.execute(). Pass it as the factory argument of sqlite3.connect().
+    """
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,95 @@
+import logging
+import os
+import re
+import sqlite3
+
+from event_tracker.utils.logger import configure_logger
+from event_tracker.utils.sql_utils import get_db_connection
+
+
+# Named after the module even when run with python -m, so LOG_LEVELS can refer to it
+logger = logging.getLogger("event_tracker.utils.migrations")
+configure_logger(logger)
+
+
+# Migrations are numbered SQL files, e.g. 001_event_indexes.sql. Each one ends by
+# setting PRAGMA user_version to its own number.
+MIGRATIONS_PATH = os.getenv(
+    "SQL_MIGRATIONS_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "sql", "migrations"),
+)
+
+MIGRATION_FILE = re.compile(r"^(\d+)_\w+\.sql$")
+
+
+def list_migrations(path: str = None) -> list[tuple[int, str]]:
+    """
+    Lists the migration files in order.
+
+    Args:
+        path (str): The migrations directory. Defaults to MIGRATIONS_PATH.
+
+    Returns:
+        list[tuple[int, str]]: (version, file path) pairs sorted by version.
+    """
+    path = path or MIGRATIONS_PATH
+    migrations = []
+    for filename in os.listdir(path):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), os.path.join(path, filename)))
+    return sorted(migrations)
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Returns the schema version recorded in the database header."""
+    return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def apply_migrations(conn: sqlite3.Connection, path: str = None) -> list[int]:
+    """
+    Applies every migration newer than the database's schema version.
+
+    Each migration runs in its own transaction, so a failing migration leaves
+    the database at the previous version.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the database.
+        path (str): The migrations directory. Defaults to MIGRATIONS_PATH.
+
+    Returns:
+        list[int]: The versions that were applied.
+
+    Raises:
+        sqlite3.Error: If a migration fails.
+    """
+    current = get_schema_version(conn)
+    applied = []
+    for version, filename in list_migrations(path):
+        if version <= current:
+            continue
+        with open(filename) as f:
+            script = f.read()
+        logger.info("Applying migration %s", os.path.basename(filename))
+        try:
+            conn.executescript(f"BEGIN;\n{script}\nCOMMIT;")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            logger.error("Migration %s failed: %s", os.path.basename(filename), str(e))
+            raise e
+        applied.append(version)
+    return applied
+
+
+def migrate() -> list[int]:
+    """Brings the configured database up to the latest schema version."""
+    with get_db_connection() as conn:
+        applied = apply_migrations(conn)
+        version = get_schema_version(conn)
+    logger.info("Database schema is at version %s", version)
+    return applied
+
+
+if __name__ == "__main__":
+    migrate()
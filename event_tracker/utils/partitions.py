@@ -0,0 +1,407 @@
+import argparse
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+from heapq import merge
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterator, Optional
+
+from event_tracker.utils import sql_utils
+from event_tracker.utils.logger import configure_logger
+from event_tracker.utils.sql_utils import ConnectionPool, get_db_connection
+
+# Named after the module even when run with python -m, so LOG_LEVELS can refer to it
+logger = logging.getLogger("event_tracker.utils.partitions")
+configure_logger(logger)
+
+# keep events in one SQLite file per 'year' or 'decade' of their date instead of in the
+# events table ('none')
+EVENT_PARTITIONING = os.getenv("EVENT_PARTITIONING", "none")
+
+# directory of the partition files; empty puts them in a partitions directory beside DB_PATH
+PARTITION_DIR = os.getenv("PARTITION_DIR", "")
+
+# connections kept per partition file, and threads reading partitions in parallel
+PARTITION_POOL_SIZE = int(os.getenv("PARTITION_POOL_SIZE", "2"))
+PARTITION_WORKERS = int(os.getenv("PARTITION_WORKERS", "4"))
+
+# years covered by one partition under each scheme
+SCHEMES = {'year': 1, 'decade': 10}
+
+PARTITION_SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "sql", "create_partition_table.sql")
+
+_PARTITION_FILE = re.compile(r"^events_(-?\d+)\.db$")
+
+_COLUMNS = "id, event_name, event_day, event_month, event_year, is_religious"
+
+
+###################################################
+#
+# Partitioned storage. Each partition is a separate
+# database file holding the events table for one year
+# or decade, opened on first use. The event_partitions
+# table of the main database hands out IDs, keeps
+# names unique and says which file holds each event.
+#
+###################################################
+
+class PartitionedEventStore:
+    """
+    Stores events across per-year or per-decade SQLite files.
+
+    Single events are found through event_partitions, so reading or writing one
+    touches the main database and one small partition. Wide reads run one query
+    per partition on a thread pool: scan() merges them into one stream ordered
+    by ID, fetching the next page of every partition while the current one is
+    consumed, and between() skips the partitions outside the range.
+
+    Rows are (id, event_name, event_day, event_month, event_year, is_religious),
+    with deleted appended by get() and get_many().
+    """
+
+    def __init__(self, directory: str, scheme: str, pool_size: int = PARTITION_POOL_SIZE,
+                 workers: int = PARTITION_WORKERS):
+        if scheme not in SCHEMES:
+            raise ValueError(f"Invalid partitioning: {scheme}. Expected one of {', '.join(SCHEMES)}.")
+        self.directory = directory
+        self.scheme = scheme
+        self.span = SCHEMES[scheme]
+        self.pool_size = pool_size
+        with open(PARTITION_SCHEMA_PATH) as f:
+            self._schema = f.read()
+        self._pools = {}  # partition -> ConnectionPool
+        self._lock = threading.Lock()
+        # Threads are only started by the first wide read
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="partition")
+
+    def partition_of(self, year: int) -> int:
+        """Returns the partition holding events of a year: the year, or the first year of its decade."""
+        return year // self.span * self.span
+
+    def path(self, partition: int) -> str:
+        return os.path.join(self.directory, f"events_{partition}.db")
+
+    def partitions(self) -> list[int]:
+        """Lists the partitions that have a file, in order."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(match.group(1)) for match in map(_PARTITION_FILE.match, names) if match)
+
+    def _pool(self, partition: int) -> ConnectionPool:
+        with self._lock:
+            pool = self._pools.get(partition)
+            if pool is None:
+                os.makedirs(self.directory, exist_ok=True)
+                conn = sqlite3.connect(self.path(partition))
+                try:
+                    conn.executescript(self._schema)
+                finally:
+                    conn.close()
+                pool = self._pools[partition] = ConnectionPool(self.path(partition), size=self.pool_size)
+                logger.debug("Opened partition %s", partition)
+            return pool
+
+    @contextmanager
+    def connection(self, partition: int) -> Iterator[sqlite3.Connection]:
+        """Checks out a connection to a partition file, creating the file if needed."""
+        pool = self._pool(partition)
+        conn = pool.acquire()
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools.clear()
+        self._executor.shutdown(wait=True)
+
+    ###################################################
+    # Single events
+    ###################################################
+
+    def locate(self, ids: list[int]) -> dict[int, int]:
+        """Returns the partition of each of the IDs that exists."""
+        with get_db_connection() as conn:
+            rows = conn.execute("SELECT id, partition FROM event_partitions WHERE id IN (SELECT value FROM json_each(?))",
+                                (json.dumps(list(ids)),)).fetchall()
+        return dict(rows)
+
+    def add(self, event_name: str, event_day: int, event_month: int, event_year: int, is_religious: bool) -> int:
+        """
+        Stores a new event and returns its ID.
+
+        The ID and name are claimed in event_partitions first and released again if
+        the partition write fails, so a crash in between leaves an unused ID rather
+        than an event no lookup can find.
+
+        Raises:
+            sqlite3.IntegrityError: If the name is taken.
+        """
+        partition = self.partition_of(event_year)
+        with get_db_connection() as conn:
+            cursor = conn.execute("INSERT INTO event_partitions (partition, event_name) VALUES (?, ?)", (partition, event_name))
+            id = cursor.lastrowid
+            conn.commit()
+        try:
+            with self.connection(partition) as conn:
+                conn.execute(f"INSERT INTO events ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                             (id, event_name, event_day, event_month, event_year, is_religious))
+                conn.commit()
+        except BaseException:
+            with get_db_connection() as conn:
+                conn.execute("DELETE FROM event_partitions WHERE id = ?", (id,))
+                conn.commit()
+            raise
+        return id
+
+    def get(self, id: int) -> Optional[tuple]:
+        """Returns an event's row, deleted or not, or None if there is no such event."""
+        return self.get_many([id]).get(id)
+
+    def get_many(self, ids: list[int]) -> dict[int, tuple]:
+        """Returns the rows of the IDs that exist, reading each partition involved in parallel."""
+        by_partition = {}
+        for id, partition in self.locate(ids).items():
+            by_partition.setdefault(partition, []).append(id)
+
+        def read(partition: int, ids: list[int]) -> list[tuple]:
+            with self.connection(partition) as conn:
+                return conn.execute(f"SELECT {_COLUMNS}, deleted FROM events WHERE id IN (SELECT value FROM json_each(?))",
+                                    (json.dumps(ids),)).fetchall()
+
+        if len(by_partition) == 1:
+            # One partition gains nothing from a thread hop, the common case of get()
+            return {row[0]: row for row in read(*by_partition.popitem())}
+        futures = [self._executor.submit(read, partition, ids) for partition, ids in by_partition.items()]
+        return {row[0]: row for future in futures for row in future.result()}
+
+    def mark_deleted(self, id: int, partition: int) -> None:
+        with self.connection(partition) as conn:
+            conn.execute("UPDATE events SET deleted = TRUE, deleted_at = ? WHERE id = ?", (time.time(), id))
+            conn.commit()
+
+    def move(self, id: int, partition: int, event_day: int, event_month: int, event_year: int) -> None:
+        """
+        Changes the date of an event, moving it to another partition if the year calls for it.
+
+        The copy in the new partition is written before the old one is removed, so the
+        event is never missing, though a scan running at that moment may see it twice.
+        """
+        target = self.partition_of(event_year)
+        if target == partition:
+            with self.connection(partition) as conn:
+                conn.execute("UPDATE events SET event_day = ?, event_month = ?, event_year = ? WHERE id = ?",
+                             (event_day, event_month, event_year, id))
+                conn.commit()
+            return
+
+        with self.connection(partition) as conn:
+            row = conn.execute("SELECT event_name, is_religious, deleted, deleted_at FROM events WHERE id = ?", (id,)).fetchone()
+        with self.connection(target) as conn:
+            conn.execute(f"INSERT OR REPLACE INTO events ({_COLUMNS}, deleted, deleted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (id, row[0], event_day, event_month, event_year, row[1], row[2], row[3]))
+            conn.commit()
+        with get_db_connection() as conn:
+            conn.execute("UPDATE event_partitions SET partition = ? WHERE id = ?", (target, id))
+            conn.commit()
+        with self.connection(partition) as conn:
+            conn.execute("DELETE FROM events WHERE id = ?", (id,))
+            conn.commit()
+        logger.debug("Moved event %s from partition %s to %s", id, partition, target)
+
+    ###################################################
+    # Wide reads
+    ###################################################
+
+    def _read(self, partition: int, query: str, params: tuple) -> list[tuple]:
+        with self.connection(partition) as conn:
+            return conn.execute(query, params).fetchall()
+
+    def scan(self, batch_size: int = 500, after: int = 0) -> Iterator[tuple]:
+        """
+        Yields every live event with an ID greater than `after`, ordered by ID.
+
+        Every partition is read a keyset page at a time on the thread pool. The first
+        page of each is requested at once, and the next page of a partition as soon as
+        the merge starts on the current one, so reads overlap with the consumer and
+        memory stays within two pages per partition.
+        """
+        query = f"SELECT {_COLUMNS} FROM events WHERE deleted = FALSE AND id > ? ORDER BY id LIMIT ?"
+
+        def pages(partition: int, future: Future) -> Iterator[tuple]:
+            while future is not None:
+                rows = future.result()
+                future = self._executor.submit(self._read, partition, query, (rows[-1][0], batch_size)) \
+                    if len(rows) == batch_size else None
+                yield from rows
+
+        partitions = self.partitions()
+        firsts = [self._executor.submit(self._read, partition, query, (after, batch_size)) for partition in partitions]
+        yield from merge(*(pages(partition, first) for partition, first in zip(partitions, firsts)),
+                         key=lambda row: row[0])
+
+    def page(self, limit: int, after: int = 0) -> list[tuple]:
+        """Returns the first `limit` live events with an ID greater than `after`."""
+        rows = []
+        for row in self.scan(limit, after):
+            rows.append(row)
+            if len(rows) == limit:
+                break
+        return rows
+
+    def between(self, start: date, end: date) -> Iterator[tuple]:
+        """
+        Yields the live events dated within a range, ordered by date.
+
+        Only the partitions covering the range are read, all at once on the thread
+        pool. Partitions hold disjoint years, so their results are yielded one after
+        the other in partition order, each as soon as it and those before it are read.
+        """
+        query = f"""
+            SELECT {_COLUMNS} FROM events
+            WHERE deleted = FALSE
+              AND (event_year, event_month, event_day) >= (?, ?, ?)
+              AND (event_year, event_month, event_day) <= (?, ?, ?)
+            ORDER BY event_year, event_month, event_day
+        """
+        params = (start.year, start.month, start.day, end.year, end.month, end.day)
+        low, high = self.partition_of(start.year), self.partition_of(end.year)
+        futures = [self._executor.submit(self._read, partition, query, params)
+                   for partition in self.partitions() if low <= partition <= high]
+        for future in futures:
+            yield from future.result()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _partition_dir() -> str:
+    return PARTITION_DIR or os.path.join(os.path.dirname(os.path.abspath(sql_utils.DB_PATH)), "partitions")
+
+
+def get_partitioned_store() -> Optional[PartitionedEventStore]:
+    """
+    Returns the process-wide partitioned store, or None when EVENT_PARTITIONING is 'none'.
+
+    The store is created on first use, and recreated if DB_PATH or the settings change.
+    """
+    global _store
+    if EVENT_PARTITIONING == 'none':
+        return None
+    directory = _partition_dir()
+    store = _store
+    if store is not None and (store.directory, store.scheme) == (directory, EVENT_PARTITIONING):
+        return store
+    with _store_lock:
+        if _store is None or (_store.directory, _store.scheme) != (directory, EVENT_PARTITIONING):
+            if _store is not None:
+                _store.close()
+            _store = PartitionedEventStore(directory, EVENT_PARTITIONING)
+        return _store
+
+
+def close_partitioned_store() -> None:
+    """Closes the process-wide partitioned store, if one has been created."""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
+
+
+def check_unpartitioned(feature: str) -> None:
+    """
+    Raises:
+        RuntimeError: If events are partitioned, for features that read tables kept
+            up to date by triggers on the events table of the main database.
+    """
+    if EVENT_PARTITIONING != 'none':
+        raise RuntimeError(f"{feature} is not available with EVENT_PARTITIONING={EVENT_PARTITIONING}")
+
+
+def _forget_store_after_fork() -> None:
+    # As with the connection pool, a child opens its own connections and threads
+    global _store, _store_lock
+    _store = None
+    _store_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_store_after_fork)
+
+
+def split_events(store: PartitionedEventStore, batch_size: int = 1000) -> int:
+    """
+    Moves the events of the main events table, deleted ones included, into their
+    partitions, keeping their IDs.
+
+    Each batch is written to its partitions first; then, in one transaction on the
+    main database, it is entered in event_partitions and deleted from events (with
+    any recurrence rule, which partitioned events cannot have), so an event is never
+    kept in both places. An interrupted move can be resumed: rows already written to
+    a partition but still in events are written again.
+
+    Returns:
+        int: The number of events moved.
+    """
+    moved, after = 0, 0
+    while True:
+        with get_db_connection() as conn:
+            rows = conn.execute(f"""
+                SELECT {_COLUMNS}, deleted, deleted_at FROM events
+                WHERE id > ? AND id NOT IN (SELECT id FROM event_partitions) ORDER BY id LIMIT ?
+            """, (after, batch_size)).fetchall()
+        if not rows:
+            return moved
+        by_partition = {}
+        for row in rows:
+            by_partition.setdefault(store.partition_of(row[4]), []).append(row)
+        for partition, partition_rows in by_partition.items():
+            with store.connection(partition) as conn:
+                conn.executemany(f"INSERT OR REPLACE INTO events ({_COLUMNS}, deleted, deleted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                 partition_rows)
+                conn.commit()
+        ids = json.dumps([row[0] for row in rows])
+        with get_db_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("INSERT INTO event_partitions (id, partition, event_name) VALUES (?, ?, ?)",
+                                 [(row[0], store.partition_of(row[4]), row[1]) for row in rows])
+                conn.execute("DELETE FROM recurrence_rules WHERE event_id IN (SELECT value FROM json_each(?))", (ids,))
+                conn.execute("DELETE FROM events WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        moved += len(rows)
+        after = rows[-1][0]
+        logger.info("Moved %d events into partitions", moved)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Move the events table into partition files, before setting EVENT_PARTITIONING.")
+    parser.add_argument("scheme", choices=sorted(SCHEMES), help="partition by year or by decade")
+    parser.add_argument("--directory", help="where to write the partition files (default PARTITION_DIR)")
+    args = parser.parse_args(argv)
+
+    store = PartitionedEventStore(args.directory or _partition_dir(), args.scheme)
+    try:
+        split_events(store)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from bisect import bisect_left, insort
+from heapq import nsmallest
+import re
+import unicodedata
+from typing import Any
+
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits text into lowercase words with accents removed, matching the
+    unicode61 tokenizer (remove_diacritics 2) of the events_fts table.
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return _WORD.findall(stripped)
+
+
+class PrefixIndex:
+    """
+    Answers "which event names have a word starting with ..." for autocomplete.
+
+    Each word of each name is kept once in a sorted list of (word, id) pairs, so
+    every word sharing a prefix sits in one contiguous run found by a binary
+    search, as the subtree of a trie would be, while storing one tuple per word
+    instead of one node per character. Adding or removing a name is a binary
+    search plus a list insert per word.
+    """
+
+    def __init__(self):
+        self._words = []  # (word, id)
+        self._events = {}  # id -> event dict
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def add(self, event: dict[str, Any]) -> None:
+        """Adds an event, replacing any event with the same ID."""
+        self.remove(event['id'])
+        self._events[event['id']] = event
+        for word in set(tokenize(event['event_name'])):
+            insort(self._words, (word, event['id']))
+
+    def remove(self, event_id: int) -> None:
+        """Removes an event if it is indexed."""
+        event = self._events.pop(event_id, None)
+        if event is None:
+            return
+        for word in set(tokenize(event['event_name'])):
+            del self._words[bisect_left(self._words, (word, event_id))]
+
+    def get(self, event_id: int) -> dict[str, Any]:
+        return self._events.get(event_id)
+
+    def _range(self, word: str, prefix: bool) -> tuple[int, int]:
+        # Positions in _words of this word, or of every word starting with it
+        low = bisect_left(self._words, (word,))
+        high = bisect_left(self._words, (word + '\U0010ffff',) if prefix else (word, float('inf')))
+        return low, high
+
+    def complete(self, text: str, limit: int) -> list[dict[str, Any]]:
+        """
+        Finds events whose name has every word of the text, the last one as a
+        prefix and the others in full.
+
+        Names that start with the text come first, then the rest, each group
+        ordered by name.
+
+        Args:
+            text (str): What has been typed so far.
+            limit (int): The maximum number of events to return.
+
+        Returns:
+            list[dict[str, Any]]: The matching events.
+        """
+        words = tokenize(text)
+        if not words:
+            return []
+        # Walk the smallest run of matching words and check the other words against each candidate
+        ranges = [self._range(word, prefix=i == len(words) - 1) for i, word in enumerate(words)]
+        low, high = min(ranges, key=lambda r: r[1] - r[0])
+        full, last = set(words[:-1]), words[-1]
+        ids = []
+        for _, event_id in self._words[low:high]:
+            name_words = tokenize(self._events[event_id]['event_name'])
+            if full.issubset(name_words) and any(word.startswith(last) for word in name_words):
+                ids.append(event_id)
+
+        typed = ' '.join(words)
+
+        def rank(event: dict[str, Any]) -> tuple:
+            return (not ' '.join(tokenize(event['event_name'])).startswith(typed), event['event_name'].casefold())
+
+        return nsmallest(limit, (self._events[event_id] for event_id in dict.fromkeys(ids)), key=rank)
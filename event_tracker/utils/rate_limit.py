@@ -0,0 +1,36 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket rate limiter.
+
+    Tokens are added at `rate` per second up to `burst`; each permitted call
+    takes one token.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        if rate <= 0 or burst <= 0:
+            raise ValueError(f"Invalid rate limit: {rate}/s with burst {burst}. Both must be positive.")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """
+        Takes a token if one is available.
+
+        Returns:
+            bool: True if the call is permitted, False if it should be rejected.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
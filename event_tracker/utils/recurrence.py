@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Optional
+
+from event_tracker.utils.date_utils import clamp_date, easter_sunday, nth_weekday
+
+
+FREQUENCIES = ('yearly', 'monthly', 'nth_weekday', 'easter')
+
+# Easter falls between 22 March and 25 April, so these offsets keep every
+# occurrence in Easter's own year
+MIN_EASTER_OFFSET = -80
+MAX_EASTER_OFFSET = 250
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    """
+    How an event repeats. The event's own date is the first possible occurrence.
+
+    Frequencies:
+        yearly: on the event's day and month.
+        monthly: on the event's day of the month.
+        nth_weekday: on the nth `weekday` (Monday is 0) of the event's month, e.g.
+            nth=4, weekday=3 for the fourth Thursday; nth=-1 is the last one.
+        easter: `easter_offset` days after Western Easter Sunday, e.g. -2 for Good Friday.
+
+    Days past the end of a shorter month (31 April, 29 February outside leap
+    years) fall on the month's last day. `interval` repeats every that many
+    years (months for monthly), counted from the event's date, and `until` is
+    the last date an occurrence may fall on.
+    """
+    __slots__ = ('frequency', 'interval', 'weekday', 'nth', 'easter_offset', 'until')
+
+    frequency: str
+    interval: int
+    weekday: Optional[int]
+    nth: Optional[int]
+    easter_offset: int
+    until: Optional[date]
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'RecurrenceRule':
+        """
+        Builds and validates a rule from its JSON form.
+
+        Args:
+            data (dict[str, Any]): 'frequency' plus, as the frequency needs them,
+                'interval', 'weekday', 'nth', 'easter_offset' and 'until' (YYYY-MM-DD).
+
+        Returns:
+            RecurrenceRule: The rule.
+
+        Raises:
+            ValueError: If a field is missing or invalid.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Invalid recurrence: expected an object.")
+        frequency = data.get('frequency')
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Invalid frequency: {frequency}. Expected one of {', '.join(FREQUENCIES)}.")
+
+        interval = data.get('interval', 1)
+        if not isinstance(interval, int) or isinstance(interval, bool) or interval <= 0:
+            raise ValueError(f"Invalid interval: {interval}. Interval must be a positive number.")
+
+        weekday = nth = None
+        if frequency == 'nth_weekday':
+            weekday, nth = data.get('weekday'), data.get('nth')
+            if not isinstance(weekday, int) or isinstance(weekday, bool) or not 0 <= weekday <= 6:
+                raise ValueError(f"Invalid weekday: {weekday}. Weekday must be between 0 (Monday) and 6 (Sunday).")
+            if not isinstance(nth, int) or isinstance(nth, bool) or not (1 <= nth <= 5 or nth == -1):
+                raise ValueError(f"Invalid nth: {nth}. Must be between 1 and 5, or -1 for the last.")
+
+        easter_offset = 0
+        if frequency == 'easter':
+            easter_offset = data.get('easter_offset', 0)
+            if not isinstance(easter_offset, int) or isinstance(easter_offset, bool) \
+                    or not MIN_EASTER_OFFSET <= easter_offset <= MAX_EASTER_OFFSET:
+                raise ValueError(f"Invalid easter_offset: {easter_offset}. "
+                                 f"Must be between {MIN_EASTER_OFFSET} and {MAX_EASTER_OFFSET}.")
+
+        until = data.get('until')
+        if until is not None:
+            try:
+                until = date.fromisoformat(until)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid until: {until}. Expected YYYY-MM-DD.")
+
+        return cls(frequency, interval, weekday, nth, easter_offset, until)
+
+    @classmethod
+    def from_row(cls, row: tuple) -> 'RecurrenceRule':
+        """Builds a rule from a (frequency, repeat_interval, weekday, nth, easter_offset, until) row."""
+        frequency, interval, weekday, nth, easter_offset, until = row
+        return cls(frequency, interval, weekday, nth, easter_offset, date.fromisoformat(until) if until else None)
+
+    def to_row(self) -> tuple:
+        return (self.frequency, self.interval, self.weekday, self.nth, self.easter_offset,
+                self.until.isoformat() if self.until else None)
+
+    def to_dict(self) -> dict[str, Any]:
+        data = {'frequency': self.frequency, 'interval': self.interval}
+        if self.frequency == 'nth_weekday':
+            data.update(weekday=self.weekday, nth=self.nth)
+        if self.frequency == 'easter':
+            data['easter_offset'] = self.easter_offset
+        if self.until is not None:
+            data['until'] = self.until.isoformat()
+        return data
+
+    def occurrences_in_year(self, start: date, year: int) -> list[date]:
+        """
+        Computes the occurrences falling in one year.
+
+        Args:
+            start (date): The event's date, where the recurrence starts.
+            year (int): The year.
+
+        Returns:
+            list[date]: The occurrences in date order, none before start or after until.
+        """
+        if year < start.year or (self.until is not None and year > self.until.year):
+            return []
+
+        if self.frequency == 'monthly':
+            occurrences = []
+            for month in range(1, 13):
+                months_since_start = (year - start.year) * 12 + month - start.month
+                if months_since_start >= 0 and months_since_start % self.interval == 0:
+                    occurrences.append(clamp_date(year, month, start.day))
+        elif (year - start.year) % self.interval:
+            occurrences = []
+        elif self.frequency == 'yearly':
+            occurrences = [clamp_date(year, start.month, start.day)]
+        elif self.frequency == 'nth_weekday':
+            try:
+                occurrences = [nth_weekday(year, start.month, self.weekday, self.nth)]
+            except ValueError:
+                occurrences = []  # no fifth such weekday this year
+        else:
+            occurrences = [easter_sunday(year) + timedelta(days=self.easter_offset)]
+
+        return [day for day in occurrences if day >= start and (self.until is None or day <= self.until)]
@@ -0,0 +1,368 @@
+"""
+Pre-forking production server for the Flask app.
+
+    python -m event_tracker.utils.server [--workers N] [--port PORT]
+
+The master process binds the listening socket, optionally imports the app once
+(preloading), and forks WEB_WORKERS worker processes that all accept on the
+shared socket. Each worker serves requests on threads and opens its own SQLite
+connections after the fork.
+
+Signals sent to the master:
+    SIGTERM, SIGINT: stop accepting connections, let workers finish in-flight
+        requests for up to WEB_GRACEFUL_TIMEOUT seconds, then exit.
+    SIGHUP: re-read .env (or WEB_ENV_FILE) and replace every worker with a fresh one without
+        dropping connections. From then on each worker is a new interpreter
+        that imports the app itself, so module-level settings and code changes
+        take effect with or without preloading.
+    SIGTTIN, SIGTTOU: add or remove one worker.
+"""
+import argparse
+import importlib
+import logging
+import os
+import select
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+if __name__ == "__main__":
+    # Load the .env file before the modules below, and the settings further down, are read
+    load_dotenv(os.getenv("WEB_ENV_FILE"))
+
+from event_tracker.utils import metrics
+from event_tracker.utils.logger import configure_logger, flush_logs
+from event_tracker.utils.sql_utils import close_change_watch, close_pool, close_replica, get_db_connection, get_read_connection
+
+# Named after the module even when run with python -m, so LOG_LEVELS can refer to it
+logger = logging.getLogger("event_tracker.utils.server")
+configure_logger(logger)
+
+# .env file read at startup and on SIGHUP; by default the nearest one above this module
+WEB_ENV_FILE = os.getenv("WEB_ENV_FILE")
+WEB_APP = os.getenv("WEB_APP", "app:create_app")
+WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.getenv("WEB_PORT", "5000"))
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1)))
+# import the app in the master so workers start instantly and share its memory
+WEB_PRELOAD = os.getenv("WEB_PRELOAD", "true").lower() == "true"
+# seconds workers get to finish in-flight requests before they are killed
+WEB_GRACEFUL_TIMEOUT = float(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+# seconds an idle keep-alive connection is held open
+WEB_KEEPALIVE = float(os.getenv("WEB_KEEPALIVE", "5"))
+
+
+class _RequestHandler(WSGIRequestHandler):
+    # Idle keep-alive connections time out, so stopping workers never waits on them
+    timeout = WEB_KEEPALIVE
+
+
+def load_app(spec: str) -> Callable:
+    """
+    Imports a WSGI app from a "module:attribute" spec.
+
+    If the attribute is a factory rather than an app (such as create_app), it
+    is called with no arguments.
+
+    Raises:
+        ValueError: If the spec is malformed.
+    """
+    module_name, _, attribute = spec.partition(':')
+    if not module_name or not attribute:
+        raise ValueError(f"Invalid app: {spec}. Expected 'module:attribute'.")
+    target = getattr(importlib.import_module(module_name), attribute)
+    # Flask apps are callable too, but take the WSGI (environ, start_response) pair
+    if not hasattr(target, 'wsgi_app'):
+        target = target()
+    return target
+
+
+###################################################
+#
+# Workers
+#
+###################################################
+
+def _serve_worker(sock: socket.socket, app_spec: str, app: Optional[Callable]) -> None:
+    # Runs in the forked child and never returns
+    for signum in (signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+        signal.signal(signum, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C reaches the master, which stops us
+
+    status = 0
+    try:
+        if app is None:
+            app = load_app(app_spec)
+
+        # Open this worker's own connections, and take its copy of the database if
+        # READ_REPLICA_ENABLED, now rather than on the first request
+        try:
+            with get_db_connection():
+                pass
+            with get_read_connection():
+                pass
+        except Exception as e:
+            logger.warning("Worker %d could not connect to the database: %s", os.getpid(), str(e))
+        metrics.start_sharing()
+
+        host, port = sock.getsockname()[:2]
+        server = make_server(host, port, app, threaded=True, request_handler=_RequestHandler, fd=sock.fileno())
+        # Keep request threads joinable so server_close() waits for in-flight requests
+        server.daemon_threads = False
+
+        def stop(signum, frame):
+            # shutdown() blocks until serve_forever() returns, so it cannot run on this thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        logger.info("Worker %d serving on %s:%d", os.getpid(), host, port)
+        server.serve_forever()
+        server.server_close()
+        logger.info("Worker %d stopped", os.getpid())
+    except BaseException as e:
+        logger.error("Worker %d failed: %s", os.getpid(), str(e))
+        status = 1
+    finally:
+        close_pool()
+        close_replica()
+        close_change_watch()
+        metrics.stop_sharing()
+        flush_logs()
+        sys.stderr.flush()
+        os._exit(status)
+
+
+def _exec_worker(sock: socket.socket, app_spec: str) -> None:
+    # Replaces the forked child with a new interpreter serving on the inherited socket
+    try:
+        os.execv(sys.executable, [sys.executable, "-m", "event_tracker.utils.server",
+                                  "--worker-fd", str(sock.fileno()), app_spec])
+    except BaseException as e:
+        logger.error("Worker %d could not start: %s", os.getpid(), str(e))
+        flush_logs()
+        os._exit(1)
+
+
+###################################################
+#
+# Master
+#
+###################################################
+
+class PreforkServer:
+    """
+    Forks and supervises worker processes sharing one listening socket.
+
+    Workers that exit unexpectedly are replaced. See the module docstring for
+    the signals the master handles.
+    """
+
+    def __init__(self, app_spec: str = WEB_APP, host: str = WEB_HOST, port: int = WEB_PORT,
+                 workers: int = WEB_WORKERS, preload: bool = WEB_PRELOAD,
+                 graceful_timeout: float = WEB_GRACEFUL_TIMEOUT):
+        if workers <= 0:
+            raise ValueError(f"Invalid worker count: {workers}. Count must be a positive number.")
+        self.app_spec = app_spec
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.preload = preload
+        self.graceful_timeout = graceful_timeout
+
+        self.socket = None
+        self._app = None
+        self._metrics_dir = None  # created by run() when METRICS_DIR is not set
+        self._exec_workers = False  # set by the first reload
+        self._children = {}  # pid -> generation
+        self._stopping = {}  # pid -> time by which it must have exited
+        self._generation = 0
+        self._signals = []
+        self._wakeup = None
+
+    def _bind(self) -> socket.socket:
+        sock = socket.create_server((self.host, self.port), backlog=2048, reuse_port=False)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            signal.set_wakeup_fd(-1)
+            os.close(self._wakeup[0])
+            os.close(self._wakeup[1])
+            for signum in (signal.SIGTERM, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            if self._exec_workers:
+                _exec_worker(self.socket, self.app_spec)
+            _serve_worker(self.socket, self.app_spec, self._app)
+        self._children[pid] = self._generation
+        logger.info("Booted worker %d", pid)
+        return pid
+
+    def _stop_worker(self, pid: int) -> None:
+        if pid in self._stopping:
+            return
+        self._stopping[pid] = time.monotonic() + self.graceful_timeout
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self._children.pop(pid, None)
+            expected = self._stopping.pop(pid, None) is not None
+            if not expected:
+                logger.warning("Worker %d exited unexpectedly with status %d", pid, os.waitstatus_to_exitcode(status))
+
+    def _kill_overdue(self) -> None:
+        now = time.monotonic()
+        for pid, deadline in self._stopping.items():
+            if deadline <= now:
+                logger.warning("Worker %d did not stop within %ss, killing it", pid, self.graceful_timeout)
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def _current_workers(self) -> list[int]:
+        return [pid for pid, generation in self._children.items()
+                if generation == self._generation and pid not in self._stopping]
+
+    def _manage_workers(self) -> None:
+        current = self._current_workers()
+        for _ in range(self.workers - len(current)):
+            self._spawn()
+        # Retire the oldest workers of this generation first
+        for pid in current[:max(0, len(current) - self.workers)]:
+            self._stop_worker(pid)
+
+    def _reload(self) -> None:
+        # Modules imported here read their settings once, so forked workers would keep
+        # the old values; new workers exec a fresh interpreter with the refreshed
+        # environment instead. The worker count is kept; change it with SIGTTIN and SIGTTOU.
+        load_dotenv(WEB_ENV_FILE, override=True)
+        os.environ["METRICS_DIR"] = metrics.METRICS_DIR
+        self._exec_workers = True
+        self._app = None
+        old = list(self._children)
+        self._generation += 1
+        logger.info("Reloading: starting %d new workers", self.workers)
+        # The new workers are accepting before the old ones stop, so no connection is refused
+        self._manage_workers()
+        for pid in old:
+            self._stop_worker(pid)
+
+    def _share_metrics(self) -> None:
+        # Workers pool their metrics in one directory, so a scrape answered by any of
+        # them reports the whole server (see metrics.render_shared)
+        if not metrics.METRICS_ENABLED:
+            return
+        if metrics.METRICS_DIR:
+            os.makedirs(metrics.METRICS_DIR, exist_ok=True)
+            for name in os.listdir(metrics.METRICS_DIR):
+                if name.endswith(('.json', '.tmp')):
+                    os.remove(os.path.join(metrics.METRICS_DIR, name))
+        else:
+            self._metrics_dir = metrics.METRICS_DIR = tempfile.mkdtemp(prefix="event-tracker-metrics-")
+        # Also seen by workers started in a fresh interpreter after a reload
+        os.environ["METRICS_DIR"] = metrics.METRICS_DIR
+
+    def _handle_signal(self, signum, frame) -> None:
+        self._signals.append(signum)
+
+    def _install_signals(self) -> None:
+        self._wakeup = os.pipe()
+        for fd in self._wakeup:
+            os.set_blocking(fd, False)
+        signal.set_wakeup_fd(self._wakeup[1])
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU, signal.SIGCHLD):
+            signal.signal(signum, self._handle_signal)
+
+    def _wait(self, timeout: float) -> None:
+        # Sleeps until a signal arrives or the timeout passes
+        try:
+            select.select([self._wakeup[0]], [], [], timeout)
+            os.read(self._wakeup[0], 4096)
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def run(self) -> None:
+        """Binds the socket, starts the workers and supervises them until stopped."""
+        self.socket = self._bind()
+        self.port = self.socket.getsockname()[1]
+        self._share_metrics()
+        if self.preload:
+            self._app = load_app(self.app_spec)
+        # Workers must not inherit open database connections from the master
+        close_pool()
+
+        self._install_signals()
+        logger.info("Listening on %s:%d with %d workers (pid %d)", self.host, self.port, self.workers, os.getpid())
+        self._manage_workers()
+
+        stopping = False
+        while not stopping or self._children:
+            self._wait(1.0)
+            self._reap()
+            while self._signals:
+                signum = self._signals.pop(0)
+                if signum in (signal.SIGTERM, signal.SIGINT) and not stopping:
+                    logger.info("Shutting down gracefully")
+                    stopping = True
+                    self.socket.close()
+                    for pid in list(self._children):
+                        self._stop_worker(pid)
+                elif stopping:
+                    continue
+                elif signum == signal.SIGHUP:
+                    self._reload()
+                elif signum == signal.SIGTTIN:
+                    self.workers += 1
+                elif signum == signal.SIGTTOU and self.workers > 1:
+                    self.workers -= 1
+            self._kill_overdue()
+            if not stopping:
+                self._manage_workers()
+
+        if self._metrics_dir is not None:
+            shutil.rmtree(self._metrics_dir, ignore_errors=True)
+        logger.info("Shutdown complete")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the app with a pool of pre-forked worker processes.")
+    parser.add_argument("app", nargs="?", default=WEB_APP, help="the app as module:attribute (default: %(default)s)")
+    parser.add_argument("--host", default=WEB_HOST)
+    parser.add_argument("--port", type=int, default=WEB_PORT)
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    parser.add_argument("--no-preload", dest="preload", action="store_false", default=WEB_PRELOAD,
+                        help="import the app in each worker instead of once in the master")
+    parser.add_argument("--graceful-timeout", type=float, default=WEB_GRACEFUL_TIMEOUT)
+    # Used by the master to start a worker on its listening socket after a reload
+    parser.add_argument("--worker-fd", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker_fd is not None:
+        _serve_worker(socket.socket(fileno=args.worker_fd), args.app, None)
+
+    server = PreforkServer(args.app, args.host, args.port, args.workers, args.preload, args.graceful_timeout)
+    server.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
+from collections import deque
 from contextlib import contextmanager
+import itertools
+import json
 import logging
 import os
 import sqlite3
+import threading
+import time
+from typing import Callable, ContextManager, Iterable, Optional
 
 from event_tracker.utils.logger import configure_logger
+from event_tracker.utils import metrics
 
 
 logger = logging.getLogger(__name__)
@@ -13,14 +20,903 @@ configure_logger(logger)
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/meal_max.db")
 
+# connection pool settings
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+
+# storage profile applied to every new connection, see STORAGE_PROFILES
+DB_STORAGE_PROFILE = os.getenv("DB_STORAGE_PROFILE", "wal")
+
+# serve reads from an in-memory copy of the database, see ReadReplica
+READ_REPLICA_ENABLED = os.getenv("READ_REPLICA_ENABLED", "false").lower() == "true"
+# seconds the in-memory copy may lag behind writes made by other processes
+READ_REPLICA_MAX_STALENESS = float(os.getenv("READ_REPLICA_MAX_STALENESS", "1"))
+
+
+###################################################
+#
+# Storage profiles
+#
+###################################################
+
+# "wal" lets readers run concurrently with the writer and only fsyncs on
+# checkpoints. "default" is SQLite's stock rollback journal behaviour.
+STORAGE_PROFILES = {
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,
+        'cache_size': -16000,
+        'busy_timeout': 5000,
+        'wal_autocheckpoint': 1000,
+        'checkpoint_interval': 60.0,
+        'checkpoint_mode': 'PASSIVE',
+    },
+    'default': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -2000,
+        'busy_timeout': 5000,
+        'wal_autocheckpoint': 1000,
+        'checkpoint_interval': 0.0,
+        'checkpoint_mode': 'PASSIVE',
+    },
+}
+
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+SYNCHRONOUS_MODES = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+CHECKPOINT_MODES = {'PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'}
+
+
+def get_storage_profile(name: str = None) -> dict:
+    """
+    Resolves a storage profile, applying any overrides set in the environment.
+
+    Each setting can be overridden individually with DB_JOURNAL_MODE, DB_SYNCHRONOUS,
+    DB_MMAP_SIZE, DB_CACHE_SIZE, DB_BUSY_TIMEOUT, DB_WAL_AUTOCHECKPOINT,
+    DB_CHECKPOINT_INTERVAL and DB_CHECKPOINT_MODE.
+
+    Args:
+        name (str): The profile name. Defaults to DB_STORAGE_PROFILE.
+
+    Returns:
+        dict: The resolved settings.
+
+    Raises:
+        ValueError: If the profile or one of the overrides is not valid.
+    """
+    name = name or DB_STORAGE_PROFILE
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile: {name}. Expected one of {sorted(STORAGE_PROFILES)}.")
+    profile = dict(STORAGE_PROFILES[name])
+
+    for key, cast in (('journal_mode', str.upper), ('synchronous', str.upper), ('mmap_size', int),
+                      ('cache_size', int), ('busy_timeout', int), ('wal_autocheckpoint', int),
+                      ('checkpoint_interval', float), ('checkpoint_mode', str.upper)):
+        value = os.getenv(f"DB_{key.upper()}")
+        if value:
+            profile[key] = cast(value)
+
+    if profile['journal_mode'] not in JOURNAL_MODES:
+        raise ValueError(f"Invalid journal mode: {profile['journal_mode']}.")
+    if profile['synchronous'] not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Invalid synchronous mode: {profile['synchronous']}.")
+    if profile['checkpoint_mode'] not in CHECKPOINT_MODES:
+        raise ValueError(f"Invalid checkpoint mode: {profile['checkpoint_mode']}.")
+    return profile
+
+
+def apply_storage_profile(conn: sqlite3.Connection, profile: dict) -> None:
+    """
+    Applies the connection-level PRAGMAs of a storage profile.
+
+    Args:
+        conn (sqlite3.Connection): The connection to configure.
+        profile (dict): A profile as returned by get_storage_profile().
+    """
+    # busy_timeout first so switching the journal mode waits for other writers
+    conn.execute(f"PRAGMA busy_timeout = {int(profile['busy_timeout'])};")
+    conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']};")
+    conn.execute(f"PRAGMA synchronous = {profile['synchronous']};")
+    conn.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])};")
+    conn.execute(f"PRAGMA cache_size = {int(profile['cache_size'])};")
+    conn.execute(f"PRAGMA wal_autocheckpoint = {int(profile['wal_autocheckpoint'])};")
+
+
+def checkpoint_database(conn: sqlite3.Connection, mode: str = 'PASSIVE') -> tuple:
+    """
+    Runs a WAL checkpoint on the given connection.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the database.
+        mode (str): One of PASSIVE, FULL, RESTART or TRUNCATE.
+
+    Returns:
+        tuple: (busy, wal pages, pages checkpointed) as reported by SQLite.
+    """
+    mode = mode.upper()
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f"Invalid checkpoint mode: {mode}.")
+    return conn.execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
+
+
+###################################################
+#
+# Connection pool
+#
+###################################################
+
+class ConnectionPool:
+    """
+    A bounded pool of SQLite connections shared between threads.
+
+    Connections are checked out with acquire() and handed back with release().
+    At most `size` connections are open at once; callers beyond that wait up
+    to `timeout` seconds for one to be returned. Idle connections older than
+    `idle_timeout` seconds are closed instead of being reused, and every
+    connection is validated with a trivial query before it is handed out.
+
+    New connections are configured with the given storage profile. When the
+    profile uses WAL with a checkpoint interval, a returned connection runs a
+    checkpoint once that interval has elapsed since the last one.
+    """
+
+    def __init__(self, db_path: str, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT,
+                 idle_timeout: float = DB_POOL_IDLE_TIMEOUT, profile: dict = None):
+        if size <= 0:
+            raise ValueError(f"Invalid pool size: {size}. Size must be a positive number.")
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.profile = profile if profile is not None else get_storage_profile()
+        self._last_checkpoint = time.monotonic()
+
+        self._idle = deque()  # (connection, time it was returned)
+        self._open = 0
+        self._closed = False
+        self._available = threading.Condition(threading.Lock())
+        self._stats = {'hits': 0, 'opens': 0, 'waits': 0, 'timeouts': 0, 'discards': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        factory = metrics.InstrumentedConnection if metrics.METRICS_ENABLED else sqlite3.Connection
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=factory)
+        try:
+            apply_storage_profile(conn, self.profile)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        logger.debug("Opened new database connection to %s", self.db_path)
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1;").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Checks a connection out of the pool, opening a new one if there is room.
+
+        Returns:
+            sqlite3.Connection: A validated connection.
+
+        Raises:
+            sqlite3.OperationalError: If no connection became available within the timeout
+                or the pool has been closed.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn = None
+            with self._available:
+                waited = False
+                while True:
+                    if self._closed:
+                        raise sqlite3.OperationalError("Connection pool is closed")
+                    now = time.monotonic()
+                    # Drop connections that sat idle for too long
+                    while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                        stale, _ = self._idle.popleft()
+                        self._open -= 1
+                        self._stats['discards'] += 1
+                        self._discard(stale)
+                    if self._idle:
+                        conn, _ = self._idle.pop()
+                        self._stats['hits'] += 1
+                        break
+                    if self._open < self.size:
+                        self._open += 1
+                        self._stats['opens'] += 1
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise sqlite3.OperationalError(
+                            f"Timed out after {self.timeout}s waiting for a database connection")
+                    if not waited:
+                        self._stats['waits'] += 1
+                        waited = True
+                    self._available.wait(remaining)
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except sqlite3.Error:
+                    with self._available:
+                        self._open -= 1
+                        self._available.notify()
+                    raise
+
+            if self._is_healthy(conn):
+                return conn
+
+            logger.warning("Discarding unhealthy pooled database connection")
+            self._discard(conn)
+            with self._available:
+                self._open -= 1
+                self._stats['discards'] += 1
+                self._available.notify()
+
+    def release(self, conn: sqlite3.Connection, discard: bool = False) -> None:
+        """
+        Returns a connection to the pool.
+
+        Any transaction left open by the caller is rolled back so the next user
+        starts from a clean state.
+
+        Args:
+            conn (sqlite3.Connection): The connection previously returned by acquire().
+            discard (bool): Close the connection instead of keeping it for reuse.
+        """
+        if not discard:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._maybe_checkpoint(conn)
+            except sqlite3.Error:
+                discard = True
+
+        with self._available:
+            if discard or self._closed:
+                self._open -= 1
+                self._stats['discards'] += 1
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._available.notify()
+
+    def _maybe_checkpoint(self, conn: sqlite3.Connection) -> None:
+        interval = self.profile['checkpoint_interval']
+        if interval <= 0 or self.profile['journal_mode'] != 'WAL':
+            return
+        now = time.monotonic()
+        if now - self._last_checkpoint < interval:
+            return
+        self._last_checkpoint = now
+        busy, wal_pages, moved = checkpoint_database(conn, self.profile['checkpoint_mode'])
+        logger.debug("WAL checkpoint: busy=%s wal_pages=%s checkpointed=%s", busy, wal_pages, moved)
+
+    def close(self) -> None:
+        """Closes every idle connection and rejects further checkouts."""
+        with self._available:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._open -= 1
+                self._discard(conn)
+            self._available.notify_all()
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the pool counters.
+
+        Returns:
+            dict: hits, opens, waits, timeouts and discards since the pool was created,
+                plus the current number of idle and checked out connections.
+        """
+        with self._available:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._open - len(self._idle)
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Returns the process-wide connection pool, creating it on first use.
+
+    The pool is recreated if DB_PATH has been changed since it was built.
+    """
+    global _pool
+    pool = _pool
+    if pool is not None and pool.db_path == DB_PATH:
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.db_path != DB_PATH:
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+
+def close_pool() -> None:
+    """Closes the process-wide connection pool, if one has been created."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def _forget_pool_after_fork() -> None:
+    # A forked child must never use the parent's connections (see
+    # https://www.sqlite.org/howtocorrupt.html#_carrying_an_open_database_connection_across_a_fork_).
+    # Drop them without closing so the parent's handles are left alone; the
+    # child opens its own pool on first use.
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_pool_after_fork)
+
+
+def _collect_pool_metrics() -> list[metrics.Sample]:
+    # Only report a pool that exists; a scrape should not open one
+    pool = _pool
+    if pool is None:
+        return []
+    stats = pool.stats()
+    samples = [
+        ('db_pool_connections', 'gauge', 'Pooled database connections by state.', {'state': 'idle'}, stats['idle']),
+        ('db_pool_connections', 'gauge', 'Pooled database connections by state.', {'state': 'in_use'}, stats['in_use']),
+        ('db_pool_size', 'gauge', 'Most connections the pool will open.', {}, stats['size']),
+    ]
+    for name in ('hits', 'opens', 'waits', 'timeouts', 'discards'):
+        samples.append((f'db_pool_{name}_total', 'counter', f'Connection pool {name}.', {}, stats[name]))
+    return samples
+
+
+metrics.REGISTRY.register_collector(_collect_pool_metrics)
+
+
+def get_pool_stats() -> dict:
+    """
+    Returns the counters of the process-wide connection pool.
+
+    Returns:
+        dict: See ConnectionPool.stats().
+    """
+    return get_pool().stats()
+
+
+###################################################
+#
+# Read replica
+#
+###################################################
+
+class _ReadWriteLock:
+    """Any number of readers or a single writer. A waiting writer holds back new readers."""
+
+    def __init__(self):
+        self._changed = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    # Plain methods rather than a context manager, as every read of the replica goes through them
+    def acquire_read(self) -> None:
+        with self._changed:
+            while self._writing or self._writers_waiting:
+                self._changed.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        with self._changed:
+            self._readers -= 1
+            if not self._readers and self._writers_waiting:
+                self._changed.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._changed:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._changed.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._changed:
+                self._writing = False
+                self._changed.notify_all()
+
+
+class ReadReplica:
+    """
+    An in-memory copy of the database that reads are served from.
+
+    The copy is taken with the SQLite backup API into a named shared-cache
+    :memory: database. Each reading thread opens its own read-only connection
+    to it, so reads run side by side. Writes still go to the file.
+
+    PRAGMA data_version changes whenever another connection commits, so a
+    connection that never writes can check cheaply whether the file has moved
+    on. When it has, the changes logged in event_changes after the newest
+    version in the copy are replayed. The events they touch, and their
+    recurrence rules, are read from the file and rewritten in the copy, whose
+    own triggers update the search index and day counts. The log rows are then
+    copied as they are, so the change feed matches. Catching up costs time in
+    proportion to what changed, not to the size of the database.
+
+    The file is checked by the first read more than `max_staleness` seconds
+    after the last check. It is also checked by the next read after a write
+    made by this process (see mark_stale()), so those writes are visible
+    straight away. Sometimes the log cannot account for a difference: entries
+    were removed, the schema version changed, or replaying conflicts with the
+    copy. A new full copy is then taken, at most once per `max_staleness`
+    seconds, and reads go to the file until it is due. `file_connection` opens
+    those reads; it defaults to get_db_connection.
+    """
+
+    def __init__(self, db_path: str, max_staleness: float = READ_REPLICA_MAX_STALENESS,
+                 file_connection: Optional[Callable[[], ContextManager[sqlite3.Connection]]] = None):
+        if max_staleness < 0:
+            raise ValueError(f"Invalid max staleness: {max_staleness}. It must not be negative.")
+        self.db_path = db_path
+        self.max_staleness = max_staleness
+        self._file_connection = file_connection or get_db_connection
+
+        self._lock = threading.Lock()  # held while checking the file, replaying changes or copying
+        self._rw = _ReadWriteLock()  # reads of the copy against replaying into it or swapping it
+        self._local = threading.local()  # each thread's connection to the copy
+        self._counters_lock = threading.Lock()
+        self._writes = 0  # bumped by mark_stale()
+        self._generations = itertools.count()
+        self._source = None  # connection to the file, only used under _lock
+        self._target = None  # writable connection to the copy, which keeps it alive
+        self._uri = None
+        self._data_version = None
+        self._version = None  # newest event_changes version in the copy, None without a change log
+        self._user_version = None
+        self._synced_writes = -1  # _writes when the copy last caught up
+        self._checked_at = 0.0  # when the copy was last known to match the file
+        self._copied_at = None
+        self._needs_copy = False  # the log could not explain a change, reads go to the file until a copy is due
+        self._stats = {'copies': 0, 'replays': 0, 'changes': 0, 'checks': 0, 'file_reads': 0,
+                       'refresh_seconds': 0.0}
+
+    def _connect_source(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {int(get_storage_profile()['busy_timeout'])};")
+        return conn
+
+    def _copy(self, writes: int) -> None:
+        started = time.perf_counter()
+        checked_at = time.monotonic()
+        # Read before copying: a commit landing during the copy is then seen as pending, never missed
+        data_version = self._source.execute("PRAGMA data_version;").fetchone()[0]
+        # The memdb VFS cannot hold a copy of a WAL database, so the copy is a shared cache
+        uri = f"file:event-replica-{os.getpid()}-{id(self)}-{next(self._generations)}?mode=memory&cache=shared"
+        target = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        try:
+            self._source.backup(target)
+            user_version = target.execute("PRAGMA user_version;").fetchone()[0]
+            try:
+                version = target.execute("SELECT COALESCE(MAX(version), 0) FROM event_changes;").fetchone()[0]
+            except sqlite3.OperationalError:
+                version = None  # no change log, so every change needs a full copy
+        except sqlite3.Error:
+            target.close()
+            raise
+
+        with self._rw.writing():
+            previous, self._target, self._uri = self._target, target, uri
+        # Threads still reading the previous copy keep it alive until their next read
+        if previous is not None:
+            previous.close()
+        self._data_version, self._version, self._user_version = data_version, version, user_version
+        self._synced_writes, self._checked_at, self._copied_at, self._needs_copy = writes, checked_at, checked_at, False
+        elapsed = time.perf_counter() - started
+        self._stats['copies'] += 1
+        self._stats['refresh_seconds'] += elapsed
+        logger.debug("Copied %s into the in-memory read replica in %.1f ms", self.db_path, elapsed * 1000)
+
+    def _replay(self) -> bool:
+        # Returns False if the log cannot bring the copy up to date
+        if self._version is None:
+            return False
+        started = time.perf_counter()
+        source = self._source
+        source.execute("BEGIN")
+        try:
+            if source.execute("PRAGMA user_version;").fetchone()[0] != self._user_version:
+                return False
+            latest = source.execute("SELECT COALESCE(MAX(version), 0) FROM event_changes;").fetchone()[0]
+            changes = source.execute("""
+                SELECT version, event_id, operation, changed_at FROM event_changes
+                WHERE version > ? ORDER BY version
+            """, (self._version,)).fetchall()
+            # Versions have no gaps, so missing ones were removed from the log
+            if latest < self._version or len(changes) != latest - self._version:
+                return False
+            if not changes:
+                return True
+            ids = json.dumps(sorted({change[1] for change in changes}))
+            events = source.execute("SELECT * FROM events WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+            event_columns = [column[0] for column in events.description]
+            event_rows = events.fetchall()
+            rules = source.execute("SELECT * FROM recurrence_rules WHERE event_id IN (SELECT value FROM json_each(?))", (ids,))
+            rule_columns = [column[0] for column in rules.description]
+            rule_rows = rules.fetchall()
+        finally:
+            source.rollback()
+
+        with self._rw.writing():
+            target = self._target
+            try:
+                target.execute("BEGIN")
+                target.execute("DELETE FROM recurrence_rules WHERE event_id IN (SELECT value FROM json_each(?))", (ids,))
+                target.execute("DELETE FROM events WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+                target.executemany(f"INSERT INTO events ({', '.join(event_columns)}) "
+                                   f"VALUES ({', '.join('?' * len(event_columns))})", event_rows)
+                target.executemany(f"INSERT INTO recurrence_rules ({', '.join(rule_columns)}) "
+                                   f"VALUES ({', '.join('?' * len(rule_columns))})", rule_rows)
+                # The copy's triggers logged the rewrites under versions of their own; keep the file's
+                target.execute("DELETE FROM event_changes WHERE version > ?", (self._version,))
+                target.executemany("INSERT INTO event_changes (version, event_id, operation, changed_at) VALUES (?, ?, ?, ?)",
+                                   changes)
+                target.commit()
+            except sqlite3.IntegrityError as e:
+                # e.g. a name freed by archiving, which is not logged, taken by a new event
+                target.rollback()
+                logger.info("Could not replay changes into the read replica: %s", str(e))
+                return False
+
+        self._version = latest
+        elapsed = time.perf_counter() - started
+        self._stats['replays'] += 1
+        self._stats['changes'] += len(changes)
+        self._stats['refresh_seconds'] += elapsed
+        logger.debug("Replayed %d changes into the read replica in %.1f ms", len(changes), elapsed * 1000)
+        return True
+
+    def _is_current(self, now: float) -> bool:
+        return self._uri is not None and self._synced_writes == self._writes and now - self._checked_at <= self.max_staleness
+
+    def _copy_is_due(self, now: float) -> bool:
+        return not self._needs_copy or now - self._copied_at >= self.max_staleness
+
+    def _sync(self) -> bool:
+        # Brings the copy up to date if it may be behind. Returns False if reads should go to the file.
+        now = time.monotonic()
+        if self._is_current(now):
+            return True
+        if not self._copy_is_due(now):
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if self._is_current(now):
+                return True
+            if not self._copy_is_due(now):
+                return False
+            writes = self._writes
+            if self._source is None:
+                self._source = self._connect_source()
+            if self._uri is None:
+                self._copy(writes)
+                return True
+
+            data_version = self._source.execute("PRAGMA data_version;").fetchone()[0]
+            if data_version == self._data_version:
+                self._stats['checks'] += 1
+            elif self._replay():
+                self._data_version = data_version
+            elif now - self._copied_at < self.max_staleness:
+                self._needs_copy = True
+                return False
+            else:
+                self._copy(writes)
+                return True
+            self._synced_writes, self._checked_at = writes, now
+            return True
+
+    def _reader(self) -> sqlite3.Connection:
+        # Called while reading, so the copy cannot be swapped underneath
+        local = self._local
+        if getattr(local, 'uri', None) != self._uri:
+            factory = metrics.InstrumentedConnection if metrics.METRICS_ENABLED else sqlite3.Connection
+            conn = sqlite3.connect(self._uri, uri=True, factory=factory)
+            conn.execute("PRAGMA query_only = ON;")
+            # Readers then take no table locks, which would make replaying fail rather than
+            # wait on a cursor left open; the read-write lock already keeps them apart
+            conn.execute("PRAGMA read_uncommitted = ON;")
+            previous = getattr(local, 'conn', None)
+            if previous is not None:
+                previous.close()
+            local.uri, local.conn = self._uri, conn
+        return local.conn
+
+    @contextmanager
+    def read(self):
+        """
+        Checks out a connection to read from, catching up with the file first if needed.
+
+        Yields:
+            sqlite3.Connection: This thread's connection to the copy, or a pooled
+                connection to the file while a full copy is not yet due.
+
+        Raises:
+            sqlite3.Error: If the copy could not be brought up to date.
+        """
+        local = self._local
+        if getattr(local, 'reading', False):
+            # A read nested in another reuses its connection instead of waiting on the lock it holds
+            yield local.conn
+            return
+        if not self._sync():
+            with self._counters_lock:
+                self._stats['file_reads'] += 1
+            with self._file_connection() as conn:
+                yield conn
+            return
+        self._rw.acquire_read()
+        try:
+            conn = self._reader()
+            local.reading = True
+            yield conn
+        finally:
+            local.reading = False
+            self._rw.release_read()
+
+    def mark_stale(self) -> None:
+        """Makes the next read catch up with the file first. Call after every write made by this process."""
+        with self._counters_lock:
+            self._writes += 1
+
+    def close(self) -> None:
+        """Closes the connections to the file and to the copy."""
+        with self._lock:
+            if self._source is not None:
+                self._source.close()
+                self._source = None
+            with self._rw.writing():
+                if self._target is not None:
+                    self._target.close()
+                    self._target = None
+                self._uri = None
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the replica counters.
+
+        Returns:
+            dict: copies (full copies taken), replays and changes (catch-ups from
+                event_changes and the changes they applied), checks (looks at the file
+                that found nothing new), file_reads (reads sent to the file while a full
+                copy was not due), refresh_seconds (time spent copying and replaying) and
+                age_seconds (since the copy was last known to match the file, or None
+                before the first copy).
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['age_seconds'] = time.monotonic() - self._checked_at if self._uri is not None else None
+        return stats
+
+
+_replica = None
+_replica_lock = threading.Lock()
+
+
+def get_replica() -> Optional[ReadReplica]:
+    """
+    Returns the process-wide read replica, or None unless READ_REPLICA_ENABLED.
+
+    The replica is created, and its first copy taken, on first use. It is
+    recreated if DB_PATH has been changed since it was built.
+    """
+    global _replica
+    if not READ_REPLICA_ENABLED:
+        return None
+    replica = _replica
+    if replica is not None and replica.db_path == DB_PATH:
+        return replica
+    with _replica_lock:
+        if _replica is None or _replica.db_path != DB_PATH:
+            if _replica is not None:
+                _replica.close()
+            replica = ReadReplica(DB_PATH, READ_REPLICA_MAX_STALENESS)
+            with replica.read():
+                pass
+            _replica = replica
+        return _replica
+
+
+def mark_replica_stale() -> None:
+    """Tells the read replica, if there is one, that this process wrote to the database."""
+    replica = _replica
+    if replica is not None:
+        replica.mark_stale()
+
+
+def close_replica() -> None:
+    """Closes the process-wide read replica, if one has been created."""
+    global _replica
+    with _replica_lock:
+        if _replica is not None:
+            _replica.close()
+            _replica = None
+
+
+def _forget_replica_after_fork() -> None:
+    # Like the pool, each worker takes its own copy after the fork
+    global _replica, _replica_lock
+    _replica = None
+    _replica_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_replica_after_fork)
+
+
+def _collect_replica_metrics() -> list[metrics.Sample]:
+    replica = _replica
+    if replica is None:
+        return []
+    stats = replica.stats()
+    samples = [
+        ('db_replica_copies_total', 'counter', 'Full copies of the database taken by the read replica.', {},
+         stats['copies']),
+        ('db_replica_replays_total', 'counter', 'Catch-ups of the read replica from event_changes.', {},
+         stats['replays']),
+        ('db_replica_changes_total', 'counter', 'Changes replayed into the read replica.', {}, stats['changes']),
+        ('db_replica_checks_total', 'counter', 'Looks at the database that found the read replica current.', {},
+         stats['checks']),
+        ('db_replica_file_reads_total', 'counter', 'Reads sent to the database file while a full copy was not due.', {},
+         stats['file_reads']),
+        ('db_replica_refresh_seconds_total', 'counter', 'Time spent copying and replaying into the read replica.', {},
+         stats['refresh_seconds']),
+    ]
+    if stats['age_seconds'] is not None:
+        samples.append(('db_replica_age_seconds', 'gauge', 'Seconds since the read replica was known to be current.',
+                        {}, stats['age_seconds']))
+    return samples
+
+
+metrics.REGISTRY.register_collector(_collect_replica_metrics)
+
+
+###################################################
+#
+# Change watch
+#
+###################################################
+
+class ChangeWatch:
+    """
+    Tells whether anything has been committed to a set of database files since the
+    last look, by this process or any other.
+
+    Like ReadReplica, it relies on PRAGMA data_version, which changes on a connection
+    that never writes whenever another connection commits. One such connection is
+    kept per file, so a look costs one pragma per file and no table reads.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._files = {}  # path -> (connection, data_version at the last poll)
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {int(get_storage_profile()['busy_timeout'])};")
+        return conn
+
+    def poll(self, extra_paths: Iterable[str] = ()) -> bool:
+        """
+        Returns True if db_path or one of extra_paths has changed since the previous
+        poll, or is being polled for the first time.
+        """
+        changed = False
+        with self._lock:
+            for path in (self.db_path, *extra_paths):
+                entry = self._files.get(path)
+                conn = self._connect(path) if entry is None else entry[0]
+                data_version = conn.execute("PRAGMA data_version;").fetchone()[0]
+                if entry is None or entry[1] != data_version:
+                    changed = True
+                self._files[path] = (conn, data_version)
+        return changed
+
+    def high_water_mark(self) -> Optional[int]:
+        """Returns the newest event_changes version in db_path, 0 if none, or None without a change log."""
+        with self._lock:
+            entry = self._files.get(self.db_path)
+            conn = self._connect(self.db_path) if entry is None else entry[0]
+            if entry is None:
+                self._files[self.db_path] = (conn, None)
+            try:
+                return conn.execute("SELECT COALESCE(MAX(version), 0) FROM event_changes;").fetchone()[0]
+            except sqlite3.OperationalError:
+                return None
+
+    def close(self) -> None:
+        """Closes the connections to the watched files."""
+        with self._lock:
+            for conn, _ in self._files.values():
+                conn.close()
+            self._files.clear()
+
+
+_change_watch = None
+_change_watch_lock = threading.Lock()
+
+
+def get_change_watch() -> ChangeWatch:
+    """
+    Returns the process-wide change watch, creating it on first use.
+
+    The watch is recreated if DB_PATH has been changed since it was built.
+    """
+    global _change_watch
+    watch = _change_watch
+    if watch is not None and watch.db_path == DB_PATH:
+        return watch
+    with _change_watch_lock:
+        if _change_watch is None or _change_watch.db_path != DB_PATH:
+            if _change_watch is not None:
+                _change_watch.close()
+            _change_watch = ChangeWatch(DB_PATH)
+        return _change_watch
+
+
+def close_change_watch() -> None:
+    """Closes the process-wide change watch, if one has been created."""
+    global _change_watch
+    with _change_watch_lock:
+        if _change_watch is not None:
+            _change_watch.close()
+            _change_watch = None
+
+
+def _forget_change_watch_after_fork() -> None:
+    global _change_watch, _change_watch_lock
+    _change_watch = None
+    _change_watch_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_change_watch_after_fork)
+
+
+###################################################
+#
+# Health checks
+#
+###################################################
 
 def check_database_connection():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        # This ensures the connection is actually active
-        cursor.execute("SELECT 1;")
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            # This ensures the connection is actually active
+            cursor.execute("SELECT 1;")
     except sqlite3.Error as e:
         error_message = f"Database connection error: {e}"
         logger.error(error_message)
@@ -28,10 +924,9 @@ def check_database_connection():
 
 def check_table_exists(tablename: str):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT 1 FROM {tablename} LIMIT 1;")
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT 1 FROM {tablename} LIMIT 1;")
     except sqlite3.Error as e:
         error_message = f"Table check error: {e}"
         logger.error(error_message)
@@ -39,20 +934,40 @@ def check_table_exists(tablename: str):
 
 ###################################################
 #
-# This one yields rather than returns.
-# What is the type of the yielded value?
+# Connections are checked out of the shared pool and
+# handed back (not closed) when the block exits.
 #
 ###################################################
 @contextmanager
 def get_db_connection():
-    conn = None
+    pool = get_pool()
+    conn = pool.acquire()
     try:
-        conn = sqlite3.connect(DB_PATH)
         yield conn
     except sqlite3.Error as e:
         logger.error("Database connection error: %s", str(e))
         raise e
     finally:
-        if conn:
-            conn.close()
-            logger.info("Database connection closed.")
\ No newline at end of file
+        pool.release(conn)
+        logger.debug("Database connection returned to pool.")
+
+
+###################################################
+#
+# Reads go to the in-memory replica when it is
+# enabled, and to a pooled connection otherwise.
+#
+###################################################
+@contextmanager
+def get_read_connection():
+    replica = get_replica()
+    if replica is None:
+        with get_db_connection() as conn:
+            yield conn
+        return
+    try:
+        with replica.read() as conn:
+            yield conn
+    except sqlite3.Error as e:
+        logger.error("Database connection error: %s", str(e))
+        raise e
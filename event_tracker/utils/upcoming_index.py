@@ -0,0 +1,131 @@
+from bisect import bisect_left, insort
+import calendar
+from datetime import date
+from typing import Any, Iterator, Optional
+
+
+class UpcomingIndex:
+    """
+    Sorted in-memory indexes over event dates answering "next N events" and
+    "events in a month" queries with a binary search.
+
+    Events are kept twice: ordered by (month, day) for annually recurring views,
+    where the stored year is only a marker, and ordered by full date for one-off
+    views. Adding or removing an event is a binary search plus a list insert.
+    """
+
+    def __init__(self):
+        self._by_day_of_year = []  # (month, day, id)
+        self._by_date = []  # (date ordinal, id)
+        self._events = {}  # id -> event dict
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    @staticmethod
+    def _ordinal(event: dict[str, Any]) -> Optional[int]:
+        try:
+            return date(event['event_year'], event['event_month'], event['event_day']).toordinal()
+        except ValueError:
+            return None  # not a real date, e.g. 30 February
+
+    def add(self, event: dict[str, Any]) -> None:
+        """Adds an event, replacing any event with the same ID."""
+        self.remove(event['id'])
+        self._events[event['id']] = event
+        insort(self._by_day_of_year, (event['event_month'], event['event_day'], event['id']))
+        ordinal = self._ordinal(event)
+        if ordinal is not None:
+            insort(self._by_date, (ordinal, event['id']))
+
+    def remove(self, event_id: int) -> None:
+        """Removes an event if it is indexed."""
+        event = self._events.pop(event_id, None)
+        if event is None:
+            return
+        key = (event['event_month'], event['event_day'], event_id)
+        del self._by_day_of_year[bisect_left(self._by_day_of_year, key)]
+        ordinal = self._ordinal(event)
+        if ordinal is not None:
+            del self._by_date[bisect_left(self._by_date, (ordinal, event_id))]
+
+    def get(self, event_id: int) -> Optional[dict[str, Any]]:
+        return self._events.get(event_id)
+
+    @staticmethod
+    def _occurrence(year: int, month: int, day: int) -> Optional[date]:
+        if month == 2 and day == 29 and not calendar.isleap(year):
+            # Observed on 28 February outside leap years, like yearly RecurrenceRules,
+            # so it stays in its month and its place in _by_day_of_year
+            return date(year, 2, 28)
+        try:
+            return date(year, month, day)
+        except ValueError:
+            return None
+
+    def _iter_recurring(self, start: date) -> Iterator[tuple[date, dict[str, Any]]]:
+        # Each event is visited once: from the start date to the end of the year,
+        # then wrapping around into the next year
+        entries = self._by_day_of_year
+        position = bisect_left(entries, (start.month, start.day))
+        for index in range(position, position + len(entries)):
+            month, day, event_id = entries[index % len(entries)]
+            year = start.year if index < len(entries) else start.year + 1
+            occurrence = self._occurrence(year, month, day)
+            if occurrence is not None and occurrence >= start:
+                yield occurrence, self._events[event_id]
+
+    def next_events(self, start: date, n: int, recurring: bool = True) -> list[tuple[date, dict[str, Any]]]:
+        """
+        Returns the next n events on or after a date.
+
+        Args:
+            start (date): The first date to include.
+            n (int): The maximum number of events to return.
+            recurring (bool): Treat every event as recurring each year on its day and month.
+                Otherwise only events dated on or after start are returned.
+
+        Returns:
+            list[tuple[date, dict[str, Any]]]: (occurrence date, event) pairs in date order.
+        """
+        results = []
+        if recurring:
+            for occurrence in self._iter_recurring(start):
+                if len(results) == n:
+                    break
+                results.append(occurrence)
+            return results
+
+        position = bisect_left(self._by_date, (start.toordinal(),))
+        for ordinal, event_id in self._by_date[position:position + n]:
+            results.append((date.fromordinal(ordinal), self._events[event_id]))
+        return results
+
+    def events_in_month(self, year: int, month: int, recurring: bool = True) -> list[tuple[date, dict[str, Any]]]:
+        """
+        Returns the events falling in a month, in date order.
+
+        Args:
+            year (int): The year.
+            month (int): The month.
+            recurring (bool): Match events on their day and month only, ignoring the stored year.
+
+        Returns:
+            list[tuple[date, dict[str, Any]]]: (occurrence date, event) pairs.
+        """
+        results = []
+        if recurring:
+            entries = self._by_day_of_year
+            start, end = bisect_left(entries, (month,)), bisect_left(entries, (month + 1,))
+            for _, day, event_id in entries[start:end]:
+                occurrence = self._occurrence(year, month, day)
+                if occurrence is not None and occurrence.month == month:
+                    results.append((occurrence, self._events[event_id]))
+            return results
+
+        first = date(year, month, 1).toordinal()
+        last = first + calendar.monthrange(year, month)[1]
+        entries = self._by_date
+        for ordinal, event_id in entries[bisect_left(entries, (first,)):bisect_left(entries, (last,))]:
+            results.append((date.fromordinal(ordinal), self._events[event_id]))
+        return results
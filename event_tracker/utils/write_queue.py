@@ -0,0 +1,209 @@
+from concurrent.futures import Future
+from contextlib import AbstractContextManager
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+import weakref
+
+from event_tracker.utils.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# most operations committed together
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "100"))
+# how long the writer waits for more operations after the first one of a batch, in
+# milliseconds. With 0 a batch is whatever queued up while the previous one committed.
+WRITE_BATCH_DELAY_MS = float(os.getenv("WRITE_BATCH_DELAY_MS", "0"))
+
+_STOP = object()
+
+
+class _Operation:
+    __slots__ = ('func', 'future', 'enqueued_at')
+
+    def __init__(self, func: Callable[[sqlite3.Connection], Any]):
+        self.func = func
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class WriteQueue:
+    """
+    Funnels database writes through a single writer thread that commits them in groups.
+
+    Callers submit an operation, a function taking a connection, and get a
+    future. The writer takes the first waiting operation, gathers any others
+    submitted within `max_delay` seconds (up to `max_batch` in total) and runs
+    them all in one transaction, so a burst of writes costs one lock
+    acquisition and one commit instead of one each.
+
+    Every operation runs inside its own savepoint. An operation that raises is
+    rolled back on its own and its future gets the exception, while the rest of
+    the batch still commits. Futures are only resolved once the batch has been
+    committed; if the commit itself fails, every operation in the batch fails.
+    """
+
+    def __init__(self, connect: Callable[[], AbstractContextManager], max_batch: int = WRITE_BATCH_SIZE,
+                 max_delay: float = WRITE_BATCH_DELAY_MS / 1000):
+        if max_batch <= 0:
+            raise ValueError(f"Invalid batch size: {max_batch}. Size must be a positive number.")
+        self.connect = connect
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._reset()
+        _queues.add(self)
+
+    def _reset(self) -> None:
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {'batches': 0, 'operations': 0, 'failed': 0, 'max_batch_size': 0,
+                       'queue_seconds': 0.0, 'max_queue_seconds': 0.0, 'commit_seconds': 0.0}
+
+    def submit(self, func: Callable[[sqlite3.Connection], Any]) -> Future:
+        """
+        Queues an operation for the writer thread.
+
+        Args:
+            func (Callable[[sqlite3.Connection], Any]): Executes the write on the given
+                connection. It must not commit or roll back.
+
+        Returns:
+            Future: Resolves to the operation's return value once it is committed, or
+                to the exception it raised.
+        """
+        operation = _Operation(func)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self._thread.start()
+        self._queue.put(operation)
+        return operation.future
+
+    def execute(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Submits an operation and waits for its result, re-raising its exception."""
+        return self.submit(func).result()
+
+    def close(self) -> None:
+        """Commits the operations already queued and stops the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the writer counters.
+
+        Returns:
+            dict: batches and operations committed, failed operations, the mean and
+                largest batch size, the mean and largest time operations waited in the
+                queue, the mean time spent committing, and the current queue depth.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        batches, operations = stats['batches'], stats['operations']
+        return {
+            'batches': batches,
+            'operations': operations,
+            'failed': stats['failed'],
+            'mean_batch_size': operations / batches if batches else 0.0,
+            'max_batch_size': stats['max_batch_size'],
+            'mean_queue_ms': stats['queue_seconds'] * 1000 / operations if operations else 0.0,
+            'max_queue_ms': stats['max_queue_seconds'] * 1000,
+            'mean_commit_ms': stats['commit_seconds'] * 1000 / batches if batches else 0.0,
+            'queued': self._queue.qsize(),
+        }
+
+    def _next_batch(self) -> tuple[list[_Operation], bool]:
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = first.enqueued_at + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                # Take what is already waiting, then wait out the rest of the delay
+                operation = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    operation = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if operation is _STOP:
+                return batch, True
+            batch.append(operation)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch: list[_Operation]) -> None:
+        started = time.monotonic()
+        outcomes = []  # (result, exception) per operation
+        try:
+            with self.connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    for operation in batch:
+                        conn.execute("SAVEPOINT write_op")
+                        try:
+                            outcomes.append((operation.func(conn), None))
+                        except Exception as e:
+                            conn.execute("ROLLBACK TO write_op")
+                            outcomes.append((None, e))
+                        finally:
+                            conn.execute("RELEASE write_op")
+                    committing = time.monotonic()
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+        except Exception as e:
+            logger.error("Write batch of %d operations failed: %s", len(batch), str(e))
+            outcomes = [(None, e)] * len(batch)
+            committing = time.monotonic()
+
+        finished = time.monotonic()
+        waited = [started - operation.enqueued_at for operation in batch]
+        failed = sum(1 for _, error in outcomes if error is not None)
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['operations'] += len(batch)
+            self._stats['failed'] += failed
+            self._stats['max_batch_size'] = max(self._stats['max_batch_size'], len(batch))
+            self._stats['queue_seconds'] += sum(waited)
+            self._stats['max_queue_seconds'] = max(self._stats['max_queue_seconds'], max(waited))
+            self._stats['commit_seconds'] += finished - committing
+        logger.debug("Committed %d writes (%d failed) in %.2f ms", len(batch), failed, (finished - started) * 1000)
+
+        for operation, (result, error) in zip(batch, outcomes):
+            if error is not None:
+                operation.future.set_exception(error)
+            else:
+                operation.future.set_result(result)
+
+
+_queues = weakref.WeakSet()
+
+
+def _forget_writers_after_fork() -> None:
+    # The writer threads do not exist in a forked child; each queue starts a new one on use
+    for write_queue in list(_queues):
+        write_queue._reset()
+
+
+os.register_at_fork(after_in_child=_forget_writers_after_fork)
@@ -5,10 +5,24 @@ if [ -f "$DB_PATH" ]; then
     echo "Recreating database at $DB_PATH."
     # Drop and recreate the tables
     sqlite3 "$DB_PATH" < /app/sql/create_event_table.sql
+    # auto_vacuum only changes when the file is rebuilt, which is quick now it is empty
+    sqlite3 "$DB_PATH" "PRAGMA auto_vacuum = INCREMENTAL; VACUUM;"
     echo "Database recreated successfully."
 else
     echo "Creating database at $DB_PATH."
     # Create the database for the first time
     sqlite3 "$DB_PATH" < /app/sql/create_event_table.sql
     echo "Database created successfully."
-fi
\ No newline at end of file
+fi
+
+# The journal mode is stored in the database file, so set it once here.
+# The remaining storage settings are applied per connection by the app.
+if [ -z "$DB_JOURNAL_MODE" ]; then
+    if [ "${DB_STORAGE_PROFILE:-wal}" = "wal" ]; then
+        DB_JOURNAL_MODE=WAL
+    else
+        DB_JOURNAL_MODE=DELETE
+    fi
+fi
+echo "Setting journal mode to $DB_JOURNAL_MODE."
+sqlite3 "$DB_PATH" "PRAGMA journal_mode = $DB_JOURNAL_MODE;" > /dev/null
@@ -1,3 +1,7 @@
+-- Lets the archive job return freed pages to the file system a few at a time.
+-- Only takes effect before the first table is created.
+PRAGMA auto_vacuum = INCREMENTAL;
+
 DROP TABLE IF EXISTS events;
 CREATE TABLE events (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -6,5 +10,176 @@ CREATE TABLE events (
     event_month INTEGER NOT NULL,
     event_year INTEGER NOT NULL,
     is_religious BOOLEAN NOT NULL,
-    is_deleted BOOLEAN DEFAULT FALSE
-);
\ No newline at end of file
+    deleted BOOLEAN DEFAULT FALSE,
+    deleted_at REAL
+);
+
+-- Live events ordered by date, used for date range queries
+CREATE INDEX idx_events_live_date ON events (event_year, event_month, event_day) WHERE deleted = FALSE;
+
+-- Deleted events oldest first, for the archive job; live events are not in it
+CREATE INDEX idx_events_deleted_at ON events (deleted_at) WHERE deleted = TRUE;
+
+-- When each event was soft deleted, so old deletions can be archived
+CREATE TRIGGER events_deleted_at
+AFTER UPDATE OF deleted ON events WHEN new.deleted IS NOT old.deleted BEGIN
+    UPDATE events SET deleted_at = CASE WHEN new.deleted THEN (julianday('now') - 2440587.5) * 86400.0 END
+    WHERE id = new.id;
+END;
+
+-- Yearly public holiday lists fetched from the holiday API
+DROP TABLE IF EXISTS holiday_cache;
+CREATE TABLE holiday_cache (
+    country TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    holidays TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (country, year)
+);
+
+DROP TABLE IF EXISTS recurrence_rules;
+-- How recurring events repeat, one rule per event; the event's date is where it starts
+CREATE TABLE recurrence_rules (
+    event_id INTEGER PRIMARY KEY REFERENCES events (id),
+    frequency TEXT NOT NULL CHECK (frequency IN ('yearly', 'monthly', 'nth_weekday', 'easter')),
+    repeat_interval INTEGER NOT NULL DEFAULT 1,
+    weekday INTEGER,
+    nth INTEGER,
+    easter_offset INTEGER NOT NULL DEFAULT 0,
+    until TEXT
+);
+
+DROP TABLE IF EXISTS events_fts;
+-- Full-text index over the names of live events, kept in step with events by the triggers below.
+-- It reads event_name from events (external content); prefix='2 3' speeds up short prefix queries.
+CREATE VIRTUAL TABLE events_fts USING fts5 (
+    event_name,
+    content = 'events',
+    content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+-- Soft deleted events leave the index, so searches never see them
+CREATE TRIGGER events_fts_insert AFTER INSERT ON events WHEN new.deleted = FALSE BEGIN
+    INSERT INTO events_fts (rowid, event_name) VALUES (new.id, new.event_name);
+END;
+
+CREATE TRIGGER events_fts_delete AFTER DELETE ON events WHEN old.deleted = FALSE BEGIN
+    INSERT INTO events_fts (events_fts, rowid, event_name) VALUES ('delete', old.id, old.event_name);
+END;
+
+CREATE TRIGGER events_fts_update AFTER UPDATE OF event_name, deleted ON events BEGIN
+    INSERT INTO events_fts (events_fts, rowid, event_name) SELECT 'delete', old.id, old.event_name WHERE old.deleted = FALSE;
+    INSERT INTO events_fts (rowid, event_name) SELECT new.id, new.event_name WHERE new.deleted = FALSE;
+END;
+
+DROP TABLE IF EXISTS event_day_counts;
+-- Number of live events on each day, and how many of them are religious, kept in step
+-- with events by the triggers below so dashboards never count the events themselves
+CREATE TABLE event_day_counts (
+    event_year INTEGER NOT NULL,
+    event_month INTEGER NOT NULL,
+    event_day INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    religious INTEGER NOT NULL,
+    PRIMARY KEY (event_year, event_month, event_day)
+) WITHOUT ROWID;
+
+CREATE TRIGGER event_day_counts_insert AFTER INSERT ON events WHEN new.deleted = FALSE BEGIN
+    INSERT INTO event_day_counts (event_year, event_month, event_day, total, religious)
+    VALUES (new.event_year, new.event_month, new.event_day, 1, new.is_religious IS TRUE)
+    ON CONFLICT DO UPDATE SET total = total + 1, religious = religious + excluded.religious;
+END;
+
+CREATE TRIGGER event_day_counts_delete AFTER DELETE ON events WHEN old.deleted = FALSE BEGIN
+    UPDATE event_day_counts SET total = total - 1, religious = religious - (old.is_religious IS TRUE)
+    WHERE event_year = old.event_year AND event_month = old.event_month AND event_day = old.event_day;
+    DELETE FROM event_day_counts
+    WHERE event_year = old.event_year AND event_month = old.event_month AND event_day = old.event_day AND total = 0;
+END;
+
+-- Moving, soft deleting or reclassifying an event takes it off its old day and adds it to its new one
+CREATE TRIGGER event_day_counts_update
+AFTER UPDATE OF event_day, event_month, event_year, is_religious, deleted ON events BEGIN
+    UPDATE event_day_counts SET total = total - 1, religious = religious - (old.is_religious IS TRUE)
+    WHERE old.deleted = FALSE
+      AND event_year = old.event_year AND event_month = old.event_month AND event_day = old.event_day;
+    DELETE FROM event_day_counts
+    WHERE event_year = old.event_year AND event_month = old.event_month AND event_day = old.event_day AND total = 0;
+    INSERT INTO event_day_counts (event_year, event_month, event_day, total, religious)
+    SELECT new.event_year, new.event_month, new.event_day, 1, new.is_religious IS TRUE WHERE new.deleted = FALSE
+    ON CONFLICT DO UPDATE SET total = total + 1, religious = religious + excluded.religious;
+END;
+
+DROP TABLE IF EXISTS event_changes;
+-- Every insert, update and deletion of an event, numbered by version, so clients can
+-- sync by asking for what changed after the last version they saw. AUTOINCREMENT keeps
+-- versions increasing even after old changes are removed.
+CREATE TABLE event_changes (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id INTEGER NOT NULL,
+    operation TEXT NOT NULL CHECK (operation IN ('insert', 'update', 'delete')),
+    changed_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+);
+
+CREATE TRIGGER event_changes_insert AFTER INSERT ON events WHEN new.deleted = FALSE BEGIN
+    INSERT INTO event_changes (event_id, operation) VALUES (new.id, 'insert');
+END;
+
+CREATE TRIGGER event_changes_delete AFTER DELETE ON events WHEN old.deleted = FALSE BEGIN
+    INSERT INTO event_changes (event_id, operation) VALUES (old.id, 'delete');
+END;
+
+-- A soft delete is a deletion, and undoing one an insert; changes to deleted events are not recorded
+CREATE TRIGGER event_changes_update
+AFTER UPDATE OF event_name, event_day, event_month, event_year, is_religious, deleted ON events
+WHEN old.deleted = FALSE OR new.deleted = FALSE BEGIN
+    INSERT INTO event_changes (event_id, operation)
+    VALUES (new.id, CASE WHEN new.deleted THEN 'delete' WHEN old.deleted THEN 'insert' ELSE 'update' END);
+END;
+
+-- Setting or clearing the recurrence of a live event is an update of that event, so the
+-- change feed, and the read replicas that follow it, see the new rule
+CREATE TRIGGER event_changes_recurrence_insert AFTER INSERT ON recurrence_rules
+WHEN EXISTS (SELECT 1 FROM events WHERE id = new.event_id AND deleted = FALSE) BEGIN
+    INSERT INTO event_changes (event_id, operation) VALUES (new.event_id, 'update');
+END;
+
+CREATE TRIGGER event_changes_recurrence_update AFTER UPDATE ON recurrence_rules
+WHEN EXISTS (SELECT 1 FROM events WHERE id = new.event_id AND deleted = FALSE) BEGIN
+    INSERT INTO event_changes (event_id, operation) VALUES (new.event_id, 'update');
+END;
+
+CREATE TRIGGER event_changes_recurrence_delete AFTER DELETE ON recurrence_rules
+WHEN EXISTS (SELECT 1 FROM events WHERE id = old.event_id AND deleted = FALSE) BEGIN
+    INSERT INTO event_changes (event_id, operation) VALUES (old.event_id, 'update');
+END;
+
+DROP TABLE IF EXISTS events_archive;
+-- Soft deleted events moved out of events by python -m event_tracker.models.archive_model,
+-- with their recurrence rule as JSON. Names are no longer unique once archived.
+CREATE TABLE events_archive (
+    id INTEGER PRIMARY KEY,
+    event_name TEXT NOT NULL,
+    event_day INTEGER NOT NULL,
+    event_month INTEGER NOT NULL,
+    event_year INTEGER NOT NULL,
+    is_religious BOOLEAN NOT NULL,
+    recurrence TEXT,
+    deleted_at REAL,
+    archived_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+);
+
+DROP TABLE IF EXISTS event_partitions;
+-- Where each event is stored when EVENT_PARTITIONING is set: the year or decade of the
+-- partition file holding it. New IDs are handed out here, and names are kept unique
+-- across every partition.
+CREATE TABLE event_partitions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    partition INTEGER NOT NULL,
+    event_name TEXT NOT NULL UNIQUE
+);
+
+-- Keep in step with the newest file in sql/migrations
+PRAGMA user_version = 9;
@@ -0,0 +1,15 @@
+-- One partition of the events table when EVENT_PARTITIONING is set, holding the events
+-- of one year or decade. IDs and unique names are kept by event_partitions in the main
+-- database, so neither is declared here.
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    event_name TEXT NOT NULL,
+    event_day INTEGER NOT NULL,
+    event_month INTEGER NOT NULL,
+    event_year INTEGER NOT NULL,
+    is_religious BOOLEAN NOT NULL,
+    deleted BOOLEAN DEFAULT FALSE,
+    deleted_at REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_events_live_date ON events (event_year, event_month, event_day) WHERE deleted = FALSE;
@@ -0,0 +1,7 @@
+-- The original DDL named the soft delete flag is_deleted while the code queries deleted
+ALTER TABLE events RENAME COLUMN is_deleted TO deleted;
+
+-- Live events ordered by date, used for date range queries
+CREATE INDEX IF NOT EXISTS idx_events_live_date ON events (event_year, event_month, event_day) WHERE deleted = FALSE;
+
+PRAGMA user_version = 1;
@@ -0,0 +1,10 @@
+-- Yearly public holiday lists fetched from the holiday API
+CREATE TABLE IF NOT EXISTS holiday_cache (
+    country TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    holidays TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (country, year)
+);
+
+PRAGMA user_version = 2;
@@ -0,0 +1,12 @@
+-- How recurring events repeat, one rule per event; the event's date is where it starts
+CREATE TABLE IF NOT EXISTS recurrence_rules (
+    event_id INTEGER PRIMARY KEY REFERENCES events (id),
+    frequency TEXT NOT NULL CHECK (frequency IN ('yearly', 'monthly', 'nth_weekday', 'easter')),
+    repeat_interval INTEGER NOT NULL DEFAULT 1,
+    weekday INTEGER,
+    nth INTEGER,
+    easter_offset INTEGER NOT NULL DEFAULT 0,
+    until TEXT
+);
+
+PRAGMA user_version = 3;
@@ -0,0 +1,28 @@
+-- Full-text index over the names of live events, kept in step with events by the triggers below.
+-- It reads event_name from events (external content); prefix='2 3' speeds up short prefix queries.
+CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5 (
+    event_name,
+    content = 'events',
+    content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+-- Soft deleted events leave the index, so searches never see them
+CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events WHEN new.deleted = FALSE BEGIN
+    INSERT INTO events_fts (rowid, event_name) VALUES (new.id, new.event_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events WHEN old.deleted = FALSE BEGIN
+    INSERT INTO events_fts (events_fts, rowid, event_name) VALUES ('delete', old.id, old.event_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF event_name, deleted ON events BEGIN
+    INSERT INTO events_fts (events_fts, rowid, event_name) SELECT 'delete', old.id, old.event_name WHERE old.deleted = FALSE;
+    INSERT INTO events_fts (rowid, event_name) SELECT new.id, new.event_name WHERE new.deleted = FALSE;
+END;
+
+-- Index the events that already exist. ('rebuild' would also index the soft deleted ones.)
+INSERT INTO events_fts (rowid, event_name) SELECT id, event_name FROM events WHERE deleted = FALSE;
+
+PRAGMA user_version = 4;
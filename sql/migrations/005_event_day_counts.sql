@@ -0,0 +1,44 @@
+-- Number of live events on each day, and how many of them are religious, kept in step
+-- with events by the triggers below so dashboards never count the events themselves
+CREATE TABLE IF NOT EXISTS event_day_counts (
+    event_year INTEGER NOT NULL,
+    event_month INTEGER NOT NULL,
+    event_day INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    religious INTEGER NOT NULL,
+    PRIMARY KEY (event_year, event_month, event_day)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS event_day_counts_insert AFTER INSERT ON events WHEN new.deleted = FALSE BEGIN
+    INSERT INTO event_day_counts (event_year, event_month, event_day, total, religious)
+    VALUES (new.event_year, new.event_month, new.event_day, 1, new.is_religious IS TRUE)
+    ON CONFLICT DO UPDATE SET total = total + 1, religious = religious + excluded.religious;
+END;
+
+CREATE TRIGGER IF NOT EXISTS event_day_counts_delete AFTER DELETE ON events WHEN old.deleted = FALSE BEGIN
+    UPDATE event_day_counts SET total = total - 1, religious = religious - (old.is_religious IS TRUE)
+    WHERE event_year = old.event_year AND event_month = old.event_month AND event_day = old.event_day;
+    DELETE FROM event_day_counts
+    WHERE event_year = old.event_year AND event_month = old.event_month AND event_day = old.event_day AND total = 0;
+END;
+
+-- Moving, soft deleting or reclassifying an event takes it off its old day and adds it to its new one
+CREATE TRIGGER IF NOT EXISTS event_day_counts_update
+AFTER UPDATE OF event_day, event_month, event_year, is_religious, deleted ON events BEGIN
+    UPDATE event_day_counts SET total = total - 1, religious = religious - (old.is_religious IS TRUE)
+    WHERE old.deleted = FALSE
+      AND event_year = old.event_year AND event_month = old.event_month AND event_day = old.event_day;
+    DELETE FROM event_day_counts
+    WHERE event_year = old.event_year AND event_month = old.event_month AND event_day = old.event_day AND total = 0;
+    INSERT INTO event_day_counts (event_year, event_month, event_day, total, religious)
+    SELECT new.event_year, new.event_month, new.event_day, 1, new.is_religious IS TRUE WHERE new.deleted = FALSE
+    ON CONFLICT DO UPDATE SET total = total + 1, religious = religious + excluded.religious;
+END;
+
+-- Count the events that already exist
+INSERT INTO event_day_counts (event_year, event_month, event_day, total, religious)
+SELECT event_year, event_month, event_day, COUNT(*), SUM(is_religious IS TRUE)
+FROM events WHERE deleted = FALSE
+GROUP BY event_year, event_month, event_day;
+
+PRAGMA user_version = 5;
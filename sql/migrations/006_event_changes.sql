@@ -0,0 +1,30 @@
+-- Every insert, update and deletion of an event, numbered by version, so clients can
+-- sync by asking for what changed after the last version they saw. AUTOINCREMENT keeps
+-- versions increasing even after old changes are removed.
+CREATE TABLE IF NOT EXISTS event_changes (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id INTEGER NOT NULL,
+    operation TEXT NOT NULL CHECK (operation IN ('insert', 'update', 'delete')),
+    changed_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+);
+
+CREATE TRIGGER IF NOT EXISTS event_changes_insert AFTER INSERT ON events WHEN new.deleted = FALSE BEGIN
+    INSERT INTO event_changes (event_id, operation) VALUES (new.id, 'insert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS event_changes_delete AFTER DELETE ON events WHEN old.deleted = FALSE BEGIN
+    INSERT INTO event_changes (event_id, operation) VALUES (old.id, 'delete');
+END;
+
+-- A soft delete is a deletion, and undoing one an insert; changes to deleted events are not recorded
+CREATE TRIGGER IF NOT EXISTS event_changes_update
+AFTER UPDATE OF event_name, event_day, event_month, event_year, is_religious, deleted ON events
+WHEN old.deleted = FALSE OR new.deleted = FALSE BEGIN
+    INSERT INTO event_changes (event_id, operation)
+    VALUES (new.id, CASE WHEN new.deleted THEN 'delete' WHEN old.deleted THEN 'insert' ELSE 'update' END);
+END;
+
+-- Start the log with the events that already exist, so syncing from version 0 sees every event
+INSERT INTO event_changes (event_id, operation) SELECT id, 'insert' FROM events WHERE deleted = FALSE ORDER BY id;
+
+PRAGMA user_version = 6;
@@ -0,0 +1,34 @@
+-- When each event was soft deleted, so old deletions can be archived. Events deleted
+-- before this migration count as deleted now.
+ALTER TABLE events ADD COLUMN deleted_at REAL;
+UPDATE events SET deleted_at = (julianday('now') - 2440587.5) * 86400.0 WHERE deleted = TRUE;
+
+-- Deleted events oldest first, for the archive job; live events are not in it
+CREATE INDEX IF NOT EXISTS idx_events_deleted_at ON events (deleted_at) WHERE deleted = TRUE;
+
+CREATE TRIGGER IF NOT EXISTS events_deleted_at
+AFTER UPDATE OF deleted ON events WHEN new.deleted IS NOT old.deleted BEGIN
+    UPDATE events SET deleted_at = CASE WHEN new.deleted THEN (julianday('now') - 2440587.5) * 86400.0 END
+    WHERE id = new.id;
+END;
+
+-- Soft deleted events moved out of events by python -m event_tracker.models.archive_model,
+-- with their recurrence rule as JSON. Names are no longer unique once archived.
+CREATE TABLE IF NOT EXISTS events_archive (
+    id INTEGER PRIMARY KEY,
+    event_name TEXT NOT NULL,
+    event_day INTEGER NOT NULL,
+    event_month INTEGER NOT NULL,
+    event_year INTEGER NOT NULL,
+    is_religious BOOLEAN NOT NULL,
+    recurrence TEXT,
+    deleted_at REAL,
+    archived_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+);
+
+-- Space freed by archiving is only returned to the file system once the database is
+-- rebuilt in incremental mode, which takes an exclusive lock; run
+--     python -m event_tracker.models.archive_model --enable-incremental-vacuum
+-- once, while the app is stopped.
+
+PRAGMA user_version = 7;
@@ -0,0 +1,10 @@
+-- Where each event is stored when EVENT_PARTITIONING is set: the year or decade of the
+-- partition file holding it. New IDs are handed out here, and names are kept unique
+-- across every partition.
+CREATE TABLE IF NOT EXISTS event_partitions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    partition INTEGER NOT NULL,
+    event_name TEXT NOT NULL UNIQUE
+);
+
+PRAGMA user_version = 8;
@@ -0,0 +1,18 @@
+-- Setting or clearing the recurrence of a live event is an update of that event, so the
+-- change feed, and the read replicas that follow it, see the new rule
+CREATE TRIGGER IF NOT EXISTS event_changes_recurrence_insert AFTER INSERT ON recurrence_rules
+WHEN EXISTS (SELECT 1 FROM events WHERE id = new.event_id AND deleted = FALSE) BEGIN
+    INSERT INTO event_changes (event_id, operation) VALUES (new.event_id, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS event_changes_recurrence_update AFTER UPDATE ON recurrence_rules
+WHEN EXISTS (SELECT 1 FROM events WHERE id = new.event_id AND deleted = FALSE) BEGIN
+    INSERT INTO event_changes (event_id, operation) VALUES (new.event_id, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS event_changes_recurrence_delete AFTER DELETE ON recurrence_rules
+WHEN EXISTS (SELECT 1 FROM events WHERE id = old.event_id AND deleted = FALSE) BEGIN
+    INSERT INTO event_changes (event_id, operation) VALUES (old.event_id, 'update');
+END;
+
+PRAGMA user_version = 9;
@@ -0,0 +1,165 @@
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+
+from event_tracker.models import archive_model, calendar_model
+from event_tracker.models.archive_model import archive_deleted_events, compact, reclaim_space
+from event_tracker.utils import sql_utils
+from event_tracker.utils.recurrence import RecurrenceRule
+
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), "..", "sql")
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+def create_events_db(path, events, script_filter=lambda script: script):
+    conn = sqlite3.connect(path)
+    with open(os.path.join(SQL_DIR, "create_event_table.sql")) as f:
+        conn.executescript(script_filter(f.read()))
+    conn.executemany(
+        "INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) VALUES (?, ?, ?, ?, ?)",
+        events,
+    )
+    conn.commit()
+    conn.close()
+
+@pytest.fixture
+def events_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "events.db")
+    create_events_db(path, [
+        ("Christmas", 25, 12, 2024, True),
+        ("Boxing Day", 26, 12, 2024, False),
+        ("New Year", 1, 1, 2025, False),
+        ("Easter", 20, 4, 2025, True),
+    ])
+    monkeypatch.setattr(sql_utils, "DB_PATH", path)
+    monkeypatch.setattr(archive_model, "ARCHIVE_PAUSE_MS", 0)
+    calendar_model.clear_cache()
+    yield path
+    archive_model.wait_for_compaction()
+    sql_utils.close_pool()
+
+def deleted_days_ago(path, days, *ids):
+    conn = sqlite3.connect(path)
+    conn.executemany("UPDATE events SET deleted_at = ? WHERE id = ?", [(time.time() - days * 86400, id) for id in ids])
+    conn.commit()
+    conn.close()
+
+######################################################
+#
+#    Archiving
+#
+######################################################
+
+def test_archive_moves_old_deletions_only(events_db):
+    """Test that events deleted before the retention window leave events, with their recurrence rule."""
+    calendar_model.set_event_recurrence(4, RecurrenceRule.from_dict({'frequency': 'easter'}))
+    for id in (2, 3, 4):
+        calendar_model.delete_event(id)
+    deleted_days_ago(events_db, 40, 2, 4)
+
+    report = archive_deleted_events(retention_days=30)
+
+    assert report['archived'] == 2 and report['batches'] == 1
+    conn = sqlite3.connect(events_db)
+    assert conn.execute("SELECT id FROM events ORDER BY id").fetchall() == [(1,), (3,)]
+    assert conn.execute("SELECT COUNT(*) FROM recurrence_rules").fetchone() == (0,)
+    archived = conn.execute("SELECT id, event_name, recurrence FROM events_archive ORDER BY id").fetchall()
+    assert [row[:2] for row in archived] == [(2, "Boxing Day"), (4, "Easter")]
+    assert json.loads(archived[1][2])['frequency'] == 'easter'
+    conn.close()
+
+    # The change feed and counts already treated them as deleted, and their names are free again
+    assert [c['operation'] for c in calendar_model.get_changes(5)['changes']] == ['delete', 'delete', 'delete']
+    calendar_model.add_event(26, 12, 2025, "Boxing Day", False)
+
+def test_deleted_at_follows_the_deleted_flag(events_db):
+    calendar_model.delete_event(1)
+    conn = sqlite3.connect(events_db)
+    deleted_at = conn.execute("SELECT deleted_at FROM events WHERE id = 1").fetchone()[0]
+    assert abs(deleted_at - time.time()) < 60
+    conn.execute("UPDATE events SET deleted = FALSE WHERE id = 1")
+    assert conn.execute("SELECT deleted_at FROM events WHERE id = 1").fetchone() == (None,)
+    conn.close()
+
+def test_archive_in_batches_to_separate_file(events_db, tmp_path):
+    for id in (1, 2, 3, 4):
+        calendar_model.delete_event(id)
+    archive_path = str(tmp_path / "archive.db")
+
+    report = archive_deleted_events(retention_days=0, batch_size=3, archive_path=archive_path)
+
+    assert (report['archived'], report['batches']) == (4, 2)
+    conn = sqlite3.connect(archive_path)
+    assert conn.execute("SELECT COUNT(*) FROM events_archive").fetchone() == (4,)
+    conn.close()
+    conn = sqlite3.connect(events_db)
+    assert conn.execute("SELECT COUNT(*) FROM events").fetchone() == (0,)
+    assert conn.execute("SELECT COUNT(*) FROM events_archive").fetchone() == (0,)
+    assert conn.execute("PRAGMA database_list").fetchall()[-1][1] == "main"
+    conn.close()
+
+def test_archive_invalid_options(events_db):
+    with pytest.raises(ValueError, match="Invalid retention"):
+        archive_deleted_events(retention_days=-1)
+    with pytest.raises(ValueError, match="Invalid batch size"):
+        archive_model.start_compaction(batch_size="10")
+
+######################################################
+#
+#    Reclaiming space
+#
+######################################################
+
+def test_compact_reclaims_pages(tmp_path, monkeypatch):
+    path = str(tmp_path / "big.db")
+    create_events_db(path, [(f"Event {i} " + "x" * 500, 1, 1, 2024, False) for i in range(2000)])
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE events SET deleted = TRUE")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(sql_utils, "DB_PATH", path)
+    monkeypatch.setattr(archive_model, "ARCHIVE_PAUSE_MS", 0)
+
+    report = compact(retention_days=0, archive_path=str(tmp_path / "archive.db"))
+    sql_utils.close_pool()
+
+    assert report['archived'] == 2000
+    assert report['incremental'] and report['free_pages'] == 0
+    assert report['bytes_reclaimed'] > 1_000_000
+    assert report['seconds'] >= report['longest_lock_seconds'] > 0
+
+def test_reclaim_space_needs_incremental_mode(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    create_events_db(path, [("Christmas", 25, 12, 2024, True)],
+                     lambda script: script.replace("PRAGMA auto_vacuum = INCREMENTAL;", ""))
+    monkeypatch.setattr(sql_utils, "DB_PATH", path)
+
+    assert reclaim_space()['incremental'] is False
+    archive_model.enable_incremental_vacuum()
+    assert reclaim_space()['incremental'] is True
+    sql_utils.close_pool()
+
+######################################################
+#
+#    Background compaction
+#
+######################################################
+
+def test_start_compaction_reports_status(events_db):
+    calendar_model.delete_event(1)
+    deleted_days_ago(events_db, 400, 1)
+
+    assert archive_model.start_compaction(retention_days=365)
+    archive_model.wait_for_compaction()
+
+    status = archive_model.get_compaction_status()
+    assert status['running'] is False and status['error'] is None
+    assert status['last_report']['archived'] == 1
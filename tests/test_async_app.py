@@ -0,0 +1,292 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+
+import aiohttp
+from aiohttp.test_utils import TestClient, TestServer
+import pytest
+
+import async_app
+from event_tracker.models import archive_model, calendar_model, holiday_model
+from event_tracker.utils import import_utils, sql_utils
+from event_tracker.utils.rate_limit import TokenBucket
+
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), "..", "sql")
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture(autouse=True)
+def events_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "events.db")
+    conn = sqlite3.connect(path)
+    with open(os.path.join(SQL_DIR, "create_event_table.sql")) as f:
+        conn.executescript(f.read())
+    conn.executemany(
+        "INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) VALUES (?, ?, ?, ?, ?)",
+        [("Christmas", 25, 12, 2024, True), ("New Year", 1, 1, 2025, False)],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(sql_utils, "DB_PATH", path)
+    monkeypatch.setattr(holiday_model, "_rate_limiter", TokenBucket(100, 100))
+    calendar_model.clear_cache()
+    holiday_model.clear_holiday_cache()
+    yield path
+    sql_utils.close_pool()
+
+def run_with_client(test):
+    """Runs a coroutine taking a test client against a fresh async app."""
+    async def main():
+        async with TestClient(TestServer(async_app.create_app())) as client:
+            return await test(client)
+    return asyncio.run(main())
+
+######################################################
+#
+#    Routes
+#
+######################################################
+
+def test_create_and_get_events():
+    async def test(client):
+        response = await client.post("/api/create-event", json={
+            "event_name": "Epiphany", "event_day": 6, "event_month": 1, "event_year": 2025, "is_religious": True})
+        assert response.status == 201
+
+        response = await client.get("/api/get-events")
+        assert response.status == 200
+        body = await response.json()
+        assert [event["event_name"] for event in body["events"]] == ["Christmas", "New Year", "Epiphany"]
+
+        response = await client.get("/api/get-events", headers={"If-None-Match": response.headers["ETag"]})
+        assert response.status == 304
+
+    run_with_client(test)
+
+def test_create_event_invalid_input():
+    async def test(client):
+        response = await client.post("/api/create-event", json={"event_name": "Epiphany"})
+        assert response.status == 400
+
+    run_with_client(test)
+
+def test_get_and_delete_event_by_id():
+    async def test(client):
+        response = await client.get("/api/get-event-by-id/1")
+        assert (await response.json())["event"]["event_name"] == "Christmas"
+
+        response = await client.delete("/api/delete-event/1")
+        assert response.status == 200
+
+        response = await client.get("/api/get-events?format=columnar")
+        assert (await response.json())["events"]["event_name"] == ["New Year"]
+
+    run_with_client(test)
+
+def test_get_events_stream_ndjson(monkeypatch):
+    monkeypatch.setattr(async_app, "STREAM_PAGE_SIZE", 1)
+
+    async def test(client):
+        response = await client.get("/api/get-events?stream=ndjson")
+        assert response.content_type == "application/x-ndjson"
+        lines = (await response.text()).splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [1, 2]
+
+        response = await client.get("/api/get-events?stream=json")
+        assert [event["id"] for event in (await response.json())["events"]] == [1, 2]
+
+    run_with_client(test)
+
+def test_add_events_bulk_csv():
+    async def test(client):
+        body = "event_name,event_day,event_month,event_year,is_religious\nEaster,20,4,2025,true\n"
+        response = await client.post("/api/events/bulk", data=body, headers={"Content-Type": "text/csv"})
+        assert response.status == 200
+        assert (await response.json())["inserted"] == 1
+
+        response = await client.post("/api/events/bulk", data="nope", headers={"Content-Type": "text/plain"})
+        assert response.status == 415
+
+    run_with_client(test)
+
+def test_add_events_bulk_multipart_spools_to_disk(monkeypatch):
+    """Test that an upload larger than BULK_SPOOL_SIZE is read in full through import_utils.spool."""
+    monkeypatch.setattr(import_utils, "BULK_SPOOL_SIZE", 16)
+
+    async def test(client):
+        rows = "".join(f"Event {i},1,2,2025,false\n" for i in range(50))
+        form = aiohttp.FormData()
+        form.add_field("note", "ignored")
+        form.add_field("file", "event_name,event_day,event_month,event_year,is_religious\n" + rows,
+                       filename="events.csv", content_type="text/csv")
+        response = await client.post("/api/events/bulk", data=form)
+        assert response.status == 200
+        assert (await response.json())["inserted"] == 50
+
+    run_with_client(test)
+
+def test_database_calls_run_on_db_thread(monkeypatch):
+    """Test that model functions never run on the event loop thread."""
+    threads = []
+
+    def get_events_between(start, end):
+        threads.append(threading.current_thread().name)
+        return []
+
+    monkeypatch.setattr(calendar_model, "get_events_between", get_events_between)
+
+    async def test(client):
+        response = await client.get("/api/events?from=2024-01-01&to=2024-12-31")
+        assert response.status == 200
+
+    run_with_client(test)
+    assert threads[0].startswith("db")
+
+def test_is_holiday_concurrent_requests_share_one_lookup(monkeypatch):
+    """Test that concurrent misses for a year wait on one load, here the rule-based fallback."""
+    monkeypatch.setattr(holiday_model, "HOLIDAY_API_URL", "http://127.0.0.1:9")
+    loads = []
+    load_year = holiday_model._load_year_async
+
+    async def counting_load(*args):
+        loads.append(args[1:])
+        return await load_year(*args)
+
+    monkeypatch.setattr(holiday_model, "_load_year_async", counting_load)
+
+    async def test(client):
+        responses = await asyncio.gather(*(client.get("/api/is-holiday?date=2024-07-04&country=US") for _ in range(20)))
+        bodies = [await response.json() for response in responses]
+        assert all(body["is_holiday"] and body["source"] == "rules" for body in bodies)
+
+    run_with_client(test)
+    assert loads == [("US", 2024)]
+
+def test_is_holiday_invalid_lookup():
+    async def test(client):
+        for query in ("date=2024-07-04&country=../x", "date=0001-07-04&country=US"):
+            response = await client.get(f"/api/is-holiday?{query}")
+            assert response.status == 400
+
+    run_with_client(test)
+
+def test_metrics_route():
+    async def test(client):
+        await client.get("/api/get-event-by-id/1")
+        response = await client.get("/api/metrics")
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        body = await response.text()
+        assert 'route="/api/get-event-by-id/{id}",status="200"' in body
+        assert 'model_function_duration_seconds_count{function="calendar_model.get_event_by_id"}' in body
+
+    run_with_client(test)
+
+def test_recurring_event_occurrences():
+    async def test(client):
+        response = await client.post("/api/create-event", json={
+            "event_name": "Good Friday", "event_day": 1, "event_month": 1, "event_year": 2024, "is_religious": True,
+            "recurrence": {"frequency": "easter", "easter_offset": -2}})
+        assert response.status == 201
+
+        response = await client.get("/api/events/occurrences?from=2025-01-01&to=2026-12-31&limit=3")
+        body = await response.json()
+        assert [(event["date"], event["event_name"]) for event in body["events"]] == [
+            ("2025-01-01", "New Year"), ("2025-04-18", "Good Friday"), ("2026-04-03", "Good Friday")]
+
+        response = await client.put("/api/events/2/recurrence", json={"recurrence": {"frequency": "fortnightly"}})
+        assert response.status == 400
+
+    run_with_client(test)
+
+def test_search_and_autocomplete():
+    async def test(client):
+        response = await client.get("/api/events/search?q=christ&religious=true")
+        assert [event["event_name"] for event in (await response.json())["events"]] == ["Christmas"]
+
+        response = await client.get("/api/events/autocomplete?q=new")
+        assert [event["event_name"] for event in (await response.json())["events"]] == ["New Year"]
+
+        response = await client.get("/api/events/search?q=")
+        assert response.status == 400
+
+    run_with_client(test)
+
+def test_event_counts():
+    async def test(client):
+        response = await client.get("/api/stats/by-year")
+        assert [(count["year"], count["religious"]) for count in (await response.json())["counts"]] == [(2024, 1), (2025, 0)]
+
+        response = await client.get("/api/stats/by-day?from=2025-01-01")
+        assert (await response.json())["counts"] == [
+            {"year": 2025, "month": 1, "day": 1, "total": 1, "religious": 0, "secular": 1}]
+
+        response = await client.get("/api/stats/by-month?from=2025-01-01&to=2024-01-01")
+        assert response.status == 400
+
+        response = await client.get("/api/stats/by-week")
+        assert response.status == 404
+
+    run_with_client(test)
+
+def test_compaction_routes():
+    async def test(client):
+        await client.delete("/api/delete-event/2")
+
+        response = await client.post("/api/admin/compact", json={"retention_days": 0})
+        assert response.status == 202
+        archive_model.wait_for_compaction()
+
+        response = await client.get("/api/admin/compact")
+        body = await response.json()
+        assert body["running"] is False and body["last_report"]["archived"] == 1
+
+        response = await client.post("/api/admin/compact", json={"batch_size": 0})
+        assert response.status == 400
+
+    run_with_client(test)
+
+def test_get_events_by_ids():
+    async def test(client):
+        await client.delete("/api/delete-event/2")
+
+        response = await client.get("/api/events/batch?ids=1,2,9,1")
+        entries = (await response.json())["events"]
+        assert [(entry["id"], entry["status"]) for entry in entries] == [
+            (1, "found"), (2, "deleted"), (9, "not_found"), (1, "found")]
+        assert entries[0]["event"]["event_name"] == "Christmas"
+
+        response = await client.post("/api/events/batch", json={"ids": [1, "two"]})
+        assert response.status == 400
+
+    run_with_client(test)
+
+def test_changes_long_poll(monkeypatch):
+    """Test that a long poll is answered by a write made while it waits, without tying up the DB thread."""
+    monkeypatch.setattr(calendar_model, "CHANGES_POLL_INTERVAL", 30)
+
+    async def test(client):
+        response = await client.get("/api/events/changes?since=0")
+        body = await response.json()
+        assert [change["operation"] for change in body["changes"]] == ["insert", "insert"]
+
+        poll = asyncio.ensure_future(client.get(f"/api/events/changes?since={body['version']}&wait=10"))
+        await asyncio.sleep(0.1)
+        response = await client.post("/api/create-event", json={
+            "event_name": "Epiphany", "event_day": 6, "event_month": 1, "event_year": 2025, "is_religious": True})
+        assert response.status == 201
+
+        response = await asyncio.wait_for(poll, 5)
+        changes = (await response.json())["changes"]
+        assert [change["event"]["event_name"] for change in changes] == ["Epiphany"]
+
+        response = await client.get("/api/events/changes?wait=600")
+        assert response.status == 400
+
+    run_with_client(test)
@@ -0,0 +1,47 @@
+import sqlite3
+
+from benchmarks.common import compare_to_baseline, percentile, seed_database, seeded_database, summarize
+
+
+def test_percentile_uses_nearest_rank():
+    samples = [i / 1000 for i in range(1, 101)]
+
+    assert percentile(samples, 50) == 0.05
+    assert percentile(samples, 99) == 0.099
+    assert percentile([0.2], 95) == 0.2
+    assert percentile([], 50) == 0.0
+
+def test_summarize_reports_throughput_over_elapsed_time():
+    result = summarize([0.001] * 10, elapsed=0.005, errors=2)
+
+    assert result['count'] == 10
+    assert result['ops/s'] == 2000
+    assert result['p50_ms'] == 1.0
+    assert result['errors'] == 2
+
+def test_compare_flags_only_regressions_past_threshold():
+    baseline = {'fast': {'p50_ms': 1.0, 'p95_ms': 2.0}, 'removed': {'p50_ms': 1.0, 'p95_ms': 1.0}}
+    results = {
+        'fast': {'p50_ms': 1.2, 'p95_ms': 3.0},
+        'new': {'p50_ms': 9.0, 'p95_ms': 9.0},
+    }
+
+    regressions = compare_to_baseline(results, baseline, threshold=0.25)
+
+    assert [(r['benchmark'], r['metric']) for r in regressions] == [('fast', 'p95_ms')]
+    assert regressions[0]['change'] == 0.5
+
+def test_seeded_databases_are_reproducible(tmp_path):
+    seed_database(str(tmp_path / "a.db"), 200, seed=7)
+    copy = seeded_database(200, str(tmp_path / "b.db"), seed=7, cache_dir=str(tmp_path / "cache"))
+
+    def dump(path):
+        conn = sqlite3.connect(path)
+        rows = conn.execute("SELECT * FROM events ORDER BY id").fetchall()
+        rules = conn.execute("SELECT event_id FROM recurrence_rules ORDER BY event_id").fetchall()
+        conn.close()
+        return rows, rules
+
+    rows, rules = dump(str(tmp_path / "a.db"))
+    assert len(rows) == 200 and len(rules) == 2
+    assert dump(copy) == (rows, rules)
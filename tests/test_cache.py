@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from event_tracker.utils.cache import LRUCache
+
+
+def test_lru_cache_get_and_set():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set(1, "Christmas")
+
+    assert cache.get(1) == "Christmas"
+    assert cache.get(2) is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that reading an entry protects it from eviction."""
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set(1, "Christmas")
+    cache.set(2, "Easter")
+    cache.get(1)
+    cache.set(3, "Diwali")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "Christmas"
+    assert cache.get(3) == "Diwali"
+    assert cache.stats()['evictions'] == 1
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(max_size=2, ttl=0.01)
+    cache.set(1, "Christmas")
+    time.sleep(0.02)
+
+    assert cache.get(1) is None
+    assert cache.stats()['expirations'] == 1
+
+def test_lru_cache_invalidate():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set(1, "Christmas")
+    cache.invalidate(1)
+    cache.invalidate(2)  # missing keys are ignored
+
+    assert cache.get(1) is None
+
+def test_lru_cache_invalid_size():
+    with pytest.raises(ValueError, match="Invalid cache size"):
+        LRUCache(max_size=0, ttl=60)
@@ -1,15 +1,29 @@
-from contextlib import contextmanager
+from contextlib import closing, contextmanager
+from datetime import date
+import json
+import os
 import re
 import sqlite3
+import threading
+import time
 
 import pytest
 
+from event_tracker.models import calendar_model
+from event_tracker.utils import sql_utils
+from event_tracker.utils.recurrence import RecurrenceRule
+from event_tracker.utils.write_queue import WriteQueue
 from event_tracker.models.calendar_model import (
     Event,
+    EventColumns,
     add_event,
+    add_events_bulk,
     delete_event,
     get_event_by_id,
     get_events,
+    get_events_between,
+    get_events_page,
+    iter_events,
     update_event_date,
 )
 
@@ -33,6 +47,7 @@ def mock_cursor(mocker):
     mock_cursor.fetchone.return_value = None  # Default return for queries
     mock_cursor.fetchall.return_value = []
     mock_cursor.commit.return_value = None
+    mock_conn.execute.return_value.fetchone.return_value = (0,)  # the event_changes high-water mark
 
     # Mock the get_db_connection context manager from sql_utils
     @contextmanager
@@ -40,9 +55,40 @@ def mock_cursor(mocker):
         yield mock_conn  # Yield the mocked connection object
 
     mocker.patch("event_tracker.models.calendar_model.get_db_connection", mock_get_db_connection)
+    mocker.patch("event_tracker.models.calendar_model.get_read_connection", mock_get_db_connection)
+    # There is no database file for other processes to write to
+    mocker.patch("event_tracker.models.calendar_model.EVENT_CACHE_CHECK_WRITES", False)
+
+    # Start every test with empty caches
+    calendar_model.clear_cache()
 
     return mock_cursor  # Return the mock cursor so we can set expectations per test
 
+# A real database for functions that stream from the cursor
+@pytest.fixture
+def events_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "events.db")
+    conn = sqlite3.connect(path)
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_event_table.sql")) as f:
+        conn.executescript(f.read())
+    conn.executemany(
+        "INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) VALUES (?, ?, ?, ?, ?)",
+        [
+            ("Christmas", 25, 12, 2024, True),
+            ("New Year", 1, 1, 2025, False),
+            ("Not A Date", 30, 2, 2024, False),
+            ("Millennium", 1, 1, 2000, False),
+            ("Leap Day", 29, 2, 2024, False),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(sql_utils, "DB_PATH", path)
+    calendar_model.clear_cache()
+    yield path
+    sql_utils.close_pool()
+    sql_utils.close_change_watch()
+
 ######################################################
 #
 #    Add and delete
@@ -82,6 +128,44 @@ def test_create_song_duplicate(mock_cursor):
     with pytest.raises(ValueError, match="Event with name 'Event Name' already exists"):
         add_event(event_name="Event Name", event_day=1, event_month=1, event_year=2022, is_religious=True)
 
+def test_add_events_bulk(mock_cursor):
+    """Test that valid events are inserted with executemany in batches."""
+    events = [
+        {'event_name': "Easter", 'event_day': "4", 'event_month': 4, 'event_year': 2022, 'is_religious': "true"},
+        {'event_name': "New Year", 'event_day': 1, 'event_month': 1, 'event_year': 2022, 'is_religious': False},
+        {'event_name': "Diwali", 'event_day': 24, 'event_month': 10, 'event_year': 2022, 'is_religious': True},
+    ]
+
+    result = add_events_bulk(iter(events), batch_size=2)
+
+    assert result == {'inserted': 3, 'errors': []}
+    batches = [call[0][1] for call in mock_cursor.executemany.call_args_list]
+    assert batches == [
+        [("Easter", 4, 4, 2022, True), ("New Year", 1, 1, 2022, False)],
+        [("Diwali", 24, 10, 2022, True)],
+    ]
+
+def test_add_events_bulk_reports_bad_rows(mock_cursor):
+    """Test that invalid and duplicate rows are reported while the rest are inserted."""
+    mock_cursor.executemany.side_effect = sqlite3.IntegrityError("UNIQUE constraint failed: events.event_name")
+
+    def execute(query, params=None):
+        if params and params[0] == "Christmas":
+            raise sqlite3.IntegrityError("UNIQUE constraint failed: events.event_name")
+    mock_cursor.execute.side_effect = execute
+
+    events = [
+        {'event_name': "Christmas", 'event_day': 25, 'event_month': 12, 'event_year': 2022, 'is_religious': True},
+        {'event_name': "Bad Day", 'event_day': 0, 'event_month': 1, 'event_year': 2022, 'is_religious': True},
+        {'event_name': "Easter", 'event_day': 4, 'event_month': 4, 'event_year': 2022, 'is_religious': True},
+    ]
+
+    result = add_events_bulk(events)
+
+    assert result['inserted'] == 1
+    assert [(error['index'], error['event_name']) for error in result['errors']] == [(0, "Christmas"), (1, "Bad Day")]
+    assert result['errors'][0]['error'] == "Event with name 'Christmas' already exists"
+
 def test_delete_event(mock_cursor):
     """Test soft deleting an event from the catalog by event ID."""
 
@@ -195,6 +279,446 @@ def test_get_events(mock_cursor):
 
     assert result == expected_result, f"Expected {expected_result}, got {result}"
 
+def test_get_events_between(mock_cursor):
+    """Test retrieving the events within a date range."""
+    mock_cursor.fetchall.return_value = [
+        (2, "Easter", 4, 4, 2022, True),
+    ]
+
+    result = get_events_between(date(2022, 1, 1), date(2022, 12, 31))
+
+    assert result == [
+        {'id': 2, 'event_name': "Easter", 'event_day': 4, 'event_month': 4, 'event_year': 2022, 'is_religious': True},
+    ]
+
+    expected_query = normalize_whitespace("""
+        SELECT id, event_name, event_day, event_month, event_year, is_religious
+        FROM events
+        WHERE deleted = FALSE
+          AND (event_year, event_month, event_day) >= (?, ?, ?)
+          AND (event_year, event_month, event_day) <= (?, ?, ?)
+        ORDER BY event_year, event_month, event_day
+    """)
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+
+    actual_arguments = mock_cursor.execute.call_args[0][1]
+    assert actual_arguments == (2022, 1, 1, 2022, 12, 31)
+
+def test_get_events_between_invalid_range(mock_cursor):
+    """Test that a range ending before it starts is rejected."""
+    with pytest.raises(ValueError, match="Invalid range"):
+        get_events_between(date(2022, 12, 31), date(2022, 1, 1))
+
+def test_get_events_page(mock_cursor):
+    """Test retrieving a full page of events returns a cursor for the next page."""
+    mock_cursor.fetchall.return_value = [
+        (3, "Event 3", 1, 1, 2022, True),
+        (5, "Event 5", 2, 2, 2022, False),
+    ]
+
+    events, next_after = get_events_page(2, after=2)
+
+    assert [event['id'] for event in events] == [3, 5]
+    assert next_after == 5
+
+    expected_query = normalize_whitespace("""
+        SELECT id, event_name, event_day, event_month, event_year, is_religious
+        FROM events WHERE deleted = FALSE AND id > ?
+        ORDER BY id LIMIT ?
+    """)
+    assert normalize_whitespace(mock_cursor.execute.call_args[0][0]) == expected_query
+    assert mock_cursor.execute.call_args[0][1] == (2, 2)
+
+def test_get_events_page_last_page(mock_cursor):
+    """Test that a short page has no next cursor."""
+    mock_cursor.fetchall.return_value = [(3, "Event 3", 1, 1, 2022, True)]
+
+    _, next_after = get_events_page(2, after=2)
+
+    assert next_after is None
+
+def test_get_events_page_invalid_limit(mock_cursor):
+    """Test that page sizes outside the allowed range are rejected."""
+    with pytest.raises(ValueError, match="Invalid limit"):
+        get_events_page(0)
+    with pytest.raises(ValueError, match="Invalid limit"):
+        get_events_page(100000)
+
+def test_iter_events(mock_cursor):
+    """Test that iter_events walks the table one page at a time."""
+    mock_cursor.fetchall.side_effect = [
+        [(1, "Event 1", 1, 1, 2022, True), (2, "Event 2", 2, 2, 2022, False)],
+        [(4, "Event 4", 4, 4, 2022, False)],
+    ]
+
+    result = [event['id'] for event in iter_events(batch_size=2)]
+
+    assert result == [1, 2, 4]
+    assert [call[0][1] for call in mock_cursor.execute.call_args_list] == [(0, 2), (2, 2)]
+
+######################################################
+#
+#    Caching
+#
+######################################################
+
+def test_get_event_by_id_is_cached(mock_cursor):
+    """Test that a second lookup of the same event is served from cache."""
+    mock_cursor.fetchone.return_value = (1, "Event Name", 1, 1, 2022, True, False)
+
+    first = get_event_by_id(1)
+    second = get_event_by_id(1)
+
+    assert first == second
+    assert mock_cursor.execute.call_count == 1
+    assert calendar_model.get_cache_stats()['events']['hits'] == 1
+
+def test_delete_event_invalidates_cache(mock_cursor):
+    """Test that deleting an event evicts it and the cached event list."""
+    mock_cursor.fetchone.return_value = (1, "Event Name", 1, 1, 2022, True, False)
+    mock_cursor.fetchall.return_value = [(1, "Event Name", 1, 1, 2022, True)]
+    get_event_by_id(1)
+    _, etag = calendar_model.get_events_with_etag()
+
+    mock_cursor.fetchone.return_value = (False,)
+    delete_event(1)
+
+    mock_cursor.fetchone.return_value = (1, "Event Name", 1, 1, 2022, True, True)
+    with pytest.raises(ValueError, match="Event with ID 1 has been deleted"):
+        get_event_by_id(1)
+    mock_cursor.fetchall.return_value = []
+    events, new_etag = calendar_model.get_events_with_etag()
+    assert len(events) == 0
+    assert new_etag != etag
+
+def test_get_events_is_cached_until_write(mock_cursor):
+    """Test that the event list is reused, with the same ETag, until an event is added."""
+    mock_cursor.fetchall.return_value = [(1, "Event 1", 1, 1, 2022, True)]
+
+    _, etag = calendar_model.get_events_with_etag()
+    _, same_etag = calendar_model.get_events_with_etag()
+    assert same_etag == etag
+    assert mock_cursor.fetchall.call_count == 1
+
+    add_event(event_name="Event 2", event_day=2, event_month=2, event_year=2022, is_religious=False)
+    mock_cursor.fetchall.return_value = [(1, "Event 1", 1, 1, 2022, True), (2, "Event 2", 2, 2, 2022, False)]
+    _, new_etag = calendar_model.get_events_with_etag()
+    assert new_etag != etag
+    assert mock_cursor.fetchall.call_count == 2
+
+def test_etag_depends_only_on_events(mock_cursor, monkeypatch):
+    """Test that independent caches holding the same events give the same ETag."""
+    mock_cursor.fetchall.return_value = [(1, "Event 1", 1, 1, 2022, True)]
+    _, etag = calendar_model.get_events_with_etag()
+
+    # A fresh cache, as in another worker process or after a restart
+    monkeypatch.setattr(calendar_model, "_events_snapshot", None)
+    _, other_etag = calendar_model.get_events_with_etag()
+    assert other_etag == etag
+    assert mock_cursor.fetchall.call_count == 2
+
+    monkeypatch.setattr(calendar_model, "_events_snapshot", None)
+    mock_cursor.fetchall.return_value = [(1, "Event 1", 1, 1, 2023, True)]
+    _, changed_etag = calendar_model.get_events_with_etag()
+    assert changed_etag != etag
+
+def test_etag_follows_writes_from_another_connection(events_db):
+    """Test that a write through another connection changes the ETag, even back to the same list."""
+    _, etag = calendar_model.get_events_with_etag()
+
+    with closing(sqlite3.connect(events_db)) as conn:
+        conn.execute("UPDATE events SET event_name = 'Xmas' WHERE id = 1")
+        conn.commit()
+    events, renamed_etag = calendar_model.get_events_with_etag()
+    assert events[0].event_name == "Xmas"
+    assert renamed_etag != etag
+
+    with closing(sqlite3.connect(events_db)) as conn:
+        conn.execute("UPDATE events SET event_name = 'Christmas' WHERE id = 1")
+        conn.commit()
+    events, restored_etag = calendar_model.get_events_with_etag()
+    assert events[0].event_name == "Christmas"
+    assert restored_etag not in (etag, renamed_etag)
+    assert restored_etag.split("-")[1] == etag.split("-")[1]
+
+def test_cache_disabled(mock_cursor, monkeypatch):
+    """Test that every read goes to the database when caching is switched off."""
+    monkeypatch.setattr(calendar_model, "EVENT_CACHE_ENABLED", False)
+    mock_cursor.fetchall.return_value = [(1, "Event 1", 1, 1, 2022, True)]
+
+    get_events()
+    _, etag = calendar_model.get_events_with_etag()
+
+    assert etag is None
+    assert mock_cursor.fetchall.call_count == 2
+
+def test_caches_see_writes_from_other_processes(events_db):
+    """Test that a commit made outside this process drops every cache before it is used."""
+    assert get_event_by_id(1).event_name == "Christmas"
+    assert [event['event_name'] for event in calendar_model.autocomplete_events("chr")] == ["Christmas"]
+    assert len(calendar_model.get_events_in_month(2024, 12)) == 1
+    _, etag = calendar_model.get_events_with_etag()
+
+    # Another worker deletes an event
+    with closing(sqlite3.connect(events_db)) as conn:
+        conn.execute("UPDATE events SET deleted = TRUE WHERE id = 1")
+        conn.commit()
+
+    with pytest.raises(ValueError, match="has been deleted"):
+        get_event_by_id(1)
+    assert calendar_model.autocomplete_events("chr") == []
+    assert calendar_model.get_events_in_month(2024, 12) == []
+    events, new_etag = calendar_model.get_events_with_etag()
+    assert len(events) == 4 and new_etag != etag
+
+def test_own_writes_keep_the_caches(events_db):
+    """Test that writes made by this process are patched into the caches rather than dropping them."""
+    get_event_by_id(2)
+    calendar_model.get_upcoming_events(date(2024, 1, 1), 1)
+    index = calendar_model._indexes['upcoming'][1]
+
+    add_event(event_name="Epiphany", event_day=6, event_month=1, event_year=2024, is_religious=True)
+    update_event_date(1, 2, 1, 2024)
+
+    assert [event['event_name'] for event in calendar_model.get_upcoming_events(date(2024, 1, 2), 2)] == ["Christmas", "Epiphany"]
+    assert calendar_model._indexes['upcoming'][1] is index
+    assert get_event_by_id(2).event_name == "New Year"
+    assert calendar_model.get_cache_stats()['events']['hits'] == 1
+
+######################################################
+#
+#    Batch lookups
+#
+######################################################
+
+def test_get_events_by_ids_in_chunks(events_db, monkeypatch):
+    """Test that a batch spanning several IN (...) queries reports every ID in request order."""
+    monkeypatch.setattr(calendar_model, "ID_QUERY_CHUNK_SIZE", 2)
+    delete_event(3)
+
+    entries = calendar_model.get_events_by_ids([5, 1, 3, 42, 1, 2])
+
+    assert [(entry['id'], entry['status']) for entry in entries] == [
+        (5, 'found'), (1, 'found'), (3, 'deleted'), (42, 'not_found'), (1, 'found'), (2, 'found')]
+    assert entries[0]['event'] == Event(5, "Leap Day", 29, 2, 2024, False).to_dict()
+    assert entries[2]['event'] is None
+    # Found events are cached for get_event_by_id
+    assert calendar_model._event_cache.get(2) == Event(2, "New Year", 1, 1, 2025, False)
+
+def test_get_events_by_ids_invalid(events_db, monkeypatch):
+    monkeypatch.setattr(calendar_model, "MAX_BATCH_SIZE", 3)
+
+    with pytest.raises(ValueError, match="Too many IDs"):
+        calendar_model.get_events_by_ids([1, 2, 3, 4])
+    with pytest.raises(ValueError, match="Invalid ID"):
+        calendar_model.get_events_by_ids([1, "2"])
+
+######################################################
+#
+#    Date distances
+#
+######################################################
+
+def test_get_event_distances(events_db):
+    """Test that distances are signed day counts and invalid dates are skipped."""
+    ids, days = calendar_model.get_event_distances(date(2024, 1, 1))
+
+    assert ids.tolist() == [1, 2, 4, 5]
+    assert days.tolist() == [359, 366, -8766, 59]
+
+def test_get_nearest_upcoming_events(events_db):
+    """Test that the k nearest future events are returned in date order."""
+    events = calendar_model.get_nearest_upcoming_events(date(2024, 3, 1), 2)
+
+    assert [(event['event_name'], event['days_until']) for event in events] == [("Christmas", 299), ("New Year", 306)]
+
+def test_get_distance_matrix(events_db):
+    ids, matrix = calendar_model.get_distance_matrix([1, 2, 5])
+
+    assert ids.tolist() == [1, 2, 5]
+    assert matrix.tolist() == [[0, 7, -300], [-7, 0, -307], [300, 307, 0]]
+
+def test_get_distance_matrix_too_large(events_db, monkeypatch):
+    monkeypatch.setattr(calendar_model, "MAX_DISTANCE_MATRIX_SIZE", 2)
+
+    with pytest.raises(ValueError, match="Too many events"):
+        calendar_model.get_distance_matrix()
+
+def test_distances_refresh_after_delete(events_db):
+    """Test that the cached date arrays are rebuilt after an event is deleted."""
+    calendar_model.get_event_distances(date(2024, 1, 1))
+    delete_event(1)
+
+    ids, _ = calendar_model.get_event_distances(date(2024, 1, 1))
+
+    assert ids.tolist() == [2, 4, 5]
+
+######################################################
+#
+#    Upcoming events
+#
+######################################################
+
+def test_get_upcoming_events(events_db):
+    """Test that upcoming events treat every event as recurring yearly."""
+    events = calendar_model.get_upcoming_events(date(2030, 12, 1), 2)
+
+    assert [(event['date'], event['event_name']) for event in events] == [("2030-12-25", "Christmas"), ("2031-01-01", "New Year")]
+
+def test_upcoming_index_follows_writes(events_db):
+    """Test that adds, deletes and date updates are applied to the built index."""
+    calendar_model.get_upcoming_events(date(2024, 1, 1), 1)
+
+    add_event(event_name="Epiphany", event_day=6, event_month=1, event_year=2024, is_religious=True)
+    delete_event(2)
+    update_event_date(1, 2, 1, 2024)
+
+    events = calendar_model.get_events_in_month(2024, 1)
+    assert [(event['date'], event['event_name']) for event in events] == [
+        ("2024-01-01", "Millennium"), ("2024-01-02", "Christmas"), ("2024-01-06", "Epiphany")]
+
+######################################################
+#
+#    Recurring events
+#
+######################################################
+
+def test_recurring_events_are_expanded_in_range(events_db):
+    add_event(event_name="Thanksgiving", event_day=1, event_month=11, event_year=2020, is_religious=False,
+              recurrence=RecurrenceRule.from_dict({"frequency": "nth_weekday", "weekday": 3, "nth": 4}))
+    add_event(event_name="Easter", event_day=1, event_month=1, event_year=2024, is_religious=True,
+              recurrence=RecurrenceRule.from_dict({"frequency": "easter"}))
+
+    events = calendar_model.get_occurrences(date(2024, 3, 1), date(2025, 4, 30))
+
+    assert [(event['date'], event['event_name']) for event in events] == [
+        ("2024-03-31", "Easter"), ("2024-11-28", "Thanksgiving"), ("2024-12-25", "Christmas"),
+        ("2025-01-01", "New Year"), ("2025-04-20", "Easter")]
+    assert events[0]['recurrence'] == {'frequency': 'easter', 'interval': 1, 'easter_offset': 0}
+
+def test_occurrences_are_lazy_and_memoized_per_year(events_db, monkeypatch):
+    add_event(event_name="Payday", event_day=31, event_month=1, event_year=1990, is_religious=False,
+              recurrence=RecurrenceRule.from_dict({"frequency": "monthly"}))
+    expanded = []
+    occurrences_in_year = calendar_model._occurrences_in_year
+    monkeypatch.setattr(calendar_model, "_occurrences_in_year",
+                        lambda year: expanded.append(year) or occurrences_in_year(year))
+
+    first = next(calendar_model.iter_occurrences(date(1990, 1, 1), date(2089, 12, 31)))
+    calendar_model.get_occurrences(date(1990, 2, 1), date(1990, 3, 31))
+
+    assert first[0] == date(1990, 1, 31)
+    assert expanded == [1990, 1990]
+    assert calendar_model._occurrence_years.stats()['hits'] == 1
+
+def test_set_event_recurrence_applies_to_later_queries(events_db):
+    calendar_model.get_occurrences(date(2026, 1, 1), date(2026, 12, 31))
+
+    calendar_model.set_event_recurrence(1, RecurrenceRule.from_dict({"frequency": "yearly", "until": "2026-12-31"}))
+    assert [event['event_name'] for event in calendar_model.get_occurrences(date(2026, 1, 1), date(2027, 12, 31))] == ["Christmas"]
+
+    calendar_model.set_event_recurrence(1, None)
+    assert calendar_model.get_occurrences(date(2026, 1, 1), date(2026, 12, 31)) == []
+    with pytest.raises(ValueError, match="must start on a real date"):
+        calendar_model.set_event_recurrence(3, RecurrenceRule.from_dict({"frequency": "yearly"}))
+
+######################################################
+#
+#    Search
+#
+######################################################
+
+def test_search_events_ranks_prefix_matches(events_db):
+    add_event(event_name="Christmas Eve", event_day=24, event_month=12, event_year=2024, is_religious=True)
+    add_event(event_name="Orthodox Christmas Day Celebrations", event_day=7, event_month=1, event_year=2025, is_religious=True)
+    add_event(event_name="Christmas Market Opening", event_day=20, event_month=11, event_year=2024, is_religious=False)
+
+    events = calendar_model.search_events("christ")
+
+    assert [event['event_name'] for event in events][0] == "Christmas"
+    assert len(events) == 4
+    assert events[0]['score'] >= events[-1]['score']
+    assert [event['event_name'] for event in calendar_model.search_events("christ", is_religious=False)] == [
+        "Christmas Market Opening"]
+
+def test_search_index_follows_deletes_and_renames(events_db):
+    delete_event(1)
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("UPDATE events SET event_name = 'New Year''s Day' WHERE id = 2")
+        conn.commit()
+
+    assert calendar_model.search_events("christmas") == []
+    # The shorter name ranks higher
+    assert [event['id'] for event in calendar_model.search_events("DAY")] == [5, 2]
+
+def test_search_falls_back_to_prefix_index_without_fts(events_db):
+    with sql_utils.get_db_connection() as conn:
+        conn.executescript("DROP TABLE events_fts;")
+
+    events = calendar_model.search_events("mill")
+
+    assert [(event['event_name'], event['score']) for event in events] == [("Millennium", None)]
+
+def test_autocomplete_follows_writes(events_db):
+    assert calendar_model.autocomplete_events("n") == [calendar_model._row_to_dict((2, "New Year", 1, 1, 2025, 0)),
+                                                      calendar_model._row_to_dict((3, "Not A Date", 30, 2, 2024, 0))]
+
+    add_event(event_name="New Moon", event_day=3, event_month=3, event_year=2025, is_religious=False)
+    delete_event(2)
+
+    assert [event['event_name'] for event in calendar_model.autocomplete_events("ne")] == ["New Moon"]
+    with pytest.raises(ValueError, match="must not be empty"):
+        calendar_model.autocomplete_events("  ")
+
+######################################################
+#
+#    Event representation
+#
+######################################################
+
+def test_event_is_slotted_and_immutable():
+    event = Event(1, "Christmas", 25, 12, 2024, True)
+
+    assert not hasattr(event, "__dict__")
+    with pytest.raises(AttributeError):
+        event.event_name = "Boxing Day"
+
+def test_event_columns(mock_cursor):
+    """Test that get_events_with_etag returns columns that serialize both ways."""
+    mock_cursor.fetchall.return_value = [
+        (1, "Christmas", 25, 12, 2024, True),
+        (2, "New Year", 1, 1, 2025, False),
+    ]
+
+    columns, _ = calendar_model.get_events_with_etag()
+
+    assert isinstance(columns, EventColumns)
+    assert len(columns) == 2
+    assert columns[1] == Event(2, "New Year", 1, 1, 2025, False)
+    assert list(columns) == get_events()
+    assert json.loads(columns.to_json()) == [event.to_dict() for event in columns]
+    assert json.loads(columns.to_json('columns')) == {
+        'id': [1, 2],
+        'event_name': ["Christmas", "New Year"],
+        'event_day': [25, 1],
+        'event_month': [12, 1],
+        'event_year': [2024, 2025],
+        'is_religious': [True, False],
+    }
+    with pytest.raises(ValueError, match="Invalid orient"):
+        columns.to_json('rows')
+
+def test_event_row_factory(events_db):
+    """Test that the row factory builds Events straight from the cursor."""
+    conn = sqlite3.connect(events_db)
+    cursor = conn.cursor()
+    cursor.row_factory = calendar_model.event_row_factory
+    cursor.execute("SELECT id, event_name, event_day, event_month, event_year, is_religious FROM events WHERE id = 1")
+
+    assert cursor.fetchone() == Event(1, "Christmas", 25, 12, 2024, True)
+    conn.close()
+
 def test_update_event(mock_cursor):
     # Simulate that the event exists (id = 1)
     mock_cursor.fetchall.return_value = [
@@ -212,3 +736,123 @@ def test_update_event(mock_cursor):
 
     # Ensure the correct SQL query was executed
     assert actual_update_sql == expected_update_sql, "The UPDATE query did not match the expected structure."
+
+def test_update_event_invalid_date(mock_cursor):
+    """Test that an invalid date is rejected before anything is written."""
+    with pytest.raises(ValueError, match="Invalid day: 0"):
+        update_event_date(1, 0, 2, 2023)
+    with pytest.raises(ValueError, match="Invalid month: -1"):
+        update_event_date(1, 2, -1, 2023)
+
+    mock_cursor.execute.assert_not_called()
+
+def test_concurrent_writes_are_group_committed(events_db, monkeypatch):
+    """Test that concurrent add_event calls all succeed and share commits."""
+    monkeypatch.setattr(calendar_model, "_write_queue", WriteQueue(lambda: sql_utils.get_db_connection(), max_delay=0.05))
+
+    threads = [
+        threading.Thread(target=add_event, kwargs={'event_name': f"Event {i}", 'event_day': 1, 'event_month': 1,
+                                                   'event_year': 2030, 'is_religious': False})
+        for i in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(get_events()) == 25
+    stats = calendar_model.get_write_stats()
+    assert stats['operations'] == 20
+    assert stats['batches'] < 20
+    calendar_model._write_queue.close()
+
+######################################################
+#
+#    Change feed
+#
+######################################################
+
+def test_changes_follow_writes(events_db):
+    start = calendar_model.get_changes(0, limit=3)
+    assert [(change['id'], change['operation']) for change in start['changes']] == [(1, 'insert'), (2, 'insert'), (3, 'insert')]
+    assert start['has_more']
+    version = calendar_model.get_changes(start['version'], limit=10)['version']
+
+    add_event(6, 1, 2025, "Epiphany", True)
+    update_event_date(2, 2, 1, 2025)
+    delete_event(1)
+    changes = calendar_model.get_changes(version)
+
+    assert [(change['id'], change['operation']) for change in changes['changes']] == [
+        (6, 'insert'), (2, 'update'), (1, 'delete')]
+    assert changes['changes'][1]['event']['event_day'] == 2
+    assert changes['changes'][2]['event'] is None
+    assert changes['version'] == changes['changes'][-1]['version'] and not changes['has_more']
+    assert calendar_model.get_changes(changes['version']) == {'changes': [], 'version': changes['version'], 'has_more': False}
+
+def test_changes_long_poll_wakes_on_write(events_db, monkeypatch):
+    """Test that a waiting call returns as soon as this process writes, not at the next poll."""
+    monkeypatch.setattr(calendar_model, "CHANGES_POLL_INTERVAL", 30)
+    version = calendar_model.get_changes(0, limit=1000)['version']
+    writer = threading.Timer(0.1, add_event, (6, 1, 2025, "Epiphany", True))
+    writer.start()
+
+    started = time.monotonic()
+    changes = calendar_model.get_changes(version, wait=10)
+    writer.join()
+
+    assert [change['event']['event_name'] for change in changes['changes']] == ["Epiphany"]
+    assert time.monotonic() - started < 5
+    assert calendar_model.get_changes(changes['version'], wait=0.05)['changes'] == []
+    with pytest.raises(ValueError, match="Invalid wait"):
+        calendar_model.get_changes(0, wait=calendar_model.MAX_CHANGES_WAIT + 1)
+
+######################################################
+#
+#    Read replica
+#
+######################################################
+
+def test_reads_from_replica_see_own_writes(events_db, monkeypatch):
+    """Test that reads served from the in-memory replica see every write made through this module."""
+    monkeypatch.setattr(sql_utils, "READ_REPLICA_ENABLED", True)
+    monkeypatch.setattr(sql_utils, "READ_REPLICA_MAX_STALENESS", 60)
+    try:
+        assert len(get_events()) == 5
+        add_event(4, 7, 2025, "Independence Day", False)
+        id = 6
+        assert get_event_by_id(id).event_name == "Independence Day"
+        update_event_date(id, 5, 7, 2025)
+        assert [event['id'] for event in get_events_between(date(2025, 7, 5), date(2025, 7, 5))] == [id]
+        delete_event(id)
+        assert len(get_events()) == 5
+        stats = sql_utils.get_replica().stats()
+        assert stats['copies'] == 1 and stats['replays'] >= 3
+    finally:
+        sql_utils.close_replica()
+
+def test_replica_picks_up_writes_from_other_processes(events_db, monkeypatch):
+    """Test that a write made by another process is read within READ_REPLICA_MAX_STALENESS."""
+    monkeypatch.setattr(sql_utils, "READ_REPLICA_ENABLED", True)
+    monkeypatch.setattr(sql_utils, "READ_REPLICA_MAX_STALENESS", 0.2)
+    monkeypatch.setattr(calendar_model, "EVENT_CACHE_ENABLED", False)
+    try:
+        assert len(get_events()) == 5
+
+        pid = os.fork()
+        if pid == 0:
+            conn = sqlite3.connect(events_db)
+            conn.execute("UPDATE events SET event_name = 'Christmas Day' WHERE id = 1")
+            conn.commit()
+            conn.close()
+            os._exit(0)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+
+        time.sleep(0.2)
+        assert get_event_by_id(1).event_name == "Christmas Day"
+        assert [event['event_name'] for event in calendar_model.search_events("day")] == ["Christmas Day", "Leap Day"]
+        assert sql_utils.get_replica().stats()['copies'] == 1
+    finally:
+        sql_utils.close_replica()
+
@@ -0,0 +1,189 @@
+import asyncio
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import aiohttp
+import pytest
+
+from event_tracker.models import holiday_model
+from event_tracker.utils import sql_utils
+from event_tracker.utils.rate_limit import TokenBucket
+
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), "..", "sql")
+
+HOLIDAYS_2024 = [
+    {"date": "2024-01-01", "localName": "New Year's Day", "name": "New Year's Day", "countryCode": "US"},
+    {"date": "2024-07-04", "localName": "Independence Day", "name": "Independence Day", "countryCode": "US"},
+    {"date": "2024-12-25", "localName": "Christmas Day", "name": "Christmas Day", "countryCode": "US"},
+]
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+class StubHolidayAPI(BaseHTTPRequestHandler):
+    """Serves /{year}/{country} like the public holiday API and counts requests."""
+    requests = []
+    delay = 0.0
+
+    def do_GET(self):
+        type(self).requests.append(self.path)
+        time.sleep(type(self).delay)
+        body = json.dumps(HOLIDAYS_2024).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    StubHolidayAPI.requests = []
+    StubHolidayAPI.delay = 0.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHolidayAPI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(holiday_model, "HOLIDAY_API_URL", f"http://127.0.0.1:{server.server_port}")
+    yield StubHolidayAPI
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture(autouse=True)
+def holiday_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "events.db")
+    conn = sqlite3.connect(path)
+    with open(os.path.join(SQL_DIR, "create_event_table.sql")) as f:
+        conn.executescript(f.read())
+    conn.close()
+    monkeypatch.setattr(sql_utils, "DB_PATH", path)
+    monkeypatch.setattr(holiday_model, "_rate_limiter", TokenBucket(100, 100))
+    holiday_model.clear_holiday_cache()
+    yield path
+    holiday_model.clear_holiday_cache()
+    sql_utils.close_pool()
+
+######################################################
+#
+#    Lookups
+#
+######################################################
+
+def test_is_holiday_fetches_year_once(stub_api):
+    """Test that a whole year is fetched once and then answered from memory."""
+    assert holiday_model.is_holiday(date(2024, 12, 25), "US")
+    assert not holiday_model.is_holiday(date(2024, 12, 24), "US")
+    assert holiday_model.get_holiday_names(date(2024, 7, 4), "us") == ["Independence Day"]
+
+    assert stub_api.requests == ["/2024/US"]
+    assert holiday_model.get_holiday_year(2024, "US").source == "api"
+
+def test_concurrent_misses_share_one_fetch(stub_api):
+    """Test that threads missing on the same year wait for a single request."""
+    stub_api.delay = 0.2
+    results = []
+
+    def check():
+        results.append(holiday_model.is_holiday(date(2024, 1, 1), "US"))
+
+    threads = [threading.Thread(target=check) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 8
+    assert len(stub_api.requests) == 1
+
+def test_holidays_are_persisted(stub_api):
+    """Test that a fetched year is reused from the holiday_cache table after a restart."""
+    holiday_model.is_holiday(date(2024, 1, 1), "US")
+    holiday_model.clear_holiday_cache()
+
+    holiday_year = holiday_model.get_holiday_year(2024, "US")
+
+    assert holiday_year.source == "cache"
+    assert date(2024, 7, 4) in holiday_year.holidays
+    assert len(stub_api.requests) == 1
+
+def test_fallback_when_api_unreachable(monkeypatch):
+    """Test that the rule-based calendar answers when the API is down."""
+    monkeypatch.setattr(holiday_model, "HOLIDAY_API_URL", "http://127.0.0.1:9")
+
+    holiday_year = holiday_model.get_holiday_year(2024, "US")
+
+    assert holiday_year.source == "rules"
+    assert holiday_model.is_holiday(date(2024, 11, 28), "US")  # Thanksgiving
+    assert holiday_model.is_holiday(date(2024, 5, 27), "US")  # Memorial Day
+    assert holiday_year.holidays[date(2024, 9, 2)] == ["Labor Day"]
+    assert not holiday_model.is_holiday(date(2024, 11, 29), "US")
+
+def test_stale_cache_preferred_over_rules(stub_api, monkeypatch):
+    """Test that an expired cached year is used when the API is down."""
+    holiday_model.is_holiday(date(2024, 1, 1), "US")
+    holiday_model.clear_holiday_cache()
+    monkeypatch.setattr(holiday_model, "HOLIDAY_CACHE_TTL", 0)
+    monkeypatch.setattr(holiday_model, "HOLIDAY_API_URL", "http://127.0.0.1:9")
+
+    holiday_year = holiday_model.get_holiday_year(2024, "US")
+
+    assert holiday_year.source == "stale-cache"
+    assert holiday_year.holidays[date(2024, 7, 4)] == ["Independence Day"]
+
+def test_rate_limited_requests_fall_back(stub_api, monkeypatch):
+    """Test that the API is not called once the rate limit is exhausted."""
+    monkeypatch.setattr(holiday_model, "_rate_limiter", TokenBucket(0.001, 1))
+
+    assert holiday_model.get_holiday_year(2024, "US").source == "api"
+    assert holiday_model.get_holiday_year(2025, "US").source == "rules"
+    assert len(stub_api.requests) == 1
+
+@pytest.mark.parametrize("year, country", [
+    (2024, "../admin"),
+    (2024, "USA"),
+    (2024, "U1"),
+    (2024, ""),
+    (1, "US"),
+    (9999, "US"),
+])
+def test_invalid_lookups_rejected(stub_api, year, country):
+    """Test that bad country codes and out-of-range years never reach the API."""
+    with pytest.raises(ValueError):
+        holiday_model.get_holiday_year(year, country)
+
+    assert stub_api.requests == []
+
+def test_memory_cache_is_bounded(stub_api, monkeypatch):
+    """Test that only HOLIDAY_MEMORY_SIZE years are kept in memory."""
+    monkeypatch.setattr(holiday_model, "_calendars", holiday_model.LRUCache(2, holiday_model.HOLIDAY_CACHE_TTL))
+
+    for year in (2022, 2023, 2024):
+        holiday_model.get_holiday_year(year, "US")
+
+    assert holiday_model._calendars.stats()["size"] == 2
+    assert holiday_model.get_holiday_year(2022, "US").source == "cache"
+
+def test_async_lookup_shares_caches(stub_api):
+    """Test that the async lookup fetches through the API once and then uses memory."""
+    async def lookup():
+        async with aiohttp.ClientSession() as session:
+            first = await holiday_model.get_holiday_year_async(session, 2024, "us")
+            second = await holiday_model.get_holiday_year_async(session, 2024, "US")
+        return first, second
+
+    first, second = asyncio.run(lookup())
+
+    assert first.source == "api"
+    assert second is first
+    assert holiday_model.is_holiday(date(2024, 7, 4), "US")
+    assert stub_api.requests == ["/2024/US"]
@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.bench_import_time import BUDGETS, import_subtree, LAZY_PACKAGES, parse_importtime, profile_import
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+REPORT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 | _io
+import time:       300 |        300 |     numpy.core
+import time:      1000 |       1300 |   numpy
+import time:       200 |       1500 | event_tracker.models.calendar_model
+"""
+
+
+def run_python(code, unset=()):
+    """Runs code in a fresh interpreter and returns what it printed as JSON."""
+    env = {name: value for name, value in os.environ.items() if name not in unset}
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+######################################################
+#
+#    Import time report
+#
+######################################################
+
+def test_parse_importtime_and_subtree():
+    entries = parse_importtime(REPORT)
+
+    assert [entry['module'] for entry in entries] == ["_io", "numpy.core", "numpy", "event_tracker.models.calendar_model"]
+    assert entries[1]['depth'] == 2
+    assert entries[2]['self_us'] == 1000
+
+    subtree = import_subtree(entries, "event_tracker.models.calendar_model")
+    assert [entry['module'] for entry in subtree] == ["numpy.core", "numpy", "event_tracker.models.calendar_model"]
+    assert subtree[-1]['cumulative_us'] == 1500
+
+######################################################
+#
+#    Lazy imports
+#
+######################################################
+
+def test_model_and_utils_layers_load_no_optional_packages():
+    """Test that importing the models starts no thread and loads no web framework, HTTP client or NumPy."""
+    loaded = run_python(
+        "import json, sys, threading\n"
+        "from event_tracker.models import archive_model, calendar_model, holiday_model\n"
+        "from event_tracker.utils import async_utils, migrations, recurrence, server\n"
+        "print(json.dumps({'modules': sorted({name.partition('.')[0] for name in sys.modules}),"
+        " 'threads': threading.active_count()}))"
+    )
+
+    heavy = set(LAZY_PACKAGES) - {'werkzeug', 'dotenv'}  # the pre-fork server is built on both
+    assert heavy.isdisjoint(loaded['modules'])
+    assert loaded['threads'] == 1
+
+def test_importing_app_does_not_load_env_file():
+    env = run_python("import json, os, app\nprint(json.dumps(os.getenv('DB_PATH')))", unset=("DB_PATH",))
+
+    assert env is None
+
+@pytest.mark.parametrize("module", [module for module in BUDGETS if module.startswith("event_tracker.")])
+def test_profiled_modules_import_no_lazy_package(module):
+    """Test the benchmark's lazy import check; its time budgets are only enforced by the benchmark."""
+    subtree = import_subtree(profile_import(module), module)
+
+    loaded = {entry['module'].partition('.')[0] for entry in subtree}
+    assert loaded.isdisjoint(LAZY_PACKAGES)
@@ -0,0 +1,82 @@
+import io
+
+import pytest
+
+from event_tracker.utils import import_utils
+from event_tracker.utils.import_utils import iter_csv, iter_json_array, iter_ndjson, spool
+
+
+######################################################
+#
+#    JSON arrays
+#
+######################################################
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_iter_json_array(chunk_size):
+    """Test that array elements are decoded regardless of where chunks split them."""
+    body = '[{"event_name": "Día de Reyes", "event_day": 6}, 12345, [1, 2], "x"]'.encode()
+
+    result = list(iter_json_array(io.BytesIO(body), chunk_size=chunk_size))
+
+    assert result == [{"event_name": "Día de Reyes", "event_day": 6}, 12345, [1, 2], "x"]
+
+def test_iter_json_array_empty():
+    assert list(iter_json_array(io.BytesIO(b" [ ] "))) == []
+
+def test_iter_json_array_is_lazy():
+    """Test that elements are yielded before the rest of the body is read."""
+    body = io.BytesIO(b'[{"a": 1}, ' + b' ' * 100000 + b'{"a": 2}]')
+    records = iter_json_array(body, chunk_size=16)
+
+    assert next(records) == {"a": 1}
+    assert body.tell() < 100
+
+@pytest.mark.parametrize("body, message", [
+    (b'{"a": 1}', "Expected a JSON array"),
+    (b'[1 2]', "Expected ',' or ']'"),
+    (b'[{"a": 1},', "Invalid JSON"),
+    (b'[1] [2]', "Unexpected data"),
+])
+def test_iter_json_array_malformed(body, message):
+    with pytest.raises(ValueError, match=message):
+        list(iter_json_array(io.BytesIO(body), chunk_size=4))
+
+######################################################
+#
+#    NDJSON and CSV
+#
+######################################################
+
+def test_iter_ndjson():
+    body = io.BytesIO(b'{"event_name": "Easter"}\n\n{"event_name": "Diwali"}\n')
+
+    assert list(iter_ndjson(body)) == [{"event_name": "Easter"}, {"event_name": "Diwali"}]
+
+def test_iter_ndjson_malformed():
+    with pytest.raises(ValueError, match="line 2"):
+        list(iter_ndjson(io.BytesIO(b'{"event_name": "Easter"}\n{oops}\n')))
+
+def test_iter_csv():
+    body = io.BytesIO(b"event_name,event_day,is_religious\nEaster,4,true\n\"New Year, Eve\",31,false\n")
+
+    assert list(iter_csv(body)) == [
+        {"event_name": "Easter", "event_day": "4", "is_religious": "true"},
+        {"event_name": "New Year, Eve", "event_day": "31", "is_religious": "false"},
+    ]
+
+######################################################
+#
+#    Spooling
+#
+######################################################
+
+def test_spool_reads_body_before_parsing(monkeypatch):
+    """Test that the whole body is buffered, on disk past BULK_SPOOL_SIZE, and rewound."""
+    monkeypatch.setattr(import_utils, "BULK_SPOOL_SIZE", 10)
+    source = io.BytesIO(b'{"event_name": "A"}\n{"event_name": "B"}\n')
+
+    with spool(source, chunk_size=8) as body:
+        assert source.read() == b""
+        assert not isinstance(body, io.BytesIO)
+        assert [record["event_name"] for record in iter_ndjson(body)] == ["A", "B"]
@@ -0,0 +1,91 @@
+import json
+import logging
+import os
+
+from event_tracker.utils import logger as log_config
+from event_tracker.utils.logger import configure_logger, flush_logs, JsonFormatter, SamplingFilter
+
+
+def make_record(msg, *args, level=logging.INFO, name="event_tracker.test"):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+######################################################
+#
+#    Configuration
+#
+######################################################
+
+def test_configure_logger_is_idempotent():
+    logger = logging.getLogger("event_tracker.test_idempotent")
+
+    for _ in range(3):
+        configure_logger(logger)
+
+    assert logger.handlers.count(log_config._handler) == 1
+
+def test_level_for_uses_nearest_configured_package(monkeypatch):
+    monkeypatch.setattr(log_config, "_levels", log_config._parse_levels("event_tracker.utils=DEBUG, app=warning"))
+    monkeypatch.setattr(log_config, "LOG_LEVEL", "INFO")
+
+    assert log_config.level_for("event_tracker.utils.sql_utils") == "DEBUG"
+    assert log_config.level_for("app") == "WARNING"
+    assert log_config.level_for("event_tracker.models.calendar_model") == "INFO"
+
+def test_records_are_written_by_the_listener(tmp_path, monkeypatch):
+    output = logging.FileHandler(tmp_path / "out.log")
+    output.setFormatter(JsonFormatter())
+    monkeypatch.setattr(log_config._listener, "handlers", (output,))
+    logger = logging.getLogger("event_tracker.test_listener")
+    configure_logger(logger)
+
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Failed on %s", "Christmas")
+    flush_logs()
+    output.close()
+
+    entry = json.loads((tmp_path / "out.log").read_text())
+    assert entry["message"] == "Failed on Christmas"
+    assert entry["level"] == "ERROR"
+    assert "ValueError: boom" in entry["exception"]
+
+def test_logs_from_forked_child_are_flushed(tmp_path):
+    """Test that a child exiting with os._exit() still writes what it logged."""
+    path = tmp_path / "child.log"
+    pid = os.fork()
+    if pid == 0:
+        with open(path, "w") as f:
+            log_config._listener.handlers = (logging.StreamHandler(f),)
+            logger = logging.getLogger("event_tracker.test_fork")
+            configure_logger(logger)
+            logger.warning("from child %d", os.getpid())
+            flush_logs()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert path.read_text() == f"from child {pid}\n"
+
+######################################################
+#
+#    Sampling
+#
+######################################################
+
+def test_sampling_drops_repeats_and_reports_them(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(log_config.time, "monotonic", lambda: now[0])
+    sampling = SamplingFilter(burst=2, window=1)
+
+    passed = [sampling.filter(make_record("Retrieved %d events", i)) for i in range(5)]
+    now[0] = 1.5
+    record = make_record("Retrieved %d events", 5)
+
+    assert passed == [True, True, False, False, False]
+    assert sampling.filter(record)
+    assert record.suppressed == 3
+
+def test_sampling_never_drops_warnings():
+    sampling = SamplingFilter(burst=1, window=60)
+
+    assert all(sampling.filter(make_record("Disk full", level=logging.WARNING)) for _ in range(5))
@@ -0,0 +1,152 @@
+import json
+import os
+import sqlite3
+import subprocess
+
+import pytest
+
+from event_tracker.utils import metrics
+from event_tracker.utils.metrics import InstrumentedConnection, MetricsRegistry, timed
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+@pytest.fixture(autouse=True)
+def reset_global_registry():
+    metrics.REGISTRY.reset()
+    yield
+    metrics.REGISTRY.reset()
+
+######################################################
+#
+#    Registry
+#
+######################################################
+
+def test_histogram_renders_cumulative_buckets(registry):
+    histogram = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1.0"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 5.55',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+def test_counter_and_label_escaping(registry):
+    counter = registry.counter("errors_total", "Errors.", ("message",))
+
+    counter.inc('say "hi"\n')
+    counter.inc('say "hi"\n', amount=2)
+
+    assert 'errors_total{message="say \\"hi\\"\\n"} 3' in registry.render()
+
+def test_metric_names_keep_their_type(registry):
+    registry.counter("requests", "Requests.")
+
+    assert registry.counter("requests", "Requests.") is registry.counter("requests", "Requests.")
+    with pytest.raises(ValueError, match="already registered"):
+        registry.histogram("requests", "Requests.")
+
+def test_collectors_are_read_at_render_time(registry):
+    depth = [3]
+    registry.register_collector(lambda: [("queue_depth", "gauge", "Queue depth.", {}, depth[0])])
+
+    depth[0] = 7
+
+    assert "queue_depth 7" in registry.render().splitlines()
+
+######################################################
+#
+#    Instrumentation
+#
+######################################################
+
+def test_timed_records_calls_and_errors():
+    @timed
+    def fail():
+        raise ValueError("nope")
+
+    with pytest.raises(ValueError):
+        fail()
+
+    assert metrics._function_seconds.count("test_metrics.fail") == 1
+    assert metrics._function_errors.value("test_metrics.fail") == 1
+
+def test_instrumented_connection_times_statements():
+    conn = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY)")
+    conn.executemany("INSERT INTO events VALUES (?)", [(1,), (2,)])
+    conn.cursor().execute("SELECT * FROM events").fetchall()
+    with pytest.raises(sqlite3.Error):
+        conn.execute("SELECT * FROM missing")
+    conn.close()
+
+    assert metrics._query_seconds.count("INSERT") == 1
+    assert metrics._query_seconds.count("SELECT") == 2
+    assert metrics._query_errors.value("SELECT") == 1
+
+def test_metrics_route(tmp_path, monkeypatch):
+    """Test that /api/metrics reports request latency by route pattern."""
+    from app import create_app
+    from event_tracker.utils import sql_utils
+
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "events.db"))
+    client = create_app().test_client()
+    client.get("/api/health")
+    client.get("/api/db-check")
+
+    response = client.get("/api/metrics")
+
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/health",status="200"} 1' in body
+    assert 'sql_query_duration_seconds_count{statement="SELECT"}' in body
+    assert "db_pool_connections" in body
+    sql_utils.close_pool()
+
+######################################################
+#
+#    Several processes
+#
+######################################################
+
+def test_render_shared_adds_up_processes(tmp_path, monkeypatch):
+    """Test that counters and histograms are summed over processes, and live samples kept per pid."""
+    metrics._function_errors.inc("calendar_model.add_event")
+    metrics._function_seconds.observe(0.002, "calendar_model.add_event")
+    collector = lambda: [("test_pool_size", "gauge", "Pool size.", {}, 3)]
+    monkeypatch.setattr(metrics.REGISTRY, "_collectors", metrics.REGISTRY._collectors + [collector])
+
+    # Another worker, still running, and one that has exited
+    other = metrics.REGISTRY.snapshot()
+    with open(tmp_path / f"{os.getppid()}.json", "w") as f:
+        json.dump(other, f)
+    exited = subprocess.Popen(["true"])
+    exited.wait()
+    with open(tmp_path / f"{exited.pid}.json", "w") as f:
+        json.dump(other, f)
+
+    body = metrics.render_shared(str(tmp_path))
+
+    assert 'model_function_errors_total{function="calendar_model.add_event"} 3' in body
+    assert 'model_function_duration_seconds_count{function="calendar_model.add_event"} 3' in body
+    assert f'test_pool_size{{pid="{os.getpid()}"}} 3' in body
+    assert f'test_pool_size{{pid="{os.getppid()}"}} 3' in body
+    assert f'pid="{exited.pid}"' not in body
+    assert (tmp_path / f"{os.getpid()}.json").exists()
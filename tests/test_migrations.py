@@ -0,0 +1,96 @@
+import os
+import sqlite3
+
+import pytest
+
+from event_tracker.utils.migrations import apply_migrations, get_schema_version, list_migrations
+
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), "..", "sql")
+
+# The events table as it was created before migrations existed
+LEGACY_SCHEMA = """
+CREATE TABLE events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_name TEXT NOT NULL UNIQUE,
+    event_day INTEGER NOT NULL,
+    event_month INTEGER NOT NULL,
+    event_year INTEGER NOT NULL,
+    is_religious BOOLEAN NOT NULL,
+    is_deleted BOOLEAN DEFAULT FALSE
+);
+"""
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    conn.executescript(LEGACY_SCHEMA)
+    conn.execute("INSERT INTO events (event_name, event_day, event_month, event_year, is_religious, is_deleted) "
+                 "VALUES ('Christmas', 25, 12, 2021, TRUE, TRUE)")
+    conn.commit()
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def fresh_db(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "fresh.db"))
+    with open(os.path.join(SQL_DIR, "create_event_table.sql")) as f:
+        conn.executescript(f.read())
+    yield conn
+    conn.close()
+
+def columns(conn):
+    return [row[1] for row in conn.execute("PRAGMA table_info(events)")]
+
+def indexes(conn):
+    return {row[1] for row in conn.execute("PRAGMA index_list(events)")}
+
+######################################################
+#
+#    Migrations
+#
+######################################################
+
+def test_migrate_legacy_schema(legacy_db):
+    """Test that a legacy database is upgraded and keeps its data."""
+    applied = apply_migrations(legacy_db)
+
+    assert applied == [version for version, _ in list_migrations()]
+    assert "deleted" in columns(legacy_db)
+    assert "is_deleted" not in columns(legacy_db)
+    assert "idx_events_live_date" in indexes(legacy_db)
+    assert legacy_db.execute("SELECT deleted FROM events WHERE event_name = 'Christmas'").fetchone() == (1,)
+
+def test_migrate_is_idempotent(legacy_db):
+    """Test that running the migrations twice applies nothing the second time."""
+    apply_migrations(legacy_db)
+
+    assert apply_migrations(legacy_db) == []
+
+def test_create_script_matches_migrations(fresh_db, legacy_db):
+    """Test that a freshly created database is at the latest version with the same schema."""
+    apply_migrations(legacy_db)
+
+    assert get_schema_version(fresh_db) == list_migrations()[-1][0]
+    assert apply_migrations(fresh_db) == []
+    assert columns(fresh_db) == columns(legacy_db)
+    assert indexes(fresh_db) == indexes(legacy_db)
+
+def test_date_range_uses_index(fresh_db):
+    """Test that the date range query is answered from the live date index."""
+    plan = fresh_db.execute("""
+        EXPLAIN QUERY PLAN
+        SELECT id FROM events
+        WHERE deleted = FALSE
+          AND (event_year, event_month, event_day) >= (?, ?, ?)
+          AND (event_year, event_month, event_day) <= (?, ?, ?)
+        ORDER BY event_year, event_month, event_day
+    """, (2022, 1, 1, 2022, 12, 31)).fetchall()
+
+    assert "idx_events_live_date" in " ".join(row[-1] for row in plan)
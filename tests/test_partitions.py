@@ -0,0 +1,137 @@
+from datetime import date
+import os
+import sqlite3
+
+import pytest
+
+from event_tracker.models import calendar_model, stats_model
+from event_tracker.utils import partitions, sql_utils
+from event_tracker.utils.partitions import PartitionedEventStore, split_events
+
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), "..", "sql")
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def main_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "events.db")
+    conn = sqlite3.connect(path)
+    with open(os.path.join(SQL_DIR, "create_event_table.sql")) as f:
+        conn.executescript(f.read())
+    conn.close()
+    monkeypatch.setattr(sql_utils, "DB_PATH", path)
+    calendar_model.clear_cache()
+    yield path
+    partitions.close_partitioned_store()
+    sql_utils.close_pool()
+
+@pytest.fixture
+def partitioned(main_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(partitions, "EVENT_PARTITIONING", "decade")
+    monkeypatch.setattr(partitions, "PARTITION_DIR", str(tmp_path / "partitions"))
+    for name, day, month, year, religious in [
+        ("Moon Landing", 20, 7, 1969, False),
+        ("Christmas", 25, 12, 2024, True),
+        ("Berlin Wall", 9, 11, 1989, False),
+        ("New Year", 1, 1, 2025, False),
+    ]:
+        calendar_model.add_event(day, month, year, name, religious)
+    return partitions.get_partitioned_store()
+
+######################################################
+#
+#    Routing
+#
+######################################################
+
+def test_events_are_stored_by_decade(partitioned):
+    assert partitioned.partitions() == [1960, 1980, 2020]
+    assert partitioned.locate([1, 2, 3, 4, 5]) == {1: 1960, 2: 2020, 3: 1980, 4: 2020}
+    conn = sqlite3.connect(partitioned.path(2020))
+    assert conn.execute("SELECT id FROM events ORDER BY id").fetchall() == [(2,), (4,)]
+    conn.close()
+
+    assert calendar_model.get_event_by_id(3).event_name == "Berlin Wall"
+    with pytest.raises(ValueError, match="not found"):
+        calendar_model.get_event_by_id(9)
+    with pytest.raises(ValueError, match="already exists"):
+        calendar_model.add_event(1, 1, 1901, "Christmas", True)
+
+def test_wide_reads_merge_partitions(partitioned):
+    assert [event.id for event in calendar_model.get_events()] == [1, 2, 3, 4]
+    assert [event['id'] for event in calendar_model.iter_events(batch_size=1)] == [1, 2, 3, 4]
+    assert calendar_model.get_events_page(2, after=1) == (
+        [event.to_dict() for event in map(calendar_model.get_event_by_id, (2, 3))], 3)
+
+    read = []
+    original = partitioned._read
+    partitioned._read = lambda partition, *args: read.append(partition) or original(partition, *args)
+    events = calendar_model.get_events_between(date(1980, 1, 1), date(2024, 12, 31))
+    assert [event['event_name'] for event in events] == ["Berlin Wall", "Christmas"]
+    assert sorted(read) == [1980, 2020]
+
+def test_writes_move_and_delete_across_partitions(partitioned):
+    calendar_model.update_event_date(3, 9, 11, 2029)
+    assert partitioned.partitions() == [1960, 1980, 2020]
+    assert partitioned.locate([3]) == {3: 2020}
+    assert calendar_model.get_event_by_id(3).event_year == 2029
+
+    calendar_model.delete_event(1)
+    with pytest.raises(ValueError, match="has been deleted"):
+        calendar_model.delete_event(1)
+    entries = calendar_model.get_events_by_ids([1, 3, 7])
+    assert [entry['status'] for entry in entries] == ['deleted', 'found', 'not_found']
+    assert [event.id for event in calendar_model.get_events()] == [2, 3, 4]
+
+def test_nearest_upcoming_events_read_partitions(partitioned):
+    ids, days = calendar_model.get_event_distances(date(2024, 1, 1))
+    assert list(ids) == [1, 2, 3, 4] and list(days[1:2]) == [359]
+    nearest = calendar_model.get_nearest_upcoming_events(date(2024, 1, 1), 2)
+    assert [(event['event_name'], event['days_until']) for event in nearest] == [("Christmas", 359), ("New Year", 366)]
+
+def test_index_backed_reads_use_partitions(partitioned):
+    upcoming = calendar_model.get_upcoming_events(date(2024, 12, 1), 2, recurring=False)
+    assert [event['event_name'] for event in upcoming] == ["Christmas", "New Year"]
+    assert [event['event_name'] for event in calendar_model.search_events("berl")] == ["Berlin Wall"]
+
+def test_features_kept_in_the_main_database_are_refused(partitioned):
+    with pytest.raises(RuntimeError, match="EVENT_PARTITIONING=decade"):
+        calendar_model.get_changes(0)
+    with pytest.raises(RuntimeError, match="Event counts"):
+        stats_model.get_event_counts('year')
+    with pytest.raises(RuntimeError, match="Bulk import"):
+        calendar_model.add_events_bulk([])
+
+######################################################
+#
+#    Store
+#
+######################################################
+
+def test_split_moves_existing_events(main_db, tmp_path):
+    conn = sqlite3.connect(main_db)
+    conn.executemany(
+        "INSERT INTO events (event_name, event_day, event_month, event_year, is_religious, deleted) VALUES (?, ?, ?, ?, ?, ?)",
+        [("Moon Landing", 20, 7, 1969, False, False), ("Christmas", 25, 12, 2024, True, True),
+         ("Apollo 13", 11, 4, 1970, False, False)],
+    )
+    conn.commit()
+    conn.close()
+    store = PartitionedEventStore(str(tmp_path / "years"), "year")
+    try:
+        assert split_events(store, batch_size=2) == 3
+        assert split_events(store) == 0
+        conn = sqlite3.connect(main_db)
+        assert conn.execute("SELECT COUNT(*) FROM events").fetchone() == (0,)
+        conn.close()
+        assert store.partitions() == [1969, 1970, 2024]
+        assert [row[0] for row in store.scan(batch_size=1)] == [1, 3]
+        assert store.get(2)[6] == 1
+        assert store.add("Apollo 11", 16, 7, 1969, False) == 4
+    finally:
+        store.close()
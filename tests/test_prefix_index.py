@@ -0,0 +1,42 @@
+from event_tracker.utils.prefix_index import PrefixIndex, tokenize
+
+
+def make_event(id, name):
+    return {'id': id, 'event_name': name, 'event_day': 1, 'event_month': 1, 'event_year': 2024, 'is_religious': False}
+
+def build_index():
+    index = PrefixIndex()
+    for id, name in enumerate(["Christmas Eve", "Christmas", "Orthodox Christmas", "Día de los Muertos", "New Year's Eve"], 1):
+        index.add(make_event(id, name))
+    return index
+
+def names(events):
+    return [event['event_name'] for event in events]
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Día de los MUERTOS!") == ["dia", "de", "los", "muertos"]
+
+def test_complete_ranks_names_starting_with_the_text_first():
+    assert names(build_index().complete("chri", 10)) == ["Christmas", "Christmas Eve", "Orthodox Christmas"]
+
+def test_complete_needs_earlier_words_in_full():
+    index = build_index()
+
+    assert names(index.complete("christmas e", 10)) == ["Christmas Eve"]
+    assert names(index.complete("chris eve", 10)) == []
+
+def test_complete_respects_limit_and_accents():
+    index = build_index()
+
+    assert names(index.complete("eve", 1)) == ["Christmas Eve"]
+    assert names(index.complete("dia", 10)) == ["Día de los Muertos"]
+
+def test_remove_and_replace():
+    index = build_index()
+
+    index.remove(2)
+    index.add(make_event(3, "Epiphany"))
+
+    assert names(index.complete("christmas", 10)) == ["Christmas Eve"]
+    assert names(index.complete("epi", 10)) == ["Epiphany"]
+    assert len(index) == 4
@@ -0,0 +1,96 @@
+from datetime import date
+
+import pytest
+
+from event_tracker.utils.date_utils import clamp_date, easter_sunday
+from event_tracker.utils.recurrence import RecurrenceRule
+
+
+def rule(**data):
+    return RecurrenceRule.from_dict(data)
+
+######################################################
+#
+#    Dates
+#
+######################################################
+
+@pytest.mark.parametrize("year, expected", [
+    (2024, date(2024, 3, 31)),
+    (2025, date(2025, 4, 20)),
+    (2038, date(2038, 4, 25)),
+    (2285, date(2285, 3, 22)),
+])
+def test_easter_sunday(year, expected):
+    assert easter_sunday(year) == expected
+
+def test_clamp_date():
+    assert clamp_date(2025, 2, 29) == date(2025, 2, 28)
+    assert clamp_date(2024, 2, 29) == date(2024, 2, 29)
+
+######################################################
+#
+#    Expansion
+#
+######################################################
+
+def test_yearly_with_interval_and_until():
+    every_other = rule(frequency="yearly", interval=2, until="2030-06-30")
+    start = date(2024, 7, 4)
+
+    years = [every_other.occurrences_in_year(start, year) for year in range(2023, 2033)]
+
+    assert [day for days in years for day in days] == [date(2024, 7, 4), date(2026, 7, 4), date(2028, 7, 4)]
+
+def test_yearly_leap_day_falls_on_last_day_of_february():
+    assert rule(frequency="yearly").occurrences_in_year(date(2024, 2, 29), 2025) == [date(2025, 2, 28)]
+
+def test_monthly_clamps_short_months_and_skips_months_before_start():
+    occurrences = rule(frequency="monthly").occurrences_in_year(date(2025, 1, 31), 2025)
+
+    assert occurrences[:3] == [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)]
+    assert len(occurrences) == 12
+    assert rule(frequency="monthly", interval=5).occurrences_in_year(date(2024, 11, 1), 2025) == [
+        date(2025, 4, 1), date(2025, 9, 1)]
+
+def test_nth_weekday():
+    thanksgiving = rule(frequency="nth_weekday", weekday=3, nth=4)
+    last_monday = rule(frequency="nth_weekday", weekday=0, nth=-1)
+    fifth_friday = rule(frequency="nth_weekday", weekday=4, nth=5)
+
+    assert thanksgiving.occurrences_in_year(date(2000, 11, 1), 2025) == [date(2025, 11, 27)]
+    assert last_monday.occurrences_in_year(date(2000, 5, 1), 2025) == [date(2025, 5, 26)]
+    assert fifth_friday.occurrences_in_year(date(2000, 2, 1), 2025) == []
+
+def test_easter_relative():
+    good_friday = rule(frequency="easter", easter_offset=-2)
+
+    assert good_friday.occurrences_in_year(date(2000, 1, 1), 2025) == [date(2025, 4, 18)]
+    assert good_friday.occurrences_in_year(date(2025, 4, 19), 2025) == []
+
+######################################################
+#
+#    Validation
+#
+######################################################
+
+@pytest.mark.parametrize("data, message", [
+    ({"frequency": "weekly"}, "Invalid frequency"),
+    ({"frequency": "yearly", "interval": 0}, "Invalid interval"),
+    ({"frequency": "nth_weekday", "weekday": 7, "nth": 1}, "Invalid weekday"),
+    ({"frequency": "nth_weekday", "weekday": 0, "nth": 0}, "Invalid nth"),
+    ({"frequency": "easter", "easter_offset": 300}, "Invalid easter_offset"),
+    ({"frequency": "easter", "easter_offset": True}, "Invalid easter_offset"),
+    ({"frequency": "nth_weekday", "weekday": False, "nth": 1}, "Invalid weekday"),
+    ({"frequency": "nth_weekday", "weekday": 0, "nth": True}, "Invalid nth"),
+    ({"frequency": "yearly", "until": "soon"}, "Invalid until"),
+])
+def test_from_dict_rejects_invalid_rules(data, message):
+    with pytest.raises(ValueError, match=message):
+        RecurrenceRule.from_dict(data)
+
+def test_round_trips_through_row_and_dict():
+    original = rule(frequency="nth_weekday", weekday=3, nth=4, until="2040-01-01")
+
+    assert RecurrenceRule.from_row(original.to_row()) == original
+    assert RecurrenceRule.from_dict(original.to_dict()) == original
@@ -0,0 +1,130 @@
+import http.client
+import os
+import re
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+from flask import Flask
+
+from event_tracker.utils.server import PreforkServer, load_app
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def server(tmp_path):
+    """Runs the pre-fork server with two workers on a free port."""
+    path = create_database(str(tmp_path / "events.db"))
+    env_file = tmp_path / ".env"
+    env_file.write_text(f"DB_PATH={path}\n")
+
+    log_path = tmp_path / "server.log"
+    env = dict(os.environ, WEB_ENV_FILE=str(env_file), WEB_GRACEFUL_TIMEOUT="10", METRICS_SHARE_INTERVAL="0.1")
+    env.pop("METRICS_DIR", None)
+    env.pop("DB_PATH", None)
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "event_tracker.utils.server", "--workers", "2", "--host", "127.0.0.1", "--port", "0"],
+            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    process.log = lambda: log_path.read_text()
+    process.port = int(wait_for(process, r"Listening on 127\.0\.0\.1:(\d+)").group(1))
+    wait_for(process, r"(serving on.*\n(.|\n)*){2}")
+    yield process
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+
+def create_database(path, *event_names):
+    conn = sqlite3.connect(path)
+    with open(os.path.join(ROOT, "sql", "create_event_table.sql")) as f:
+        conn.executescript(f.read())
+    conn.executemany("INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) VALUES (?, 1, 1, 2025, 0)",
+                     [(name,) for name in event_names])
+    conn.commit()
+    conn.close()
+    return path
+
+def wait_for(process, pattern, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        match = re.search(pattern, process.log())
+        if match:
+            return match
+        time.sleep(0.05)
+    raise AssertionError(f"{pattern!r} not logged:\n{process.log()}")
+
+def get(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path)
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response.status, body
+
+######################################################
+#
+#    Server
+#
+######################################################
+
+def test_load_app_calls_factory():
+    assert isinstance(load_app("app:create_app"), Flask)
+
+def test_load_app_invalid_spec():
+    with pytest.raises(ValueError, match="Invalid app"):
+        load_app("app")
+
+def test_invalid_worker_count():
+    with pytest.raises(ValueError, match="Invalid worker count"):
+        PreforkServer(workers=0)
+
+def test_serves_reloads_and_stops(server, tmp_path):
+    """Test that workers serve requests, are replaced on SIGHUP and stop cleanly on SIGTERM."""
+    assert get(server.port, "/api/health")[0] == 200
+
+    # The app is preloaded, so only a fresh interpreter sees the new DB_PATH
+    path = create_database(str(tmp_path / "reloaded.db"), "Reloaded")
+    (tmp_path / ".env").write_text(f"DB_PATH={path}\n")
+    server.send_signal(signal.SIGHUP)
+    wait_for(server, r"Reloading")
+    wait_for(server, r"(serving on.*\n(.|\n)*){4}")
+    wait_for(server, r"(Worker \d+ stopped.*\n(.|\n)*){2}")
+    status, body = get(server.port, "/api/get-events")
+    assert status == 200
+    assert b"Reloaded" in body
+
+    server.send_signal(signal.SIGTERM)
+    assert server.wait(timeout=15) == 0
+    assert len(re.findall(r"Worker \d+ stopped", server.log())) == 4
+    assert "exited unexpectedly" not in server.log()
+
+def test_crashed_worker_is_replaced(server):
+    worker = int(re.search(r"Booted worker (\d+)", server.log()).group(1))
+
+    os.kill(worker, signal.SIGKILL)
+
+    wait_for(server, r"(Booted worker.*\n(.|\n)*){3}")
+    assert get(server.port, "/api/health")[0] == 200
+
+def test_metrics_cover_every_worker(server):
+    """Test that a scrape answered by either worker counts the requests both of them served."""
+    for _ in range(10):
+        assert get(server.port, "/api/health")[0] == 200
+    time.sleep(0.5)
+
+    for _ in range(4):
+        status, body = get(server.port, "/api/metrics")
+        assert status == 200
+        assert b'http_request_duration_seconds_count{method="GET",route="/api/health",status="200"} 10' in body
+        assert len(set(re.findall(rb'pid="(\d+)"', body))) == 2
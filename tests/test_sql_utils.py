@@ -0,0 +1,295 @@
+from contextlib import closing
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from event_tracker.utils import sql_utils
+from event_tracker.utils.sql_utils import ConnectionPool, get_db_connection, get_read_connection, ReadReplica
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "events.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, event_name TEXT)")
+    conn.close()
+    return path
+
+@pytest.fixture
+def shared_pool(db_path, monkeypatch):
+    """Point the module-level pool at a temporary database."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", db_path)
+    yield sql_utils.get_pool()
+    sql_utils.close_pool()
+
+######################################################
+#
+#    Pool behaviour
+#
+######################################################
+
+def test_pool_reuses_connections(db_path):
+    """Test that a returned connection is handed out again instead of reopening."""
+    pool = ConnectionPool(db_path, size=2)
+
+    conn = pool.acquire()
+    pool.release(conn)
+    again = pool.acquire()
+
+    assert again is conn
+    stats = pool.stats()
+    assert stats['opens'] == 1
+    assert stats['hits'] == 1
+    assert stats['in_use'] == 1
+
+def test_pool_is_bounded(db_path):
+    """Test that checkouts beyond the pool size time out."""
+    pool = ConnectionPool(db_path, size=1, timeout=0.05)
+    pool.acquire()
+
+    with pytest.raises(sqlite3.OperationalError, match="Timed out"):
+        pool.acquire()
+
+    stats = pool.stats()
+    assert stats['waits'] == 1
+    assert stats['timeouts'] == 1
+
+def test_pool_waiter_gets_released_connection(db_path):
+    """Test that a waiting thread receives a connection as soon as one is returned."""
+    pool = ConnectionPool(db_path, size=1, timeout=2)
+    conn = pool.acquire()
+    result = {}
+
+    def worker():
+        result['conn'] = pool.acquire()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    pool.release(conn)
+    thread.join(timeout=2)
+
+    assert result['conn'] is conn
+    assert pool.stats()['opens'] == 1
+
+def test_pool_discards_idle_connections(db_path):
+    """Test that connections idle for longer than the idle timeout are not reused."""
+    pool = ConnectionPool(db_path, size=1, idle_timeout=0)
+    conn = pool.acquire()
+    pool.release(conn)
+
+    again = pool.acquire()
+
+    assert again is not conn
+    assert pool.stats()['discards'] == 1
+
+def test_pool_replaces_unhealthy_connection(db_path):
+    """Test that a connection failing validation is replaced on checkout."""
+    pool = ConnectionPool(db_path, size=1)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()  # simulate a connection that died while idle
+
+    again = pool.acquire()
+
+    assert again is not conn
+    assert again.execute("SELECT 1").fetchone() == (1,)
+    assert pool.stats()['discards'] == 1
+
+def test_pool_rolls_back_open_transaction(db_path):
+    """Test that uncommitted work is rolled back when a connection is returned."""
+    pool = ConnectionPool(db_path, size=1)
+    conn = pool.acquire()
+    conn.execute("INSERT INTO events (event_name) VALUES ('Christmas')")
+    pool.release(conn)
+
+    conn = pool.acquire()
+    assert conn.execute("SELECT COUNT(*) FROM events").fetchone() == (0,)
+
+######################################################
+#
+#    get_db_connection
+#
+######################################################
+
+def test_get_db_connection_uses_pool(shared_pool):
+    """Test that get_db_connection checks connections out of the shared pool."""
+    with get_db_connection() as first:
+        pass
+    with get_db_connection() as second:
+        pass
+
+    assert first is second
+    assert sql_utils.get_pool_stats()['opens'] == 1
+
+def test_check_table_exists_missing_table(shared_pool):
+    """Test that checking a missing table raises an error."""
+    with pytest.raises(Exception, match="Table check error"):
+        sql_utils.check_table_exists("holidays")
+
+######################################################
+#
+#    Storage profiles
+#
+######################################################
+
+def test_pool_applies_storage_profile(db_path):
+    """Test that new pooled connections are configured with the storage profile."""
+    pool = ConnectionPool(db_path, size=1, profile=sql_utils.get_storage_profile("wal"))
+    conn = pool.acquire()
+
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert conn.execute("PRAGMA synchronous").fetchone() == (1,)  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone() == (5000,)
+
+def test_storage_profile_env_override(monkeypatch):
+    """Test that individual settings can be overridden from the environment."""
+    monkeypatch.setenv("DB_SYNCHRONOUS", "full")
+    monkeypatch.setenv("DB_CACHE_SIZE", "-64000")
+
+    profile = sql_utils.get_storage_profile("wal")
+
+    assert profile['synchronous'] == "FULL"
+    assert profile['cache_size'] == -64000
+    assert profile['journal_mode'] == "WAL"
+
+def test_storage_profile_invalid():
+    """Test that an unknown profile name is rejected."""
+    with pytest.raises(ValueError, match="Unknown storage profile"):
+        sql_utils.get_storage_profile("turbo")
+
+def test_forked_child_gets_its_own_pool(shared_pool):
+    """Test that a forked process never reuses the parent's pooled connections."""
+    with get_db_connection():
+        pass
+
+    pid = os.fork()
+    if pid == 0:
+        fresh = sql_utils._pool is None and sql_utils.get_pool() is not shared_pool
+        os._exit(0 if fresh else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert sql_utils.get_pool() is shared_pool
+
+######################################################
+#
+#    Read replica
+#
+######################################################
+
+@pytest.fixture
+def events_db(tmp_path):
+    """A database with the full schema, change log included."""
+    path = str(tmp_path / "replica.db")
+    conn = sqlite3.connect(path)
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_event_table.sql")) as f:
+        conn.executescript(f.read())
+    conn.close()
+    return path
+
+def insert_event(path, name, year=2024):
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) VALUES (?, 1, 1, ?, FALSE)",
+                 (name, year))
+    conn.commit()
+    conn.close()
+
+def read_names(replica):
+    with replica.read() as conn:
+        return [row[0] for row in conn.execute("SELECT event_name FROM events WHERE deleted = FALSE ORDER BY id")]
+
+def test_replica_replays_local_writes_from_change_log(events_db):
+    """Test that the copy is kept within max staleness, and catches up as soon as this process writes."""
+    insert_event(events_db, "Christmas")
+    replica = ReadReplica(events_db, max_staleness=60)
+    assert read_names(replica) == ["Christmas"]
+
+    insert_event(events_db, "New Year", 2025)
+    conn = sqlite3.connect(events_db)
+    conn.execute("UPDATE events SET event_name = 'Christmas Day' WHERE id = 1")
+    conn.commit()
+    conn.close()
+    assert read_names(replica) == ["Christmas"]
+    replica.mark_stale()
+    assert read_names(replica) == ["Christmas Day", "New Year"]
+
+    with replica.read() as conn:
+        assert conn.execute("SELECT rowid FROM events_fts WHERE events_fts MATCH 'day'").fetchall() == [(1,)]
+        assert conn.execute("SELECT event_year, total FROM event_day_counts ORDER BY event_year").fetchall() == [(2024, 1), (2025, 1)]
+        assert conn.execute("SELECT version, event_id, operation FROM event_changes ORDER BY version").fetchall() == [
+            (1, 1, 'insert'), (2, 2, 'insert'), (3, 1, 'update')]
+    stats = replica.stats()
+    assert (stats['copies'], stats['replays'], stats['changes']) == (1, 1, 2)
+    replica.close()
+
+def test_replica_checks_the_file_once_stale(events_db):
+    """Test that another process's write is picked up by the first read after max staleness."""
+    replica = ReadReplica(events_db, max_staleness=0)
+    assert read_names(replica) == []
+    assert read_names(replica) == []
+    assert replica.stats()['checks'] >= 1
+
+    insert_event(events_db, "Easter")
+    assert read_names(replica) == ["Easter"]
+    assert replica.stats()['copies'] == 1
+    replica.close()
+
+def test_replica_without_change_log_reads_file_until_copy_is_due(db_path):
+    """Test that changes the log cannot explain are read from the file until a new copy is due."""
+    replica = ReadReplica(db_path, max_staleness=60, file_connection=lambda: closing(sqlite3.connect(db_path)))
+    with replica.read():
+        pass
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO events (event_name) VALUES ('Christmas')")
+    conn.commit()
+    conn.close()
+    replica.mark_stale()
+
+    with replica.read() as conn:
+        assert conn.execute("PRAGMA database_list").fetchone()[2] == db_path
+        assert conn.execute("SELECT event_name FROM events").fetchall() == [("Christmas",)]
+    assert (replica.stats()['copies'], replica.stats()['file_reads']) == (1, 1)
+
+    replica.max_staleness = 0
+    with replica.read() as conn:
+        assert conn.execute("PRAGMA database_list").fetchone()[2] != db_path
+    assert replica.stats()['copies'] == 2
+    replica.close()
+
+def test_replica_gives_each_thread_its_own_read_only_connection(events_db):
+    replica = ReadReplica(events_db)
+    with replica.read() as conn:
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            conn.execute("INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) "
+                         "VALUES ('Christmas', 25, 12, 2024, TRUE)")
+        with replica.read() as nested:
+            assert nested is conn
+
+    other = []
+    def read_elsewhere():
+        with replica.read() as conn:
+            other.append(conn)
+    thread = threading.Thread(target=read_elsewhere)
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+    replica.close()
+
+def test_get_read_connection_uses_replica_when_enabled(shared_pool, monkeypatch):
+    with get_read_connection() as conn:
+        assert conn.execute("PRAGMA database_list").fetchone()[2] == sql_utils.DB_PATH
+    assert sql_utils.get_replica() is None
+
+    monkeypatch.setattr(sql_utils, "READ_REPLICA_ENABLED", True)
+    try:
+        with get_read_connection() as conn:
+            assert conn.execute("PRAGMA database_list").fetchone()[2] != sql_utils.DB_PATH
+    finally:
+        sql_utils.close_replica()
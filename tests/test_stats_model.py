@@ -0,0 +1,87 @@
+from datetime import date
+import os
+import sqlite3
+
+import pytest
+
+from event_tracker.models import calendar_model, stats_model
+from event_tracker.models.stats_model import find_count_mismatches, get_event_counts, rebuild_event_counts
+from event_tracker.utils import sql_utils
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def events_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "events.db")
+    conn = sqlite3.connect(path)
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_event_table.sql")) as f:
+        conn.executescript(f.read())
+    conn.executemany(
+        "INSERT INTO events (event_name, event_day, event_month, event_year, is_religious) VALUES (?, ?, ?, ?, ?)",
+        [
+            ("Christmas", 25, 12, 2024, True),
+            ("Christmas Market", 25, 12, 2024, False),
+            ("Boxing Day", 26, 12, 2024, False),
+            ("New Year", 1, 1, 2025, False),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(sql_utils, "DB_PATH", path)
+    calendar_model.clear_cache()
+    yield path
+    sql_utils.close_pool()
+
+######################################################
+#
+#    Counts
+#
+######################################################
+
+def test_counts_by_day_month_and_year(events_db):
+    assert get_event_counts('day', date(2024, 12, 25), date(2024, 12, 25)) == [
+        {'year': 2024, 'month': 12, 'day': 25, 'total': 2, 'religious': 1, 'secular': 1}]
+    assert get_event_counts('month') == [
+        {'year': 2024, 'month': 12, 'total': 3, 'religious': 1, 'secular': 2},
+        {'year': 2025, 'month': 1, 'total': 1, 'religious': 0, 'secular': 1}]
+    assert get_event_counts('year', start=date(2025, 1, 1)) == [
+        {'year': 2025, 'total': 1, 'religious': 0, 'secular': 1}]
+
+def test_counts_invalid_arguments(events_db):
+    with pytest.raises(ValueError, match="Invalid period"):
+        get_event_counts('week')
+    with pytest.raises(ValueError, match="Invalid range"):
+        get_event_counts('day', date(2025, 1, 1), date(2024, 1, 1))
+
+def test_counts_follow_writes(events_db):
+    """Test that adding, moving and deleting events keeps the counts in step with the events table."""
+    calendar_model.add_event(25, 12, 2024, "Midnight Mass", True)
+    calendar_model.update_event_date(3, 1, 1, 2025)
+    calendar_model.delete_event(2)
+
+    assert get_event_counts('day') == [
+        {'year': 2024, 'month': 12, 'day': 25, 'total': 2, 'religious': 2, 'secular': 0},
+        {'year': 2025, 'month': 1, 'day': 1, 'total': 2, 'religious': 0, 'secular': 2}]
+    assert find_count_mismatches() == []
+
+def test_rebuild_repairs_counts(events_db):
+    conn = sqlite3.connect(events_db)
+    conn.execute("UPDATE event_day_counts SET total = 7 WHERE event_day = 26")
+    conn.execute("DELETE FROM event_day_counts WHERE event_year = 2025")
+    conn.commit()
+    conn.close()
+
+    assert find_count_mismatches() == [
+        {'year': 2024, 'month': 12, 'day': 26, 'stored': [7, 0], 'actual': [1, 0]},
+        {'year': 2025, 'month': 1, 'day': 1, 'stored': [0, 0], 'actual': [1, 0]}]
+    with pytest.raises(SystemExit) as exit_info:
+        stats_model.main(["--check"])
+    assert exit_info.value.code == 1
+
+    assert rebuild_event_counts() == 3
+    assert find_count_mismatches() == []
@@ -0,0 +1,80 @@
+from datetime import date
+
+from event_tracker.utils.upcoming_index import UpcomingIndex
+
+
+def make_event(id, name, day, month, year):
+    return {'id': id, 'event_name': name, 'event_day': day, 'event_month': month, 'event_year': year, 'is_religious': False}
+
+def build_index():
+    index = UpcomingIndex()
+    index.add(make_event(1, "Christmas", 25, 12, 1))
+    index.add(make_event(2, "New Year", 1, 1, 1))
+    index.add(make_event(3, "Leap Day", 29, 2, 2024))
+    index.add(make_event(4, "Halloween", 31, 10, 2022))
+    index.add(make_event(5, "Launch", 15, 3, 2025))
+    return index
+
+def names(results):
+    return [(occurrence.isoformat(), event['event_name']) for occurrence, event in results]
+
+######################################################
+#
+#    Recurring queries
+#
+######################################################
+
+def test_next_events_wraps_into_next_year():
+    index = build_index()
+
+    result = index.next_events(date(2024, 11, 1), 3)
+
+    assert names(result) == [("2024-12-25", "Christmas"), ("2025-01-01", "New Year"), ("2025-02-28", "Leap Day")]
+
+def test_next_events_returns_each_event_once():
+    index = build_index()
+
+    assert len(index.next_events(date(2024, 6, 1), 100)) == 5
+
+def test_events_in_month_recurring():
+    index = build_index()
+
+    assert names(index.events_in_month(2030, 12)) == [("2030-12-25", "Christmas")]
+    assert names(index.events_in_month(2028, 2)) == [("2028-02-29", "Leap Day")]
+
+def test_leap_day_outside_leap_years():
+    """Test that every query observes 29 February on 28 February in other years."""
+    index = build_index()
+
+    assert names(index.next_events(date(2027, 2, 1), 1)) == [("2027-02-28", "Leap Day")]
+    assert names(index.next_events(date(2027, 2, 28), 1)) == [("2027-02-28", "Leap Day")]
+    assert names(index.next_events(date(2027, 3, 1), 1)) == [("2027-03-15", "Launch")]
+    assert names(index.events_in_month(2027, 2)) == [("2027-02-28", "Leap Day")]
+    assert index.events_in_month(2027, 3) == [(date(2027, 3, 15), index.get(5))]
+
+######################################################
+#
+#    Dated queries and updates
+#
+######################################################
+
+def test_next_events_dated():
+    index = build_index()
+
+    result = index.next_events(date(2023, 1, 1), 5, recurring=False)
+
+    assert names(result) == [("2024-02-29", "Leap Day"), ("2025-03-15", "Launch")]
+
+def test_events_in_month_dated():
+    index = build_index()
+
+    assert names(index.events_in_month(2022, 10, recurring=False)) == [("2022-10-31", "Halloween")]
+    assert index.events_in_month(2023, 10, recurring=False) == []
+
+def test_remove_and_update():
+    index = build_index()
+    index.remove(1)
+    index.add(make_event(4, "Halloween", 1, 11, 2022))
+
+    assert names(index.next_events(date(2024, 10, 15), 2)) == [("2024-11-01", "Halloween"), ("2025-01-01", "New Year")]
+    assert len(index) == 4
@@ -0,0 +1,110 @@
+from contextlib import contextmanager
+import sqlite3
+
+import pytest
+
+from event_tracker.utils.write_queue import WriteQueue
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "events.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, event_name TEXT UNIQUE)")
+    conn.close()
+    return path
+
+@pytest.fixture
+def write_queue(db_path):
+    @contextmanager
+    def connect():
+        conn = sqlite3.connect(db_path, check_same_thread=False, timeout=0)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    write_queue = WriteQueue(connect, max_batch=50, max_delay=0.05)
+    yield write_queue
+    write_queue.close()
+
+def insert(name):
+    def operation(conn):
+        return conn.execute("INSERT INTO events (event_name) VALUES (?)", (name,)).lastrowid
+    return operation
+
+def names(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT event_name FROM events ORDER BY id").fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+######################################################
+#
+#    Group commit
+#
+######################################################
+
+def test_writes_are_committed_together(write_queue, db_path):
+    """Test that writes submitted together share one transaction and get their own results."""
+    futures = [write_queue.submit(insert(f"event-{i}")) for i in range(10)]
+
+    assert [future.result() for future in futures] == list(range(1, 11))
+    assert names(db_path) == [f"event-{i}" for i in range(10)]
+    stats = write_queue.stats()
+    assert stats['batches'] == 1
+    assert stats['operations'] == 10
+    assert stats['max_batch_size'] == 10
+
+def test_batch_size_is_bounded(db_path, write_queue):
+    write_queue.max_batch = 4
+
+    futures = [write_queue.submit(insert(f"event-{i}")) for i in range(10)]
+    for future in futures:
+        future.result()
+
+    assert write_queue.stats()['max_batch_size'] == 4
+    assert write_queue.stats()['batches'] == 3
+
+def test_failed_write_is_rolled_back_alone(write_queue, db_path):
+    """Test that an operation that raises only undoes its own changes."""
+    def insert_twice(conn):
+        conn.execute("INSERT INTO events (event_name) VALUES ('Partial')")
+        conn.execute("INSERT INTO events (event_name) VALUES ('Christmas')")
+
+    first = write_queue.submit(insert("Christmas"))
+    duplicate = write_queue.submit(insert_twice)
+    last = write_queue.submit(insert("Easter"))
+
+    first.result()
+    last.result()
+    with pytest.raises(sqlite3.IntegrityError):
+        duplicate.result()
+    assert names(db_path) == ["Christmas", "Easter"]
+    assert write_queue.stats()['failed'] == 1
+
+def test_locked_database_fails_whole_batch(write_queue, db_path):
+    blocker = sqlite3.connect(db_path)
+    blocker.execute("BEGIN IMMEDIATE")
+
+    futures = [write_queue.submit(insert(f"event-{i}")) for i in range(3)]
+
+    for future in futures:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            future.result()
+    blocker.rollback()
+    blocker.close()
+    assert write_queue.execute(insert("After")) == 1
+
+def test_close_commits_queued_writes(write_queue, db_path):
+    futures = [write_queue.submit(insert(f"event-{i}")) for i in range(5)]
+
+    write_queue.close()
+
+    assert all(future.done() for future in futures)
+    assert len(names(db_path)) == 5